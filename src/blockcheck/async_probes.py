@@ -0,0 +1,561 @@
+"""Asyncio probe engine for blockcheck — TLS/HTTP, 16-20KB, STUN, TCP ping.
+
+One event loop multiplexes every probe of a phase, so concurrency is bound
+by ASYNC_PROBE_CONCURRENCY (and ASYNC_PROBE_PER_HOST per host) instead of
+the thread count, and cancellation through ``cancelled()`` closes every
+socket at once instead of waiting for blocking timeouts.
+
+TLS runs through ``ssl.MemoryBIO`` over plain asyncio streams (not the
+asyncio SSL transport): handshake EOF, RST and certificate errors surface
+as the same exceptions the blocking testers see, and the results are built
+by the same helpers (``tls_tester`` / ``tcp_test``), so ``DPIClassifier``
+gets identical inputs. Timeouts apply per socket operation, like
+``settimeout`` in the blocking testers.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import socket
+import ssl
+import time
+from collections.abc import Awaitable, Callable
+from contextlib import asynccontextmanager
+from urllib.parse import urljoin, urlsplit
+
+from blockcheck.config import (
+    ASYNC_PROBE_CONCURRENCY,
+    ASYNC_PROBE_PER_HOST,
+    HTTPS_TIMEOUT,
+    PING_COUNT,
+    PING_TIMEOUT,
+    STUN_TIMEOUT,
+    TCP_16_20_RETRIES,
+    TCP_16_20_TIMEOUT,
+)
+from blockcheck.dpi_classifier import classify_connect_error
+from blockcheck.models import SingleTestResult, TestStatus, TestType
+from blockcheck.stun_tester import _resolve_udp_addresses, build_stun_request, parse_stun_response
+from blockcheck.tcp_test import (
+    is_conclusive_tcp_16_20_ok,
+    summarize_tcp_16_20_attempts,
+    tcp_16_20_error_result,
+    tcp_16_20_received_result,
+)
+from blockcheck.tls_tester import (
+    _build_tls_context,
+    _https_failure_result,
+    _https_ok_result,
+    _https_test_type,
+    _no_addr_result,
+    _normalize_ip_family,
+    _resolve_connect_addrs,
+    _resolve_error_result,
+)
+
+_CANCEL_POLL_SECONDS = 0.05
+_MAX_HEADER_BYTES = 64 * 1024
+_TCP_16_20_READ_LIMIT = 25_000
+_MAX_REDIRECTS = 5
+
+
+class _ProbeStream:
+    """Byte stream over an asyncio connection, optionally wrapped in TLS via MemoryBIO."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, timeout: float):
+        self._reader = reader
+        self._writer = writer
+        self._timeout = timeout
+        self._tls: ssl.SSLObject | None = None
+        self._incoming: ssl.MemoryBIO | None = None
+        self._outgoing: ssl.MemoryBIO | None = None
+
+    async def start_tls(self, context: ssl.SSLContext, server_hostname: str) -> None:
+        self._incoming = ssl.MemoryBIO()
+        self._outgoing = ssl.MemoryBIO()
+        self._tls = context.wrap_bio(self._incoming, self._outgoing, server_hostname=server_hostname)
+        while True:
+            try:
+                self._tls.do_handshake()
+                break
+            except ssl.SSLWantReadError:
+                await self._flush_tls()
+                await self._fill_tls()
+        await self._flush_tls()
+
+    def tls_version(self) -> str | None:
+        return self._tls.version() if self._tls is not None else None
+
+    async def sendall(self, data: bytes) -> None:
+        if self._tls is None:
+            self._writer.write(data)
+            await asyncio.wait_for(self._writer.drain(), self._timeout)
+            return
+        self._tls.write(data)
+        await self._flush_tls()
+
+    async def recv(self, size: int) -> bytes:
+        if self._tls is None:
+            return await asyncio.wait_for(self._reader.read(size), self._timeout)
+        while True:
+            try:
+                return self._tls.read(size)
+            except ssl.SSLWantReadError:
+                await self._flush_tls()
+                await self._fill_tls()
+            except (ssl.SSLZeroReturnError, ssl.SSLEOFError):
+                # Как suppress_ragged_eofs у блокирующего сокета.
+                return b""
+
+    def close(self) -> None:
+        try:
+            self._writer.close()
+        except Exception:
+            pass
+
+    async def _flush_tls(self) -> None:
+        data = self._outgoing.read()
+        if data:
+            self._writer.write(data)
+            await asyncio.wait_for(self._writer.drain(), self._timeout)
+
+    async def _fill_tls(self) -> None:
+        data = await asyncio.wait_for(self._reader.read(65536), self._timeout)
+        if data:
+            self._incoming.write(data)
+        else:
+            self._incoming.write_eof()
+
+
+class _StunProtocol(asyncio.DatagramProtocol):
+    def __init__(self) -> None:
+        self.response: asyncio.Future | None = None
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        if self.response is not None and not self.response.done():
+            self.response.set_result(data)
+
+    def error_received(self, exc: Exception) -> None:
+        if self.response is not None and not self.response.done():
+            self.response.set_exception(exc)
+
+
+class AsyncProbeEngine:
+    """Runs blockcheck probes on one asyncio loop with global/per-host limits.
+
+    ``run(coro)`` drives a phase coroutine on a fresh loop in the calling
+    thread and returns False if ``cancelled()`` fired (every probe is torn
+    down immediately). Probe methods return ``SingleTestResult``.
+    """
+
+    def __init__(
+        self,
+        *,
+        concurrency: int = ASYNC_PROBE_CONCURRENCY,
+        per_host: int = ASYNC_PROBE_PER_HOST,
+        cancelled: Callable[[], bool] | None = None,
+        cafile: str | None = None,
+    ):
+        self.concurrency = max(1, int(concurrency))
+        self.per_host = max(1, int(per_host))
+        self._cancelled = cancelled
+        self._cafile = cafile
+        self._global_limit: asyncio.Semaphore | None = None
+        self._host_limits: dict[str, asyncio.Semaphore] = {}
+
+    # ------------------------------------------------------------------
+    # Loop driver
+    # ------------------------------------------------------------------
+
+    def run(self, coro: Awaitable) -> bool:
+        """Run coro to completion; False when cancelled midway."""
+        return asyncio.run(self._supervise(coro))
+
+    async def _supervise(self, coro: Awaitable) -> bool:
+        self._global_limit = asyncio.Semaphore(self.concurrency)
+        self._host_limits = {}
+        task = asyncio.ensure_future(coro)
+        while not task.done():
+            if self._is_cancelled():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+                return False
+            await asyncio.wait({task}, timeout=_CANCEL_POLL_SECONDS)
+        task.result()
+        return True
+
+    def _is_cancelled(self) -> bool:
+        if not callable(self._cancelled):
+            return False
+        try:
+            return bool(self._cancelled())
+        except Exception:
+            return False
+
+    @asynccontextmanager
+    async def _slot(self, host: str):
+        key = str(host or "").lower()
+        host_limit = self._host_limits.get(key)
+        if host_limit is None:
+            host_limit = self._host_limits[key] = asyncio.Semaphore(self.per_host)
+        async with host_limit:
+            async with self._global_limit:
+                yield
+
+    # ------------------------------------------------------------------
+    # Connections
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    async def _open(addr_family: int, sockaddr: tuple, timeout: float) -> _ProbeStream:
+        loop = asyncio.get_running_loop()
+        sock = socket.socket(addr_family, socket.SOCK_STREAM)
+        try:
+            sock.setblocking(False)
+            await asyncio.wait_for(loop.sock_connect(sock, sockaddr), timeout)
+            reader, writer = await asyncio.open_connection(sock=sock)
+        except BaseException:
+            sock.close()
+            raise
+        return _ProbeStream(reader, writer, timeout)
+
+    @staticmethod
+    async def _connect_addrs(host: str, port: int, family: str, addresses: list[str] | None):
+        if addresses is not None:
+            return _resolve_connect_addrs(host, port, family, addresses)
+        loop = asyncio.get_running_loop()
+        af = {"ipv4": socket.AF_INET, "ipv6": socket.AF_INET6}.get(family, socket.AF_UNSPEC)
+        infos = await loop.getaddrinfo(host, port, family=af, type=socket.SOCK_STREAM, proto=socket.IPPROTO_TCP)
+        return [(info[0], info[4]) for info in infos]
+
+    # ------------------------------------------------------------------
+    # Probes
+    # ------------------------------------------------------------------
+
+    async def probe_https(
+        self,
+        host: str,
+        port: int = 443,
+        timeout: float = HTTPS_TIMEOUT,
+        tls_version: str | None = None,
+        ip_family: str = "auto",
+        addresses: list[str] | None = None,
+    ) -> SingleTestResult:
+        """Async counterpart of tls_tester.test_https (same result mapping)."""
+        test_type = _https_test_type(tls_version)
+        start = time.time()
+        bytes_read = 0
+        family = _normalize_ip_family(ip_family)
+
+        async with self._slot(host):
+            try:
+                connect_addrs = await self._connect_addrs(host, port, family, addresses)
+            except Exception as e:
+                return _resolve_error_result(host, test_type, family, start, e)
+            if not connect_addrs:
+                return _no_addr_result(host, test_type, family, start)
+
+            last_exception: Exception | None = None
+            for addr_family, sockaddr in connect_addrs:
+                stream = None
+                try:
+                    stream = await self._open(addr_family, sockaddr, timeout)
+                    await stream.start_tls(_build_tls_context(tls_version, self._cafile), host)
+                    request = (
+                        f"GET / HTTP/1.1\r\n"
+                        f"Host: {host}\r\n"
+                        f"Connection: close\r\n"
+                        f"User-Agent: Mozilla/5.0\r\n\r\n"
+                    )
+                    await stream.sendall(request.encode())
+
+                    response = b""
+                    while len(response) < 2048:
+                        chunk = await stream.recv(4096)
+                        if not chunk:
+                            break
+                        response += chunk
+                    bytes_read = len(response)
+                    return _https_ok_result(host, test_type, stream.tls_version(), response, addr_family, sockaddr, start)
+                except Exception as e:
+                    last_exception = e
+                    continue
+                finally:
+                    if stream is not None:
+                        stream.close()
+
+        return _https_failure_result(host, test_type, family, start, last_exception, bytes_read)
+
+    async def probe_tcp_16_20_single(self, url: str, timeout: float = TCP_16_20_TIMEOUT) -> SingleTestResult:
+        """Async counterpart of tcp_test.check_tcp_16_20_single.
+
+        Plain HTTP/1.1 GET (redirects followed), counting response body
+        bytes as they arrive — up to 25KB.
+        """
+        start = time.time()
+        bytes_received = 0
+        try:
+            current_url = url
+            for hop in range(_MAX_REDIRECTS + 1):
+                parts = urlsplit(current_url)
+                host = parts.hostname or ""
+                secure = parts.scheme == "https"
+                port = parts.port or (443 if secure else 80)
+                path = parts.path or "/"
+                if parts.query:
+                    path += f"?{parts.query}"
+
+                async with self._slot(host):
+                    connect_addrs = await self._connect_addrs(host, port, "auto", None)
+                    if not connect_addrs:
+                        raise OSError(f"No addresses for {host}")
+                    addr_family, sockaddr = connect_addrs[0]
+                    stream = await self._open(addr_family, sockaddr, timeout)
+                    try:
+                        if secure:
+                            await stream.start_tls(_build_tls_context(None, self._cafile), host)
+                        host_header = host if parts.port is None else f"{host}:{parts.port}"
+                        await stream.sendall(
+                            (
+                                f"GET {path} HTTP/1.1\r\n"
+                                f"Host: {host_header}\r\n"
+                                f"User-Agent: Mozilla/5.0\r\n"
+                                f"Accept: */*\r\n"
+                                f"Connection: close\r\n\r\n"
+                            ).encode()
+                        )
+
+                        head = b""
+                        while b"\r\n\r\n" not in head:
+                            chunk = await stream.recv(4096)
+                            if not chunk:
+                                raise ConnectionAbortedError("Server closed connection before sending headers")
+                            head += chunk
+                            if len(head) > _MAX_HEADER_BYTES:
+                                raise ValueError("Response headers too large")
+                        header_block, body = head.split(b"\r\n\r\n", 1)
+                        status_code, location = self._parse_head(header_block)
+
+                        if 300 <= status_code < 400 and location:
+                            if hop >= _MAX_REDIRECTS:
+                                raise RuntimeError("Exceeded maximum allowed redirects.")
+                            current_url = urljoin(current_url, location)
+                            continue
+
+                        bytes_received = len(body)
+                        while bytes_received <= _TCP_16_20_READ_LIMIT:
+                            chunk = await stream.recv(4096)
+                            if not chunk:
+                                break
+                            bytes_received += len(chunk)
+                    finally:
+                        stream.close()
+                break
+
+            return tcp_16_20_received_result(url, bytes_received, (time.time() - start) * 1000)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if not str(e):
+                e = RuntimeError(type(e).__name__)
+            return tcp_16_20_error_result(url, e, bytes_received, (time.time() - start) * 1000)
+
+    async def probe_tcp_16_20(
+        self,
+        url: str,
+        retries: int = TCP_16_20_RETRIES,
+        timeout: float = TCP_16_20_TIMEOUT,
+    ) -> SingleTestResult:
+        """Async counterpart of tcp_test.check_tcp_16_20 (same retry analysis)."""
+        results: list[SingleTestResult] = []
+        for _attempt in range(retries):
+            result = await self.probe_tcp_16_20_single(url, timeout)
+            results.append(result)
+            if is_conclusive_tcp_16_20_ok(result):
+                return result
+        return summarize_tcp_16_20_attempts(url, results, retries)
+
+    async def probe_stun(
+        self,
+        host: str,
+        port: int = 3478,
+        timeout: float = STUN_TIMEOUT,
+        retries: int = 2,
+        family: socket.AddressFamily | None = None,
+        addresses: list[str] | None = None,
+    ) -> SingleTestResult:
+        """Async counterpart of stun_tester.test_stun (same retry budget and codes)."""
+        start = time.monotonic()
+        target_name = f"{host}:{port}"
+        loop = asyncio.get_running_loop()
+
+        try:
+            if addresses is not None:
+                resolved = _resolve_udp_addresses(host, port, family, addresses)
+            else:
+                resolved = await loop.run_in_executor(None, _resolve_udp_addresses, host, port, family)
+        except (socket.gaierror, OSError):
+            return SingleTestResult(
+                target_name=target_name, test_type=TestType.STUN,
+                status=TestStatus.FAIL, error_code="DNS_ERR",
+                time_ms=round((time.monotonic() - start) * 1000, 2),
+                detail=f"DNS resolution failed for {host}",
+            )
+        if not resolved:
+            return SingleTestResult(
+                target_name=target_name, test_type=TestType.STUN,
+                status=TestStatus.FAIL, error_code="DNS_ERR",
+                time_ms=round((time.monotonic() - start) * 1000, 2),
+                detail=f"No usable UDP address for {host}",
+            )
+
+        last_error = "UDP timeout"
+        last_code = "TIMEOUT"
+        last_status = TestStatus.TIMEOUT
+        last_family = ""
+
+        retry_rounds = max(1, int(retries))
+        timeout_budget = max(float(timeout), 1.0)
+        per_attempt = max(timeout_budget / max(1, retry_rounds * len(resolved)), 1.0)
+        deadline = start + timeout_budget
+
+        async with self._slot(host):
+            for retry_idx in range(1, retry_rounds + 1):
+                stop_scan = False
+                for af, _socktype, _proto, target_addr in resolved:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    family_label = "IPv6" if af == socket.AF_INET6 else "IPv4"
+                    last_family = family_label
+                    transport = None
+                    try:
+                        transport, protocol = await loop.create_datagram_endpoint(_StunProtocol, family=af)
+                        protocol.response = loop.create_future()
+                        transport.sendto(build_stun_request(), target_addr)
+                        response = await asyncio.wait_for(protocol.response, min(per_attempt, max(0.5, remaining)))
+                        elapsed = (time.monotonic() - start) * 1000
+                        parsed = parse_stun_response(response)
+                        if parsed:
+                            parsed.setdefault("resolved_ip", str(target_addr[0]))
+                            parsed.setdefault("resolved_family", family_label)
+                            return SingleTestResult(
+                                target_name=target_name,
+                                test_type=TestType.STUN,
+                                status=TestStatus.OK,
+                                time_ms=round(elapsed, 2),
+                                detail=f"Public IP: {parsed['ip']}:{parsed['port']} ({family_label})",
+                                raw_data=parsed,
+                            )
+                        last_error = f"Failed to parse STUN response ({family_label})"
+                        last_code = "PARSE_ERR"
+                        last_status = TestStatus.FAIL
+                        stop_scan = True
+                        break
+                    except TimeoutError:
+                        last_error = f"UDP timeout ({family_label}, attempt {retry_idx}/{retry_rounds})"
+                        last_code = "TIMEOUT"
+                        last_status = TestStatus.TIMEOUT
+                    except ConnectionResetError:
+                        last_error = f"Connection reset (ICMP unreachable, {family_label})"
+                        last_code = "RESET"
+                        last_status = TestStatus.FAIL
+                        stop_scan = True
+                        break
+                    except OSError as e:
+                        last_error = f"{e} ({family_label})"
+                        last_code = "ERROR"
+                        last_status = TestStatus.ERROR
+                        stop_scan = True
+                        break
+                    finally:
+                        if transport is not None:
+                            transport.close()
+                if stop_scan:
+                    break
+
+        return SingleTestResult(
+            target_name=target_name, test_type=TestType.STUN,
+            status=last_status, error_code=last_code,
+            time_ms=round((time.monotonic() - start) * 1000, 2),
+            detail=last_error,
+            raw_data={"family": last_family} if last_family else {},
+        )
+
+    async def probe_tcp_ping(
+        self,
+        host: str,
+        port: int = 443,
+        count: int = PING_COUNT,
+        timeout: float = PING_TIMEOUT,
+        addresses: list[str] | None = None,
+    ) -> SingleTestResult:
+        """TCP connect "ping": average handshake time over count connects."""
+        try:
+            connect_addrs = await self._connect_addrs(host, port, "auto", addresses)
+        except Exception as e:
+            return SingleTestResult(
+                target_name=host, test_type=TestType.PING,
+                status=TestStatus.ERROR, error_code="DNS_ERR",
+                detail=f"DNS resolution failed: {str(e)[:80]}",
+            )
+        if not connect_addrs:
+            return SingleTestResult(
+                target_name=host, test_type=TestType.PING,
+                status=TestStatus.ERROR, error_code="NO_ADDR",
+                detail=f"No addresses for {host}",
+            )
+
+        addr_family, sockaddr = connect_addrs[0]
+        samples: list[float] = []
+        last_exception: Exception | None = None
+        async with self._slot(host):
+            for _ in range(max(1, int(count))):
+                started = time.perf_counter()
+                try:
+                    stream = await self._open(addr_family, sockaddr, timeout)
+                except Exception as e:
+                    last_exception = e
+                    continue
+                samples.append((time.perf_counter() - started) * 1000)
+                stream.close()
+
+        raw = {"method": "tcp_connect", "port": port, "connected_ip": str(sockaddr[0])}
+        if samples:
+            ms = sum(samples) / len(samples)
+            return SingleTestResult(
+                target_name=host, test_type=TestType.PING,
+                status=TestStatus.OK, time_ms=ms,
+                detail=f"{ms:.0f}ms",
+                raw_data=raw,
+            )
+        if isinstance(last_exception, TimeoutError):
+            return SingleTestResult(
+                target_name=host, test_type=TestType.PING,
+                status=TestStatus.TIMEOUT, error_code="TIMEOUT",
+                detail="Timeout", raw_data=raw,
+            )
+        label, detail, _ = classify_connect_error(last_exception or OSError("connect failed"))
+        return SingleTestResult(
+            target_name=host, test_type=TestType.PING,
+            status=TestStatus.ERROR, error_code=label,
+            detail=detail, raw_data=raw,
+        )
+
+    @staticmethod
+    def _parse_head(header_block: bytes) -> tuple[int, str]:
+        lines = header_block.decode("latin-1", errors="replace").split("\r\n")
+        try:
+            status_code = int(lines[0].split()[1])
+        except (IndexError, ValueError):
+            raise ValueError(f"Malformed HTTP status line: {lines[0][:60]!r}") from None
+        location = ""
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "location":
+                location = value.strip()
+                break
+        return status_code, location
@@ -113,6 +113,9 @@ WINDOWS_ERRNO_NET_UNREACH = 10051   # WSAENETUNREACH
 # Thread pool
 # ---------------------------------------------------------------------------
 DEFAULT_PARALLEL = 4
+HOST_RESOLVE_PARALLEL = 16  # getaddrinfo workers for the shared host resolution stage
+ASYNC_PROBE_CONCURRENCY = 256  # probes in flight in the asyncio probe engine
+ASYNC_PROBE_PER_HOST = 6       # concurrent probes to a single host
 
 # ---------------------------------------------------------------------------
 # Strategy scanner
@@ -123,6 +126,7 @@ STRATEGY_STARTUP_WAIT = 1.0       # seconds to wait for winws2 startup
 STRATEGY_KILL_TIMEOUT = 4         # seconds to wait for winws2 shutdown
 WINWS2_EXE_RELATIVE = RELATIVE_EXE_PATH_WINWS2
 PROBE_TEMP_PRESET = "blockcheck_probe.txt"
+PROBE_TEMP_PRESET_NEXT = "blockcheck_probe_next.txt"
 PROBE_TEMP_HOSTLIST = "blockcheck_probe_hosts.txt"
 
 # ---------------------------------------------------------------------------
@@ -1,5 +1,7 @@
 """DNS integrity check — compare UDP DNS vs DoH to detect faking/stubs."""
 
+from __future__ import annotations
+
 import logging
 import socket
 from collections import Counter
@@ -12,6 +14,7 @@ from blockcheck.config import (
     DOH_SERVERS,
     DOH_TIMEOUT,
 )
+from blockcheck.dns_resolver import get_uncached_resolver
 from blockcheck.models import DNSIntegrityResult
 
 if TYPE_CHECKING:
@@ -21,88 +24,52 @@ logger = logging.getLogger(__name__)
 
 
 # ---------------------------------------------------------------------------
-# UDP DNS resolution (stdlib fallback — no aiodns required)
+# UDP DNS resolution (blockcheck.dns_resolver — one socket per server, no cache)
 # ---------------------------------------------------------------------------
 
-def _resolve_udp(domain: str, nameserver: str, timeout: float = DNS_TIMEOUT) -> list[str]:
-    """Resolve domain via a specific DNS server using raw UDP socket.
-
-    Builds a minimal DNS query (A record) and parses the response.
-    Falls back to socket.getaddrinfo if raw query fails.
-    """
-    import struct
-    import secrets
-
+def _resolve_system(domain: str) -> list[str]:
     try:
-        # Build DNS query
-        tx_id = secrets.token_bytes(2)
-        flags = b"\x01\x00"  # Standard query, recursion desired
-        counts = struct.pack(">HHHH", 1, 0, 0, 0)  # 1 question
-
-        # Encode domain name
-        qname = b""
-        for part in domain.split("."):
-            qname += bytes([len(part)]) + part.encode("ascii")
-        qname += b"\x00"
-
-        qtype = struct.pack(">H", 1)   # A record
-        qclass = struct.pack(">H", 1)  # IN class
-
-        query = tx_id + flags + counts + qname + qtype + qclass
-
-        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        sock.settimeout(timeout)
-        sock.sendto(query, (nameserver, 53))
-        data, _ = sock.recvfrom(1024)
-        sock.close()
-
-        # Parse response — skip header and question, read answers
-        if len(data) < 12:
-            return []
-
-        ans_count = struct.unpack(">H", data[6:8])[0]
-        # Skip question section
-        offset = 12
-        # Skip QNAME
-        while offset < len(data) and data[offset] != 0:
-            if data[offset] & 0xC0 == 0xC0:  # Pointer
-                offset += 2
-                break
-            offset += data[offset] + 1
-        else:
-            offset += 1  # null terminator
-        offset += 4  # QTYPE + QCLASS
+        infos = socket.getaddrinfo(domain, None, socket.AF_INET)
+        return list({info[4][0] for info in infos})
+    except Exception:
+        return []
 
-        ips = []
-        for _ in range(ans_count):
-            if offset + 12 > len(data):
-                break
-            # Skip NAME (may be pointer)
-            if data[offset] & 0xC0 == 0xC0:
-                offset += 2
-            else:
-                while offset < len(data) and data[offset] != 0:
-                    offset += data[offset] + 1
-                offset += 1
 
-            rtype = struct.unpack(">H", data[offset : offset + 2])[0]
-            rdlength = struct.unpack(">H", data[offset + 8 : offset + 10])[0]
-            offset += 10
+def _resolve_udp(domain: str, nameserver: str, timeout: float = DNS_TIMEOUT) -> list[str]:
+    """Resolve domain (A record) via a specific DNS server over UDP.
 
-            if rtype == 1 and rdlength == 4:  # A record
-                ip = socket.inet_ntoa(data[offset : offset + 4])
-                ips.append(ip)
-            offset += rdlength
+    Falls back to socket.getaddrinfo if the server does not answer.
+    """
+    try:
+        answer = get_uncached_resolver().resolve(domain, nameserver, "A", timeout=timeout)
+    except Exception:
+        return _resolve_system(domain)
+    return list(answer.addresses)
 
-        return ips
 
-    except Exception:
-        # Fallback: use system resolver
-        try:
-            infos = socket.getaddrinfo(domain, None, socket.AF_INET)
-            return list({info[4][0] for info in infos})
-        except Exception:
-            return []
+def _resolve_udp_many(
+    domains: list[str],
+    nameservers: list[str],
+    timeout: float = DNS_TIMEOUT,
+    cancelled: Callable[[], bool] | None = None,
+) -> dict[str, list[str]]:
+    """_resolve_udp for all domains at once: every domain goes to the first
+    server in one batch, domains without an answer go on to the next one."""
+    results: dict[str, list[str]] = {domain: [] for domain in domains}
+    pending = list(results)
+    resolver = get_uncached_resolver()
+    for server in nameservers:
+        if not pending or (cancelled is not None and cancelled()):
+            break
+        answers = resolver.resolve_many([(domain, server, "A") for domain in pending], timeout=timeout)
+        unresolved = []
+        for domain, answer in zip(pending, answers):
+            ips = _resolve_system(domain) if isinstance(answer, Exception) else list(answer.addresses)
+            results[domain] = ips
+            if not ips:
+                unresolved.append(domain)
+        pending = unresolved
+    return results
 
 
 # ---------------------------------------------------------------------------
@@ -167,18 +134,7 @@ def check_dns_integrity(
         callback("DNS integrity: resolving via UDP...")
 
     # Phase 1: UDP DNS
-    udp_results: dict[str, list[str]] = {}
-    for domain in domains:
-        if _is_cancelled():
-            break
-        ips = []
-        for server in DNS_UDP_SERVERS[:2]:  # Use first 2 servers
-            if _is_cancelled():
-                break
-            ips = _resolve_udp(domain, server)
-            if ips:
-                break
-        udp_results[domain] = ips
+    udp_results = _resolve_udp_many(list(domains), DNS_UDP_SERVERS[:2], cancelled=_is_cancelled)  # Use first 2 servers
 
     if _is_cancelled():
         return []
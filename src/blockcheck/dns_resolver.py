@@ -0,0 +1,552 @@
+"""Асинхронный DNS-резолвер поверх UDP для blockcheck и DNS-диагностики.
+
+Один UDP-сокет (connected endpoint) на каждый nameserver; запросы к нему
+идут параллельно и разбираются по transaction ID (плюс сверка секции
+вопроса — чужой/запоздавший ответ на другой вопрос игнорируется). Повтор
+отправляется с тем же ID, так что поздний ответ на первую попытку тоже
+засчитывается. Разбираются A, AAAA и CNAME (со сжатием имён).
+
+Ответы с NOERROR/NXDOMAIN кладутся в небольшой TTL-кэш. Таймаут или ошибка
+сокета — исключение ``DnsError`` (пустой ответ и «сервер не ответил» для
+проверок подмены — разные вещи). TC-бит не обрабатывается: для проверок
+хватает того, что поместилось в UDP.
+
+``DnsResolver`` — синхронный фасад для существующих (потоковых) вызывающих:
+свой event loop в фоновом daemon-потоке, ``resolve`` и ``resolve_many``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import ipaddress
+import secrets
+import socket
+import struct
+import threading
+import time
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, field
+
+from blockcheck.config import DNS_RETRIES, DNS_TIMEOUT
+
+DNS_PORT = 53
+
+QTYPE_A = 1
+QTYPE_CNAME = 5
+QTYPE_AAAA = 28
+_QTYPES = {"A": QTYPE_A, "AAAA": QTYPE_AAAA, "CNAME": QTYPE_CNAME}
+_QCLASS_IN = 1
+
+RCODE_NOERROR = 0
+RCODE_NXDOMAIN = 3
+
+_HEADER = struct.Struct(">HHHHHH")
+_RR_FIXED = struct.Struct(">HHIH")
+_FLAGS_RD = 0x0100
+_MAX_POINTER_JUMPS = 32
+_MAX_RESPONSE_SIZE = 4096
+
+CACHE_MAX_TTL = 300
+CACHE_NEGATIVE_TTL = 30
+CACHE_MAX_ENTRIES = 2048
+
+_clock = time.monotonic
+
+Nameserver = str | tuple[str, int]
+
+
+class DnsError(OSError):
+    """Запрос не выполнен: таймаут, ошибка сокета, некорректное имя/ответ."""
+
+
+class DnsTimeout(DnsError):
+    pass
+
+
+@dataclass(frozen=True)
+class DnsAnswer:
+    name: str
+    qtype: int
+    rcode: int
+    addresses: tuple[str, ...] = ()
+    cnames: tuple[str, ...] = ()
+    ttl: int = 0
+    nameserver: str = ""
+    cached: bool = field(default=False, compare=False)
+
+    @property
+    def ok(self) -> bool:
+        return self.rcode == RCODE_NOERROR
+
+
+# ---------------------------------------------------------------------------
+# Формат сообщений
+# ---------------------------------------------------------------------------
+
+def _qtype_code(qtype: str | int) -> int:
+    if isinstance(qtype, int):
+        return qtype
+    try:
+        return _QTYPES[str(qtype).upper()]
+    except KeyError:
+        raise DnsError(f"unsupported DNS record type: {qtype!r}") from None
+
+
+def encode_name(name: str) -> bytes:
+    host = str(name or "").strip().rstrip(".")
+    if not host:
+        raise DnsError("empty DNS name")
+    parts = []
+    for label in host.split("."):
+        try:
+            raw = label.encode("ascii")
+        except UnicodeEncodeError:
+            try:
+                raw = label.encode("idna")
+            except UnicodeError as exc:
+                raise DnsError(f"invalid DNS name: {name!r}") from exc
+        if not raw or len(raw) > 63:
+            raise DnsError(f"invalid DNS name: {name!r}")
+        parts.append(bytes((len(raw),)) + raw)
+    wire = b"".join(parts) + b"\x00"
+    if len(wire) > 255:
+        raise DnsError(f"DNS name too long: {name!r}")
+    return wire
+
+
+def encode_question(name: str, qtype: str | int = "A") -> bytes:
+    return encode_name(name) + struct.pack(">HH", _qtype_code(qtype), _QCLASS_IN)
+
+
+def build_query(tx_id: int, question: bytes) -> bytes:
+    return _HEADER.pack(tx_id, _FLAGS_RD, 1, 0, 0, 0) + question
+
+
+def _read_name(data: bytes, offset: int) -> tuple[str, int]:
+    """Имя по смещению (со сжатием) и смещение сразу за ним в исходной позиции."""
+    labels: list[str] = []
+    end = -1
+    jumps = 0
+    while True:
+        if offset >= len(data):
+            raise DnsError("truncated DNS name")
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            if offset + 1 >= len(data):
+                raise DnsError("truncated DNS pointer")
+            if end < 0:
+                end = offset + 2
+            jumps += 1
+            if jumps > _MAX_POINTER_JUMPS:
+                raise DnsError("DNS name pointer loop")
+            offset = ((length & 0x3F) << 8) | data[offset + 1]
+            continue
+        if length == 0:
+            return ".".join(labels), (end if end >= 0 else offset + 1)
+        if length > 63 or offset + 1 + length > len(data):
+            raise DnsError("malformed DNS label")
+        labels.append(data[offset + 1:offset + 1 + length].decode("ascii", "replace"))
+        offset += 1 + length
+
+
+def parse_response(data: bytes, *, nameserver: str = "") -> tuple[int, DnsAnswer]:
+    """(transaction ID, ответ). A/AAAA собираются по всей цепочке CNAME."""
+    if len(data) < _HEADER.size:
+        raise DnsError("truncated DNS header")
+    tx_id, flags, qdcount, ancount, _nscount, _arcount = _HEADER.unpack_from(data)
+    offset = _HEADER.size
+    name = ""
+    qtype = 0
+    for index in range(qdcount):
+        question_name, offset = _read_name(data, offset)
+        if offset + 4 > len(data):
+            raise DnsError("truncated DNS question")
+        if index == 0:
+            name = question_name
+            qtype = struct.unpack_from(">H", data, offset)[0]
+        offset += 4
+
+    addresses: list[str] = []
+    cnames: list[str] = []
+    ttls: list[int] = []
+    for _ in range(ancount):
+        _rr_name, offset = _read_name(data, offset)
+        if offset + _RR_FIXED.size > len(data):
+            break
+        rtype, rclass, ttl, rdlength = _RR_FIXED.unpack_from(data, offset)
+        offset += _RR_FIXED.size
+        rdata_end = offset + rdlength
+        if rdata_end > len(data):
+            break
+        if rclass == _QCLASS_IN:
+            if rtype == QTYPE_A and rdlength == 4:
+                addresses.append(socket.inet_ntoa(data[offset:rdata_end]))
+                ttls.append(ttl)
+            elif rtype == QTYPE_AAAA and rdlength == 16:
+                addresses.append(str(ipaddress.IPv6Address(data[offset:rdata_end])))
+                ttls.append(ttl)
+            elif rtype == QTYPE_CNAME:
+                cnames.append(_read_name(data, offset)[0])
+                ttls.append(ttl)
+        offset = rdata_end
+
+    return tx_id, DnsAnswer(
+        name=name,
+        qtype=qtype,
+        rcode=flags & 0x000F,
+        addresses=tuple(addresses),
+        cnames=tuple(cnames),
+        ttl=min(ttls) if ttls else 0,
+        nameserver=nameserver,
+    )
+
+
+def _nameserver_address(nameserver: Nameserver, default_port: int) -> tuple[str, int]:
+    if isinstance(nameserver, tuple):
+        host, port = nameserver
+        return str(host), int(port)
+    return str(nameserver), default_port
+
+
+def _nameserver_label(address: tuple[str, int]) -> str:
+    host, port = address
+    return host if port == DNS_PORT else f"{host}:{port}"
+
+
+# ---------------------------------------------------------------------------
+# Асинхронный движок
+# ---------------------------------------------------------------------------
+
+class _NameserverProtocol(asyncio.DatagramProtocol):
+    """Один UDP-сокет к серверу; ответы раздаются ожидающим по transaction ID."""
+
+    def __init__(self) -> None:
+        self.transport: asyncio.DatagramTransport | None = None
+        self.pending: dict[int, tuple[bytes, asyncio.Future]] = {}
+        self.closed = False
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        if len(data) < _HEADER.size:
+            return
+        waiter = self.pending.get(int.from_bytes(data[:2], "big"))
+        if waiter is None:
+            return
+        question, future = waiter
+        # Сверка вопроса отсекает ответ на другой запрос с совпавшим ID.
+        if data[_HEADER.size:_HEADER.size + len(question)].lower() != question.lower():
+            return
+        if not future.done():
+            future.set_result(data)
+
+    def error_received(self, exc: Exception) -> None:
+        # ICMP port unreachable и т.п. — сервер недоступен для всех ожидающих.
+        self._fail_pending(exc)
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        self.closed = True
+        self._fail_pending(exc or ConnectionError("DNS socket closed"))
+
+    def allocate_id(self) -> int:
+        while True:
+            tx_id = secrets.randbits(16)
+            if tx_id not in self.pending:
+                return tx_id
+
+    def _fail_pending(self, exc: BaseException) -> None:
+        for _question, future in list(self.pending.values()):
+            if not future.done():
+                future.set_exception(DnsError(str(exc) or type(exc).__name__))
+
+
+class AsyncDnsResolver:
+    """Мультиплексирующий резолвер; один экземпляр — один event loop."""
+
+    def __init__(
+        self,
+        *,
+        timeout: float = DNS_TIMEOUT,
+        retries: int = DNS_RETRIES,
+        port: int = DNS_PORT,
+        cache: bool = True,
+    ) -> None:
+        self.timeout = float(timeout)
+        self.retries = max(0, int(retries))
+        self.port = int(port)
+        self._cache_enabled = bool(cache)
+        self._cache: dict[tuple[tuple[str, int], str, int], tuple[float, DnsAnswer]] = {}
+        self._channels: dict[tuple[str, int], _NameserverProtocol] = {}
+        self._channel_locks: dict[tuple[str, int], asyncio.Lock] = {}
+
+    async def resolve(
+        self,
+        name: str,
+        nameserver: Nameserver,
+        qtype: str | int = "A",
+        *,
+        timeout: float | None = None,
+    ) -> DnsAnswer:
+        address = _nameserver_address(nameserver, self.port)
+        question = encode_question(name, qtype)
+        qtype_code = _qtype_code(qtype)
+        cache_key = (address, str(name).strip().rstrip(".").lower(), qtype_code)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+
+        data = await self._exchange(address, question, self.timeout if timeout is None else float(timeout))
+        _tx_id, answer = parse_response(data, nameserver=_nameserver_label(address))
+        self._cache_put(cache_key, answer)
+        return answer
+
+    async def resolve_many(
+        self,
+        queries: Iterable[Sequence],
+        *,
+        timeout: float | None = None,
+    ) -> list[DnsAnswer | DnsError]:
+        """Все запросы сразу; на месте неудачных — исключение DnsError."""
+        tasks = [self.resolve(*query, timeout=timeout) for query in queries]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        outcome: list[DnsAnswer | DnsError] = []
+        for result in results:
+            if isinstance(result, DnsError) or isinstance(result, DnsAnswer):
+                outcome.append(result)
+            elif isinstance(result, BaseException):
+                if isinstance(result, asyncio.CancelledError):
+                    raise result
+                outcome.append(DnsError(str(result) or type(result).__name__))
+            else:
+                outcome.append(result)
+        return outcome
+
+    async def close(self) -> None:
+        for protocol in self._channels.values():
+            if protocol.transport is not None:
+                protocol.transport.close()
+        self._channels.clear()
+        self._channel_locks.clear()
+
+    def clear_cache(self) -> None:
+        self._cache.clear()
+
+    # ---- внутреннее ----
+
+    async def _exchange(self, address: tuple[str, int], question: bytes, timeout: float) -> bytes:
+        protocol = await self._channel(address)
+        loop = asyncio.get_running_loop()
+        tx_id = protocol.allocate_id()
+        future = loop.create_future()
+        protocol.pending[tx_id] = (question, future)
+        query = build_query(tx_id, question)
+        attempts = self.retries + 1
+        per_attempt = max(0.05, timeout / attempts)
+        try:
+            for _attempt in range(attempts):
+                if protocol.closed or protocol.transport is None:
+                    raise DnsError(f"DNS socket to {_nameserver_label(address)} closed")
+                protocol.transport.sendto(query)
+                try:
+                    return await asyncio.wait_for(asyncio.shield(future), per_attempt)
+                except asyncio.TimeoutError:
+                    continue
+            raise DnsTimeout(f"DNS timeout: {_nameserver_label(address)}")
+        finally:
+            protocol.pending.pop(tx_id, None)
+            if not future.done():
+                future.cancel()
+
+    async def _channel(self, address: tuple[str, int]) -> _NameserverProtocol:
+        protocol = self._channels.get(address)
+        if protocol is not None and not protocol.closed:
+            return protocol
+        lock = self._channel_locks.setdefault(address, asyncio.Lock())
+        async with lock:
+            protocol = self._channels.get(address)
+            if protocol is not None and not protocol.closed:
+                return protocol
+            host, port = address
+            try:
+                family = socket.AF_INET6 if ipaddress.ip_address(host).version == 6 else socket.AF_INET
+            except ValueError as exc:
+                raise DnsError(f"nameserver must be an IP address: {host!r}") from exc
+            loop = asyncio.get_running_loop()
+            try:
+                _transport, protocol = await loop.create_datagram_endpoint(
+                    _NameserverProtocol,
+                    remote_addr=(host, port),
+                    family=family,
+                )
+            except OSError as exc:
+                raise DnsError(f"DNS socket to {_nameserver_label(address)}: {exc}") from exc
+            self._channels[address] = protocol
+            return protocol
+
+    def _cache_get(self, key) -> DnsAnswer | None:
+        if not self._cache_enabled:
+            return None
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expires_at, answer = entry
+        if expires_at <= _clock():
+            self._cache.pop(key, None)
+            return None
+        return DnsAnswer(**{**answer.__dict__, "cached": True})
+
+    def _cache_put(self, key, answer: DnsAnswer) -> None:
+        if not self._cache_enabled:
+            return
+        if answer.rcode == RCODE_NOERROR and answer.ttl > 0:
+            ttl = min(answer.ttl, CACHE_MAX_TTL)
+        elif answer.rcode in (RCODE_NOERROR, RCODE_NXDOMAIN):
+            ttl = CACHE_NEGATIVE_TTL
+        else:
+            return
+        if len(self._cache) >= CACHE_MAX_ENTRIES:
+            del self._cache[next(iter(self._cache))]
+        self._cache[key] = (_clock() + ttl, answer)
+
+
+# ---------------------------------------------------------------------------
+# Синхронный фасад
+# ---------------------------------------------------------------------------
+
+class DnsResolver:
+    """Синхронный фасад над AsyncDnsResolver с собственным loop в фоновом потоке.
+
+    Методы потокобезопасны и блокируют вызывающий поток до результата, в том
+    числе когда их зовут из QThread-воркеров.
+    """
+
+    def __init__(
+        self,
+        *,
+        timeout: float = DNS_TIMEOUT,
+        retries: int = DNS_RETRIES,
+        port: int = DNS_PORT,
+        cache: bool = True,
+    ) -> None:
+        self._engine_kwargs = {"timeout": timeout, "retries": retries, "port": port, "cache": cache}
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._engine: AsyncDnsResolver | None = None
+
+    @property
+    def timeout(self) -> float:
+        return float(self._engine_kwargs["timeout"])
+
+    def resolve(self, name: str, nameserver: Nameserver, qtype: str | int = "A", *, timeout: float | None = None) -> DnsAnswer:
+        engine = self._ensure_started()
+        return self._run(engine.resolve(name, nameserver, qtype, timeout=timeout), timeout)
+
+    def resolve_many(self, queries: Iterable[Sequence], *, timeout: float | None = None) -> list[DnsAnswer | DnsError]:
+        queries = [tuple(query) for query in queries]
+        if not queries:
+            return []
+        engine = self._ensure_started()
+        return self._run(engine.resolve_many(queries, timeout=timeout), timeout)
+
+    def clear_cache(self) -> None:
+        engine = self._engine
+        if engine is not None and self._loop is not None:
+            self._loop.call_soon_threadsafe(engine.clear_cache)
+
+    def close(self) -> None:
+        with self._lock:
+            loop, thread, engine = self._loop, self._thread, self._engine
+            self._loop = self._thread = self._engine = None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(engine.close(), loop).result(timeout=2)
+        except Exception:
+            pass
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join(timeout=2)
+
+    def _run(self, coro, timeout: float | None):
+        loop = self._loop
+        if loop is None:
+            coro.close()
+            raise DnsError("DNS resolver closed")
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        # Запас сверх таймаута запроса: сами таймауты считает engine.
+        limit = (self.timeout if timeout is None else float(timeout)) + 5.0
+        try:
+            return future.result(timeout=limit)
+        except TimeoutError as exc:
+            future.cancel()
+            raise DnsTimeout("DNS resolver did not respond") from exc
+
+    def _ensure_started(self) -> AsyncDnsResolver:
+        with self._lock:
+            if self._engine is not None:
+                return self._engine
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def _run_loop() -> None:
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                try:
+                    loop.run_forever()
+                finally:
+                    loop.close()
+
+            thread = threading.Thread(target=_run_loop, name="dns-resolver", daemon=True)
+            thread.start()
+            ready.wait()
+            self._loop = loop
+            self._thread = thread
+            self._engine = AsyncDnsResolver(**self._engine_kwargs)
+            return self._engine
+
+
+_DEFAULT_RESOLVER: DnsResolver | None = None
+_DEFAULT_RESOLVER_LOCK = threading.Lock()
+_UNCACHED_RESOLVER: DnsResolver | None = None
+
+
+def get_default_resolver() -> DnsResolver:
+    """Общий резолвер процесса (сокеты и кэш переиспользуются между проверками)."""
+    global _DEFAULT_RESOLVER
+    with _DEFAULT_RESOLVER_LOCK:
+        if _DEFAULT_RESOLVER is None:
+            _DEFAULT_RESOLVER = DnsResolver()
+        return _DEFAULT_RESOLVER
+
+
+def get_uncached_resolver() -> DnsResolver:
+    """Общий резолвер без кэша: каждый запрос уходит на сервер.
+
+    Одна попытка с таймаутом DNS_TIMEOUT — как прежний запрос через сокет.
+    """
+    global _UNCACHED_RESOLVER
+    with _DEFAULT_RESOLVER_LOCK:
+        if _UNCACHED_RESOLVER is None:
+            _UNCACHED_RESOLVER = DnsResolver(timeout=DNS_TIMEOUT, retries=0, cache=False)
+        return _UNCACHED_RESOLVER
+
+
+__all__ = [
+    "AsyncDnsResolver",
+    "DnsAnswer",
+    "DnsError",
+    "DnsResolver",
+    "DnsTimeout",
+    "QTYPE_A",
+    "QTYPE_AAAA",
+    "QTYPE_CNAME",
+    "RCODE_NOERROR",
+    "RCODE_NXDOMAIN",
+    "build_query",
+    "encode_question",
+    "get_default_resolver",
+    "get_uncached_resolver",
+    "parse_response",
+]
@@ -0,0 +1,103 @@
+"""Shared host resolution stage for BlockcheckRunner.
+
+All unique hosts of a run are resolved once, concurrently, on a bounded
+getaddrinfo pool. Every phase takes its addresses from the stage instead of
+resolving the same host again; a phase can wait on a single host's future
+and start probing it as soon as that host is resolved.
+"""
+
+from __future__ import annotations
+
+import socket
+import threading
+from collections.abc import Callable, Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from blockcheck.config import HOST_RESOLVE_PARALLEL
+from blockcheck.models import HostAddresses
+
+
+def resolve_host_addresses(host: str) -> HostAddresses:
+    """System resolver lookup, split into unique IPv4 / IPv6 lists."""
+    result = HostAddresses(host=host)
+    if not host:
+        return result
+    try:
+        infos = socket.getaddrinfo(host, 443, proto=socket.IPPROTO_TCP)
+    except Exception as e:
+        result.error = str(e)[:120]
+        return result
+
+    for family, _socktype, _proto, _canonname, sockaddr in infos:
+        ip = sockaddr[0]
+        if not isinstance(ip, str):
+            continue
+        if family == socket.AF_INET:
+            if ip not in result.ipv4:
+                result.ipv4.append(ip)
+        elif family == socket.AF_INET6:
+            if ip not in result.ipv6:
+                result.ipv6.append(ip)
+    return result
+
+
+def normalize_host(host: str) -> str:
+    return str(host or "").strip().lower().rstrip(".")
+
+
+class HostResolutionStage:
+    """Per-run cache of host futures backed by a bounded thread pool."""
+
+    def __init__(
+        self,
+        max_workers: int = HOST_RESOLVE_PARALLEL,
+        resolver: Callable[[str], HostAddresses] = resolve_host_addresses,
+    ):
+        self._resolver = resolver
+        self._max_workers = max(1, int(max_workers))
+        self._pool: ThreadPoolExecutor | None = None
+        self._futures: dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def start(self, hosts: Iterable[str]) -> None:
+        """Submit every not yet known host; returns immediately."""
+        for host in hosts:
+            self.future(host)
+
+    def future(self, host: str) -> Future:
+        """Future[HostAddresses] for host, submitting it on first request."""
+        key = normalize_host(host)
+        with self._lock:
+            future = self._futures.get(key)
+            if future is None:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self._max_workers,
+                        thread_name_prefix="blockcheck-resolve",
+                    )
+                future = self._pool.submit(self._resolver, key)
+                self._futures[key] = future
+            return future
+
+    def get(self, host: str, timeout: float | None = None) -> HostAddresses:
+        """Resolved addresses for host (waits for its lookup only)."""
+        try:
+            return self.future(host).result(timeout=timeout)
+        except Exception as e:
+            return HostAddresses(host=normalize_host(host), error=str(e)[:120] or type(e).__name__)
+
+    def snapshot(self) -> dict[str, HostAddresses]:
+        """Finished lookups, in submission order (for the report)."""
+        with self._lock:
+            items = list(self._futures.items())
+        return {
+            host: future.result()
+            for host, future in items
+            if future.done() and not future.cancelled() and future.exception() is None
+        }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
@@ -15,11 +15,13 @@ from blockcheck.models import SingleTestResult, TestStatus, TestType
 def check_http_injection(
     domain: str,
     timeout: int = ISP_PAGE_TIMEOUT,
+    address: str | None = None,
 ) -> SingleTestResult:
     """Check for HTTP injection on port 80.
 
     Sends a plain HTTP GET and checks if the response is from the real server
-    or an injected block page (common DPI technique).
+    or an injected block page (common DPI technique). ``address`` is an
+    already resolved IPv4 of domain (skips the lookup on connect).
     """
     start = time.time()
     sock = None
@@ -27,7 +29,7 @@ def check_http_injection(
     try:
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         sock.settimeout(timeout)
-        sock.connect((domain, 80))
+        sock.connect((address or domain, 80))
 
         request = (
             f"GET / HTTP/1.1\r\n"
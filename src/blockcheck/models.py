@@ -75,6 +75,25 @@ class DNSIntegrityResult:
     stub_ip: str | None = None
 
 
+@dataclass
+class HostAddresses:
+    host: str
+    ipv4: list[str] = field(default_factory=list)
+    ipv6: list[str] = field(default_factory=list)
+    error: str = ""
+
+    @property
+    def resolved(self) -> bool:
+        return bool(self.ipv4 or self.ipv6)
+
+    def for_family(self, ip_family: str) -> list[str]:
+        if ip_family == "ipv4":
+            return list(self.ipv4)
+        if ip_family == "ipv6":
+            return list(self.ipv6)
+        return [*self.ipv4, *self.ipv6]
+
+
 class PreflightVerdict(Enum):
     PASSED = "passed"
     WARNING = "warning"
@@ -100,6 +119,7 @@ class BlockcheckReport:
     preflight: list[PreflightResult] = field(default_factory=list)
     targets: list[TargetResult] = field(default_factory=list)
     dns_integrity: list[DNSIntegrityResult] = field(default_factory=list)
+    host_addresses: dict[str, HostAddresses] = field(default_factory=dict)
     summary: dict[str, Any] = field(default_factory=dict)
     elapsed_seconds: float = 0.0
     cancelled: bool = False
@@ -2,12 +2,12 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import re
-import socket
 import time
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
 from typing import TYPE_CHECKING, Any, Protocol, runtime_checkable
 
 from blockcheck.config import (
@@ -19,8 +19,10 @@ from blockcheck.config import (
     TCP_TARGET_MAX_COUNT,
     TCP_TARGETS_PER_PROVIDER,
 )
+from blockcheck.async_probes import AsyncProbeEngine
 from blockcheck.dpi_classifier import DPIClassifier
 from blockcheck.dns_integrity import check_dns_integrity
+from blockcheck.host_resolution import HostResolutionStage
 from blockcheck.preflight import run_preflight
 from blockcheck.isp_page_detector import check_http_injection, detect_isp_page
 from blockcheck.models import (
@@ -100,6 +102,7 @@ class BlockcheckRunner:
         callback: BlockcheckCallback | None = None,
         extra_domains: list[str] | None = None,
         skip_preflight_failed: bool = False,
+        use_async_probes: bool = True,
     ):
         self.mode = mode
         if timeout is not None:
@@ -113,6 +116,10 @@ class BlockcheckRunner:
         self._cancelled = threading.Event()
         self._extra_domains = extra_domains
         self._skip_preflight_failed = skip_preflight_failed
+        self._hosts = HostResolutionStage()
+        # HTTPS / TCP 16-20KB / STUN probes: one asyncio loop per phase
+        # (False — прежний пул потоков на parallel воркеров).
+        self._use_async_probes = use_async_probes
 
     def cancel(self) -> None:
         """Thread-safe cancellation."""
@@ -124,9 +131,18 @@ class BlockcheckRunner:
 
     def run(self) -> BlockcheckReport:
         """Run all test phases sequentially, return report."""
+        self._hosts = HostResolutionStage()
+        try:
+            return self._run_phases()
+        finally:
+            self._hosts.shutdown()
+
+    def _run_phases(self) -> BlockcheckReport:
         start_time = time.time()
         report = BlockcheckReport()
         targets = build_targets_with_user_domains(self._extra_domains)
+        # All target hosts resolve in the background while preflight/DNS run.
+        self._hosts.start(self._extract_run_hosts(targets))
 
         phase_count = self._count_phases()
         current_phase = 0
@@ -169,6 +185,7 @@ class BlockcheckRunner:
             self.cb.on_log(f"DNS domains source: {dns_source} ({len(dns_domains)} total)")
             if dns_source.startswith("fallback"):
                 self.cb.on_log("WARNING: DNS domains list fallback is in use (reduced coverage)")
+            self._hosts.start(dns_domains)
             report.dns_integrity = check_dns_integrity(
                 dns_domains,
                 callback=lambda msg: self.cb.on_log(msg),
@@ -176,10 +193,10 @@ class BlockcheckRunner:
             )
             for d in report.dns_integrity:
                 status = self._dns_status_text(d)
-                sys_v4, sys_v6 = self._resolve_host_ips(d.domain)
+                sys_addrs = self._hosts.get(d.domain)
                 self.cb.on_log(
                     f"  {d.domain}: UDP={d.udp_ips}, DoH={d.doh_ips}, "
-                    f"SYSv4={sys_v4 or ['-']}, SYSv6={sys_v6 or ['-']} → {status}"
+                    f"SYSv4={sys_addrs.ipv4 or ['-']}, SYSv6={sys_addrs.ipv6 or ['-']} → {status}"
                 )
 
         # ── Phase 2: TLS tests ──
@@ -240,6 +257,7 @@ class BlockcheckRunner:
                 self.cb.on_log(f"  {tr.name}: {classification.value} — {detail}")
 
         # ── Summary ──
+        report.host_addresses = self._hosts.snapshot()
         was_cancelled = self.cancelled
         report.elapsed_seconds = time.time() - start_time
         report.cancelled = was_cancelled
@@ -257,7 +275,11 @@ class BlockcheckRunner:
     # ------------------------------------------------------------------
 
     def _run_https_phase(self, https_targets: list[dict]) -> list[TargetResult]:
-        """Run HTTP, TLS 1.2, TLS 1.3 tests for each HTTPS target (parallel)."""
+        """Run HTTP, TLS 1.2, TLS 1.3 tests for each HTTPS target (parallel).
+
+        Tests of a target are submitted as soon as its host is resolved by
+        the shared resolution stage — no waiting for the other targets.
+        """
         total = len(https_targets)
         # Pre-build TargetResult list to preserve order
         results: list[TargetResult] = []
@@ -269,88 +291,143 @@ class BlockcheckRunner:
             host = re.sub(r"^https?://", "", value).rstrip("/").split("/")[0]
             tr = TargetResult(name=name, value=value)
             results.append(tr)
-
-            ipv4, ipv6 = self._resolve_host_ips(host)
-            families: list[str] = []
-            if ipv4:
-                families.append("ipv4")
-            if ipv6:
-                families.append("ipv6")
-            if not families:
-                # Keep at least one probe path for diagnostics.
-                families = ["ipv4"]
-
             target_map[name] = {
                 "index": i,
                 "target": tr,
                 "host": host,
-                "families": families,
-                "expected": len(families) * 3,
+                "families": [],
+                "expected": 0,
             }
 
-            self.cb.on_log(
-                f"  DNS {name}: IPv4={ipv4 or ['-']}, IPv6={ipv6 or ['-']}, test_families={families}"
-            )
+        completed_targets: set[str] = set()
+        if self._use_async_probes:
+            self._run_https_jobs_async(target_map, total, completed_targets)
+        else:
+            self._run_https_jobs_threaded(target_map, total, completed_targets)
+
+        # Emit for targets that finished partially (cancelled)
+        for name, data in target_map.items():
+            tr = data["target"]
+            if name not in completed_targets and tr.tests:
+                self.cb.on_target_complete(tr)
+
+        return results
+
+    def _plan_https_target(self, name: str, data: dict[str, Any], total: int) -> list[tuple]:
+        """(tls_version, ip_family, addresses) jobs for a resolved target."""
+        host = str(data["host"])
+        addrs = self._hosts.get(host)
+        families: list[str] = []
+        if addrs.ipv4:
+            families.append("ipv4")
+        if addrs.ipv6:
+            families.append("ipv6")
+        if not families:
+            # Keep at least one probe path for diagnostics.
+            families = ["ipv4"]
+        data["families"] = families
+        data["expected"] = len(families) * 3
+
+        self.cb.on_log(
+            f"  DNS {name}: IPv4={addrs.ipv4 or ['-']}, IPv6={addrs.ipv6 or ['-']}, test_families={families}"
+        )
+        self.cb.on_target_started(name, int(data["index"]), total)
+        # Unresolved host: let the probe resolve by itself and report DNS_ERR.
+        return [
+            (tls_v, ip_family, addrs.for_family(ip_family) if addrs.resolved else None)
+            for tls_v in (None, "1.2", "1.3")
+            for ip_family in families
+        ]
+
+    def _record_https_result(
+        self,
+        name: str,
+        data: dict[str, Any],
+        tls_v: str | None,
+        ip_family: str,
+        r: SingleTestResult,
+        total: int,
+        completed_targets: set[str],
+    ) -> None:
+        tr = data["target"]
+        r.target_name = name
+        r.raw_data.setdefault("ip_family", ip_family)
+        tr.tests.append(r)
+
+        label = {None: "HTTP", "1.2": "TLS1.2", "1.3": "TLS1.3"}[tls_v]
+        family_label = "IPv6" if ip_family == "ipv6" else "IPv4"
+        self.cb.on_test_result(r)
+        self.cb.on_log(f"  {name} {label} [{family_label}]: {r.status.value} {r.detail}")
+        self.cb.on_progress(len(completed_targets), total, f"{name} {label} [{family_label}]")
+
+        if len(tr.tests) >= int(data["expected"]) and name not in completed_targets:
+            completed_targets.add(name)
+            self.cb.on_target_complete(tr)
+
+    def _run_https_jobs_async(self, target_map: dict[str, dict[str, Any]], total: int, completed_targets: set[str]) -> None:
+        engine = AsyncProbeEngine(cancelled=lambda: self.cancelled)
+
+        async def _target(name: str, data: dict[str, Any]) -> None:
+            host = str(data["host"])
+            try:
+                await asyncio.wrap_future(self._hosts.future(host))
+            except Exception:
+                pass  # _hosts.get() turns the failure into an empty answer
+
+            async def _one(tls_v: str | None, ip_family: str, addresses: list[str] | None) -> None:
+                r = await engine.probe_https(
+                    host,
+                    timeout=self.timeout,
+                    tls_version=tls_v,
+                    ip_family=ip_family,
+                    addresses=addresses,
+                )
+                self._record_https_result(name, data, tls_v, ip_family, r, total, completed_targets)
+
+            await asyncio.gather(*(_one(*job) for job in self._plan_https_target(name, data, total)))
 
-        # Submit all jobs to thread pool: 3 tests per target
-        def _run_one(name: str, host: str, tls_version: str | None, ip_family: str):
+        async def _all() -> None:
+            await asyncio.gather(*(_target(name, data) for name, data in target_map.items()))
+
+        engine.run(_all())
+
+    def _run_https_jobs_threaded(self, target_map: dict[str, dict[str, Any]], total: int, completed_targets: set[str]) -> None:
+        resolution_jobs: dict[Future, list[str]] = {}
+        for name, data in target_map.items():
+            resolution_jobs.setdefault(self._hosts.future(str(data["host"])), []).append(name)
+
+        def _run_one(name: str, host: str, tls_version: str | None, ip_family: str, addresses: list[str] | None):
             """Run a single TLS test — called in a pool thread."""
             return name, tls_version, ip_family, test_https(
                 host,
                 timeout=self.timeout,
                 tls_version=tls_version,
                 ip_family=ip_family,
+                addresses=addresses,
             )
 
-        completed_targets = set()
         cancelled_during_phase = False
         pool = ThreadPoolExecutor(max_workers=self.parallel)
         try:
-            futures = []
-            for name, data in target_map.items():
+            pending: set[Future] = set(resolution_jobs)
+            while pending:
                 if self.cancelled:
                     cancelled_during_phase = True
                     break
-                idx = int(data["index"])
-                host = str(data["host"])
-                families = list(data["families"])
-                self.cb.on_target_started(name, idx, total)
-                for tls_v in (None, "1.2", "1.3"):
-                    for ip_family in families:
-                        futures.append(pool.submit(_run_one, name, host, tls_v, ip_family))
-
-            for future in as_completed(futures):
-                if self.cancelled:
-                    cancelled_during_phase = True
-                    break
-                name, tls_v, ip_family, r = future.result()
-                target_data = target_map[name]
-                tr = target_data["target"]
-                r.target_name = name
-                r.raw_data.setdefault("ip_family", ip_family)
-                tr.tests.append(r)
-
-                label = {None: "HTTP", "1.2": "TLS1.2", "1.3": "TLS1.3"}[tls_v]
-                family_label = "IPv6" if ip_family == "ipv6" else "IPv4"
-                self.cb.on_test_result(r)
-                self.cb.on_log(f"  {name} {label} [{family_label}]: {r.status.value} {r.detail}")
-                self.cb.on_progress(len(completed_targets), total, f"{name} {label} [{family_label}]")
-
-                expected = int(target_data["expected"])
-                if len(tr.tests) >= expected and name not in completed_targets:
-                    completed_targets.add(name)
-                    self.cb.on_target_complete(tr)
+                done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in resolution_jobs:
+                        for name in resolution_jobs[future]:
+                            data = target_map[name]
+                            for tls_v, ip_family, addresses in self._plan_https_target(name, data, total):
+                                pending.add(pool.submit(_run_one, name, str(data["host"]), tls_v, ip_family, addresses))
+                        continue
+
+                    name, tls_v, ip_family, r = future.result()
+                    self._record_https_result(name, target_map[name], tls_v, ip_family, r, total, completed_targets)
         finally:
             pool.shutdown(wait=not cancelled_during_phase, cancel_futures=cancelled_during_phase)
 
-        # Emit for targets that finished partially (cancelled)
-        for name, data in target_map.items():
-            tr = data["target"]
-            if name not in completed_targets and tr.tests:
-                self.cb.on_target_complete(tr)
-
-        return results
-
     def _run_isp_phase(self, target_results: list[TargetResult]) -> None:
         """Run ISP page detection for existing HTTPS targets (parallel)."""
         if not target_results:
@@ -358,7 +435,8 @@ class BlockcheckRunner:
 
         def _isp_one(tr):
             host = re.sub(r"^https?://", "", tr.value).rstrip("/").split("/")[0]
-            http_result = check_http_injection(host)
+            addrs = self._hosts.get(host)
+            http_result = check_http_injection(host, address=addrs.ipv4[0] if addrs.ipv4 else None)
             http_result.target_name = tr.name
 
             if http_result.status == TestStatus.FAIL and http_result.error_code == "HTTP_INJECT":
@@ -429,12 +507,11 @@ class BlockcheckRunner:
 
         tcp_results: list[SingleTestResult] = []
 
-        def _tcp_one(tcp_t):
+        def _annotate(tcp_t, r: SingleTestResult) -> tuple[str, SingleTestResult]:
             target_name = str(tcp_t.get("name") or tcp_t.get("id") or tcp_t.get("url", "unknown"))
             provider = str(tcp_t.get("provider") or "unknown")
             asn = str(tcp_t.get("asn") or "")
             url = str(tcp_t.get("url") or "")
-            r = check_tcp_16_20(tcp_t["url"])
             r.target_name = target_name
             r.raw_data.setdefault("target_id", target_name)
             r.raw_data.setdefault("provider", provider)
@@ -444,6 +521,26 @@ class BlockcheckRunner:
                 r.raw_data.setdefault("url", url)
             return target_name, r
 
+        def _record(target_name: str, r: SingleTestResult) -> None:
+            tcp_results.append(r)
+            self.cb.on_test_result(r)
+            self.cb.on_log(f"  TCP 16-20KB {target_name}: {r.status.value} {r.detail}")
+
+        if self._use_async_probes:
+            engine = AsyncProbeEngine(cancelled=lambda: self.cancelled)
+
+            async def _tcp_async(tcp_t) -> None:
+                _record(*_annotate(tcp_t, await engine.probe_tcp_16_20(tcp_t["url"])))
+
+            async def _all() -> None:
+                await asyncio.gather(*(_tcp_async(t) for t in tcp_targets))
+
+            engine.run(_all())
+            return tcp_results
+
+        def _tcp_one(tcp_t):
+            return _annotate(tcp_t, check_tcp_16_20(tcp_t["url"]))
+
         cancelled_during_phase = False
         pool = ThreadPoolExecutor(max_workers=self.parallel)
         try:
@@ -452,10 +549,7 @@ class BlockcheckRunner:
                 if self.cancelled:
                     cancelled_during_phase = True
                     break
-                target_name, r = future.result()
-                tcp_results.append(r)
-                self.cb.on_test_result(r)
-                self.cb.on_log(f"  TCP 16-20KB {target_name}: {r.status.value} {r.detail}")
+                _record(*future.result())
         finally:
             pool.shutdown(wait=not cancelled_during_phase, cancel_futures=cancelled_during_phase)
 
@@ -592,47 +686,39 @@ class BlockcheckRunner:
         if not stun_targets:
             return results
 
-        def _parse_stun_endpoint(value: str) -> tuple[str, int]:
-            raw = str(value or "").strip()
-            if raw.upper().startswith("STUN:"):
-                raw = raw[5:].strip()
-            if not raw:
-                return "", 3478
-
-            if raw.startswith("["):
-                right = raw.find("]")
-                if right > 1:
-                    host = raw[1:right].strip()
-                    rest = raw[right + 1 :].strip()
-                    if rest.startswith(":"):
-                        try:
-                            port = int(rest[1:])
-                            if 1 <= port <= 65535:
-                                return host, port
-                        except ValueError:
-                            pass
-                    return host, 3478
-
-            if raw.count(":") == 1:
-                host, port_str = raw.rsplit(":", 1)
-                host = host.strip()
-                if host:
-                    try:
-                        port = int(port_str)
-                        if 1 <= port <= 65535:
-                            return host, port
-                    except ValueError:
-                        pass
-                    return host, 3478
+        def _stun_args(target) -> tuple[str, int, list[str] | None]:
+            host, port = self._parse_stun_endpoint(target["value"])
+            addrs = self._hosts.get(host)
+            return host, port, ([*addrs.ipv4, *addrs.ipv6] if addrs.resolved else None)
+
+        def _record(target, r: SingleTestResult) -> None:
+            r.target_name = target["name"]
+            tr = TargetResult(name=target["name"], value=target["value"], tests=[r])
+            self.cb.on_test_result(r)
+            self.cb.on_target_complete(tr)
+            self.cb.on_log(f"  STUN {target['name']}: {r.status.value} {r.detail}")
+            results.append(tr)
+
+        if self._use_async_probes:
+            engine = AsyncProbeEngine(cancelled=lambda: self.cancelled)
 
-            return raw, 3478
+            async def _stun_async(target) -> None:
+                try:
+                    await asyncio.wrap_future(self._hosts.future(self._parse_stun_endpoint(target["value"])[0]))
+                except Exception:
+                    pass
+                host, port, addresses = _stun_args(target)
+                _record(target, await engine.probe_stun(host, port, timeout=STUN_TIMEOUT, addresses=addresses))
+
+            async def _all() -> None:
+                await asyncio.gather(*(_stun_async(t) for t in stun_targets))
+
+            engine.run(_all())
+            return results
 
         def _test_one_stun(target):
-            value = target["value"]
-            host, port = _parse_stun_endpoint(value)
-            r = test_stun(host, port, timeout=STUN_TIMEOUT)
-            r.target_name = target["name"]
-            return target, r
+            host, port, addresses = _stun_args(target)
+            return target, test_stun(host, port, timeout=STUN_TIMEOUT, addresses=addresses)
 
         cancelled_during_phase = False
         pool = ThreadPoolExecutor(max_workers=self.parallel)
@@ -642,12 +728,7 @@ class BlockcheckRunner:
                 if self.cancelled:
                     cancelled_during_phase = True
                     break
-                target, r = future.result()
-                tr = TargetResult(name=target["name"], value=target["value"], tests=[r])
-                self.cb.on_test_result(r)
-                self.cb.on_target_complete(tr)
-                self.cb.on_log(f"  STUN {target['name']}: {r.status.value} {r.detail}")
-                results.append(tr)
+                _record(*future.result())
         finally:
             pool.shutdown(wait=not cancelled_during_phase, cancel_futures=cancelled_during_phase)
 
@@ -673,7 +754,8 @@ class BlockcheckRunner:
             return
 
         def _ping_one(name, host):
-            r = ping_host(host)
+            addrs = self._hosts.get(host)
+            r = ping_host(addrs.ipv4[0] if addrs.ipv4 else host)
             r.target_name = name
             return name, r
 
@@ -809,34 +891,53 @@ class BlockcheckRunner:
             return v
         return re.sub(r"^https?://", "", v).rstrip("/").split("/")[0].lower()
 
-    @staticmethod
-    def _resolve_host_ips(host: str) -> tuple[list[str], list[str]]:
-        """Resolve host and return (ipv4_list, ipv6_list)."""
-        host = str(host or "").strip()
-        if not host:
-            return [], []
-
-        ipv4: list[str] = []
-        ipv6: list[str] = []
-
-        try:
-            infos = socket.getaddrinfo(host, 443, proto=socket.IPPROTO_TCP)
-        except Exception:
-            return [], []
+    @classmethod
+    def _extract_run_hosts(cls, targets: list[dict]) -> list[str]:
+        """Every host the phases will dial: HTTPS targets, PING and STUN endpoints."""
+        hosts = cls._extract_unique_hosts(targets)
+        for t in targets:
+            v = t["value"]
+            if v.startswith("PING:"):
+                hosts.append(v.replace("PING:", "").strip())
+            elif v.startswith("STUN:"):
+                hosts.append(cls._parse_stun_endpoint(v)[0])
+        return [host for host in hosts if host]
 
-        for family, _socktype, _proto, _canonname, sockaddr in infos:
-            ip_raw = sockaddr[0]
-            if not isinstance(ip_raw, str):
-                continue
-            ip = ip_raw
-            if family == socket.AF_INET:
-                if ip not in ipv4:
-                    ipv4.append(ip)
-            elif family == socket.AF_INET6:
-                if ip not in ipv6:
-                    ipv6.append(ip)
-
-        return ipv4, ipv6
+    @staticmethod
+    def _parse_stun_endpoint(value: str) -> tuple[str, int]:
+        raw = str(value or "").strip()
+        if raw.upper().startswith("STUN:"):
+            raw = raw[5:].strip()
+        if not raw:
+            return "", 3478
+
+        if raw.startswith("["):
+            right = raw.find("]")
+            if right > 1:
+                host = raw[1:right].strip()
+                rest = raw[right + 1 :].strip()
+                if rest.startswith(":"):
+                    try:
+                        port = int(rest[1:])
+                        if 1 <= port <= 65535:
+                            return host, port
+                    except ValueError:
+                        pass
+                return host, 3478
+
+        if raw.count(":") == 1:
+            host, port_str = raw.rsplit(":", 1)
+            host = host.strip()
+            if host:
+                try:
+                    port = int(port_str)
+                    if 1 <= port <= 65535:
+                        return host, port
+                except ValueError:
+                    pass
+                return host, 3478
+
+        return raw, 3478
 
     @staticmethod
     def _dns_status_text(result: DNSIntegrityResult) -> str:
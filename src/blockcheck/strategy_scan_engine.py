@@ -0,0 +1,62 @@
+"""Engine launchers for StrategyScanner.
+
+The scanner runs strategies through an abstract launcher: the real one
+starts winws2 + WinDivert, a fake one (tests, benchmark) runs anywhere.
+Only one engine may hold WinDivert at a time, so engines never overlap;
+what overlaps is the work around them (see StrategyScanner._run_scan):
+
+    prepare lane   write next preset (file I/O only, no network)
+    engine lane    launch -> startup wait -> probe
+    teardown lane  terminate engine, wait for WinDivert to settle
+"""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Any
+
+from blockcheck.config import STRATEGY_STARTUP_WAIT
+
+if TYPE_CHECKING:
+    from blockcheck.strategy_scanner import StrategyScanner
+
+
+# Пауза после остановки winws2, чтобы драйвер WinDivert отпустил фильтр.
+WINDIVERT_RELEASE_PAUSE = 0.5
+
+
+class StrategyEngineLauncher(ABC):
+    """Starts and stops the DPI engine for one strategy probe.
+
+    ``launch`` returns a Popen-like object: ``poll()``, ``returncode``,
+    ``stdout``/``stderr`` (readable or None). ``stop`` must leave the host
+    ready for the next ``launch``; it may run on a background thread.
+    """
+
+    startup_wait: float = STRATEGY_STARTUP_WAIT
+    # Пауза после stop() перед следующим launch(); при отмене не ждём.
+    release_pause: float = 0.0
+
+    @abstractmethod
+    def launch(self, preset_path: str) -> Any:
+        """Start the engine with ``@preset_path``."""
+
+    @abstractmethod
+    def stop(self, process: Any) -> None:
+        """Stop ``process`` and release the packet filter."""
+
+
+class Winws2Launcher(StrategyEngineLauncher):
+    """winws2.exe + WinDivert (Windows)."""
+
+    # Without enough time, next winws2 fails to acquire WinDivert.
+    release_pause = WINDIVERT_RELEASE_PAUSE
+
+    def __init__(self, scanner: "StrategyScanner") -> None:
+        self._scanner = scanner
+
+    def launch(self, preset_path: str) -> Any:
+        return self._scanner._launch_winws2(preset_path)
+
+    def stop(self, process: Any) -> None:
+        self._scanner._stop_winws2_process(process)
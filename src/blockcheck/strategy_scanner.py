@@ -7,6 +7,11 @@ Lifecycle per strategy:
   4. Probe target (HTTPS for TCP mode, STUN for UDP mode)
   5. Kill winws2
   6. Record result
+
+Engines run strictly one after another. In pipelined mode step 1 for the
+next strategy (file I/O only) runs while the current engine is up, and step 5
+runs in the background until the next launch needs WinDivert
+(strategy_scan_engine.py).
 """
 
 from __future__ import annotations
@@ -28,15 +33,16 @@ from blockcheck.config import (
     ISP_BODY_MARKERS,
     PROBE_TEMP_HOSTLIST,
     PROBE_TEMP_PRESET,
+    PROBE_TEMP_PRESET_NEXT,
     STRATEGY_KILL_TIMEOUT,
     STRATEGY_PROBE_TIMEOUT,
     STRATEGY_RESPONSE_TIMEOUT,
-    STRATEGY_STARTUP_WAIT,
     TCP_BLOCK_RANGE_MIN,
     TCP_BLOCK_RANGE_MAX,
 )
 from blockcheck.models import TestStatus
 from blockcheck.scan_models import StrategyProbeResult, StrategyScanReport
+from blockcheck.strategy_scan_engine import StrategyEngineLauncher, Winws2Launcher
 from blockcheck.stun_tester import test_stun
 from config.runtime_layout import APPLICATION_PATHS
 from profile.winws2_preset_source import WINWS2_LUA_INIT_LINES
@@ -124,6 +130,8 @@ _GAMES_IPSET_FILENAMES = (
     "ipset-tankix.txt",
 )
 _PROBE_TEMP_GAMES_IPSET = "blockcheck_probe_games_ipset.txt"
+# Два файла пресета: пока движок читает один, следующий пишется во второй.
+_PROBE_TEMP_PRESET_SLOTS = (PROBE_TEMP_PRESET, PROBE_TEMP_PRESET_NEXT)
 _UDP_POOL_MAX_WORKERS = 6
 _UDP_GAMES_CANARY_PROBES: tuple[dict[str, Any], ...] = (
     {"name": "Rust A2S", "kind": "source_a2s", "host": "205.178.168.170", "port": 28015},
@@ -137,7 +145,10 @@ _UDP_GAMES_CANARY_PROBES: tuple[dict[str, Any], ...] = (
 
 
 class StrategyScanner:
-    """Sequential strategy prober for TCP/HTTPS or UDP/STUN."""
+    """Strategy prober for TCP/HTTPS or UDP/STUN, one engine at a time."""
+
+    # None — winws2 (Winws2Launcher), создаётся при первом обращении.
+    _launcher: StrategyEngineLauncher | None = None
 
     def __init__(
         self,
@@ -149,6 +160,8 @@ class StrategyScanner:
         udp_games_scope: str = _UDP_GAMES_SCOPE_ALL,
         *,
         shutdown_sync,
+        launcher: StrategyEngineLauncher | None = None,
+        pipelined: bool = True,
     ):
         self._shutdown_sync = shutdown_sync
         self._scan_protocol = self._normalize_scan_protocol(scan_protocol)
@@ -184,10 +197,15 @@ class StrategyScanner:
             socket.AF_INET6: None,
         }
         self._probe_families: list[int] = [socket.AF_INET]
+        self._pipelined = bool(pipelined)
+        self._teardown_pool: concurrent.futures.ThreadPoolExecutor | None = None
+        self._teardown: concurrent.futures.Future | None = None
 
         # Resolve paths
         self._work_dir = self._find_work_dir()
-        self._winws2_exe = self._find_winws2()
+        # winws2.exe нужен только настоящему движку; с другим launcher не ищем.
+        self._winws2_exe = self._find_winws2() if launcher is None else ""
+        self._launcher = launcher
 
     @property
     def cancelled(self) -> bool:
@@ -319,36 +337,78 @@ class StrategyScanner:
         # Baseline test: check if target is already accessible without winws2
         baseline_accessible = False if self.cancelled else self._run_baseline_test()
 
-        for idx, strat in enumerate(strategies, start=start_index):
-            if self.cancelled:
-                break
+        # Prepare lane: пресет следующей стратегии пишется, пока текущий
+        # движок работает (только файл: DNS резолвится уже под своим движком,
+        # как в последовательном режиме). Teardown lane: остановка движка
+        # идёт в фоне до следующего launch().
+        prepare_pool: concurrent.futures.ThreadPoolExecutor | None = None
+        prepared: concurrent.futures.Future | None = None
+        if self._pipelined and strategies and not self.cancelled:
+            prepare_pool = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="strategy-scan-prepare",
+            )
+            self._teardown_pool = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="strategy-scan-teardown",
+            )
+            prepared = prepare_pool.submit(self._prepare_strategy, strategies[0], 0)
 
-            name = strat.get("name", f"strategy_{idx}")
-            args = strat.get("args", "")
-            strat_id = strat.get("id", name)
+        try:
+            for offset, strat in enumerate(strategies):
+                idx = start_index + offset
+                if self.cancelled:
+                    break
 
-            self._cb.on_strategy_started(name, idx, total_available)
-            self._cb.on_phase(f"[{idx + 1}/{total_available}] {name}")
-            self._cb.on_log(f"\n--- [{idx + 1}/{total_available}] {name} ---")
-            self._cb.on_log(f"  args: {args}")
+                name = strat.get("name", f"strategy_{idx}")
+                args = strat.get("args", "")
+                strat_id = strat.get("id", name)
 
-            result = self._probe_one_strategy(
-                name=name,
-                strat_id=strat_id,
-                args=args,
-                target=self._target,
-            )
+                self._cb.on_strategy_started(name, idx, total_available)
+                self._cb.on_phase(f"[{idx + 1}/{total_available}] {name}")
+                self._cb.on_log(f"\n--- [{idx + 1}/{total_available}] {name} ---")
+                self._cb.on_log(f"  args: {args}")
 
-            if self.cancelled and (not result.success and result.error == "Cancelled"):
-                break
+                # Слот этой стратегии; следующая пишется в другой.
+                slot = offset % len(_PROBE_TEMP_PRESET_SLOTS)
+                preset_path = None
+                if prepared is not None:
+                    try:
+                        preset_path = prepared.result()
+                    except Exception as e:
+                        logger.debug("Preparing strategy %s failed, writing inline: %s", name, e)
+                    prepared = None
+                    if offset + 1 < len(strategies) and not self.cancelled:
+                        prepared = prepare_pool.submit(
+                            self._prepare_strategy,
+                            strategies[offset + 1],
+                            (offset + 1) % len(_PROBE_TEMP_PRESET_SLOTS),
+                        )
 
-            self._cb.on_strategy_result(result)
-            if result.success:
-                working.append(result)
-                self._cb.on_log(f"  SUCCESS ({result.time_ms:.0f} ms)")
-            else:
-                failed.append(result)
-                self._cb.on_log(f"  FAIL: {result.error}")
+                result = self._probe_one_strategy(
+                    name=name,
+                    strat_id=strat_id,
+                    args=args,
+                    target=self._target,
+                    preset_path=preset_path,
+                    slot=slot,
+                )
+
+                if self.cancelled and (not result.success and result.error == "Cancelled"):
+                    break
+
+                self._cb.on_strategy_result(result)
+                if result.success:
+                    working.append(result)
+                    self._cb.on_log(f"  SUCCESS ({result.time_ms:.0f} ms)")
+                else:
+                    failed.append(result)
+                    self._cb.on_log(f"  FAIL: {result.error}")
+        finally:
+            if prepare_pool is not None:
+                prepare_pool.shutdown(wait=True, cancel_futures=True)
+            self._finish_teardown()
+            if self._teardown_pool is not None:
+                self._teardown_pool.shutdown(wait=True)
+                self._teardown_pool = None
 
         tested_now = len(working) + len(failed)
         tested_total = start_index + tested_now
@@ -387,6 +447,60 @@ class StrategyScanner:
         self._cancelled = True
         self._kill_current_process()
 
+    # ------------------------------------------------------------------
+    # Pipeline lanes
+    # ------------------------------------------------------------------
+
+    def _prepare_strategy(self, strat: dict, slot: int) -> str:
+        """Prepare lane: write the preset into ``slot``.
+
+        Runs on a worker thread while another engine is up, so it does only
+        file I/O: no callbacks and no network (that would go through the
+        running engine's desync).
+        """
+        return self._write_temp_preset(strat.get("args", ""), self._target_host, slot=slot)
+
+    def _engine_launcher(self) -> StrategyEngineLauncher:
+        launcher = self._launcher
+        if launcher is None:
+            launcher = self._launcher = Winws2Launcher(self)
+        return launcher
+
+    def _launch_engine(self, preset_path: str) -> Any:
+        """Engine lane: wait for the previous teardown, then start the engine."""
+        self._finish_teardown()
+        return self._engine_launcher().launch(preset_path)
+
+    def _stop_engine(self, proc: Any) -> None:
+        launcher = self._engine_launcher()
+        launcher.stop(proc)
+        if launcher.release_pause > 0 and not self.cancelled:
+            time.sleep(launcher.release_pause)
+
+    def _begin_teardown(self) -> None:
+        """Teardown lane: stop the current engine, in the background when pipelined."""
+        with self._process_lock:
+            proc = self._process
+            self._process = None
+        if proc is None:
+            return
+        pool = self._teardown_pool
+        if pool is None:
+            self._stop_engine(proc)
+            return
+        self._finish_teardown()
+        self._teardown = pool.submit(self._stop_engine, proc)
+
+    def _finish_teardown(self) -> None:
+        future = self._teardown
+        if future is None:
+            return
+        self._teardown = None
+        try:
+            future.result()
+        except Exception as e:
+            logger.debug("Strategy engine teardown failed: %s", e)
+
     # ------------------------------------------------------------------
     # Baseline test
     # ------------------------------------------------------------------
@@ -631,6 +745,7 @@ class StrategyScanner:
 
     def _probe_one_strategy(
         self, name: str, strat_id: str, args: str, target: str,
+        preset_path: str | None = None, *, slot: int,
     ) -> StrategyProbeResult:
         """Test one strategy: write preset -> launch winws2 -> probe -> kill."""
         if self.cancelled:
@@ -650,7 +765,7 @@ class StrategyScanner:
                     target=target,
                 )
             try:
-                result = self._probe_one_attempt(name, strat_id, args, target)
+                result = self._probe_one_attempt(name, strat_id, args, target, preset_path, slot=slot)
                 # If the engine crashed, retry (WinDivert may not have released yet)
                 if not result.success and f"{ENGINE_WINWS2} crashed" in result.error:
                     last_error = result.error
@@ -678,8 +793,13 @@ class StrategyScanner:
 
     def _probe_one_attempt(
         self, name: str, strat_id: str, args: str, target: str,
+        preset_path: str | None = None, *, slot: int,
     ) -> StrategyProbeResult:
-        """Single attempt: write preset -> launch winws2 -> protocol probe -> kill."""
+        """Single attempt: write preset -> launch winws2 -> protocol probe -> kill.
+
+        ``preset_path`` is a preset already written by the prepare lane;
+        without it the preset is written inline into this strategy's ``slot``.
+        """
         if self.cancelled:
             return self._make_cancelled_probe_result(
                 strategy_name=name,
@@ -689,7 +809,8 @@ class StrategyScanner:
             )
         try:
             # 1. Write temp files
-            preset_path = self._write_temp_preset(args, self._target_host)
+            if preset_path is None:
+                preset_path = self._write_temp_preset(args, self._target_host, slot=slot)
             if self.cancelled:
                 return self._make_cancelled_probe_result(
                     strategy_name=name,
@@ -715,12 +836,12 @@ class StrategyScanner:
                 self._cb.on_log("  filter profile: Discord/Telegram voice (STUN + discord_ip_discovery)")
 
             # 2. Launch winws2
-            proc = self._launch_winws2(preset_path)
+            proc = self._launch_engine(preset_path)
             with self._process_lock:
                 self._process = proc
 
             # 3. Wait for startup
-            time.sleep(STRATEGY_STARTUP_WAIT)
+            time.sleep(self._engine_launcher().startup_wait)
             if self.cancelled:
                 return self._make_cancelled_probe_result(
                     strategy_name=name,
@@ -831,11 +952,9 @@ class StrategyScanner:
                 error=str(e),
             )
         finally:
-            self._kill_current_process()
-            # Pause to let WinDivert driver release the filter handle.
-            # Without enough time, next winws2 fails to acquire WinDivert.
-            if not self.cancelled:
-                time.sleep(0.5)
+            # Stop + WinDivert release pause; pipelined it overlaps the
+            # next strategy's bookkeeping and waits only at its launch.
+            self._begin_teardown()
 
     # ------------------------------------------------------------------
     # Probe tests
@@ -1441,14 +1560,25 @@ class StrategyScanner:
             self._games_ipset_entries_count = 0
             return sources[0]
 
-    def _write_temp_preset(self, strategy_args: str, target_domain: str) -> str:
-        """Generate a minimal preset file for probing one strategy."""
-        preset_path = os.path.join(self._work_dir, PROBE_TEMP_PRESET)
+    def _write_temp_preset(self, strategy_args: str, target_domain: str, *, slot: int) -> str:
+        """Generate a minimal preset file for probing one strategy.
+
+        ``slot`` picks one of two preset files, so the next preset can be
+        written while the running engine still owns the current one.
+        """
+        preset_path = os.path.join(self._work_dir, _PROBE_TEMP_PRESET_SLOTS[slot])
         hostlist_path = os.path.join(self._work_dir, PROBE_TEMP_HOSTLIST)
 
-        # Write single-domain hostlist
-        with open(hostlist_path, "w", encoding="utf-8") as f:
-            f.write(target_domain + "\n")
+        # Write single-domain hostlist (shared by both slots, same for every strategy)
+        hostlist_text = target_domain + "\n"
+        try:
+            with open(hostlist_path, "r", encoding="utf-8") as f:
+                hostlist_current = f.read()
+        except OSError:
+            hostlist_current = None
+        if hostlist_current != hostlist_text:
+            with open(hostlist_path, "w", encoding="utf-8") as f:
+                f.write(hostlist_text)
 
         lines: list[str] = []
 
@@ -1577,7 +1707,10 @@ class StrategyScanner:
 
         if proc is None:
             return
+        self._engine_launcher().stop(proc)
 
+    def _stop_winws2_process(self, proc: subprocess.Popen) -> None:
+        """Terminate winws2 and clean WinDivert (Winws2Launcher.stop)."""
         killed_cleanly = False
         try:
             if proc.poll() is None:
@@ -1683,7 +1816,7 @@ class StrategyScanner:
 
     def _cleanup_temp_files(self) -> None:
         """Remove temp preset and hostlist files."""
-        for fname in (PROBE_TEMP_PRESET, PROBE_TEMP_HOSTLIST, _PROBE_TEMP_GAMES_IPSET):
+        for fname in (*_PROBE_TEMP_PRESET_SLOTS, PROBE_TEMP_HOSTLIST, _PROBE_TEMP_GAMES_IPSET):
             path = os.path.join(self._work_dir, fname)
             try:
                 if os.path.exists(path):
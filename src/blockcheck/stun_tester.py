@@ -117,8 +117,20 @@ def _resolve_udp_addresses(
     host: str,
     port: int,
     family: socket.AddressFamily | None,
+    addresses: list[str] | None = None,
 ) -> list[tuple[int, int, int, tuple]]:
     """Resolve target host to unique UDP socket addresses."""
+    if addresses is not None:
+        # Pre-resolved by the runner's host resolution stage.
+        resolved_pre: list[tuple[int, int, int, tuple]] = []
+        for ip in dict.fromkeys(addresses):
+            af = socket.AF_INET6 if ":" in ip else socket.AF_INET
+            if family in (socket.AF_INET, socket.AF_INET6) and af != family:
+                continue
+            sockaddr = (ip, port, 0, 0) if af == socket.AF_INET6 else (ip, port)
+            resolved_pre.append((af, socket.SOCK_DGRAM, socket.IPPROTO_UDP, sockaddr))
+        return resolved_pre
+
     if family == socket.AF_INET:
         resolve_family = socket.AF_INET
     elif family == socket.AF_INET6:
@@ -150,6 +162,7 @@ def test_stun(
     timeout: int = STUN_TIMEOUT,
     retries: int = 2,
     family: socket.AddressFamily | None = None,
+    addresses: list[str] | None = None,
 ) -> SingleTestResult:
     """Test a STUN server via UDP with retries, return SingleTestResult.
 
@@ -162,12 +175,13 @@ def test_stun(
         timeout: Total timeout budget in seconds.
         retries: Number of retry rounds.
         family: Optional forced address family (AF_INET / AF_INET6).
+        addresses: Already resolved IPs of host (skips getaddrinfo).
     """
     start = time.monotonic()
     target_name = f"{host}:{port}"
 
     try:
-        addresses = _resolve_udp_addresses(host, port, family=family)
+        addresses = _resolve_udp_addresses(host, port, family=family, addresses=addresses)
     except (socket.gaierror, OSError):
         return SingleTestResult(
             target_name=target_name, test_type=TestType.STUN,
@@ -92,53 +92,60 @@ def check_tcp_16_20_single(
                     if bytes_received > 25_000:
                         break
 
-        elapsed = (time.time() - start) * 1000
-
-        if bytes_received > TCP_BLOCK_RANGE_MAX:
-            return SingleTestResult(
-                target_name=url, test_type=TestType.TCP_16_20,
-                status=TestStatus.OK, time_ms=round(elapsed, 2),
-                detail=f"Received {bytes_received}B (no 16-20KB block)",
-                raw_data={"bytes_received": bytes_received},
-            )
-        elif TCP_BLOCK_RANGE_MIN <= bytes_received <= TCP_BLOCK_RANGE_MAX:
-            return SingleTestResult(
-                target_name=url, test_type=TestType.TCP_16_20,
-                status=TestStatus.FAIL, error_code="TCP_16_20",
-                time_ms=round(elapsed, 2),
-                detail=f"Connection dropped at {bytes_received}B (16-20KB range)",
-                raw_data={"bytes_received": bytes_received},
-            )
-        else:
-            return SingleTestResult(
-                target_name=url, test_type=TestType.TCP_16_20,
-                status=TestStatus.OK, time_ms=round(elapsed, 2),
-                detail=f"Received {bytes_received}B",
-                raw_data={"bytes_received": bytes_received},
-            )
+        return tcp_16_20_received_result(url, bytes_received, (time.time() - start) * 1000)
 
     except Exception as e:
-        elapsed = (time.time() - start) * 1000
-        error_msg = str(e).lower()
-
-        # Check if the connection was reset in the 16-20KB range
-        if bytes_received > 0 and TCP_BLOCK_RANGE_MIN <= bytes_received <= TCP_BLOCK_RANGE_MAX:
-            if "reset" in error_msg or "aborted" in error_msg:
-                return SingleTestResult(
-                    target_name=url, test_type=TestType.TCP_16_20,
-                    status=TestStatus.FAIL, error_code="TCP_16_20",
-                    time_ms=round(elapsed, 2),
-                    detail=f"RST at {bytes_received}B (16-20KB DPI block)",
-                    raw_data={"bytes_received": bytes_received, "error": str(e)[:80]},
-                )
+        return tcp_16_20_error_result(url, e, bytes_received, (time.time() - start) * 1000)
+
 
+def tcp_16_20_received_result(url: str, bytes_received: int, elapsed: float) -> SingleTestResult:
+    """Result for a transfer that ended normally after bytes_received body bytes."""
+    if bytes_received > TCP_BLOCK_RANGE_MAX:
         return SingleTestResult(
             target_name=url, test_type=TestType.TCP_16_20,
-            status=TestStatus.ERROR, error_code="TCP_ERR",
+            status=TestStatus.OK, time_ms=round(elapsed, 2),
+            detail=f"Received {bytes_received}B (no 16-20KB block)",
+            raw_data={"bytes_received": bytes_received},
+        )
+    elif TCP_BLOCK_RANGE_MIN <= bytes_received <= TCP_BLOCK_RANGE_MAX:
+        return SingleTestResult(
+            target_name=url, test_type=TestType.TCP_16_20,
+            status=TestStatus.FAIL, error_code="TCP_16_20",
             time_ms=round(elapsed, 2),
-            detail=f"{str(e)[:80]} ({bytes_received}B received)",
+            detail=f"Connection dropped at {bytes_received}B (16-20KB range)",
             raw_data={"bytes_received": bytes_received},
         )
+    else:
+        return SingleTestResult(
+            target_name=url, test_type=TestType.TCP_16_20,
+            status=TestStatus.OK, time_ms=round(elapsed, 2),
+            detail=f"Received {bytes_received}B",
+            raw_data={"bytes_received": bytes_received},
+        )
+
+
+def tcp_16_20_error_result(url: str, e: Exception, bytes_received: int, elapsed: float) -> SingleTestResult:
+    """Result for a transfer that failed after bytes_received body bytes."""
+    error_msg = str(e).lower()
+
+    # Check if the connection was reset in the 16-20KB range
+    if bytes_received > 0 and TCP_BLOCK_RANGE_MIN <= bytes_received <= TCP_BLOCK_RANGE_MAX:
+        if "reset" in error_msg or "aborted" in error_msg:
+            return SingleTestResult(
+                target_name=url, test_type=TestType.TCP_16_20,
+                status=TestStatus.FAIL, error_code="TCP_16_20",
+                time_ms=round(elapsed, 2),
+                detail=f"RST at {bytes_received}B (16-20KB DPI block)",
+                raw_data={"bytes_received": bytes_received, "error": str(e)[:80]},
+            )
+
+    return SingleTestResult(
+        target_name=url, test_type=TestType.TCP_16_20,
+        status=TestStatus.ERROR, error_code="TCP_ERR",
+        time_ms=round(elapsed, 2),
+        detail=f"{str(e)[:80]} ({bytes_received}B received)",
+        raw_data={"bytes_received": bytes_received},
+    )
 
 
 def check_tcp_16_20(
@@ -158,9 +165,18 @@ def check_tcp_16_20(
         results.append(result)
 
         # If we got a clear OK with >20KB, no need to retry
-        if result.status == TestStatus.OK and result.raw_data.get("bytes_received", 0) > TCP_BLOCK_RANGE_MAX:
+        if is_conclusive_tcp_16_20_ok(result):
             return result
 
+    return summarize_tcp_16_20_attempts(url, results, retries)
+
+
+def is_conclusive_tcp_16_20_ok(result: SingleTestResult) -> bool:
+    return result.status == TestStatus.OK and result.raw_data.get("bytes_received", 0) > TCP_BLOCK_RANGE_MAX
+
+
+def summarize_tcp_16_20_attempts(url: str, results: list[SingleTestResult], retries: int) -> SingleTestResult:
+    """Combine retried 16-20KB attempts into one result."""
     # Analyze results — check for consistent 16-20KB failures
     fail_16_20 = [r for r in results if r.error_code == "TCP_16_20"]
     if len(fail_16_20) >= 2:
@@ -19,7 +19,23 @@ def _normalize_ip_family(ip_family: str | None) -> str:
     return "auto"
 
 
-def _resolve_connect_addrs(host: str, port: int, ip_family: str) -> list[tuple[int, tuple]]:
+def _resolve_connect_addrs(
+    host: str,
+    port: int,
+    ip_family: str,
+    addresses: list[str] | None = None,
+) -> list[tuple[int, tuple]]:
+    if addresses is not None:
+        # Pre-resolved by the runner's host resolution stage.
+        addrs: list[tuple[int, tuple]] = []
+        for ip in addresses:
+            if ":" in ip:
+                if ip_family != "ipv4":
+                    addrs.append((socket.AF_INET6, (ip, port, 0, 0)))
+            elif ip_family != "ipv6":
+                addrs.append((socket.AF_INET, (ip, port)))
+        return addrs
+
     if ip_family == "ipv4":
         family = socket.AF_INET
     elif ip_family == "ipv6":
@@ -35,12 +51,163 @@ def _resolve_connect_addrs(host: str, port: int, ip_family: str) -> list[tuple[i
     return addrs
 
 
+def _build_tls_context(tls_version: str | None, cafile: str | None = None) -> ssl.SSLContext:
+    context = ssl.create_default_context(cafile=cafile)
+    if tls_version == "1.2":
+        context.minimum_version = ssl.TLSVersion.TLSv1_2
+        context.maximum_version = ssl.TLSVersion.TLSv1_2
+    elif tls_version == "1.3":
+        context.minimum_version = ssl.TLSVersion.TLSv1_3
+        context.maximum_version = ssl.TLSVersion.TLSv1_3
+    return context
+
+
+def _https_test_type(tls_version: str | None) -> TestType:
+    if tls_version == "1.2":
+        return TestType.TLS_12
+    if tls_version == "1.3":
+        return TestType.TLS_13
+    return TestType.HTTP
+
+
+def _resolve_error_result(host: str, test_type: TestType, family: str, start: float, e: Exception) -> SingleTestResult:
+    if isinstance(e, socket.gaierror):
+        return SingleTestResult(
+            target_name=host, test_type=test_type,
+            status=TestStatus.ERROR, error_code="DNS_ERR",
+            time_ms=round((time.time() - start) * 1000, 2),
+            detail=f"DNS resolution failed: {str(e)[:80]}",
+            raw_data={"ip_family": family},
+        )
+    return SingleTestResult(
+        target_name=host, test_type=test_type,
+        status=TestStatus.ERROR, error_code="RESOLVE_ERR",
+        time_ms=round((time.time() - start) * 1000, 2),
+        detail=f"Resolve error: {str(e)[:80]}",
+        raw_data={"ip_family": family},
+    )
+
+
+def _no_addr_result(host: str, test_type: TestType, family: str, start: float) -> SingleTestResult:
+    return SingleTestResult(
+        target_name=host, test_type=test_type,
+        status=TestStatus.UNSUPPORTED, error_code="NO_ADDR",
+        time_ms=round((time.time() - start) * 1000, 2),
+        detail=f"No addresses for requested family: {family}",
+        raw_data={"ip_family": family},
+    )
+
+
+def _https_ok_result(
+    host: str,
+    test_type: TestType,
+    actual_tls: str | None,
+    response: bytes,
+    addr_family: int,
+    sockaddr: tuple,
+    start: float,
+) -> SingleTestResult:
+    elapsed = (time.time() - start) * 1000
+
+    # Parse HTTP status
+    status_code = None
+    first_line = response.decode("utf-8", errors="ignore").split("\r\n")[0]
+    match = re.search(r"HTTP/\d\.?\d?\s+(\d{3})", first_line)
+    if match:
+        status_code = int(match.group(1))
+
+    resolved_family = "ipv6" if addr_family == socket.AF_INET6 else "ipv4"
+    connected_ip = str(sockaddr[0]) if sockaddr else ""
+
+    return SingleTestResult(
+        target_name=host, test_type=test_type,
+        status=TestStatus.OK, time_ms=round(elapsed, 2),
+        detail=f"{actual_tls} HTTP {status_code or '?'}",
+        raw_data={
+            "tls_version": actual_tls,
+            "status_code": status_code,
+            "bytes_read": len(response),
+            "ip_family": resolved_family,
+            "connected_ip": connected_ip,
+        },
+    )
+
+
+def _https_failure_result(
+    host: str,
+    test_type: TestType,
+    family: str,
+    start: float,
+    last_exception: Exception | None,
+    bytes_read: int,
+) -> SingleTestResult:
+    if isinstance(last_exception, ssl.SSLError):
+        e = last_exception
+        elapsed = (time.time() - start) * 1000
+        label, detail, _ = classify_ssl_error(e, bytes_read)
+
+        # TLS version unsupported is not a failure
+        if label == "TLS_UNSUPPORTED":
+            return SingleTestResult(
+                target_name=host, test_type=test_type,
+                status=TestStatus.UNSUPPORTED, error_code=label,
+                time_ms=round(elapsed, 2), detail=detail,
+                raw_data={"ip_family": family},
+            )
+
+        return SingleTestResult(
+            target_name=host, test_type=test_type,
+            status=TestStatus.FAIL, error_code=label,
+            time_ms=round(elapsed, 2), detail=detail,
+            raw_data={"ip_family": family},
+        )
+
+    if isinstance(last_exception, socket.timeout):
+        return SingleTestResult(
+            target_name=host, test_type=test_type,
+            status=TestStatus.TIMEOUT, error_code="TIMEOUT",
+            time_ms=round((time.time() - start) * 1000, 2),
+            detail="Connection timeout",
+            raw_data={"ip_family": family},
+        )
+
+    if isinstance(last_exception, (ConnectionResetError, ConnectionRefusedError, OSError)):
+        e = last_exception
+        elapsed = (time.time() - start) * 1000
+        label, detail, _ = classify_connect_error(e, bytes_read)
+        return SingleTestResult(
+            target_name=host, test_type=test_type,
+            status=TestStatus.FAIL, error_code=label,
+            time_ms=round(elapsed, 2), detail=detail,
+            raw_data={"ip_family": family},
+        )
+
+    if last_exception is not None:
+        e = last_exception
+        return SingleTestResult(
+            target_name=host, test_type=test_type,
+            status=TestStatus.ERROR, error_code="ERROR",
+            time_ms=round((time.time() - start) * 1000, 2),
+            detail=str(e)[:100],
+            raw_data={"ip_family": family},
+        )
+
+    return SingleTestResult(
+        target_name=host, test_type=test_type,
+        status=TestStatus.ERROR, error_code="NO_RESULT",
+        time_ms=round((time.time() - start) * 1000, 2),
+        detail="No connection attempts completed",
+        raw_data={"ip_family": family},
+    )
+
+
 def test_https(
     host: str,
     port: int = 443,
     timeout: int = HTTPS_TIMEOUT,
     tls_version: str | None = None,
     ip_family: str = "auto",
+    addresses: list[str] | None = None,
 ) -> SingleTestResult:
     """Test HTTPS connection with optional TLS version pinning.
 
@@ -49,47 +216,24 @@ def test_https(
         port: Target port (default 443)
         timeout: Connection timeout in seconds
         tls_version: "1.2" or "1.3" to pin, None for any
+        addresses: Already resolved IPs of host (skips getaddrinfo)
 
     Returns:
         SingleTestResult with DPI-aware error classification
     """
-    test_type = TestType.HTTP
-    if tls_version == "1.2":
-        test_type = TestType.TLS_12
-    elif tls_version == "1.3":
-        test_type = TestType.TLS_13
+    test_type = _https_test_type(tls_version)
 
     start = time.time()
     bytes_read = 0
     family = _normalize_ip_family(ip_family)
 
     try:
-        connect_addrs = _resolve_connect_addrs(host, port, family)
-    except socket.gaierror as e:
-        return SingleTestResult(
-            target_name=host, test_type=test_type,
-            status=TestStatus.ERROR, error_code="DNS_ERR",
-            time_ms=round((time.time() - start) * 1000, 2),
-            detail=f"DNS resolution failed: {str(e)[:80]}",
-            raw_data={"ip_family": family},
-        )
+        connect_addrs = _resolve_connect_addrs(host, port, family, addresses)
     except Exception as e:
-        return SingleTestResult(
-            target_name=host, test_type=test_type,
-            status=TestStatus.ERROR, error_code="RESOLVE_ERR",
-            time_ms=round((time.time() - start) * 1000, 2),
-            detail=f"Resolve error: {str(e)[:80]}",
-            raw_data={"ip_family": family},
-        )
+        return _resolve_error_result(host, test_type, family, start, e)
 
     if not connect_addrs:
-        return SingleTestResult(
-            target_name=host, test_type=test_type,
-            status=TestStatus.UNSUPPORTED, error_code="NO_ADDR",
-            time_ms=round((time.time() - start) * 1000, 2),
-            detail=f"No addresses for requested family: {family}",
-            raw_data={"ip_family": family},
-        )
+        return _no_addr_result(host, test_type, family, start)
 
     last_exception: Exception | None = None
 
@@ -100,14 +244,7 @@ def test_https(
             sock = socket.socket(addr_family, socket.SOCK_STREAM)
             sock.settimeout(timeout)
 
-            context = ssl.create_default_context()
-            if tls_version == "1.2":
-                context.minimum_version = ssl.TLSVersion.TLSv1_2
-                context.maximum_version = ssl.TLSVersion.TLSv1_2
-            elif tls_version == "1.3":
-                context.minimum_version = ssl.TLSVersion.TLSv1_3
-                context.maximum_version = ssl.TLSVersion.TLSv1_3
-
+            context = _build_tls_context(tls_version)
             ssock = context.wrap_socket(sock, server_hostname=host)
             ssock.connect(sockaddr)
 
@@ -131,30 +268,7 @@ def test_https(
 
             ssock.close()
 
-            elapsed = (time.time() - start) * 1000
-
-            # Parse HTTP status
-            status_code = None
-            first_line = response.decode("utf-8", errors="ignore").split("\r\n")[0]
-            match = re.search(r"HTTP/\d\.?\d?\s+(\d{3})", first_line)
-            if match:
-                status_code = int(match.group(1))
-
-            resolved_family = "ipv6" if addr_family == socket.AF_INET6 else "ipv4"
-            connected_ip = str(sockaddr[0]) if sockaddr else ""
-
-            return SingleTestResult(
-                target_name=host, test_type=test_type,
-                status=TestStatus.OK, time_ms=round(elapsed, 2),
-                detail=f"{actual_tls} HTTP {status_code or '?'}",
-                raw_data={
-                    "tls_version": actual_tls,
-                    "status_code": status_code,
-                    "bytes_read": bytes_read,
-                    "ip_family": resolved_family,
-                    "connected_ip": connected_ip,
-                },
-            )
+            return _https_ok_result(host, test_type, actual_tls, response, addr_family, sockaddr, start)
 
         except ssl.SSLError as e:
             last_exception = e
@@ -180,61 +294,4 @@ def test_https(
                 except Exception:
                     pass
 
-    if isinstance(last_exception, ssl.SSLError):
-        e = last_exception
-        elapsed = (time.time() - start) * 1000
-        label, detail, _ = classify_ssl_error(e, bytes_read)
-
-        # TLS version unsupported is not a failure
-        if label == "TLS_UNSUPPORTED":
-            return SingleTestResult(
-                target_name=host, test_type=test_type,
-                status=TestStatus.UNSUPPORTED, error_code=label,
-                time_ms=round(elapsed, 2), detail=detail,
-                raw_data={"ip_family": family},
-            )
-
-        return SingleTestResult(
-            target_name=host, test_type=test_type,
-            status=TestStatus.FAIL, error_code=label,
-            time_ms=round(elapsed, 2), detail=detail,
-            raw_data={"ip_family": family},
-        )
-
-    if isinstance(last_exception, socket.timeout):
-        return SingleTestResult(
-            target_name=host, test_type=test_type,
-            status=TestStatus.TIMEOUT, error_code="TIMEOUT",
-            time_ms=round((time.time() - start) * 1000, 2),
-            detail="Connection timeout",
-            raw_data={"ip_family": family},
-        )
-
-    if isinstance(last_exception, (ConnectionResetError, ConnectionRefusedError, OSError)):
-        e = last_exception
-        elapsed = (time.time() - start) * 1000
-        label, detail, _ = classify_connect_error(e, bytes_read)
-        return SingleTestResult(
-            target_name=host, test_type=test_type,
-            status=TestStatus.FAIL, error_code=label,
-            time_ms=round(elapsed, 2), detail=detail,
-            raw_data={"ip_family": family},
-        )
-
-    if last_exception is not None:
-        e = last_exception
-        return SingleTestResult(
-            target_name=host, test_type=test_type,
-            status=TestStatus.ERROR, error_code="ERROR",
-            time_ms=round((time.time() - start) * 1000, 2),
-            detail=str(e)[:100],
-            raw_data={"ip_family": family},
-        )
-
-    return SingleTestResult(
-        target_name=host, test_type=test_type,
-        status=TestStatus.ERROR, error_code="NO_RESULT",
-        time_ms=round((time.time() - start) * 1000, 2),
-        detail="No connection attempts completed",
-        raw_data={"ip_family": family},
-    )
+    return _https_failure_result(host, test_type, family, start, last_exception, bytes_read)
@@ -5,18 +5,21 @@
 """
 
 import socket
-import subprocess
-import re, sys
 from typing import Dict, Optional
 from log.log import log
 
 from blockcheck.config import KNOWN_BLOCK_IPS
+from blockcheck.dns_resolver import DnsResolver, get_default_resolver
 
 
 class DNSChecker:
     """Класс для проверки DNS подмены"""
     
-    def __init__(self):
+    def __init__(self, resolver: Optional[DnsResolver] = None):
+        self._resolver = resolver or get_default_resolver()
+        # (домен, сервер) -> DnsAnswer | DnsError текущей проверки
+        self._prefetched: Dict[tuple, object] = {}
+
         # Известные легитимные IP диапазоны для сервисов
         self.known_ranges = {
             'youtube': {
@@ -104,6 +107,10 @@ class DNSChecker:
         
         if self._is_stop_requested(should_stop):
             return results
+
+        # Каждая проверка — свежие ответы серверов.
+        self._prefetched.clear()
+        self._resolver.clear_cache()
         
         # Сначала проверяем доступность внешних DNS
         self._log("\n🌐 Проверка доступности DNS серверов:", log_callback, should_stop)
@@ -136,137 +143,29 @@ class DNSChecker:
         
         return results
 
-    def _nslookup(self, domain: str, dns_server: str) -> Optional[str]:
-        """Выполняет nslookup для домена через указанный DNS сервер"""
-        try:
-            # Формируем команду nslookup
-            command = ["nslookup", domain, dns_server]
-            
-            # Выполняем команду
-            result = subprocess.run(
-                command,
-                capture_output=True,
-                timeout=10,
-                creationflags=subprocess.CREATE_NO_WINDOW if sys.platform.startswith('win') else 0
-            )
-            
-            # Декодируем вывод с правильной кодировкой для Windows
-            try:
-                output = result.stdout.decode('cp866', errors='ignore')
-            except:
-                output = result.stdout.decode('utf-8', errors='ignore')
-            
-            # Логируем для отладки
-            log(f"nslookup {domain} @{dns_server} returned code {result.returncode}", "DEBUG")
-            
-            # Проверяем на ошибки
-            if "can't find" in output.lower() or "non-existent" in output.lower():
-                return None
-                
-            if "timed out" in output.lower() or "timeout" in output.lower():
-                return None
-            
-            # Проверяем успешность по коду возврата
-            if result.returncode != 0 and not output:
-                return None
-            
-            # Специальная обработка для multiline Addresses
-            lines = output.split('\n')
-            
-            # Ищем строку "Addresses:" или "Адреса:"
-            addresses_idx = -1
-            for i, line in enumerate(lines):
-                if any(addr in line for addr in ['Addresses:', 'Адреса:']):
-                    addresses_idx = i
-                    break
-            
-            # Если нашли "Addresses:", проверяем следующие строки
-            if addresses_idx >= 0:
-                # Сначала проверяем есть ли IP в той же строке
-                addr_line = lines[addresses_idx]
-                ip_match = re.search(r'(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})', addr_line)
-                if ip_match:
-                    ip = ip_match.group(1)
-                    if self._is_valid_ip(ip) and ip != dns_server:
-                        log(f"Found IP in Addresses line: {ip}", "DEBUG")
-                        return ip
-                
-                # Проверяем следующие строки (обычно IP адреса идут с отступом)
-                for j in range(addresses_idx + 1, min(addresses_idx + 30, len(lines))):
-                    line = lines[j].strip()
-                    
-                    # Прекращаем если встретили новую секцию
-                    if line and not line[0].isspace() and ':' in line:
-                        break
-                    
-                    # Ищем IPv4 адрес
-                    ip_match = re.search(r'^(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})$', line)
-                    if ip_match:
-                        ip = ip_match.group(1)
-                        if self._is_valid_ip(ip) and ip != dns_server:
-                            log(f"Found IP in multiline: {ip}", "DEBUG")
-                            return ip
-            
-            # Альтернативный метод - ищем секцию "Non-authoritative answer"
-            in_answer_section = False
-            
-            for i, line in enumerate(lines):
-                line_stripped = line.strip()
-                
-                # Проверяем начало секции ответа
-                if any(marker in line.lower() for marker in [
-                    'non-authoritative answer', 
-                    'не заслуживающий доверия',
-                    'неавторитетный ответ'
-                ]):
-                    in_answer_section = True
-                    continue
-                
-                # Если мы в секции ответа
-                if in_answer_section:
-                    # Ищем строки "Address:" (одиночный адрес)
-                    if 'Address:' in line or 'Адрес:' in line:
-                        ip_match = re.search(r'(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})', line)
-                        if ip_match:
-                            ip = ip_match.group(1)
-                            if self._is_valid_ip(ip) and ip != dns_server:
-                                log(f"Found IP in Address line: {ip}", "DEBUG")
-                                return ip
-                    
-                    # Проверяем просто строки с IP (для multiline вывода)
-                    ip_match = re.search(r'^\s*(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})\s*$', line)
-                    if ip_match:
-                        ip = ip_match.group(1)
-                        if self._is_valid_ip(ip) and ip != dns_server:
-                            log(f"Found standalone IP: {ip}", "DEBUG")
-                            return ip
-            
-            # Последняя попытка - ищем все IP адреса
-            all_ips = re.findall(r'\b(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})\b', output)
-            
-            # Отладка
-            if all_ips:
-                log(f"All IPs found: {all_ips}", "DEBUG")
-            
-            # Фильтруем и возвращаем первый подходящий
-            for ip in all_ips:
-                if (self._is_valid_ip(ip) and 
-                    ip != dns_server and 
-                    not ip.startswith('127.') and
-                    not ip.startswith('192.168.') and
-                    not ip.startswith('10.')):
-                    log(f"Returning IP from all IPs: {ip}", "DEBUG")
-                    return ip
-            
-            log(f"No valid IP found for {domain} via {dns_server}", "DEBUG")
-            return None
-            
-        except subprocess.TimeoutExpired:
-            log(f"nslookup timeout for {domain} via {dns_server}", "DEBUG")
-            return None
-        except Exception as e:
-            log(f"nslookup error: {e}", "DEBUG")
-            return None
+    def _query_dns_server(self, domain: str, dns_server: str) -> Optional[str]:
+        """A-запрос к указанному DNS серверу (ответ из предзагрузки, если есть).
+
+        Возвращает первый IPv4 из ответа; таймаут/ошибка сети — DnsError.
+        """
+        answer = self._prefetched.get((domain, dns_server))
+        if answer is None:
+            answer = self._resolver.resolve(domain, dns_server, "A")
+        if isinstance(answer, Exception):
+            raise answer
+        for ip in answer.addresses:
+            if self._is_valid_ip(ip) and ip != dns_server:
+                return ip
+        log(f"No valid IP found for {domain} via {dns_server} (rcode {answer.rcode})", "DEBUG")
+        return None
+
+    def _prefetch(self, queries) -> None:
+        """Отправляет все запросы (домен, сервер) разом — по одному сокету на сервер."""
+        queries = [(domain, server) for domain, server in queries if server and (domain, server) not in self._prefetched]
+        if not queries:
+            return
+        answers = self._resolver.resolve_many([(domain, server, "A") for domain, server in queries])
+        self._prefetched.update(zip(queries, answers))
 
     def _check_dns_servers_availability(self, log_callback=None, should_stop=None) -> Dict[str, bool]:
         """Проверяет доступность DNS серверов через DNS запросы"""
@@ -274,6 +173,14 @@ class DNSChecker:
         
         self._log("Проверка доступности DNS серверов...", log_callback, should_stop)
         
+        # Пробуем несколько популярных доменов
+        test_domains = ["google.com", "cloudflare.com", "example.com"]
+        self._prefetch(
+            (test_domain, dns_server)
+            for dns_server in self.dns_servers.values()
+            for test_domain in test_domains
+        )
+
         for dns_name, dns_server in self.dns_servers.items():
             if self._is_stop_requested(should_stop):
                 break
@@ -283,9 +190,6 @@ class DNSChecker:
             # Проверяем может ли DNS сервер резолвить домены
             test_successful = False
             
-            # Пробуем несколько популярных доменов
-            test_domains = ["google.com", "cloudflare.com", "example.com"]
-            
             for test_domain in test_domains:
                 if self._is_stop_requested(should_stop):
                     break
@@ -313,6 +217,11 @@ class DNSChecker:
         }
         
         service_info = self.known_ranges[service]
+        self._prefetch(
+            (domain, dns_server)
+            for domain in service_info['domains']
+            for dns_server in self.dns_servers.values()
+        )
         
         # Проверяем каждый домен
         for domain in service_info['domains']:
@@ -368,8 +277,7 @@ class DNSChecker:
         
         try:
             if dns_server:
-                # Используем nslookup для конкретного DNS сервера
-                result['ip'] = self._nslookup(domain, dns_server)
+                result['ip'] = self._query_dns_server(domain, dns_server)
             else:
                 # Используем системный DNS
                 result['ip'] = socket.gethostbyname(domain)
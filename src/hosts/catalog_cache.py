@@ -0,0 +1,310 @@
+"""Персистентный кэш split hosts-каталога.
+
+Кэш лежит в `APPLICATION_PATHS.tmp_dir/hosts_catalog_cache` (папка каталога
+бывает в установке или в исходниках — туда не пишем), по три файла на папку
+каталога с префиксом-хэшем её пути:
+
+* `<хэш>.cache.json` — манифест: для каждого файла каталога
+  (size, mtime_ns, crc32 содержимого, длина, «устоялся ли» stat) и подпись
+  каталога, для которой сохранён собранный `HostsCatalog`;
+* `<хэш>.catalog.json` — сам собранный `HostsCatalog`, читается
+  только при совпадении подписи;
+* `<хэш>.services.json` — нормализованные сервисы каждого файла
+  (по crc32), читается только когда какой-то файл изменился.
+
+Файл перечитывается и хэшируется заново, только если его stat отличается от
+записанного. Stat, снятый меньше чем через `_RACY_WINDOW_NS` после mtime,
+не считается надёжным (запись в тот же тик mtime не меняет его) — такой
+файл перечитывается при каждой проверке, пока не «устоится».
+
+Кэш — только ускорение: битые или чужой версии файлы игнорируются, ошибки
+записи глушатся, и следующая загрузка просто прочитает каталог целиком.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import stat
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from utils.atomic_text import atomic_write_text
+
+HOSTS_CATALOG_CACHE_DIR_NAME = "hosts_catalog_cache"
+_CACHE_VERSION = 1
+# Запас на грубое разрешение mtime (FAT — 2 с) и на запись сразу после хэширования.
+_RACY_WINDOW_NS = 2_000_000_000
+
+# Маркер «нет записи в кэше» (None — допустимый разбор).
+MISSING = object()
+
+
+@dataclass(frozen=True, slots=True)
+class CatalogFileState:
+    size: int
+    mtime_ns: int
+    crc: int
+    length: int
+    settled: bool
+
+
+@dataclass(slots=True)
+class CatalogScan:
+    # (rel, crc32, длина) — ровно то, что сворачивается в подпись каталога.
+    entries: list[tuple[str, int, int]] = field(default_factory=list)
+    # Содержимое файлов, которые пришлось перечитать в этом проходе.
+    fresh: dict[str, bytes] = field(default_factory=dict)
+
+
+def _stat_key(path: Path) -> tuple[int, int] | None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if not stat.S_ISREG(st.st_mode):
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def default_hosts_catalog_cache_dir() -> Path:
+    from config.runtime_layout import APPLICATION_PATHS
+
+    return APPLICATION_PATHS.tmp_dir / HOSTS_CATALOG_CACHE_DIR_NAME
+
+
+def _cache_prefix(root: Path, cache_dir: str | os.PathLike | None) -> Path:
+    folder = Path(cache_dir) if cache_dir is not None else default_hosts_catalog_cache_dir()
+    digest = hashlib.blake2b(os.path.normcase(os.path.abspath(root)).encode("utf-8"), digest_size=12).hexdigest()
+    return folder / digest
+
+
+class SplitCatalogCache:
+    """Манифест, сервисы по файлам и собранный каталог одной папки каталога."""
+
+    def __init__(self, root: Path, cache_dir: str | os.PathLike | None = None):
+        self.root = Path(root)
+        prefix = _cache_prefix(self.root, cache_dir)
+        self.manifest_path = prefix.with_name(f"{prefix.name}.cache.json")
+        self.services_path = prefix.with_name(f"{prefix.name}.services.json")
+        self.catalog_path = prefix.with_name(f"{prefix.name}.catalog.json")
+        self._prefix = str(self.root) + os.sep
+        self._lock = threading.RLock()
+        self._files: dict[str, CatalogFileState] = {}
+        self._compiled_sig: tuple[int, int] | None = None
+        self._compiled: dict | None = None
+        self._payloads: dict[str, tuple[int, object]] | None = None
+        self._manifest_dirty = False
+        self._payloads_dirty = False
+        self._compiled_dirty = False
+        self._read_manifest()
+
+    # ---- сканирование ----
+
+    def relative(self, path: Path) -> str:
+        """Путь файла относительно папки каталога, через "/" (ключ манифеста)."""
+        text = str(path)
+        if text.startswith(self._prefix):
+            return text[len(self._prefix):].replace(os.sep, "/")
+        return Path(path).relative_to(self.root).as_posix()
+
+    def scan(self, files: list[Path]) -> CatalogScan:
+        """Подпись файлов каталога; перечитывает только изменившиеся файлы.
+
+        Нечитаемый файл в подпись не попадает (как и раньше у watcher'а).
+        """
+        result = CatalogScan()
+        now_ns = time.time_ns()
+        with self._lock:
+            seen: set[str] = set()
+            for path in files:
+                rel = self.relative(path)
+                key = _stat_key(path)
+                if key is None:
+                    continue
+                state = self._files.get(rel)
+                if state is not None and state.settled and (state.size, state.mtime_ns) == key:
+                    seen.add(rel)
+                    result.entries.append((rel, state.crc, state.length))
+                    continue
+                try:
+                    raw = path.read_bytes()
+                except OSError:
+                    continue
+                new_state = CatalogFileState(
+                    size=key[0],
+                    mtime_ns=key[1],
+                    crc=int(zlib.crc32(raw)),
+                    length=len(raw),
+                    settled=now_ns - key[1] > _RACY_WINDOW_NS,
+                )
+                if new_state != state:
+                    self._files[rel] = new_state
+                    self._manifest_dirty = True
+                seen.add(rel)
+                result.entries.append((rel, new_state.crc, new_state.length))
+                result.fresh[rel] = raw
+            for rel in [rel for rel in self._files if rel not in seen]:
+                del self._files[rel]
+                self._manifest_dirty = True
+        return result
+
+    # ---- нормализованные сервисы по файлам ----
+
+    def payload(self, rel: str, crc: int) -> object:
+        """Закэшированный разбор файла с данным crc32 или MISSING."""
+        with self._lock:
+            if self._payloads is None:
+                self._payloads = self._read_payloads()
+            cached = self._payloads.get(rel)
+        if cached is None or cached[0] != crc:
+            return MISSING
+        return cached[1]
+
+    def store_payload(self, rel: str, crc: int, payload: object) -> None:
+        with self._lock:
+            if self._payloads is None:
+                self._payloads = self._read_payloads()
+            self._payloads[rel] = (int(crc), payload)
+            self._payloads_dirty = True
+
+    # ---- собранный каталог ----
+
+    def compiled(self, sig: tuple[int, int]) -> dict | None:
+        with self._lock:
+            if self._compiled_sig != tuple(sig):
+                return None
+            if self._compiled is None:
+                data = self._load(self.catalog_path)
+                catalog = data.get("catalog")
+                if data.get("sig") != list(sig) or not isinstance(catalog, dict):
+                    return None
+                self._compiled = catalog
+            return self._compiled
+
+    def store_compiled(self, sig: tuple[int, int], data: dict) -> None:
+        with self._lock:
+            self._compiled_sig = (int(sig[0]), int(sig[1]))
+            self._compiled = data
+            self._compiled_dirty = True
+            self._manifest_dirty = True
+
+    # ---- запись ----
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._payloads_dirty and self._payloads is not None:
+                live = {rel: state.crc for rel, state in self._files.items()}
+                payloads = {
+                    rel: [crc, payload]
+                    for rel, (crc, payload) in self._payloads.items()
+                    if live.get(rel) == crc
+                }
+                if self._write(self.services_path, {"version": _CACHE_VERSION, "files": payloads}):
+                    self._payloads_dirty = False
+            if self._compiled_dirty and self._compiled is not None:
+                catalog = {"version": _CACHE_VERSION, "sig": list(self._compiled_sig), "catalog": self._compiled}
+                if self._write(self.catalog_path, catalog):
+                    self._compiled_dirty = False
+                else:
+                    self._compiled_sig = None
+            if self._manifest_dirty:
+                manifest = {
+                    "version": _CACHE_VERSION,
+                    "files": {
+                        rel: [state.size, state.mtime_ns, state.crc, state.length, state.settled]
+                        for rel, state in sorted(self._files.items())
+                    },
+                    "catalog_sig": list(self._compiled_sig) if self._compiled_sig is not None else None,
+                }
+                if self._write(self.manifest_path, manifest):
+                    self._manifest_dirty = False
+
+    @staticmethod
+    def _write(path: Path, data: dict) -> bool:
+        try:
+            atomic_write_text(path, json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+        except OSError:
+            # tmp_dir может быть недоступен для записи — работаем без кэша на диске.
+            return False
+        return True
+
+    # ---- чтение ----
+
+    @staticmethod
+    def _load(path: Path) -> dict:
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get("version") != _CACHE_VERSION:
+            return {}
+        return data
+
+    def _read_manifest(self) -> None:
+        data = self._load(self.manifest_path)
+        files = data.get("files")
+        if isinstance(files, dict):
+            for rel, raw in files.items():
+                try:
+                    size, mtime_ns, crc, length, settled = raw
+                    self._files[str(rel)] = CatalogFileState(
+                        size=int(size),
+                        mtime_ns=int(mtime_ns),
+                        crc=int(crc),
+                        length=int(length),
+                        settled=bool(settled),
+                    )
+                except (TypeError, ValueError):
+                    continue
+        sig = data.get("catalog_sig")
+        if isinstance(sig, list) and len(sig) == 2:
+            try:
+                self._compiled_sig = (int(sig[0]), int(sig[1]))
+            except (TypeError, ValueError):
+                pass
+
+    def _read_payloads(self) -> dict[str, tuple[int, object]]:
+        files = self._load(self.services_path).get("files")
+        payloads: dict[str, tuple[int, object]] = {}
+        if isinstance(files, dict):
+            for rel, raw in files.items():
+                if isinstance(raw, list) and len(raw) == 2 and isinstance(raw[0], int):
+                    payloads[str(rel)] = (raw[0], raw[1])
+        return payloads
+
+
+_CACHES: dict[Path, SplitCatalogCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_split_catalog_cache(root: Path) -> SplitCatalogCache:
+    """Один кэш на папку каталога в процессе (манифест читается с диска один раз)."""
+    key = Path(root)
+    with _CACHES_LOCK:
+        cache = _CACHES.get(key)
+        if cache is None:
+            cache = _CACHES[key] = SplitCatalogCache(key)
+        return cache
+
+
+def reset_split_catalog_caches() -> None:
+    """Забывает состояние в памяти; следующий доступ перечитает манифест с диска."""
+    with _CACHES_LOCK:
+        _CACHES.clear()
+
+
+__all__ = [
+    "CatalogFileState",
+    "CatalogScan",
+    "HOSTS_CATALOG_CACHE_DIR_NAME",
+    "MISSING",
+    "SplitCatalogCache",
+    "default_hosts_catalog_cache_dir",
+    "get_split_catalog_cache",
+    "reset_split_catalog_caches",
+]
@@ -9,6 +9,12 @@ from .proxy_domains import (
 )
 from .ipv6_detection import is_ipv6_address, is_ipv6_available
 from .adobe_domains import ADOBE_DOMAINS
+from .hosts_document import (
+    MANAGED_HOSTS_BEGIN,
+    MANAGED_HOSTS_END,
+    HostsDocument,
+    parse_hosts_mapping_line,
+)
 from log.log import log
 
 
@@ -27,37 +33,18 @@ HOSTS_PATH = _get_hosts_path_from_env() if os.name == "nt" else Path(r"C:\Window
 
 _GITHUB_API_DOMAIN = "api.github.com"
 _HOSTS_BOOTSTRAP_SIGNATURE_VERSION = "v3"
-_MANAGED_HOSTS_BEGIN = "# >>> zapretgui:hosts managed begin >>>"
-_MANAGED_HOSTS_END = "# <<< zapretgui:hosts managed end <<<"
-_MANAGED_HOSTS_NOTICE = "# Generated by ZapretGUI. Do not edit this block manually."
 
 
 def _get_hosts_bootstrap_signature() -> str:
     return _HOSTS_BOOTSTRAP_SIGNATURE_VERSION
 
 
-def _parse_hosts_mapping_line(line: str) -> tuple[str, list[str], str] | None:
-    mapping_part, sep, comment_part = str(line or "").partition("#")
-    mapping_stripped = mapping_part.strip()
-    if not mapping_stripped:
-        return None
-
-    parts = mapping_stripped.split()
-    if len(parts) < 2:
-        return None
-
-    ip = parts[0]
-    domains = parts[1:]
-    comment = comment_part.strip() if sep else ""
-    return ip, domains, comment
-
-
 def _rewrite_hosts_bootstrap_line(
     *,
     line: str,
     remove_github: bool,
 ) -> tuple[str | None, bool]:
-    parsed = _parse_hosts_mapping_line(line)
+    parsed = parse_hosts_mapping_line(line)
     if parsed is None:
         return line, False
 
@@ -97,13 +84,13 @@ def _remove_managed_hosts_block(lines: list[str]) -> tuple[list[str], int]:
 
     for line in lines:
         stripped = line.strip()
-        if stripped == _MANAGED_HOSTS_BEGIN:
+        if stripped == MANAGED_HOSTS_BEGIN:
             inside_block = True
             continue
         if inside_block:
             if stripped and not stripped.startswith("#"):
                 removed_entries += 1
-            if stripped == _MANAGED_HOSTS_END:
+            if stripped == MANAGED_HOSTS_END:
                 inside_block = False
             continue
         new_lines.append(line)
@@ -111,13 +98,6 @@ def _remove_managed_hosts_block(lines: list[str]) -> tuple[list[str], int]:
     return new_lines, removed_entries
 
 
-def _format_hosts_mapping_line(ip: str, domains: list[str], comment: str) -> str:
-    line = f"{ip} {' '.join(domains)}"
-    if comment:
-        line += f" # {comment}"
-    return line + "\n"
-
-
 def _format_hosts_entries_count(count: int) -> str:
     count = int(count)
     if count % 10 == 1 and count % 100 != 11:
@@ -129,102 +109,6 @@ def _format_hosts_entries_count(count: int) -> str:
     return f"{count} {word}"
 
 
-def _remove_top_domain_entries(lines: list[str], domain_keys: set[str]) -> tuple[list[str], set[str], int | None]:
-    """Убирает первое вхождение каждого нужного домена и возвращает место для нового блока."""
-    if not domain_keys:
-        return lines, set(), None
-
-    new_lines: list[str] = []
-    removed_keys: set[str] = set()
-    insert_at: int | None = None
-
-    for line in lines:
-        parsed = _parse_hosts_mapping_line(line)
-        if parsed is None:
-            new_lines.append(line)
-            continue
-
-        ip, domains, comment = parsed
-        matched_keys = {
-            domain.casefold()
-            for domain in domains
-            if domain.casefold() in domain_keys and domain.casefold() not in removed_keys
-        }
-        if not matched_keys:
-            new_lines.append(line)
-            continue
-
-        if insert_at is None:
-            insert_at = len(new_lines)
-        removed_keys.update(matched_keys)
-
-        remaining_domains = [domain for domain in domains if domain.casefold() not in matched_keys]
-        if remaining_domains:
-            new_lines.append(_format_hosts_mapping_line(ip, remaining_domains, comment))
-
-    return new_lines, removed_keys, insert_at
-
-
-def _iter_managed_hosts_block_rows(lines: list[str]) -> list[tuple[str, str]]:
-    """Возвращает строки (domain, ip), которые лежат внутри блока ZapretGUI."""
-    rows: list[tuple[str, str]] = []
-    inside_block = False
-
-    for line in lines:
-        stripped = line.strip()
-        if stripped == _MANAGED_HOSTS_BEGIN:
-            inside_block = True
-            continue
-        if not inside_block:
-            continue
-        if stripped == _MANAGED_HOSTS_END:
-            break
-        if not stripped or stripped.startswith("#"):
-            continue
-
-        parsed = _parse_hosts_mapping_line(stripped)
-        if parsed is None:
-            continue
-        ip, domains, _comment = parsed
-        for domain in domains:
-            rows.append((domain, ip))
-
-    return rows
-
-
-def _insert_managed_hosts_block(new_lines: list[str], rows: list[tuple[str, str]], insert_at: int | None = None) -> None:
-    """Добавляет блок ZapretGUI перед обычными строками hosts."""
-    if not rows:
-        return
-
-    if insert_at is None:
-        insert_at = len(new_lines)
-        for index, line in enumerate(new_lines):
-            if _parse_hosts_mapping_line(line) is not None:
-                insert_at = index
-                break
-    insert_at = max(0, min(insert_at, len(new_lines)))
-
-    while insert_at > 0 and new_lines[insert_at - 1].strip() == "":
-        del new_lines[insert_at - 1]
-        insert_at -= 1
-    while insert_at < len(new_lines) and new_lines[insert_at].strip() == "":
-        del new_lines[insert_at]
-
-    block: list[str] = []
-    if insert_at > 0 and new_lines[insert_at - 1].strip() != "":
-        block.append("\n")
-    block.append(f"{_MANAGED_HOSTS_BEGIN}\n")
-    block.append(f"{_MANAGED_HOSTS_NOTICE}\n")
-    for domain, ip in rows:
-        block.append(f"{ip} {domain}\n")
-    block.append(f"{_MANAGED_HOSTS_END}\n")
-    if insert_at < len(new_lines) and new_lines[insert_at].strip() != "":
-        block.append("\n")
-
-    new_lines[insert_at:insert_at] = block
-
-
 # ───────────────────────── hosts file read cache ─────────────────────────
 #
 # На старте приложение может несколько раз читать hosts подряд (проверки/страницы UI).
@@ -235,6 +119,9 @@ def _insert_managed_hosts_block(new_lines: list[str], rows: list[tuple[str, str]
 
 _HOSTS_TEXT_CACHE: str | None = None
 _HOSTS_SIG_CACHE: tuple[int, int] | None = None  # (mtime_ns, size)
+# Разобранный hosts для текста из кэша выше: пока сигнатура файла та же,
+# safe_read_hosts_file возвращает тот же объект строки — по нему и сверяемся.
+_HOSTS_DOCUMENT_CACHE: HostsDocument | None = None
 
 
 def _get_hosts_sig(path: Path) -> tuple[int, int] | None:
@@ -256,7 +143,19 @@ def _set_hosts_cache(content: str | None, sig: tuple[int, int] | None) -> None:
 
 def invalidate_hosts_file_cache() -> None:
     """Принудительно сбрасывает кэш чтения hosts (на случай внешних изменений)."""
+    global _HOSTS_DOCUMENT_CACHE
     _set_hosts_cache(None, None)
+    _HOSTS_DOCUMENT_CACHE = None
+
+
+def _get_hosts_document(content: str) -> HostsDocument:
+    """Разобранный hosts для текста, который вернул safe_read_hosts_file."""
+    global _HOSTS_DOCUMENT_CACHE
+    document = _HOSTS_DOCUMENT_CACHE
+    if document is None or document.text is not content:
+        document = HostsDocument(content)
+        _HOSTS_DOCUMENT_CACHE = document
+    return document
 
 
 def _run_cmd(args, description):
@@ -633,7 +532,7 @@ class HostsManager:
             if content is None:
                 return current_active_ips
 
-            for domain, ip in _iter_managed_hosts_block_rows(content.splitlines(keepends=True)):
+            for domain, ip in _get_hosts_document(content).managed_rows:
                 domain_key = (domain or "").casefold()
                 ip_value = (ip or "").strip()
                 if not domain_key or not ip_value:
@@ -887,12 +786,7 @@ class HostsManager:
                 self.set_status("Не удалось прочитать файл hosts")
                 return False
 
-            lines = content.splitlines(keepends=True)
-            new_lines, removed_count = _remove_managed_hosts_block(lines)
-
-            # Убираем лишние пустые строки в конце
-            while new_lines and new_lines[-1].strip() == "":
-                new_lines.pop()
+            document = _get_hosts_document(content)
 
             allow_ipv6 = is_ipv6_available()
             desired_rows: list[tuple[str, str]] = []
@@ -919,39 +813,35 @@ class HostsManager:
                 log("apply_domain_ip_rows: все выбранные записи отфильтрованы перед записью", "WARNING")
                 return False
 
+            plan = document.plan(desired_rows)
+            removed_count = plan.removed_entries
+
             # Ничего не добавляем — просто очищаем блок ZapretGUI
             if not desired_rows:
-                if new_lines and not new_lines[-1].endswith("\n"):
-                    new_lines[-1] += "\n"
-                updated_content = "".join(new_lines)
-                if updated_content == content:
+                if not plan.changed:
                     self.set_status(f"Файл hosts уже актуален: удалено {removed_count} записей")
                     log("apply_domain_ip_rows: hosts уже актуален, запись пропущена", "DEBUG")
                     return True
-                if not safe_write_hosts_file(updated_content):
+                if not safe_write_hosts_file(plan.text):
                     return False
+                document.commit(plan)
                 self.set_status(f"Файл hosts обновлён: удалено {removed_count} записей")
                 return True
 
-            domain_keys = {domain.casefold() for domain, _ip in desired_rows}
-            new_lines, replaced_domains, replacement_insert_at = _remove_top_domain_entries(new_lines, domain_keys)
-
-            _insert_managed_hosts_block(new_lines, desired_rows, insert_at=replacement_insert_at)
-
-            updated_content = "".join(new_lines)
-            if updated_content == content:
+            if not plan.changed:
                 self.set_status(f"Файл hosts уже актуален: {_format_hosts_entries_count(len(desired_rows))}")
                 log("apply_domain_ip_rows: hosts уже актуален, запись пропущена", "DEBUG")
                 return True
 
-            if not safe_write_hosts_file(updated_content):
+            if not safe_write_hosts_file(plan.text):
                 self.set_status("Не удалось записать файл hosts")
                 return False
+            document.commit(plan)
 
             self.set_status(f"Файл hosts обновлён: применено {_format_hosts_entries_count(len(desired_rows))}")
             log(
                 f"✅ apply_domain_ip_rows: removed={removed_count}, "
-                f"replaced_top={len(replaced_domains)}, added={len(desired_rows)}",
+                f"replaced_top={plan.replaced_domains}, added={len(desired_rows)}",
                 "DEBUG",
             )
             return True
@@ -0,0 +1,350 @@
+# hosts/hosts_document.py
+"""Разобранный hosts-файл для быстрых правок блока ZapretGUI.
+
+HostsDocument разбирает текст один раз: строки, индекс домен → строки,
+где он встречается (вне блока), строки-сопоставления и строки блока
+ZapretGUI. plan() по индексу находит, какие строки удалить или переписать и
+куда вставить новый блок, и собирает новый текст без повторного разбора
+файла. Результат байт-в-байт совпадает с прежним построчным конвейером
+(удалить блок → снять первые вхождения доменов → вставить блок; эталон —
+tests/hosts_document_reference.py).
+
+Удалённые строки остаются в документе пустыми "" (в тексте их нет), поэтому
+позиции остальных строк не сдвигаются. Новый блок commit() кладёт одним
+элементом в такую пустышку прямо перед местом вставки (обычно — на место
+старого блока), и индекс не сдвигается вовсе; сдвиг нужен только при первой
+вставке. Когда пустышек накапливается много, документ разбирается заново.
+"""
+
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left
+from dataclasses import dataclass, field
+
+MANAGED_HOSTS_BEGIN = "# >>> zapretgui:hosts managed begin >>>"
+MANAGED_HOSTS_END = "# <<< zapretgui:hosts managed end <<<"
+MANAGED_HOSTS_NOTICE = "# Generated by ZapretGUI. Do not edit this block manually."
+
+# Сколько удалённых строк терпим до полного переразбора.
+_COMPACT_MIN_DEAD = 4096
+
+
+def parse_hosts_mapping_line(line: str) -> tuple[str, list[str], str] | None:
+    mapping_part, sep, comment_part = str(line or "").partition("#")
+    mapping_stripped = mapping_part.strip()
+    if not mapping_stripped:
+        return None
+
+    parts = mapping_stripped.split()
+    if len(parts) < 2:
+        return None
+
+    ip = parts[0]
+    domains = parts[1:]
+    comment = comment_part.strip() if sep else ""
+    return ip, domains, comment
+
+
+def format_hosts_mapping_line(ip: str, domains: list[str], comment: str) -> str:
+    line = f"{ip} {' '.join(domains)}"
+    if comment:
+        line += f" # {comment}"
+    return line + "\n"
+
+
+def _managed_block_row_lines(rows: list[tuple[str, str]]) -> list[str]:
+    block = [f"{MANAGED_HOSTS_BEGIN}\n", f"{MANAGED_HOSTS_NOTICE}\n"]
+    block.extend(f"{ip} {domain}\n" for domain, ip in rows)
+    block.append(f"{MANAGED_HOSTS_END}\n")
+    return block
+
+
+@dataclass(slots=True)
+class HostsEditPlan:
+    """Правка документа: изменённые строки и вставка нового блока."""
+
+    text: str
+    changed: bool
+    removed_entries: int
+    replaced_domains: int
+    # Позиция строки → новое содержимое ("" — строка удаляется).
+    edits: dict[int, str] = field(default_factory=dict)
+    insert_at: int = 0
+    block: list[str] = field(default_factory=list)
+    # Позиция первого вхождения → ключи доменов, снятые с этой строки.
+    hits: dict[int, set[str]] = field(default_factory=dict)
+    source: str | None = None
+
+
+class HostsDocument:
+    """Текст hosts с индексом доменов и положением блока ZapretGUI."""
+
+    def __init__(self, text: str):
+        self._lock = threading.Lock()
+        self._reset(str(text or ""))
+
+    # ---- разбор ----
+
+    def _reset(self, text: str) -> None:
+        self.text = text
+        self._lines: list[str] = text.splitlines(keepends=True)
+        self._dead = 0
+        # Строки всех блоков ZapretGUI (вместе с маркерами) → что от них
+        # останется после удаления блока: "" или пустые строки-разделители
+        # вокруг блока, вставленного commit() одним элементом.
+        self._managed: dict[int, str] = {}
+        self._managed_entries = 0
+        self._managed_rows: list[tuple[str, str]] = []
+        # Строки-сопоставления вне блоков, по возрастанию.
+        self._mapping: list[int] = []
+        # Ключ домена → первая строка; остальные строки — в _more (редко).
+        self._first: dict[str, int] = {}
+        self._more: dict[str, list[int]] = {}
+
+        managed = self._managed
+        mapping = self._mapping
+        first = self._first
+        more = self._more
+        inside = False
+        # 0 — блока ещё не было, 1 — внутри первого блока, 2 — первый блок закрыт.
+        first_block = 0
+        for pos, line in enumerate(self._lines):
+            stripped = line.strip()
+            if stripped == MANAGED_HOSTS_BEGIN:
+                inside = True
+                if first_block == 0:
+                    first_block = 1
+                managed[pos] = ""
+                continue
+            if inside:
+                managed[pos] = ""
+                if stripped and not stripped.startswith("#"):
+                    self._managed_entries += 1
+                    if first_block == 1:
+                        self._add_managed_row(stripped)
+                if stripped == MANAGED_HOSTS_END:
+                    inside = False
+                    if first_block == 1:
+                        first_block = 2
+                continue
+
+            parts = line.partition("#")[0].split()
+            if len(parts) < 2:
+                continue
+            mapping.append(pos)
+            for domain in parts[1:]:
+                key = domain.casefold()
+                if first.setdefault(key, pos) != pos:
+                    extra = more.get(key)
+                    if extra is None:
+                        more[key] = [pos]
+                    elif extra[-1] != pos:
+                        extra.append(pos)
+
+    def _add_managed_row(self, stripped: str) -> None:
+        parsed = parse_hosts_mapping_line(stripped)
+        if parsed is None:
+            return
+        ip, domains, _comment = parsed
+        for domain in domains:
+            self._managed_rows.append((domain, ip))
+
+    # ---- чтение ----
+
+    @property
+    def managed_rows(self) -> list[tuple[str, str]]:
+        """Строки (domain, ip) первого блока ZapretGUI."""
+        return list(self._managed_rows)
+
+    # ---- правка ----
+
+    def plan(self, rows: list[tuple[str, str]]) -> HostsEditPlan:
+        """Строит правку: блок ZapretGUI с rows вместо текущего.
+
+        Пустой rows — только удалить блок. Документ не меняется до commit().
+        """
+        with self._lock:
+            return self._plan(list(rows or []))
+
+    def _plan(self, rows: list[tuple[str, str]]) -> HostsEditPlan:
+        lines = self._lines
+        count = len(lines)
+        edits: dict[int, str] = dict(self._managed)
+
+        # Пустые строки в конце файла (после удаления блока).
+        pos = count - 1
+        line = ""
+        while pos >= 0:
+            line = edits.get(pos, lines[pos])
+            if line:
+                if line.strip():
+                    break
+                edits[pos] = ""
+            pos -= 1
+
+        hits: dict[int, set[str]] = {}
+        block: list[str] = []
+        insert_at = count
+        if not rows:
+            if pos >= 0 and not line.endswith("\n"):
+                edits[pos] = line + "\n"
+        else:
+            for domain, _ip in rows:
+                key = domain.casefold()
+                found = self._first.get(key)
+                if found is not None:
+                    hits.setdefault(found, set()).add(key)
+
+            for found, keys in hits.items():
+                ip, domains, comment = parse_hosts_mapping_line(lines[found])
+                remaining = [domain for domain in domains if domain.casefold() not in keys]
+                edits[found] = format_hosts_mapping_line(ip, remaining, comment) if remaining else ""
+
+            if hits:
+                insert_at = min(hits)
+            elif self._mapping:
+                insert_at = self._mapping[0]
+
+            pos = insert_at - 1
+            while pos >= 0:
+                line = edits.get(pos, lines[pos])
+                if line:
+                    if line.strip():
+                        break
+                    edits[pos] = ""
+                pos -= 1
+            lead = pos >= 0
+
+            pos = insert_at
+            while pos < count:
+                line = edits.get(pos, lines[pos])
+                if line:
+                    if line.strip():
+                        break
+                    edits[pos] = ""
+                pos += 1
+            trail = pos < count
+
+            if lead:
+                block.append("\n")
+            block.extend(_managed_block_row_lines(rows))
+            if trail:
+                block.append("\n")
+
+        # Пустышки, которых и так нет в тексте, — не правка.
+        edits = {pos: value for pos, value in edits.items() if value != lines[pos]}
+        if edits or block:
+            out = lines.copy()
+            for pos, value in edits.items():
+                out[pos] = value
+            if block:
+                out.insert(insert_at, "".join(block))
+            text = "".join(out)
+            if text == self.text:
+                text = self.text
+        else:
+            text = self.text
+
+        return HostsEditPlan(
+            text=text,
+            changed=text is not self.text,
+            removed_entries=self._managed_entries,
+            replaced_domains=sum(len(keys) for keys in hits.values()),
+            edits=edits,
+            insert_at=insert_at,
+            block=block,
+            hits=hits,
+            source=self.text,
+        )
+
+    def commit(self, plan: HostsEditPlan) -> None:
+        """Переводит документ в состояние plan.text (после успешной записи)."""
+        with self._lock:
+            if plan.source is not self.text:
+                self._reset(plan.text)
+                return
+            self._commit(plan)
+            if self._dead > max(_COMPACT_MIN_DEAD, len(self._lines) // 4):
+                self._reset(self.text)
+
+    def _commit(self, plan: HostsEditPlan) -> None:
+        lines = self._lines
+        first = self._first
+        more = self._more
+        mapping = self._mapping
+
+        for found, keys in plan.hits.items():
+            for key in keys:
+                extra = more.get(key)
+                if extra:
+                    first[key] = extra.pop(0)
+                    if not extra:
+                        del more[key]
+                else:
+                    first.pop(key, None)
+            if not plan.edits.get(found):
+                index = bisect_left(mapping, found)
+                if index < len(mapping) and mapping[index] == found:
+                    del mapping[index]
+
+        for pos, value in plan.edits.items():
+            if not value:
+                self._dead += 1
+            lines[pos] = value
+
+        self._managed = {}
+        self._managed_entries = 0
+        self._managed_rows = []
+        block = plan.block
+        if block:
+            at = plan.insert_at
+            if at > 0 and not lines[at - 1]:
+                slot = at - 1
+            elif at < len(lines) and not lines[at]:
+                slot = at
+            else:
+                slot = at
+                lines.insert(at, "")
+                self._dead += 1
+                self._first = {key: (pos + 1 if pos >= at else pos) for key, pos in first.items()}
+                for extra in more.values():
+                    for index, pos in enumerate(extra):
+                        if pos >= at:
+                            extra[index] = pos + 1
+                index = bisect_left(mapping, at)
+                mapping[index:] = [pos + 1 for pos in mapping[index:]]
+
+            lead = "\n" if block[0] == "\n" else ""
+            trail = "\n" if block[-1] == "\n" else ""
+            rows = block[len(lead) + 2 : len(block) - len(trail) - 1]
+            lines[slot] = "".join(block)
+            self._dead -= 1
+            if lead:
+                prev = slot - 1
+                while not lines[prev]:
+                    prev -= 1
+                if not lines[prev].endswith("\n"):
+                    # "\n" перед блоком лишь завершил последнюю строку — это не разделитель.
+                    lines[prev] += "\n"
+                    lines[slot] = "".join(block[1:])
+                    lead = ""
+            self._managed[slot] = lead + trail
+            for line in rows:
+                stripped = line.strip()
+                if stripped and not stripped.startswith("#"):
+                    self._managed_entries += 1
+                    self._add_managed_row(stripped)
+
+        self.text = plan.text
+
+
+__all__ = [
+    "HostsDocument",
+    "HostsEditPlan",
+    "MANAGED_HOSTS_BEGIN",
+    "MANAGED_HOSTS_END",
+    "MANAGED_HOSTS_NOTICE",
+    "format_hosts_mapping_line",
+    "parse_hosts_mapping_line",
+]
@@ -7,6 +7,7 @@
 from __future__ import annotations
 
 import json
+import os
 import threading
 import time
 import zlib
@@ -14,6 +15,7 @@ from dataclasses import dataclass
 from pathlib import Path
 
 from config.runtime_layout import APPLICATION_PATHS, PACKAGED_RUNTIME
+from hosts.catalog_cache import MISSING, get_split_catalog_cache, reset_split_catalog_caches
 from settings import store as settings_store
 
 
@@ -177,28 +179,6 @@ def _append_service_entry(
     service_map[host] = merged
 
 
-def _append_service_row(
-    *,
-    profiles: list[str],
-    services: dict[str, dict[str, list[str]]],
-    service_entries: dict[str, list[tuple[str, list[str]]]],
-    service_name: str,
-    host: str,
-    ips_by_profile: dict[str, str],
-) -> None:
-    if not host:
-        return
-    row = [""] * len(profiles)
-    for profile_id, ip in ips_by_profile.items():
-        if profile_id not in profiles or not ip:
-            continue
-        row[profiles.index(profile_id)] = ip
-    if not any(row):
-        return
-    service_entries.setdefault(service_name, []).append((host, row))
-    services.setdefault(service_name, {})[host] = list(row)
-
-
 def _parse_hosts_catalog_json(text: str) -> HostsCatalog:
     try:
         data = json.loads(text or "{}")
@@ -210,13 +190,68 @@ def _parse_hosts_catalog_json(text: str) -> HostsCatalog:
         _log(f"{_CATALOG_FILE_NAME} должен содержать JSON-объект", "WARNING")
         return _empty_catalog()
 
+    profiles = [
+        normalized
+        for raw_profile in data.get("profiles") or []
+        if (normalized := _normalize_profile(raw_profile)) is not None
+    ]
+    services = [
+        normalized
+        for raw_service in data.get("services") or []
+        if (normalized := _normalize_catalog_service(raw_service)) is not None
+    ]
+    return _compile_catalog(profiles, services)
+
+
+def _normalize_catalog_service(raw_service: object) -> dict | None:
+    """Сервис каталога в виде, не зависящем от набора профилей.
+
+    Результат — JSON-совместимый dict: его же кэширует по файлам split-каталог
+    (см. hosts.catalog_cache), а `_compile_catalog` собирает из таких dict'ов
+    HostsCatalog.
+    """
+    if not isinstance(raw_service, dict):
+        return None
+    service_name = _clean_str(raw_service.get("name"))
+    if not service_name:
+        return None
+
+    mode = _normalize_mode(raw_service.get("mode"))
+    if mode == _SERVICE_MODE_HOSTS:
+        rows: list[list[str]] = []
+        for raw_row in raw_service.get("hosts") or []:
+            if not isinstance(raw_row, dict):
+                continue
+            host = _clean_str(raw_row.get("host"))
+            ip = _clean_str(raw_row.get("ip"))
+            if host and ip:
+                rows.append([host, ip])
+        return {"name": service_name, "mode": mode, "hosts": rows}
+
+    domains: list[list[object]] = []
+    for raw_domain in raw_service.get("domains") or []:
+        if not isinstance(raw_domain, dict):
+            continue
+        host = _clean_str(raw_domain.get("host") or raw_domain.get("domain"))
+        raw_ips = raw_domain.get("ips")
+        if not host or not isinstance(raw_ips, dict):
+            continue
+        ips: dict[str, list[str]] = {}
+        for profile_id, raw_value in raw_ips.items():
+            if profile_id in {_HOSTS_PROFILE_ID, _LEGACY_DIRECT_PROFILE_ID}:
+                continue
+            values = _normalize_ip_values(raw_value)
+            if values:
+                ips[profile_id] = values
+        if ips:
+            domains.append([host, ips])
+    return {"name": service_name, "mode": mode, "domains": domains}
+
+
+def _compile_catalog(raw_profiles: list[tuple[str, str]], raw_services: list[dict]) -> HostsCatalog:
     profiles: list[str] = []
     profile_names: dict[str, str] = {}
-    for raw_profile in data.get("profiles") or []:
-        normalized = _normalize_profile(raw_profile)
-        if normalized is None:
-            continue
-        profile_id, name = normalized
+    for profile_id, name in raw_profiles:
         if profile_id in profile_names:
             continue
         profiles.append(profile_id)
@@ -227,14 +262,9 @@ def _parse_hosts_catalog_json(text: str) -> HostsCatalog:
     service_order: list[str] = []
     service_modes: dict[str, str] = {}
 
-    for raw_service in data.get("services") or []:
-        if not isinstance(raw_service, dict):
-            continue
-        service_name = _clean_str(raw_service.get("name"))
-        if not service_name:
-            continue
-
-        mode = _normalize_mode(raw_service.get("mode"))
+    for service in raw_services:
+        service_name = service["name"]
+        mode = service["mode"]
         if service_name not in service_order:
             service_order.append(service_name)
         services.setdefault(service_name, {})
@@ -244,11 +274,7 @@ def _parse_hosts_catalog_json(text: str) -> HostsCatalog:
         if mode == _SERVICE_MODE_HOSTS:
             _ensure_hosts_profile(profiles, profile_names)
             hosts_profile_id = _get_hosts_profile_id(profiles)
-            for raw_row in raw_service.get("hosts") or []:
-                if not isinstance(raw_row, dict):
-                    continue
-                host = _clean_str(raw_row.get("host"))
-                ip = _clean_str(raw_row.get("ip"))
+            for host, ip in service["hosts"]:
                 _append_service_entry(
                     profiles=profiles,
                     services=services,
@@ -260,36 +286,26 @@ def _parse_hosts_catalog_json(text: str) -> HostsCatalog:
                 )
             continue
 
-        for raw_domain in raw_service.get("domains") or []:
-            if not isinstance(raw_domain, dict):
-                continue
-            host = _clean_str(raw_domain.get("host") or raw_domain.get("domain"))
-            raw_ips = raw_domain.get("ips")
-            if not host or not isinstance(raw_ips, dict):
-                continue
-
-            values_by_profile: dict[str, list[str]] = {}
-            for profile_id in profiles:
-                if profile_id in {_HOSTS_PROFILE_ID, _LEGACY_DIRECT_PROFILE_ID}:
-                    continue
-                values = _normalize_ip_values(raw_ips.get(profile_id))
-                if values:
-                    values_by_profile[profile_id] = values
-
-            row_count = max((len(values) for values in values_by_profile.values()), default=0)
+        # Колонки DNS-профилей: новые профили только дописываются в конец,
+        # поэтому индексы уже известных не сдвигаются.
+        dns_columns = [
+            (profile_id, index)
+            for index, profile_id in enumerate(profiles)
+            if profile_id not in {_HOSTS_PROFILE_ID, _LEGACY_DIRECT_PROFILE_ID}
+        ]
+        width = len(profiles)
+        service_map = services[service_name]
+        entries = service_entries[service_name]
+        for host, ips in service["domains"]:
+            columns = [(index, ips[profile_id]) for profile_id, index in dns_columns if ips.get(profile_id)]
+            row_count = max((len(values) for _index, values in columns), default=0)
             for row_index in range(row_count):
-                row_values: dict[str, str] = {}
-                for profile_id, values in values_by_profile.items():
+                row = [""] * width
+                for index, values in columns:
                     if row_index < len(values):
-                        row_values[profile_id] = values[row_index]
-                _append_service_row(
-                    profiles=profiles,
-                    services=services,
-                    service_entries=service_entries,
-                    service_name=service_name,
-                    host=host,
-                    ips_by_profile=row_values,
-                )
+                        row[index] = values[row_index]
+                entries.append((host, row))
+                service_map[host] = list(row)
 
     return HostsCatalog(
         dns_profiles=profiles,
@@ -301,6 +317,28 @@ def _parse_hosts_catalog_json(text: str) -> HostsCatalog:
     )
 
 
+def _catalog_to_json(cat: HostsCatalog) -> dict:
+    return {
+        "dns_profiles": cat.dns_profiles,
+        "dns_profile_names": cat.dns_profile_names,
+        "services": cat.services,
+        "service_entries": {name: [[host, row] for host, row in rows] for name, rows in cat.service_entries.items()},
+        "service_order": cat.service_order,
+        "service_modes": cat.service_modes,
+    }
+
+
+def _catalog_from_json(data: dict) -> HostsCatalog:
+    return HostsCatalog(
+        dns_profiles=list(data["dns_profiles"]),
+        dns_profile_names=dict(data["dns_profile_names"]),
+        services=dict(data["services"]),
+        service_entries={name: list(map(tuple, rows)) for name, rows in data["service_entries"].items()},
+        service_order=list(data["service_order"]),
+        service_modes=dict(data["service_modes"]),
+    )
+
+
 def _read_json_file(path: Path) -> object:
     return json.loads(path.read_text(encoding="utf-8", errors="replace") or "{}")
 
@@ -329,13 +367,19 @@ def _combine_content_sig(entries: list[tuple[str, int, int]]) -> tuple[int, int]
 
 
 def _iter_json_files(path: Path) -> list[Path]:
-    if not path.exists() or not path.is_dir():
+    # scandir: тип файла приходит из листинга каталога, без stat на каждый файл.
+    try:
+        with os.scandir(path) as entries:
+            names = [
+                entry.name
+                for entry in entries
+                if entry.name.lower().endswith(".json") and entry.is_file()
+            ]
+    except OSError:
         return []
-    return sorted(
-        child
-        for child in path.iterdir()
-        if child.is_file() and child.suffix.lower() == ".json"
-    )
+    # Порядок как у sorted(Path): на Windows сравнение без учёта регистра.
+    names.sort(key=os.path.normcase)
+    return [path / name for name in names]
 
 
 def _split_catalog_files(root: Path) -> list[Path]:
@@ -447,14 +491,82 @@ def _get_recent_path_sig(path: Path) -> tuple[int, int] | None:
 
 
 def _get_split_catalog_content_sig(path: Path) -> tuple[int, int]:
-    sig_entries: list[tuple[str, int, int]] = []
-    for child in _split_catalog_files(path):
+    """Подпись split-каталога; перечитываются только файлы с изменившимся stat."""
+    cache = get_split_catalog_cache(path)
+    scan = cache.scan(_split_catalog_files(path))
+    cache.flush()
+    return _combine_content_sig(scan.entries)
+
+
+def _load_split_catalog_with_sig(path: Path) -> tuple[HostsCatalog, tuple[int, int]]:
+    """Собранный каталог папки и его подпись через персистентный кэш.
+
+    Неизменившийся каталог берётся из сериализованного HostsCatalog; иначе
+    заново разбираются только изменившиеся файлы, остальные сервисы — из кэша.
+    """
+    cache = get_split_catalog_cache(path)
+    files = _split_catalog_files(path)
+    scan = cache.scan(files)
+    sig = _combine_content_sig(scan.entries)
+
+    compiled = cache.compiled(sig)
+    if compiled is not None:
         try:
-            raw = child.read_bytes()
-        except OSError:
+            return _catalog_from_json(compiled), sig
+        except (KeyError, TypeError, ValueError, AttributeError):
+            pass
+
+    crcs = {rel: crc for rel, crc, _size in scan.entries}
+
+    def parsed(file_path: Path, normalize) -> object:
+        rel = cache.relative(file_path)
+        crc = crcs.get(rel)
+        if crc is not None:
+            payload = cache.payload(rel, crc)
+            if payload is not MISSING:
+                return payload
+        raw = scan.fresh.get(rel)
+        if raw is None:
+            raw = file_path.read_bytes()
+        payload = normalize(_decode_json_bytes(raw))
+        cache.store_payload(rel, zlib.crc32(raw), payload)
+        return payload
+
+    profiles_path = path / "dns_sources.json"
+    profiles: list[tuple[str, str]] = []
+    if profiles_path in files:
+        profiles = [
+            (item[0], item[1])
+            for item in parsed(
+                profiles_path,
+                lambda raw: [[profile["id"], profile["name"]] for profile in _normalize_split_profiles(raw)],
+            )
+        ]
+
+    services: list[dict] = []
+    for service_path in files:
+        if service_path == profiles_path:
             continue
-        sig_entries.append(_content_sig_entry(root=path, path=child, raw=raw))
-    return _combine_content_sig(sig_entries)
+        mode = _SERVICE_MODE_HOSTS if service_path.parent.name == "hosts" else _SERVICE_MODE_DNS
+        try:
+            services.extend(
+                parsed(
+                    service_path,
+                    lambda raw, mode=mode: [
+                        normalized
+                        for raw_service in _normalize_split_services(raw, mode=mode)
+                        if (normalized := _normalize_catalog_service(raw_service)) is not None
+                    ],
+                )
+            )
+        except Exception as exc:
+            kind = "hosts" if mode == _SERVICE_MODE_HOSTS else "DNS"
+            _log(f"Не удалось прочитать {kind}-сервис hosts-каталога {service_path.name}: {exc}", "WARNING")
+
+    catalog = _compile_catalog(profiles, services)
+    cache.store_compiled(sig, _catalog_to_json(catalog))
+    cache.flush()
+    return catalog, sig
 
 
 def _get_file_content_sig_from_raw(raw: bytes) -> tuple[int, int]:
@@ -525,19 +637,22 @@ def _load_catalog() -> HostsCatalog:
 
         try:
             if path.exists() and path.is_dir():
-                data, sig = _load_split_catalog_data_with_sig(path)
-                text = json.dumps(data, ensure_ascii=False, sort_keys=True)
+                # Текст split-каталога собирается лениво: он нужен только get_hosts_catalog_text().
+                catalog, sig = _load_split_catalog_with_sig(path)
+                text = None
             else:
                 raw = path.read_bytes() if path.exists() else b""
                 text = raw.decode("utf-8", errors="replace") if raw else ""
                 sig = _get_file_content_sig_from_raw(raw) if path.exists() else None
+                catalog = _parse_hosts_catalog_json(text)
         except Exception as exc:
             _log(f"Не удалось прочитать hosts-каталог: {exc}", "WARNING")
             text = ""
             sig = None
+            catalog = _parse_hosts_catalog_json(text)
 
         _CACHE_TEXT = text
-        _CACHE = _parse_hosts_catalog_json(text)
+        _CACHE = catalog
         _CACHE_SIG = sig
         _CACHE_PATH = path
         _CACHE_PROFILE_INDEX = None
@@ -557,6 +672,7 @@ def invalidate_hosts_catalog_cache() -> None:
         _RECENT_SIG_PATH = None
         _RECENT_SIG = None
         _RECENT_SIG_CHECKED_AT = 0.0
+    reset_split_catalog_caches()
 
 
 def get_hosts_catalog_signature() -> tuple[str, int, int] | None:
@@ -576,8 +692,16 @@ def get_hosts_catalog_signature() -> tuple[str, int, int] | None:
 
 def get_hosts_catalog_text() -> str:
     """Возвращает сырой текст hosts-каталога с учётом кэша."""
+    global _CACHE_TEXT
     _load_catalog()
     with _CACHE_LOCK:
+        if _CACHE_TEXT is None and _CACHE_PATH is not None and _CACHE_PATH.is_dir():
+            try:
+                data = _load_split_catalog_data(_CACHE_PATH)
+                _CACHE_TEXT = json.dumps(data, ensure_ascii=False, sort_keys=True)
+            except Exception as exc:
+                _log(f"Не удалось прочитать hosts-каталог: {exc}", "WARNING")
+                _CACHE_TEXT = ""
         return _CACHE_TEXT or ""
 
 
@@ -0,0 +1,199 @@
+"""Нормализация и дедупликация строк ipset-файлов.
+
+``normalize_ip_entry_reference`` — прежний разбор через ``ipaddress`` (эталон).
+Быстрый путь ``iter_ip_entries`` разбирает IPv4-адреса и CIDR регулярным
+выражением прямо в целые числа, без объектов ``ipaddress``; v6, URL и прочий
+нестандартный ввод разбираются через ``ipaddress``, как в эталоне. Повторы отсекаются по целочисленному
+ключу (версия, сеть, префикс, адрес/подсеть) — результат совпадает со старой
+дедупликацией по строке.
+
+``collapse=True`` дополнительно сливает пересекающиеся и соседние подсети —
+по тем же ключам, как отрезки целых чисел (результат сортируется по адресу).
+"""
+
+from __future__ import annotations
+
+import ipaddress
+import re
+import socket
+import struct
+from collections.abc import Iterable, Iterator
+from urllib.parse import urlparse
+
+# Октет без ведущих нулей (как требует ipaddress), префикс 0..32 без ведущих нулей.
+# Формат проверяет регулярка, поэтому дальше хватает мягкого inet_aton.
+_OCTET = r"(?:25[0-5]|2[0-4][0-9]|1[0-9][0-9]|[1-9]?[0-9])"
+_V4_RE = re.compile(rf"({_OCTET}\.{_OCTET}\.{_OCTET}\.{_OCTET})(?:/(3[0-2]|[12]?[0-9]))?", re.ASCII)
+_unpack_v4 = struct.Struct("!I").unpack
+_inet_aton = socket.inet_aton
+
+_V4_ALL = 0xFFFFFFFF
+# Ключ: сеть << 9 | признак подсети << 8 | префикс; у v6 — ещё бит версии сверху.
+_KEY_NET_FLAG = 1 << 8
+_KEY_V6_FLAG = 1 << 137
+
+
+def normalize_ip_entry_reference(text: str) -> str | None:
+    line = str(text or "").strip()
+    if not line or line.startswith("#"):
+        return None
+
+    if "://" in line:
+        try:
+            parsed = urlparse(line)
+            host = parsed.netloc or parsed.path.split("/")[0]
+            line = host.split(":")[0]
+        except Exception:
+            pass
+
+    if "-" in line:
+        return None
+
+    if "/" in line:
+        try:
+            return ipaddress.ip_network(line, strict=False).with_prefixlen
+        except Exception:
+            return None
+
+    try:
+        return str(ipaddress.ip_address(line))
+    except Exception:
+        return None
+
+
+def _v4_text(value: int) -> str:
+    return f"{value >> 24}.{(value >> 16) & 255}.{(value >> 8) & 255}.{value & 255}"
+
+
+def _slow_entry(line: str) -> tuple[int, str] | None:
+    """IPv6, URL и нестандартная запись — через ipaddress, как в эталоне."""
+    if "://" in line or "-" in line:
+        text = normalize_ip_entry_reference(line)
+        if text is None:
+            return None
+        line = text
+    try:
+        if "/" in line:
+            network = ipaddress.ip_network(line, strict=False)
+            key = int(network.network_address) << 9 | _KEY_NET_FLAG | network.prefixlen
+            text = network.with_prefixlen
+        else:
+            network = ipaddress.ip_address(line)
+            key = int(network) << 9 | network.max_prefixlen
+            text = str(network)
+    except ValueError:
+        return None
+    return (key | _KEY_V6_FLAG if network.version == 6 else key), text
+
+
+def parse_ip_entry(text: str) -> tuple[int, str] | None:
+    """(целочисленный ключ, нормализованная строка) или None для мусора/комментария."""
+    line = text.strip()
+    if not line or line[0] == "#":
+        return None
+    match = _V4_RE.fullmatch(line)
+    if match is None:
+        return _slow_entry(line)
+    address, prefix = match.groups()
+    value = _unpack_v4(_inet_aton(address))[0]
+    if prefix is None:
+        return value << 9 | 32, line
+    prefixlen = int(prefix)
+    network = value & (_V4_ALL << (32 - prefixlen)) & _V4_ALL
+    if network != value:
+        line = f"{_v4_text(network)}/{prefixlen}"
+    return network << 9 | _KEY_NET_FLAG | prefixlen, line
+
+
+def normalize_ip_entry(text: str) -> str | None:
+    entry = parse_ip_entry(str(text or ""))
+    return None if entry is None else entry[1]
+
+
+def _iter_keyed_entries(lines: Iterable[str]) -> Iterator[tuple[int, str]]:
+    seen: set[int] = set()
+    parse = parse_ip_entry
+    for raw in lines:
+        entry = parse(raw)
+        if entry is None:
+            continue
+        key = entry[0]
+        if key in seen:
+            continue
+        seen.add(key)
+        yield entry
+
+
+def iter_ip_entries(lines: Iterable[str]) -> Iterator[str]:
+    """Нормализованные записи без повторов, в порядке первого появления.
+
+    Строки читаются потоково — файл можно передать открытым объектом.
+    """
+    for _key, text in _iter_keyed_entries(lines):
+        yield text
+
+
+def normalize_ip_entries(lines: Iterable[str], *, collapse: bool = False) -> list[str]:
+    if collapse:
+        return _collapse_keys(key for key, _text in _iter_keyed_entries(lines))
+    return list(iter_ip_entries(lines))
+
+
+def collapse_ip_entries(entries: Iterable[str]) -> list[str]:
+    """Сливает пересекающиеся и соседние подсети нормализованных записей.
+
+    Результат отсортирован по адресу (сначала IPv4); одиночные адреса
+    (/32, /128) выводятся без префикса.
+    """
+    return _collapse_keys(entry[0] for text in entries if (entry := parse_ip_entry(text)) is not None)
+
+
+def _collapse_keys(keys: Iterable[int]) -> list[str]:
+    v4_keys: list[int] = []
+    v6_keys: list[int] = []
+    for key in keys:
+        (v6_keys if key & _KEY_V6_FLAG else v4_keys).append(key)
+
+    result: list[str] = []
+    for bits, family_keys in ((32, v4_keys), (128, v6_keys)):
+        # Ключи сортируются как целые: порядок по сети совпадает с порядком по ключу.
+        family_keys.sort()
+        merged_start = merged_end = -2
+        for key in family_keys:
+            start = (key & ~_KEY_V6_FLAG) >> 9
+            end = start + (1 << (bits - (key & 255))) - 1
+            if start <= merged_end + 1:
+                if end > merged_end:
+                    merged_end = end
+                continue
+            if merged_end >= 0:
+                result.extend(_range_to_cidrs(merged_start, merged_end, bits))
+            merged_start, merged_end = start, end
+        if merged_end >= 0:
+            result.extend(_range_to_cidrs(merged_start, merged_end, bits))
+    return result
+
+
+def _range_to_cidrs(start: int, end: int, bits: int) -> Iterator[str]:
+    to_text = _v4_text if bits == 32 else _v6_text
+    while start <= end:
+        # Самый крупный выровненный по start блок, не выходящий за end.
+        align_bits = (start & -start).bit_length() - 1 if start else bits
+        size_bits = (end - start + 1).bit_length() - 1
+        block = min(align_bits, size_bits)
+        yield to_text(start) if block == 0 else f"{to_text(start)}/{bits - block}"
+        start += 1 << block
+
+
+def _v6_text(value: int) -> str:
+    return str(ipaddress.IPv6Address(value))
+
+
+__all__ = [
+    "collapse_ip_entries",
+    "iter_ip_entries",
+    "normalize_ip_entries",
+    "normalize_ip_entry",
+    "normalize_ip_entry_reference",
+    "parse_ip_entry",
+]
@@ -14,12 +14,25 @@
 (`_apply_plan`, все записи). Намерение выражается именем публичной функции:
 `rebuild_*` — фоновая сверка с недеструктивным контрактом,
 `write/delete/rename_*` и `create_*` — операции пользователя.
+
+Фоновая сверка всех списков (`rebuild_all_layered_list_files`) ведёт манифест
+`lists/.layered_manifest.json`: для base, user и итога каждого списка —
+(size, mtime_ns, хэш текста) после последней сверки. Список сверяется заново,
+только если один из трёх файлов изменился: сначала сравнивается stat, и лишь
+у файла с другим stat читается текст и сравнивается хэш (переустановка
+баз с тем же содержимым пересборки не вызывает). Изменившиеся списки
+независимы и сверяются параллельно.
 """
 
 from __future__ import annotations
 
+import hashlib
+import json
+import os
+import stat
 import threading
 from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path, PureWindowsPath
@@ -30,6 +43,13 @@ from lists.core.files import normalize_newlines, read_text_file_safe, write_text
 SAFE_HOSTLIST_PLACEHOLDER = "www.example.com"
 SAFE_IPSET_PLACEHOLDER = "123.123.123.123"
 _LAYERED_LIST_FILE_LOCK = threading.RLock()
+LAYERED_MANIFEST_FILE_NAME = ".layered_manifest.json"
+_MANIFEST_VERSION = 1
+_MAX_REBUILD_WORKERS = 8
+
+# (size, mtime_ns, хэш текста) файла слоя/итога; None — файла нет.
+_FileState = tuple[int, int, str] | None
+_ManifestEntry = tuple[_FileState, _FileState, _FileState]
 
 
 class ListOwnership(Enum):
@@ -58,6 +78,9 @@ class _LayerSnapshot:
     # Итог читается лениво: только когда слои без effective-записей и вопрос
     # владения реально стоит — иначе () без чтения (итог может быть большим).
     final_entries: tuple[str, ...]
+    # Тексты для манифеста; None — файл не прочитан (или не читается).
+    base_text: str | None = ""
+    final_text: str | None = None
 
     @property
     def ownership(self) -> ListOwnership:
@@ -148,6 +171,11 @@ def rebuild_profile_list_file(lists_root: Path, file_name: str) -> None:
 
 
 def rebuild_all_layered_list_files(lists_root: Path, *, user_only_file_names: Iterable[str] = ()) -> int:
+    """Фоновая сверка всех слоёных списков; возвращает число учтённых списков.
+
+    Списки, у которых base/user/итог не менялись с прошлой сверки (см.
+    манифест в docstring модуля), не читаются и не пишутся.
+    """
     with _LAYERED_LIST_FILE_LOCK:
         root = Path(lists_root)
         base_names = _list_file_names(root / "base")
@@ -160,8 +188,33 @@ def rebuild_all_layered_list_files(lists_root: Path, *, user_only_file_names: It
         names = set(base_names)
         names.update(name for name in user_names if name in allowed_user_only_names)
 
+        manifest_path = root / LAYERED_MANIFEST_FILE_NAME
+        previous = _read_manifest(manifest_path)
+        entries: dict[str, _ManifestEntry | None] = {}
+        stale: list[str] = []
         for name in sorted(names, key=str.casefold):
-            _reconcile_list_file(root, name, authoritative=False)
+            current = _current_manifest_entry(layered_list_file(root, name), previous.get(name))
+            if current is None:
+                stale.append(name)
+            else:
+                entries[name] = current
+
+        error: BaseException | None = None
+        for name, outcome in _reconcile_stale_lists(root, stale):
+            if isinstance(outcome, BaseException):
+                error = error or outcome
+            else:
+                entries[name] = outcome
+
+        recorded = {
+            name: entry
+            for name in sorted(entries, key=str.casefold)
+            if (entry := entries[name]) is not None
+        }
+        if recorded != previous:
+            _write_manifest(manifest_path, recorded)
+        if error is not None:
+            raise error
         return len(names)
 
 
@@ -208,26 +261,35 @@ def delete_profile_user_list_file(lists_root: Path, file_name: str) -> None:
         _reconcile_list_file(lists_root, paths.file_name, authoritative=not was_external)
 
 
-def _reconcile_list_file(lists_root: Path, file_name: str, *, authoritative: bool) -> None:
+def _reconcile_list_file(
+    lists_root: Path,
+    file_name: str,
+    *,
+    authoritative: bool,
+) -> tuple[LayeredListFile, _LayerSnapshot, _RebuildPlan]:
     """Снимок → план → применение. authoritative=True — операция пользователя:
     слои становятся единственным источником истины для итогового файла."""
     paths = layered_list_file(lists_root, file_name)
     snapshot = _load_snapshot(paths)
     plan = _plan_rebuild(paths.file_name, snapshot, authoritative=authoritative)
     _apply_plan(paths, plan)
+    return paths, snapshot, plan
 
 
 def _load_snapshot(paths: LayeredListFile) -> _LayerSnapshot:
     base_exists = paths.base_path.is_file()
     user_exists = paths.user_path.is_file()
-    base_entries = tuple(_text_entries(read_text_file_safe(str(paths.base_path)) or "")) if base_exists else ()
+    base_text = read_text_file_safe(str(paths.base_path)) if base_exists else ""
+    base_entries = tuple(_text_entries(base_text or ""))
     user_text = (read_text_file_safe(str(paths.user_path)) or "") if user_exists else ""
     user_entries = tuple(_text_entries(user_text))
+    final_text: str | None = None
     if _has_effective_entries(base_entries) or _has_effective_entries(user_entries):
         # Слои владеют файлом — итог (потенциально большой) не читаем.
         final_entries: tuple[str, ...] = ()
     else:
-        final_entries = tuple(_text_entries(read_text_file_safe(str(paths.final_path)) or ""))
+        final_text = read_text_file_safe(str(paths.final_path))
+        final_entries = tuple(_text_entries(final_text or ""))
     return _LayerSnapshot(
         base_exists=base_exists,
         user_exists=user_exists,
@@ -235,9 +297,148 @@ def _load_snapshot(paths: LayeredListFile) -> _LayerSnapshot:
         user_entries=user_entries,
         user_text=user_text,
         final_entries=final_entries,
+        base_text=base_text,
+        final_text=final_text,
     )
 
 
+def _reconcile_stale_lists(lists_root: Path, names: list[str]):
+    """(имя, запись манифеста | исключение) для каждого списка, в порядке names.
+
+    Списки не делят файлов, поэтому при нескольких изменившихся сверяются в
+    пуле потоков (чтение/запись и хэширование отпускают GIL). Вызывается под
+    _LAYERED_LIST_FILE_LOCK — операции пользователя ждут окончания.
+    """
+    if len(names) <= 1:
+        outcomes: list[object] = []
+        for name in names:
+            try:
+                outcomes.append(_reconcile_for_manifest(lists_root, name))
+            except Exception as exc:
+                outcomes.append(exc)
+        return list(zip(names, outcomes))
+
+    results = []
+    with ThreadPoolExecutor(
+        max_workers=min(_MAX_REBUILD_WORKERS, len(names)),
+        thread_name_prefix="layered-lists",
+    ) as pool:
+        futures = [pool.submit(_reconcile_for_manifest, lists_root, name) for name in names]
+        for name, future in zip(names, futures):
+            try:
+                results.append((name, future.result()))
+            except Exception as exc:
+                results.append((name, exc))
+    return results
+
+
+def _reconcile_for_manifest(lists_root: Path, file_name: str) -> _ManifestEntry | None:
+    paths, snapshot, plan = _reconcile_list_file(lists_root, file_name, authoritative=False)
+    user_text = plan.write_user if plan.write_user is not None else snapshot.user_text
+    if plan.unlink_final:
+        final_text: str | None = ""
+    elif plan.write_final is not None:
+        final_text = plan.write_final
+    else:
+        final_text = snapshot.final_text
+    base_state = _file_state_after_write(paths.base_path, snapshot.base_text)
+    user_state = _file_state_after_write(paths.user_path, user_text)
+    final_state = _file_state_after_write(paths.final_path, final_text)
+    if _UNKNOWN_STATE in (base_state, user_state, final_state):
+        # Текст какого-то файла неизвестен — список сверится и в следующий раз.
+        return None
+    return base_state, user_state, final_state
+
+
+# ---- манифест сверки ----
+
+_UNKNOWN_STATE = ("unknown",)
+
+
+def _stat_key(path: Path) -> tuple[int, int] | None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if not stat.S_ISREG(st.st_mode):
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def _text_digest(text: str) -> str:
+    # Хэш нормализованного текста: write_text_file пишет именно его, а
+    # перевод строк в конце файла на результат сверки не влияет.
+    return hashlib.blake2b(
+        normalize_newlines(text).encode("utf-8", "surrogatepass"),
+        digest_size=16,
+    ).hexdigest()
+
+
+def _file_state_after_write(path: Path, text: str | None) -> _FileState | tuple[str]:
+    key = _stat_key(path)
+    if key is None:
+        return None
+    if text is None:
+        return _UNKNOWN_STATE
+    return (*key, _text_digest(text))
+
+
+def _current_manifest_entry(paths: LayeredListFile, recorded: _ManifestEntry | None) -> _ManifestEntry | None:
+    """Запись манифеста, если файлы списка не менялись с прошлой сверки, иначе None."""
+    if recorded is None:
+        return None
+    states: list[_FileState] = []
+    for path, state in zip((paths.base_path, paths.user_path, paths.final_path), recorded):
+        key = _stat_key(path)
+        if key is None or state is None:
+            if key is not None or state is not None:
+                return None
+            states.append(None)
+            continue
+        if key == tuple(state[:2]):
+            states.append(state)
+            continue
+        # stat другой (например, базу переложил установщик) — решает содержимое.
+        text = read_text_file_safe(str(path))
+        if text is None or _text_digest(text) != state[2]:
+            return None
+        states.append((*key, state[2]))
+    return tuple(states)
+
+
+def _read_manifest(path: Path) -> dict[str, _ManifestEntry]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != _MANIFEST_VERSION:
+        return {}
+    files = data.get("files")
+    if not isinstance(files, dict):
+        return {}
+    manifest: dict[str, _ManifestEntry] = {}
+    for name, entry in files.items():
+        try:
+            states = tuple(None if state is None else (int(state[0]), int(state[1]), str(state[2])) for state in entry)
+        except (TypeError, ValueError, IndexError):
+            continue
+        if len(states) == 3:
+            manifest[str(name)] = states
+    return manifest
+
+
+def _write_manifest(path: Path, manifest: dict[str, _ManifestEntry]) -> None:
+    payload = {
+        "version": _MANIFEST_VERSION,
+        "files": {name: [None if state is None else list(state) for state in entry] for name, entry in manifest.items()},
+    }
+    try:
+        write_text_file(str(path), json.dumps(payload, ensure_ascii=False, separators=(",", ":")))
+    except OSError:
+        # Манифест — только ускорение: без него следующий запуск сверит всё.
+        pass
+
+
 def _plan_rebuild(file_name: str, snapshot: _LayerSnapshot, *, authoritative: bool) -> _RebuildPlan:
     if not authoritative and snapshot.ownership is ListOwnership.EXTERNAL:
         # Итогом управляет внешний источник — фоновая сверка его не трогает:
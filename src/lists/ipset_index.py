@@ -0,0 +1,450 @@
+"""Индекс ipset-списков: какой `ipset-*.txt` владеет IP-адресом.
+
+Раньше каждый запрос проходил `ip in net` по всем подсетям всех списков.
+Индекс компилируется один раз на подпись файлов (mtime + размер) и отвечает
+за O(log N):
+
+- IPv4: отсортированные непересекающиеся интервалы и `bisect`;
+- IPv6: префиксное дерево с шагом в байт (не больше 16 переходов по dict).
+
+Ответ совпадает с линейным проходом: побеждает первая подсеть в порядке
+файлов и строк. Скомпилированный индекс кэшируется на диск в бинарном виде
+(`tmp/ipset_index.bin`), так что после перезапуска текст не разбирается заново.
+"""
+
+from __future__ import annotations
+
+import glob
+import ipaddress
+import json
+import os
+import socket
+import struct
+import sys
+import tempfile
+import threading
+from array import array
+from bisect import bisect_right
+from pathlib import Path
+from typing import Iterable, Optional
+
+from log.log import log
+
+
+IPSET_INDEX_CACHE_FILE_NAME = "ipset_index.bin"
+
+_CACHE_MAGIC = b"ZIPSIDX1"
+_CACHE_HEADER = struct.Struct("<8sIIII")
+_V6_RECORD = struct.Struct("<16sBi")
+
+_NO_LABEL = -1
+_V4_MAX = (1 << 32) - 1
+_V6_MAX = (1 << 128) - 1
+
+_unpack_v4 = struct.Struct("!I").unpack
+
+
+def current_ipset_final_files(lists_folder: str) -> list[str]:
+    """Итоговые `lists/ipset-*.txt`, у которых есть слой в `lists/base` или `lists/user`."""
+    root = str(lists_folder or "")
+    names: set[str] = set()
+    for layer_name in ("base", "user"):
+        layer_dir = os.path.join(root, layer_name)
+        for path in glob.glob(os.path.join(layer_dir, "ipset-*.txt")):
+            names.add(os.path.basename(path))
+
+    result: list[str] = []
+    for name in sorted(names, key=str.casefold):
+        final_path = os.path.join(root, name)
+        if os.path.isfile(final_path):
+            result.append(final_path)
+    return result
+
+
+def ipset_label_for_path(path: str) -> str:
+    """`lists/ipset-youtube.txt` -> `youtube`."""
+    label = os.path.splitext(os.path.basename(path))[0]
+    if label.startswith("ipset-"):
+        label = label[len("ipset-"):]
+    return label
+
+
+def ipset_files_signature(paths: Iterable[str]) -> tuple[tuple[str, int, int], ...]:
+    signature = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            signature.append((os.path.abspath(path), int(st.st_mtime_ns), int(st.st_size)))
+        except OSError:
+            signature.append((os.path.abspath(path), 0, 0))
+    return tuple(signature)
+
+
+def _iter_networks(lines: Iterable[str]) -> Iterable[ipaddress._BaseNetwork]:
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            yield ipaddress.ip_network(line, strict=False)
+        except ValueError:
+            continue
+
+
+def _drop_shadowed(nets: list[tuple[int, int, int, int]]) -> list[tuple[int, int, int, int]]:
+    """Убирает подсети, накрытые более ранней (по приоритету) подсетью.
+
+    nets: (start, end, priority, label). CIDR-блоки либо вложены, либо не
+    пересекаются, поэтому у оставшихся побеждает самый длинный префикс —
+    ровно как первая подсеть при линейном проходе.
+    Возвращает подсети, отсортированные от внешних к внутренним.
+    """
+    nets = sorted(nets, key=lambda item: (item[0], -item[1], item[2]))
+    result = []
+    stack: list[tuple[int, int]] = []  # (end, минимальный приоритет цепочки предков)
+    for start, end, priority, label in nets:
+        while stack and stack[-1][0] < start:
+            stack.pop()
+        best = stack[-1][1] if stack else None
+        if best is not None and best < priority:
+            continue
+        result.append((start, end, priority, label))
+        stack.append((end, priority if best is None else min(best, priority)))
+    return result
+
+
+def _flatten_v4(nets: list[tuple[int, int, int, int]]) -> tuple[array, array]:
+    starts: list[int] = []
+    labels: list[int] = []
+
+    def emit(position: int, label: int) -> None:
+        if position > _V4_MAX:
+            return
+        if starts and starts[-1] == position:
+            starts.pop()
+            labels.pop()
+        if labels and labels[-1] == label:
+            return
+        starts.append(position)
+        labels.append(label)
+
+    emit(0, _NO_LABEL)
+    stack: list[tuple[int, int]] = []  # (end, label)
+    for start, end, _priority, label in nets:
+        while stack and stack[-1][0] < start:
+            closed_end, _closed = stack.pop()
+            emit(closed_end + 1, stack[-1][1] if stack else _NO_LABEL)
+        emit(start, label)
+        stack.append((end, label))
+    while stack:
+        closed_end, _closed = stack.pop()
+        emit(closed_end + 1, stack[-1][1] if stack else _NO_LABEL)
+    return array("I", starts), array("i", labels)
+
+
+class _V6Trie:
+    """Префиксное дерево IPv6 с шагом 8 бит.
+
+    Узел — dict: байт -> [label, дочерний узел]. Префикс, не кратный 8,
+    раскрывается в 2**(8 - остаток) соседних записей; более длинные
+    префиксы вставляются позже и перекрывают короткие.
+    """
+
+    def __init__(self, prefixes: list[tuple[bytes, int, int]]):
+        self.prefixes = prefixes
+        self.default = _NO_LABEL
+        self.root: dict[int, list] = {}
+        for packed, prefixlen, label in sorted(prefixes, key=lambda item: item[1]):
+            self._insert(packed, prefixlen, label)
+
+    def _insert(self, packed: bytes, prefixlen: int, label: int) -> None:
+        if prefixlen == 0:
+            self.default = label
+            return
+        depth = (prefixlen + 7) // 8
+        node = self.root
+        for byte in packed[:depth - 1]:
+            entry = node.get(byte)
+            if entry is None:
+                entry = node[byte] = [_NO_LABEL, None]
+            if entry[1] is None:
+                entry[1] = {}
+            node = entry[1]
+        spare = depth * 8 - prefixlen
+        base = packed[depth - 1] & (0xFF << spare) & 0xFF
+        for byte in range(base, base + (1 << spare)):
+            entry = node.get(byte)
+            if entry is None:
+                node[byte] = [label, None]
+            else:
+                entry[0] = label
+
+    def lookup(self, packed: bytes) -> int:
+        label = self.default
+        node = self.root
+        for byte in packed:
+            entry = node.get(byte)
+            if entry is None:
+                break
+            if entry[0] != _NO_LABEL:
+                label = entry[0]
+            node = entry[1]
+            if node is None:
+                break
+        return label
+
+
+class IpsetIndex:
+    """Неизменяемый индекс «IP -> имя ipset-списка»."""
+
+    def __init__(
+        self,
+        labels: tuple[str, ...],
+        v4_starts: array,
+        v4_labels: array,
+        v6_prefixes: list[tuple[bytes, int, int]],
+        *,
+        networks: int = 0,
+        signature: tuple = (),
+    ):
+        self.labels = labels
+        self.networks = networks
+        self.signature = signature
+        self._v4_starts = v4_starts
+        self._v4_labels = v4_labels
+        self._v6 = _V6Trie(v6_prefixes)
+
+    # ---- построение ----
+
+    @classmethod
+    def from_sources(cls, sources: Iterable[tuple[str, Iterable[str]]], *, signature: tuple = ()) -> "IpsetIndex":
+        """sources: (label, строки списка) в порядке приоритета."""
+        labels: list[str] = []
+        label_ids: dict[str, int] = {}
+        v4: list[tuple[int, int, int, int]] = []
+        v6: list[tuple[int, int, int, int]] = []
+        v6_prefixlen: dict[tuple[int, int], int] = {}
+        priority = 0
+        for label, lines in sources:
+            label_id = label_ids.get(label)
+            if label_id is None:
+                label_id = label_ids[label] = len(labels)
+                labels.append(label)
+            for net in _iter_networks(lines):
+                start = int(net.network_address)
+                end = int(net.broadcast_address)
+                if net.version == 4:
+                    v4.append((start, end, priority, label_id))
+                else:
+                    v6.append((start, end, priority, label_id))
+                    v6_prefixlen[(start, end)] = net.prefixlen
+                priority += 1
+
+        v4_starts, v4_labels = _flatten_v4(_drop_shadowed(v4))
+        v6_prefixes = [
+            (start.to_bytes(16, "big"), v6_prefixlen[(start, end)], label_id)
+            for start, end, _priority, label_id in _drop_shadowed(v6)
+        ]
+        return cls(tuple(labels), v4_starts, v4_labels, v6_prefixes, networks=priority, signature=signature)
+
+    @classmethod
+    def from_files(cls, paths: Iterable[str], *, signature: tuple = ()) -> "IpsetIndex":
+        def sources():
+            for path in paths:
+                try:
+                    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                        lines = f.readlines()
+                except OSError as e:
+                    log(f"Ошибка чтения {path}: {e}", "DEBUG")
+                    continue
+                yield ipset_label_for_path(path), lines
+
+        return cls.from_sources(sources(), signature=signature)
+
+    # ---- поиск ----
+
+    def owner(self, ip: str) -> Optional[str]:
+        """Имя списка, первая подсеть которого содержит ip; None — ни одного."""
+        if not ip:
+            return None
+        if ":" in ip:
+            packed = _pack_v6(ip)
+            if packed is None:
+                return None
+            label = self._v6.lookup(packed)
+        else:
+            value = _parse_v4(ip)
+            if value is None:
+                return None
+            label = self._v4_labels[bisect_right(self._v4_starts, value) - 1]
+        return None if label == _NO_LABEL else self.labels[label]
+
+    def __len__(self) -> int:
+        return self.networks
+
+    # ---- бинарный кэш ----
+
+    def to_bytes(self) -> bytes:
+        meta = json.dumps(
+            {"labels": list(self.labels), "networks": self.networks, "signature": _signature_key(self.signature)},
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode("utf-8")
+        starts = array("I", self._v4_starts)
+        labels = array("i", self._v4_labels)
+        if sys.byteorder != "little":
+            starts.byteswap()
+            labels.byteswap()
+        parts = [
+            _CACHE_HEADER.pack(_CACHE_MAGIC, len(meta), len(starts), len(self._v6.prefixes), 0),
+            meta,
+            starts.tobytes(),
+            labels.tobytes(),
+        ]
+        parts.extend(_V6_RECORD.pack(*prefix) for prefix in self._v6.prefixes)
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "IpsetIndex":
+        try:
+            magic, meta_len, v4_count, v6_count, _reserved = _CACHE_HEADER.unpack_from(data, 0)
+        except struct.error as e:
+            raise ValueError("truncated ipset index") from e
+        if magic != _CACHE_MAGIC:
+            raise ValueError("not an ipset index")
+        offset = _CACHE_HEADER.size
+        expected = offset + meta_len + v4_count * 8 + v6_count * _V6_RECORD.size
+        if len(data) != expected:
+            raise ValueError("truncated ipset index")
+
+        meta = json.loads(data[offset:offset + meta_len].decode("utf-8"))
+        offset += meta_len
+        starts = array("I")
+        starts.frombytes(data[offset:offset + v4_count * 4])
+        offset += v4_count * 4
+        labels = array("i")
+        labels.frombytes(data[offset:offset + v4_count * 4])
+        offset += v4_count * 4
+        if sys.byteorder != "little":
+            starts.byteswap()
+            labels.byteswap()
+        v6_prefixes = [tuple(record) for record in _V6_RECORD.iter_unpack(data[offset:])]
+        return cls(
+            tuple(meta["labels"]),
+            starts,
+            labels,
+            v6_prefixes,
+            networks=int(meta["networks"]),
+            signature=tuple(tuple(item) for item in meta["signature"]),
+        )
+
+
+def _signature_key(signature: tuple) -> list:
+    return [list(item) for item in signature]
+
+
+def _parse_v4(ip: str) -> Optional[int]:
+    # inet_aton мягче ipaddress ("1.2.3"), поэтому строка должна пережить обратное преобразование.
+    try:
+        packed = socket.inet_aton(ip)
+    except (OSError, ValueError):
+        return None
+    if socket.inet_ntoa(packed) != ip:
+        return None
+    return _unpack_v4(packed)[0]
+
+
+def _pack_v6(ip: str) -> Optional[bytes]:
+    try:
+        return socket.inet_pton(socket.AF_INET6, ip)
+    except (OSError, ValueError):
+        # Зоны ("fe80::1%eth0") и прочее, что понимает только ipaddress.
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            return None
+        return address.packed if address.version == 6 else None
+
+
+# ---- загрузка с кэшем ----
+
+_INDEX_LOCK = threading.Lock()
+_INDEX_CACHE: Optional[IpsetIndex] = None
+
+
+def default_ipset_index_cache_path() -> Path:
+    from config.runtime_layout import APPLICATION_PATHS
+
+    return APPLICATION_PATHS.tmp_dir / IPSET_INDEX_CACHE_FILE_NAME
+
+
+def load_ipset_index(paths: Iterable[str], *, cache_path: Optional[os.PathLike | str] = None) -> IpsetIndex:
+    """Индекс для списка файлов: из памяти, из дискового кэша или компиляцией.
+
+    Кэш валиден, пока не изменились пути, mtime и размеры файлов.
+    """
+    global _INDEX_CACHE
+    paths = list(paths)
+    signature = ipset_files_signature(paths)
+    with _INDEX_LOCK:
+        if _INDEX_CACHE is not None and _INDEX_CACHE.signature == signature:
+            return _INDEX_CACHE
+
+        cache_file = Path(cache_path) if cache_path is not None else default_ipset_index_cache_path()
+        index = _read_cache(cache_file, signature)
+        if index is None:
+            index = IpsetIndex.from_files(paths, signature=signature)
+            _write_cache(cache_file, index)
+        _INDEX_CACHE = index
+        return index
+
+
+def _read_cache(path: Path, signature: tuple) -> Optional[IpsetIndex]:
+    try:
+        data = path.read_bytes()
+    except OSError:
+        return None
+    try:
+        index = IpsetIndex.from_bytes(data)
+    except (ValueError, KeyError, TypeError) as e:
+        log(f"Кэш ipset индекса повреждён, пересобираем: {e}", "DEBUG")
+        return None
+    return index if index.signature == signature else None
+
+
+def _write_cache(path: Path, index: IpsetIndex) -> None:
+    tmp_name = None
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(prefix=f"{path.stem}_", suffix=".tmp", dir=str(path.parent))
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(index.to_bytes())
+        os.replace(tmp_name, str(path))
+        tmp_name = None
+    except OSError as e:
+        log(f"Не удалось сохранить кэш ipset индекса: {e}", "DEBUG")
+    finally:
+        if tmp_name is not None:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+
+
+def clear_ipset_index_cache() -> None:
+    """Сбрасывает индекс в памяти (дисковый кэш проверяется по подписи сам)."""
+    global _INDEX_CACHE
+    with _INDEX_LOCK:
+        _INDEX_CACHE = None
+
+
+__all__ = [
+    "IPSET_INDEX_CACHE_FILE_NAME",
+    "IpsetIndex",
+    "clear_ipset_index_cache",
+    "current_ipset_final_files",
+    "default_ipset_index_cache_path",
+    "ipset_files_signature",
+    "ipset_label_for_path",
+    "load_ipset_index",
+]
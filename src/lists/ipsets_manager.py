@@ -11,13 +11,13 @@
 
 from __future__ import annotations
 
-import ipaddress
 import os
+import threading
 from pathlib import Path
-from urllib.parse import urlparse
 
 from log.log import log
 from lists.core.files import write_text_file
+from lists.core.ip_entries import iter_ip_entries, normalize_ip_entry
 from lists.core.layered_files import rebuild_profile_list_file
 from lists.core.paths import get_list_base_path, get_list_final_path, get_list_user_path, get_lists_dir
 
@@ -32,10 +32,10 @@ IPSET_RU_USER_PATH = get_list_user_path("ipset-ru")
 LISTS_ROOT = Path(LISTS_FOLDER)
 
 
-_BASE_CACHE_PATH: str | None = None
-_BASE_CACHE_SIG: tuple[int, int] | None = None
-_BASE_CACHE_ENTRIES: list[str] | None = None
-_BASE_CACHE_SET: set[str] | None = None
+# Разобранные записи по пути файла; валидны, пока не изменилась подпись _file_sig.
+# Кэш хранит неизменяемые tuple/frozenset — наружу отдаются копии.
+_ENTRIES_CACHE: dict[str, tuple[tuple[int, int], tuple[str, ...], frozenset[str] | None]] = {}
+_ENTRIES_CACHE_LOCK = threading.Lock()
 
 
 def _file_sig(path: str) -> tuple[int, int] | None:
@@ -47,112 +47,70 @@ def _file_sig(path: str) -> tuple[int, int] | None:
 
 
 def _invalidate_base_cache() -> None:
-    global _BASE_CACHE_PATH, _BASE_CACHE_SIG, _BASE_CACHE_ENTRIES, _BASE_CACHE_SET
-    _BASE_CACHE_PATH = None
-    _BASE_CACHE_SIG = None
-    _BASE_CACHE_ENTRIES = None
-    _BASE_CACHE_SET = None
+    with _ENTRIES_CACHE_LOCK:
+        _ENTRIES_CACHE.clear()
 
 
-def _is_cached(path: str) -> bool:
-    return (
-        _BASE_CACHE_PATH == path
-        and _BASE_CACHE_ENTRIES is not None
-        and _BASE_CACHE_SIG is not None
-        and _BASE_CACHE_SIG == _file_sig(path)
-    )
+_normalize_ip_entry = normalize_ip_entry
 
 
-def _cache_base(path: str, entries: list[str]) -> None:
-    global _BASE_CACHE_PATH, _BASE_CACHE_SIG, _BASE_CACHE_ENTRIES, _BASE_CACHE_SET
-    _BASE_CACHE_PATH = path
-    _BASE_CACHE_SIG = _file_sig(path)
-    _BASE_CACHE_ENTRIES = list(entries)
-    _BASE_CACHE_SET = set(entries)
-
-
-def _normalize_ip_entry(text: str) -> str | None:
-    line = str(text or "").strip()
-    if not line or line.startswith("#"):
-        return None
-
-    if "://" in line:
-        try:
-            parsed = urlparse(line)
-            host = parsed.netloc or parsed.path.split("/")[0]
-            line = host.split(":")[0]
-        except Exception:
-            pass
-
-    if "-" in line:
-        return None
-
-    if "/" in line:
-        try:
-            return ipaddress.ip_network(line, strict=False).with_prefixlen
-        except Exception:
-            return None
+def _cached_effective_ip_entries(path: str) -> tuple[str, ...]:
+    sig = _file_sig(path)
+    if sig is None:
+        return ()
+    with _ENTRIES_CACHE_LOCK:
+        cached = _ENTRIES_CACHE.get(path)
+    if cached is not None and cached[0] == sig:
+        return cached[1]
 
+    # Подпись снята до чтения: если файл поменяется во время разбора,
+    # следующий вызов увидит другую подпись и перечитает его.
     try:
-        return str(ipaddress.ip_address(line))
+        with open(path, "r", encoding="utf-8") as f:
+            entries = tuple(iter_ip_entries(f))
     except Exception:
-        return None
+        return ()
+    with _ENTRIES_CACHE_LOCK:
+        _ENTRIES_CACHE[path] = (sig, entries, None)
+    return entries
 
 
-def _read_effective_ip_entries(path: str) -> list[str]:
-    if not os.path.exists(path):
-        return []
+def _cached_effective_ip_set(path: str) -> frozenset[str]:
+    entries = _cached_effective_ip_entries(path)
+    with _ENTRIES_CACHE_LOCK:
+        cached = _ENTRIES_CACHE.get(path)
+        if cached is not None and cached[1] is entries:
+            if cached[2] is None:
+                cached = _ENTRIES_CACHE[path] = (cached[0], entries, frozenset(entries))
+            return cached[2]
+    return frozenset(entries)
 
-    result: list[str] = []
-    seen: set[str] = set()
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            for raw in f:
-                norm = _normalize_ip_entry(raw)
-                if not norm or norm in seen:
-                    continue
-                seen.add(norm)
-                result.append(norm)
-    except Exception:
-        return []
-    return result
+
+def _read_effective_ip_entries(path: str) -> list[str]:
+    return list(_cached_effective_ip_entries(path))
 
 
 def _read_effective_ip_entries_from_text(text: str) -> list[str]:
-    result: list[str] = []
-    seen: set[str] = set()
-    for raw in str(text or "").splitlines():
-        norm = _normalize_ip_entry(raw)
-        if not norm or norm in seen:
-            continue
-        seen.add(norm)
-        result.append(norm)
-    return result
+    return list(iter_ip_entries(str(text or "").splitlines()))
 
 
 def _count_effective_entries(path: str) -> int:
-    return len(_read_effective_ip_entries(path))
+    return len(_cached_effective_ip_entries(path))
 
 
 def get_ipset_all_base_entries() -> list[str]:
-    if _is_cached(IPSET_ALL_BASE_PATH):
-        return list(_BASE_CACHE_ENTRIES or [])
-
-    if os.path.exists(IPSET_ALL_BASE_PATH):
-        base_entries = _read_effective_ip_entries(IPSET_ALL_BASE_PATH)
-        if base_entries:
-            _cache_base(IPSET_ALL_BASE_PATH, base_entries)
-            return list(base_entries)
-
+    base_entries = _cached_effective_ip_entries(IPSET_ALL_BASE_PATH)
+    if base_entries:
+        return list(base_entries)
     log("Не найдена системная база lists/base/ipset-all.txt", "ERROR")
     return []
 
 
 def get_ipset_all_base_set() -> set[str]:
-    entries = get_ipset_all_base_entries()
-    if _BASE_CACHE_ENTRIES == entries and _BASE_CACHE_SET is not None:
-        return set(_BASE_CACHE_SET)
-    return {x for x in entries if x}
+    base_set = _cached_effective_ip_set(IPSET_ALL_BASE_PATH)
+    if not base_set:
+        log("Не найдена системная база lists/base/ipset-all.txt", "ERROR")
+    return set(base_set)
 
 
 def get_user_ipset_entries() -> list[str]:
@@ -205,7 +163,10 @@ def get_ipset_ru_base_entries() -> list[str]:
 
 
 def get_ipset_ru_base_set() -> set[str]:
-    return set(get_ipset_ru_base_entries())
+    base_set = _cached_effective_ip_set(IPSET_RU_BASE_PATH)
+    if not base_set:
+        log("Не найдена системная база lists/base/ipset-ru.txt", "ERROR")
+    return set(base_set)
 
 
 def get_user_ipset_ru_entries() -> list[str]:
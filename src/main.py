@@ -1,5 +1,13 @@
 import sys
 
+if __name__ == "__main__":
+    # Дочерние процессы пула (разбор больших логов winws2) в собранном exe
+    # запускаются тем же бинарником — они должны уйти в multiprocessing
+    # раньше любой инициализации приложения.
+    import multiprocessing
+
+    multiprocessing.freeze_support()
+
 from config.runtime_layout import SourceApplicationLaunchForbidden, require_packaged_application
 
 
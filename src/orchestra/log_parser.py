@@ -6,7 +6,7 @@
 
 import re
 from dataclasses import dataclass
-from typing import Optional
+from typing import Callable, Optional
 from enum import Enum
 
 
@@ -407,464 +407,474 @@ class LogParser:
         """
         Парсит строку лога и возвращает событие или None.
         Обновляет внутреннее состояние парсера.
+
+        Строка сначала проходит дешёвую проверку ключевых слов: шум вида
+        packet:/IP4: без них отбрасывается без единого regex. Дальше
+        обработчики из _LINE_HANDLERS идут в прежнем порядке, но regex
+        запускается только если в строке есть его ключевое слово.
         """
-        if not line:
+        if not line or not has_event_keyword(line):
             return None
+        for keyword, patterns, handler in _LINE_HANDLERS:
+            if keyword not in line:
+                continue
+            for pattern in patterns:
+                m = pattern.search(line)
+                if m:
+                    event = handler(self, m, line)
+                    if event is not None:
+                        return event
+                    break
+        return None
 
-        # === TCP Profile Search ===
-        # desync profile search for tcp ip=... port=443 l7proto=tls hostname='youtube.com'
-        m = Patterns.tcp_profile_search.search(line)
-        if m:
-            ip, port, l7proto, hostname = m.groups()
-            self.current_ip = ip
-            self.current_port = int(port)
-            self.current_proto = "tcp"
-            self.current_l7proto = l7proto
-
-            if hostname and not hostname.replace('.', '').isdigit():
-                self.current_host = nld_cut(hostname, 2)
-                self._cache_hostname(ip, self.current_host)
-                # Сохраняем протокол для hostname (TLS или HTTP)
-                proto_key = "http" if l7proto == "http" or int(port) == 80 else "tls"
-                self.host_to_proto[self.current_host] = proto_key
-            else:
-                self.current_host = self.ip_to_hostname.get(ip)
+    # Обработчики возвращают событие (разбор строки закончен) или None
+    # (только обновили контекст, идём к следующему обработчику).
 
-            return ParsedEvent(
-                event_type=EventType.TCP_PROFILE_SEARCH,
-                hostname=self.current_host,
-                ip=ip,
-                port=int(port),
-                l7proto=l7proto,
-                raw_line=line
-            )
-
-        # === UDP Profile Search ===
+    def _on_tcp_profile_search(self, m: re.Match, line: str) -> Optional[ParsedEvent]:
+        # desync profile search for tcp ip=... port=443 l7proto=tls hostname='youtube.com'
+        ip, port, l7proto, hostname = m.groups()
+        self.current_ip = ip
+        self.current_port = int(port)
+        self.current_proto = "tcp"
+        self.current_l7proto = l7proto
+
+        if hostname and not hostname.replace('.', '').isdigit():
+            self.current_host = nld_cut(hostname, 2)
+            self._cache_hostname(ip, self.current_host)
+            # Сохраняем протокол для hostname (TLS или HTTP)
+            proto_key = "http" if l7proto == "http" or int(port) == 80 else "tls"
+            self.host_to_proto[self.current_host] = proto_key
+        else:
+            self.current_host = self.ip_to_hostname.get(ip)
+
+        return ParsedEvent(
+            event_type=EventType.TCP_PROFILE_SEARCH,
+            hostname=self.current_host,
+            ip=ip,
+            port=int(port),
+            l7proto=l7proto,
+            raw_line=line
+        )
+
+    def _on_udp_profile_search(self, m: re.Match, line: str) -> Optional[ParsedEvent]:
         # desync profile search for udp ip=... port=443 l7proto=quic
-        m = Patterns.udp_profile_search.search(line)
-        if m:
-            ip, port, l7proto = m.groups()
-            self.current_ip = ip
-            self.current_port = int(port)
-            self.current_proto = "udp"
-            self.current_l7proto = l7proto
-
-            if not is_local_ip(ip):
-                self.current_host = ip  # Для UDP используем полный IP
-                # Сохраняем протокол для IP (UDP)
-                self.host_to_proto[ip] = "udp"
-                # Ограничиваем размер кэша
-                if len(self.host_to_proto) > 2000:
-                    keys = list(self.host_to_proto.keys())
-                    for k in keys[:1000]:
-                        del self.host_to_proto[k]
-            else:
-                self.current_host = None
-
-            return ParsedEvent(
-                event_type=EventType.UDP_PROFILE_SEARCH,
-                ip=ip,
-                port=int(port),
-                l7proto=l7proto,
-                raw_line=line
-            )
-
-        # === UDP Packet IP (fallback для cached profile) ===
+        ip, port, l7proto = m.groups()
+        self.current_ip = ip
+        self.current_port = int(port)
+        self.current_proto = "udp"
+        self.current_l7proto = l7proto
+
+        if not is_local_ip(ip):
+            self.current_host = ip  # Для UDP используем полный IP
+            # Сохраняем протокол для IP (UDP)
+            self.host_to_proto[ip] = "udp"
+            # Ограничиваем размер кэша
+            if len(self.host_to_proto) > 2000:
+                keys = list(self.host_to_proto.keys())
+                for k in keys[:1000]:
+                    del self.host_to_proto[k]
+        else:
+            self.current_host = None
+
+        return ParsedEvent(
+            event_type=EventType.UDP_PROFILE_SEARCH,
+            ip=ip,
+            port=int(port),
+            l7proto=l7proto,
+            raw_line=line
+        )
+
+    def _on_udp_packet(self, m: re.Match, line: str) -> Optional[ParsedEvent]:
+        # UDP Packet IP (fallback для cached profile)
         # IP4: 151.101.1.140 => 192.168.1.100 proto=udp
-        m = Patterns.ip4_udp.search(line)
-        if m:
-            src_ip, dst_ip = m.groups()
-            remote_ip = get_remote_ip(src_ip, dst_ip)
-            if remote_ip:
-                self.current_host = remote_ip
-                self.current_ip = remote_ip
-                self.current_proto = "udp"
-                return ParsedEvent(
-                    event_type=EventType.UDP_PACKET,
-                    ip=remote_ip,
-                    raw_line=line
-                )
-
-        # === Cached Profile ===
-        m = Patterns.cached_profile.search(line)
-        if m:
-            profile_num = int(m.group(1))
-            self.current_profile = profile_num
-            if profile_num >= 3:
-                self.current_proto = "udp"
+        src_ip, dst_ip = m.groups()
+        remote_ip = get_remote_ip(src_ip, dst_ip)
+        if remote_ip:
+            self.current_host = remote_ip
+            self.current_ip = remote_ip
+            self.current_proto = "udp"
             return ParsedEvent(
-                event_type=EventType.CACHED_PROFILE,
-                profile=profile_num,
+                event_type=EventType.UDP_PACKET,
+                ip=remote_ip,
                 raw_line=line
             )
+        return None
 
-        # === Profile Matches ===
-        m = Patterns.profile_matches.search(line)
-        if m:
-            self.current_profile = int(m.group(1))
+    def _on_cached_profile(self, m: re.Match, line: str) -> Optional[ParsedEvent]:
+        profile_num = int(m.group(1))
+        self.current_profile = profile_num
+        if profile_num >= 3:
+            self.current_proto = "udp"
+        return ParsedEvent(
+            event_type=EventType.CACHED_PROFILE,
+            profile=profile_num,
+            raw_line=line
+        )
+
+    def _on_profile_matches(self, m: re.Match, line: str) -> Optional[ParsedEvent]:
+        self.current_profile = int(m.group(1))
+        return None
 
-        # === Protocol Detection by Packet Content (NOT ports) ===
-        # Эти паттерны появляются ДО dpi desync строки и устанавливают протокол
+    # Protocol Detection by Packet Content (NOT ports).
+    # Эти паттерны появляются ДО dpi desync строки и устанавливают протокол.
 
+    def _on_stun_payload(self, m: re.Match, line: str) -> Optional[ParsedEvent]:
         # STUN - определяется по Magic Cookie 0x2112A442, НЕ по портам
-        # "packet contains stun payload"
-        if Patterns.stun_payload.search(line):
-            self.current_proto = "udp"
-            self.current_l7proto = "stun"
+        self.current_proto = "udp"
+        self.current_l7proto = "stun"
+        return None
 
+    def _on_quic_initial(self, m: re.Match, line: str) -> Optional[ParsedEvent]:
         # QUIC - определяется по long header (первый байт 0xC0-0xFF)
-        # "packet contains QUIC initial"
-        if Patterns.quic_initial.search(line):
-            self.current_proto = "udp"
-            self.current_l7proto = "quic"
+        self.current_proto = "udp"
+        self.current_l7proto = "quic"
+        return None
 
-        # Discord IP Discovery
-        if Patterns.discord_payload.search(line):
-            self.current_proto = "udp"
-            self.current_l7proto = "discord"
+    def _on_discord_payload(self, m: re.Match, line: str) -> Optional[ParsedEvent]:
+        self.current_proto = "udp"
+        self.current_l7proto = "discord"
+        return None
 
-        # WireGuard
-        if Patterns.wireguard_payload.search(line):
-            self.current_proto = "udp"
-            self.current_l7proto = "wireguard"
+    def _on_wireguard_payload(self, m: re.Match, line: str) -> Optional[ParsedEvent]:
+        self.current_proto = "udp"
+        self.current_l7proto = "wireguard"
+        return None
 
+    def _on_dht_payload(self, m: re.Match, line: str) -> Optional[ParsedEvent]:
         # DHT (BitTorrent)
-        if Patterns.dht_payload.search(line):
-            self.current_proto = "udp"
-            self.current_l7proto = "dht"
-
-        # === DPI Desync (connection_proto) ===
-        m = Patterns.dpi_desync.search(line)
-        if m:
-            src_ip, _, dst_ip, _, conn_proto = m.groups()
-            self.current_l7proto = conn_proto
-            if self.current_profile >= 3:
-                remote_ip = get_remote_ip(src_ip, dst_ip)
-                if remote_ip:
-                    self.current_host = remote_ip
-                    self.current_ip = remote_ip
-                    self.current_proto = "udp"
-
-        # === UDP Protocol Success Detector ===
+        self.current_proto = "udp"
+        self.current_l7proto = "dht"
+        return None
+
+    def _on_dpi_desync(self, m: re.Match, line: str) -> Optional[ParsedEvent]:
+        src_ip, _, dst_ip, _, conn_proto = m.groups()
+        self.current_l7proto = conn_proto
+        if self.current_profile >= 3:
+            remote_ip = get_remote_ip(src_ip, dst_ip)
+            if remote_ip:
+                self.current_host = remote_ip
+                self.current_ip = remote_ip
+                self.current_proto = "udp"
+        return None
+
+    def _on_udp_success_detector(self, m: re.Match, line: str) -> Optional[ParsedEvent]:
         # LUA: udp_protocol_success_detector: QUIC (QUIC_SHORT_HEADER) - SUCCESS
         # Устанавливает UDP контекст для последующих событий slm_quality.
-        m = Patterns.udp_success.search(line)
-        if m:
-            proto_detail = m.group(1)  # "QUIC (QUIC_SHORT_HEADER)" or just "QUIC"
-            # Извлекаем базовый протокол
-            base_proto = proto_detail.split()[0].lower() if proto_detail else "quic"
-            self.current_proto = "udp"
-            self.current_l7proto = base_proto
-            # Не возвращаем событие - это информационная строка
-            # Контекст будет использован следующим slm_quality событием.
+        proto_detail = m.group(1)  # "QUIC (QUIC_SHORT_HEADER)" or just "QUIC"
+        # Извлекаем базовый протокол
+        base_proto = proto_detail.split()[0].lower() if proto_detail else "quic"
+        self.current_proto = "udp"
+        self.current_l7proto = base_proto
+        # Не возвращаем событие - это информационная строка
+        # Контекст будет использован следующим slm_quality событием.
+        return None
 
-        # === UDP Aggressive Failure Detector ===
+    def _on_udp_failure_detector(self, m: re.Match, line: str) -> Optional[ParsedEvent]:
         # LUA: udp_aggressive_failure_detector: FAIL out=2>=2 in=0<=0
         # Устанавливает UDP контекст для последующих событий
-        if Patterns.udp_fail.search(line):
-            self.current_proto = "udp"
-            # Не возвращаем событие - это информационная строка
+        self.current_proto = "udp"
+        return None
 
-        # === Automate Hostkey ===
+    def _on_automate_hostkey(self, m: re.Match, line: str) -> Optional[ParsedEvent]:
         # LUA: automate: host record key 'autostate.circular_quality_1_1.youtube.com'
         # Profile 1 = TLS, Profile 2 = HTTP, Profile 3+ = UDP
-        m = Patterns.automate_hostkey.search(line)
-        if m:
-            profile_num, hostname = m.groups()
-            profile = int(profile_num)
-            is_ip = hostname.replace('.', '').replace(':', '').isdigit()
-
-            # Для UDP (profile >= 3) используем IP как hostname
-            # Для TCP/TLS/HTTP - только домены (не IP)
-            if profile >= 3:
-                # UDP: используем IP адрес как есть
-                self.current_host = hostname
-                self.current_proto = "udp"
-            elif not is_ip:
-                # TCP: используем домен с NLD-cut
-                self.current_host = nld_cut(hostname, 2)
-                if self.current_ip:
-                    self._cache_hostname(self.current_ip, self.current_host)
-
-            return ParsedEvent(
-                event_type=EventType.HOSTKEY,
-                hostname=self.current_host,
-                profile=profile,
-                raw_line=line
-            )
-
-        # === APPLIED ===
+        profile_num, hostname = m.groups()
+        profile = int(profile_num)
+        is_ip = hostname.replace('.', '').replace(':', '').isdigit()
+
+        # Для UDP (profile >= 3) используем IP как hostname
+        # Для TCP/TLS/HTTP - только домены (не IP)
+        if profile >= 3:
+            # UDP: используем IP адрес как есть
+            self.current_host = hostname
+            self.current_proto = "udp"
+        elif not is_ip:
+            # TCP: используем домен с NLD-cut
+            self.current_host = nld_cut(hostname, 2)
+            if self.current_ip:
+                self._cache_hostname(self.current_ip, self.current_host)
+
+        return ParsedEvent(
+            event_type=EventType.HOSTKEY,
+            hostname=self.current_host,
+            profile=profile,
+            raw_line=line
+        )
+
+    def _on_applied(self, m: re.Match, line: str) -> Optional[ParsedEvent]:
         # LUA: strategy-stats: APPLIED youtube.com [tls] = strategy 2
-        m = Patterns.applied.search(line)
-        if m:
-            hostname = m.group(1)
-            proto_tag = m.group(2)  # [tls] между hostname и =
-            strategy = int(m.group(3))
-            tag = m.group(4)  # [circular_quality_1_1] после strategy
-
-            host_key = nld_cut(hostname, 2)
-
-            # Определяем протокол из тега
-            proto_key = None
-            if tag:
-                tag_m = re.match(r"circular_quality_(\d+)_", tag)
-                if tag_m:
-                    prof = int(tag_m.group(1))
-                    proto_key = {1: "tls", 2: "http", 3: "udp", 4: "udp"}.get(prof, "tls")
-            if not proto_key and proto_tag:
-                proto_key = proto_tag.lower()
-            if not proto_key:
-                proto_key = self._get_proto_key()
-
-            self.last_applied[(host_key, proto_key)] = strategy
-            self.last_host_by_proto[proto_key] = host_key
-            self.current_host = host_key
-
-            return ParsedEvent(
-                event_type=EventType.APPLIED,
-                hostname=host_key,
-                strategy=strategy,
-                l7proto=proto_key,
-                tag=tag,
-                raw_line=line
-            )
-
-        # === LOCK ===
-        # Patterns.lock: Groups: 1=protocol, 2=hostname, 3=strategy
-        m = Patterns.lock.search(line)
-        if m:
-            proto_from_log = m.group(1)  # [tls], [quic], [unknown], or None
-            hostname = m.group(2)
-            strategy = int(m.group(3))
-
-            # Приоритет 1: протокол из Lua лога (самый точный источник)
-            if proto_from_log:
-                proto = proto_from_log.lower()
-                is_udp = proto in ("udp", "quic", "stun", "discord", "wireguard", "dht", "unknown")
-            else:
-                # Приоритет 2: контекст из предыдущих строк
-                proto = self._get_proto_from_context()
-                is_udp = proto in ("udp", "quic", "stun", "discord", "wireguard", "dht")
-
-            # Fallback: проверяем hostname если контекст не определён
-            if not proto_from_log and not self.current_proto and not is_udp:
-                is_udp = self._is_udp_hostname(hostname)
-                if is_udp:
-                    proto = "udp"
-
-            # Для UDP НЕ режем IP (используем полный)
-            host_key = hostname if is_udp else nld_cut(hostname, 2)
-
-            return ParsedEvent(
-                event_type=EventType.LOCK,
-                hostname=host_key,
-                strategy=strategy,
-                l7proto=proto,
-                raw_line=line
-            )
-
-        # === UNLOCK ===
-        # Patterns.unlock: Groups: 1=protocol (or None), 2=hostname
-        m = Patterns.unlock.search(line)
-        if m:
-            proto_from_log = m.group(1)  # [tls], [quic], [unknown], or None
-            hostname = m.group(2)
-
-            # Определяем протокол
-            if proto_from_log:
-                proto = proto_from_log.lower()
-            else:
-                proto = self._get_proto_from_context()
+        hostname = m.group(1)
+        proto_tag = m.group(2)  # [tls] между hostname и =
+        strategy = int(m.group(3))
+        tag = m.group(4)  # [circular_quality_1_1] после strategy
+
+        host_key = nld_cut(hostname, 2)
+
+        # Определяем протокол из тега
+        proto_key = None
+        if tag:
+            tag_m = re.match(r"circular_quality_(\d+)_", tag)
+            if tag_m:
+                prof = int(tag_m.group(1))
+                proto_key = {1: "tls", 2: "http", 3: "udp", 4: "udp"}.get(prof, "tls")
+        if not proto_key and proto_tag:
+            proto_key = proto_tag.lower()
+        if not proto_key:
+            proto_key = self._get_proto_key()
 
-            return ParsedEvent(
-                event_type=EventType.UNLOCK,
-                hostname=hostname,
-                l7proto=proto,
-                raw_line=line
-            )
+        self.last_applied[(host_key, proto_key)] = strategy
+        self.last_host_by_proto[proto_key] = host_key
+        self.current_host = host_key
 
-        # === RESET ===
-        m = Patterns.reset.search(line)
-        if m:
-            hostname = m.group(1)
-            return ParsedEvent(
-                event_type=EventType.RESET,
-                hostname=hostname,
-                raw_line=line
-            )
+        return ParsedEvent(
+            event_type=EventType.APPLIED,
+            hostname=host_key,
+            strategy=strategy,
+            l7proto=proto_key,
+            tag=tag,
+            raw_line=line
+        )
 
-        # === SUCCESS ===
-        # Groups: 1=protocol (tls/quic/unknown/discord/None), 2=hostname, 3=strategy, 4=successes, 5=total
-        m = Patterns.success.search(line)
-        if m:
-            proto_from_log, hostname, strat, successes, total = m.groups()
-            host_key = nld_cut(hostname, 2)
-
-            # Приоритет 1: протокол из Lua лога (самый точный источник)
-            if proto_from_log:
-                proto = proto_from_log.lower()
-            else:
-                # Приоритет 2: сохранённый протокол для hostname (решает race condition)
-                proto = self.host_to_proto.get(host_key)
-                if not proto:
-                    # Приоритет 3: текущий контекст
-                    proto = self._get_proto_from_context()
+    def _on_lock(self, m: re.Match, line: str) -> Optional[ParsedEvent]:
+        # Patterns.lock: Groups: 1=protocol, 2=hostname, 3=strategy
+        proto_from_log = m.group(1)  # [tls], [quic], [unknown], or None
+        hostname = m.group(2)
+        strategy = int(m.group(3))
 
+        # Приоритет 1: протокол из Lua лога (самый точный источник)
+        if proto_from_log:
+            proto = proto_from_log.lower()
             is_udp = proto in ("udp", "quic", "stun", "discord", "wireguard", "dht", "unknown")
-
-            # Fallback: проверяем hostname ТОЛЬКО если протокол не был явно указан в логе
-            # НЕ перезаписываем proto_from_log - это приоритетный источник
-            if not proto_from_log and (not proto or proto == "tls"):
-                if self._is_udp_hostname(hostname):
-                    is_udp = True
-                    proto = "udp"
-                    host_key = hostname  # Для UDP НЕ режем IP
-
-            return ParsedEvent(
-                event_type=EventType.SUCCESS,
-                hostname=host_key,
-                strategy=int(strat),
-                successes=int(successes),
-                total=int(total),
-                l7proto=proto,
-                raw_line=line
-            )
-
-        # === FAIL ===
+        else:
+            # Приоритет 2: контекст из предыдущих строк
+            proto = self._get_proto_from_context()
+            is_udp = proto in ("udp", "quic", "stun", "discord", "wireguard", "dht")
+
+        # Fallback: проверяем hostname если контекст не определён
+        if not proto_from_log and not self.current_proto and not is_udp:
+            is_udp = self._is_udp_hostname(hostname)
+            if is_udp:
+                proto = "udp"
+
+        # Для UDP НЕ режем IP (используем полный)
+        host_key = hostname if is_udp else nld_cut(hostname, 2)
+
+        return ParsedEvent(
+            event_type=EventType.LOCK,
+            hostname=host_key,
+            strategy=strategy,
+            l7proto=proto,
+            raw_line=line
+        )
+
+    def _on_unlock(self, m: re.Match, line: str) -> Optional[ParsedEvent]:
+        # Patterns.unlock: Groups: 1=protocol (or None), 2=hostname
+        proto_from_log = m.group(1)  # [tls], [quic], [unknown], or None
+        hostname = m.group(2)
+
+        # Определяем протокол
+        if proto_from_log:
+            proto = proto_from_log.lower()
+        else:
+            proto = self._get_proto_from_context()
+
+        return ParsedEvent(
+            event_type=EventType.UNLOCK,
+            hostname=hostname,
+            l7proto=proto,
+            raw_line=line
+        )
+
+    def _on_reset(self, m: re.Match, line: str) -> Optional[ParsedEvent]:
+        hostname = m.group(1)
+        return ParsedEvent(
+            event_type=EventType.RESET,
+            hostname=hostname,
+            raw_line=line
+        )
+
+    def _quality_result_event(self, event_type: EventType, m: re.Match, line: str) -> ParsedEvent:
         # Groups: 1=protocol (tls/quic/unknown/discord/None), 2=hostname, 3=strategy, 4=successes, 5=total
-        m = Patterns.fail.search(line)
-        if m:
-            proto_from_log, hostname, strat, successes, total = m.groups()
-            host_key = nld_cut(hostname, 2)
-
-            # Приоритет 1: протокол из Lua лога (самый точный источник)
-            if proto_from_log:
-                proto = proto_from_log.lower()
-            else:
-                # Приоритет 2: сохранённый протокол для hostname (решает race condition)
-                proto = self.host_to_proto.get(host_key)
-                if not proto:
-                    # Приоритет 3: текущий контекст
-                    proto = self._get_proto_from_context()
-
-            is_udp = proto in ("udp", "quic", "stun", "discord", "wireguard", "dht", "unknown")
-
-            # Fallback: проверяем hostname ТОЛЬКО если протокол не был явно указан в логе
-            # НЕ перезаписываем proto_from_log - это приоритетный источник
-            if not proto_from_log and (not proto or proto == "tls"):
-                if self._is_udp_hostname(hostname):
-                    is_udp = True
-                    proto = "udp"
-                    host_key = hostname  # Для UDP НЕ режем IP
-
-            return ParsedEvent(
-                event_type=EventType.FAIL,
-                hostname=host_key,
-                strategy=int(strat),
-                successes=int(successes),
-                total=int(total),
-                l7proto=proto,
-                raw_line=line
-            )
-
-        # === ROTATE ===
-        m = Patterns.rotate.search(line) or Patterns.cq_rotate.search(line)
-        if m:
-            new_strat = int(m.group(1))
-            # НЕ обновляем last_applied! Только APPLIED должен это делать
-            return ParsedEvent(
-                event_type=EventType.ROTATE,
-                strategy=new_strat,
-                hostname=self.current_host,
-                raw_line=line
-            )
-
-        # === Current Strategy ===
-        m = Patterns.current_strategy.search(line) or Patterns.cq_current_strategy.search(line)
-        if m:
-            self.current_strategy = int(m.group(1))
-
-        # === RST ===
-        if Patterns.std_rst.search(line):
-            proto_key = self._get_proto_key()
-            host_key = self.current_host
-            if not host_key and self.current_ip:
-                host_key = self.ip_to_hostname.get(self.current_ip)
-            if not host_key:
-                host_key = self.last_host_by_proto.get(proto_key)
-
-            applied_strat = self.last_applied.get((host_key, proto_key)) if host_key else None
-
-            return ParsedEvent(
-                event_type=EventType.RST,
-                hostname=host_key,
-                strategy=applied_strat,
-                l7proto=proto_key,
-                raw_line=line
-            )
-
-        # === Automate Success ===
-        if Patterns.automate_success.search(line):
-            return ParsedEvent(
-                event_type=EventType.AUTOMATE_SUCCESS,
-                hostname=self.current_host,
-                raw_line=line
-            )
+        proto_from_log, hostname, strat, successes, total = m.groups()
+        host_key = nld_cut(hostname, 2)
+
+        # Приоритет 1: протокол из Lua лога (самый точный источник)
+        if proto_from_log:
+            proto = proto_from_log.lower()
+        else:
+            # Приоритет 2: сохранённый протокол для hostname (решает race condition)
+            proto = self.host_to_proto.get(host_key)
+            if not proto:
+                # Приоритет 3: текущий контекст
+                proto = self._get_proto_from_context()
 
-        # === Automate Failure ===
-        if Patterns.automate_failure.search(line):
-            return ParsedEvent(
-                event_type=EventType.AUTOMATE_FAILURE,
-                hostname=self.current_host,
-                raw_line=line
-            )
+        is_udp = proto in ("udp", "quic", "stun", "discord", "wireguard", "dht", "unknown")
+
+        # Fallback: проверяем hostname ТОЛЬКО если протокол не был явно указан в логе
+        # НЕ перезаписываем proto_from_log - это приоритетный источник
+        if not proto_from_log and (not proto or proto == "tls"):
+            if self._is_udp_hostname(hostname):
+                is_udp = True
+                proto = "udp"
+                host_key = hostname  # Для UDP НЕ режем IP
+
+        return ParsedEvent(
+            event_type=event_type,
+            hostname=host_key,
+            strategy=int(strat),
+            successes=int(successes),
+            total=int(total),
+            l7proto=proto,
+            raw_line=line
+        )
+
+    def _on_success(self, m: re.Match, line: str) -> Optional[ParsedEvent]:
+        return self._quality_result_event(EventType.SUCCESS, m, line)
+
+    def _on_fail(self, m: re.Match, line: str) -> Optional[ParsedEvent]:
+        return self._quality_result_event(EventType.FAIL, m, line)
+
+    def _on_rotate(self, m: re.Match, line: str) -> Optional[ParsedEvent]:
+        new_strat = int(m.group(1))
+        # НЕ обновляем last_applied! Только APPLIED должен это делать
+        return ParsedEvent(
+            event_type=EventType.ROTATE,
+            strategy=new_strat,
+            hostname=self.current_host,
+            raw_line=line
+        )
+
+    def _on_current_strategy(self, m: re.Match, line: str) -> Optional[ParsedEvent]:
+        self.current_strategy = int(m.group(1))
+        return None
 
-        # === Standard Success ===
-        if Patterns.std_success.search(line):
-            proto_key = self._get_proto_key()
-            host_key = self.current_host
-            if not host_key and self.current_ip:
-                host_key = self.ip_to_hostname.get(self.current_ip)
+    def _on_rst(self, m: re.Match, line: str) -> Optional[ParsedEvent]:
+        proto_key = self._get_proto_key()
+        host_key = self.current_host
+        if not host_key and self.current_ip:
+            host_key = self.ip_to_hostname.get(self.current_ip)
+        if not host_key:
+            host_key = self.last_host_by_proto.get(proto_key)
+
+        applied_strat = self.last_applied.get((host_key, proto_key)) if host_key else None
+
+        return ParsedEvent(
+            event_type=EventType.RST,
+            hostname=host_key,
+            strategy=applied_strat,
+            l7proto=proto_key,
+            raw_line=line
+        )
+
+    def _on_automate_success(self, m: re.Match, line: str) -> Optional[ParsedEvent]:
+        return ParsedEvent(
+            event_type=EventType.AUTOMATE_SUCCESS,
+            hostname=self.current_host,
+            raw_line=line
+        )
+
+    def _on_automate_failure(self, m: re.Match, line: str) -> Optional[ParsedEvent]:
+        return ParsedEvent(
+            event_type=EventType.AUTOMATE_FAILURE,
+            hostname=self.current_host,
+            raw_line=line
+        )
+
+    def _on_std_success(self, m: re.Match, line: str) -> Optional[ParsedEvent]:
+        proto_key = self._get_proto_key()
+        host_key = self.current_host
+        if not host_key and self.current_ip:
+            host_key = self.ip_to_hostname.get(self.current_ip)
+
+        applied_strat = self.last_applied.get((host_key, proto_key)) if host_key else None
+
+        return ParsedEvent(
+            event_type=EventType.SUCCESS,
+            hostname=host_key,
+            strategy=applied_strat,
+            l7proto=proto_key,
+            raw_line=line
+        )
+
+    def _on_history(self, m: re.Match, line: str) -> Optional[ParsedEvent]:
+        # Format: HISTORY youtube.com s2 successes=10 failures=2 rate=83%
+        hostname, strat, successes, failures, rate = m.groups()
+        return ParsedEvent(
+            event_type=EventType.HISTORY,
+            hostname=nld_cut(hostname, 2),
+            strategy=int(strat),
+            successes=int(successes),
+            failures=int(failures),
+            rate=int(rate),
+            raw_line=line
+        )
+
+    def _on_preloaded(self, m: re.Match, line: str) -> Optional[ParsedEvent]:
+        hostname, strat, proto = m.groups()
+        return ParsedEvent(
+            event_type=EventType.PRELOADED,
+            hostname=hostname,
+            strategy=int(strat),
+            l7proto=proto,
+            raw_line=line
+        )
 
-            applied_strat = self.last_applied.get((host_key, proto_key)) if host_key else None
+    def get_applied_strategy(self, hostname: str, proto: str) -> Optional[int]:
+        """Возвращает последнюю применённую стратегию для хоста и протокола"""
+        return self.last_applied.get((hostname, proto))
 
-            return ParsedEvent(
-                event_type=EventType.SUCCESS,
-                hostname=host_key,
-                strategy=applied_strat,
-                l7proto=proto_key,
-                raw_line=line
-            )
 
-        # === HISTORY ===
-        # Format: HISTORY youtube.com s2 successes=10 failures=2 rate=83%
-        m = Patterns.history.search(line)
-        if m:
-            hostname, strat, successes, failures, rate = m.groups()
-            return ParsedEvent(
-                event_type=EventType.HISTORY,
-                hostname=nld_cut(hostname, 2),
-                strategy=int(strat),
-                successes=int(successes),
-                failures=int(failures),
-                rate=int(rate),
-                raw_line=line
-            )
+def has_event_keyword(line: str) -> bool:
+    """Есть ли в строке хоть одно ключевое слово из _LINE_HANDLERS.
 
-        # === PRELOADED ===
-        m = Patterns.preloaded.search(line)
-        if m:
-            hostname, strat, proto = m.groups()
-            return ParsedEvent(
-                event_type=EventType.PRELOADED,
-                hostname=hostname,
-                strategy=int(strat),
-                l7proto=proto,
-                raw_line=line
-            )
+    Цепочка `in` дешевле одного regex с альтернативой и отсекает
+    packet:/IP4:/TCP: шум, который составляет почти весь debug-лог.
+    """
+    return (
+        "slm_quality" in line
+        or "desync profile" in line
+        or "dpi desync" in line
+        or "proto=udp" in line
+        or "packet contains" in line
+        or "_detector:" in line
+        or "automate:" in line
+        or "circular" in line
+        or "APPLIED " in line
+        or "PRELOADED " in line
+        or "HISTORY " in line
+    )
 
-        return None
 
-    def get_applied_strategy(self, hostname: str, proto: str) -> Optional[int]:
-        """Возвращает последнюю применённую стратегию для хоста и протокола"""
-        return self.last_applied.get((hostname, proto))
+# (ключевое слово, паттерны, обработчик) в порядке прежнего parse_line.
+# Ключевое слово — подстрока, без которой ни один из паттернов не совпадёт;
+# из нескольких паттернов берётся первый совпавший.
+_LINE_HANDLERS: tuple[tuple[str, tuple[re.Pattern, ...], Callable[..., Optional[ParsedEvent]]], ...] = (
+    ("desync profile search for tcp", (Patterns.tcp_profile_search,), LogParser._on_tcp_profile_search),
+    ("desync profile search for udp", (Patterns.udp_profile_search,), LogParser._on_udp_profile_search),
+    ("proto=udp", (Patterns.ip4_udp,), LogParser._on_udp_packet),
+    ("using cached desync profile", (Patterns.cached_profile,), LogParser._on_cached_profile),
+    ("desync profile", (Patterns.profile_matches,), LogParser._on_profile_matches),
+    ("packet contains stun", (Patterns.stun_payload,), LogParser._on_stun_payload),
+    ("packet contains QUIC", (Patterns.quic_initial,), LogParser._on_quic_initial),
+    ("packet contains discord", (Patterns.discord_payload,), LogParser._on_discord_payload),
+    ("packet contains wireguard", (Patterns.wireguard_payload,), LogParser._on_wireguard_payload),
+    ("packet contains dht", (Patterns.dht_payload,), LogParser._on_dht_payload),
+    ("dpi desync src=", (Patterns.dpi_desync,), LogParser._on_dpi_desync),
+    ("udp_protocol_success_detector: ", (Patterns.udp_success,), LogParser._on_udp_success_detector),
+    ("udp_aggressive_failure_detector: FAIL", (Patterns.udp_fail,), LogParser._on_udp_failure_detector),
+    ("LUA: automate: host record key", (Patterns.automate_hostkey,), LogParser._on_automate_hostkey),
+    ("APPLIED ", (Patterns.applied,), LogParser._on_applied),
+    ("slm_quality", (Patterns.lock,), LogParser._on_lock),
+    ("slm_quality", (Patterns.unlock,), LogParser._on_unlock),
+    ("slm_quality: RESET ", (Patterns.reset,), LogParser._on_reset),
+    (" SUCCESS ", (Patterns.success,), LogParser._on_success),
+    (" FAIL ", (Patterns.fail,), LogParser._on_fail),
+    ("rotate ", (Patterns.rotate, Patterns.cq_rotate), LogParser._on_rotate),
+    (" current strategy ", (Patterns.current_strategy, Patterns.cq_current_strategy), LogParser._on_current_strategy),
+    ("standard_failure_detector: incoming RST", (Patterns.std_rst,), LogParser._on_rst),
+    ("LUA: automate: success detected", (Patterns.automate_success,), LogParser._on_automate_success),
+    ("LUA: automate: failure detected", (Patterns.automate_failure,), LogParser._on_automate_failure),
+    ("standard_success_detector:", (Patterns.std_success,), LogParser._on_std_success),
+    ("HISTORY ", (Patterns.history,), LogParser._on_history),
+    ("PRELOADED ", (Patterns.preloaded,), LogParser._on_preloaded),
+)
@@ -15,7 +15,6 @@ import subprocess
 import threading
 import json
 import glob
-import ipaddress
 import time
 from collections import deque
 from typing import Optional, Callable, Dict, List
@@ -30,6 +29,11 @@ from utils.circular_strategy_numbering import (
 from config.runtime_layout import APPLICATION_PATHS, ApplicationPaths
 from settings.mode import ENGINE_WINWS2, EXE_NAME_WINWS2
 from lists.core.paths import get_lists_dir
+from lists.ipset_index import (
+    IpsetIndex,
+    current_ipset_final_files as _current_ipset_final_files,
+    load_ipset_index,
+)
 
 from settings.store import (
     get_orchestra_auto_restart_on_discord_fail,
@@ -46,7 +50,24 @@ from orchestra.ignored_targets import (
     get_orchestra_ignored_exact_domains,
     is_orchestra_ignored_target,
 )
-from orchestra.log_parser import LogParser, EventType, ParsedEvent, nld_cut, ip_to_subnet16, is_local_ip
+from orchestra.log_parser import (
+    LogParser,
+    EventType,
+    ParsedEvent,
+    has_event_keyword,
+    nld_cut,
+    ip_to_subnet16,
+    is_local_ip,
+)
+from orchestra.output_pipeline import (
+    HISTORY_SAVE_INTERVAL,
+    ChunkedLineReader,
+    DebugLogSink,
+    HistorySaveCoalescer,
+    OutputPipeline,
+    OutputPipelineStats,
+    rotated_log_path,
+)
 from orchestra.blocked_strategies_manager import BlockedStrategiesManager
 from orchestra.locked_strategies_manager import (
     LockedStrategiesManager,
@@ -60,12 +81,9 @@ LISTS_FOLDER = get_lists_dir()
 # Максимальное количество лог-файлов оркестратора
 MAX_ORCHESTRA_LOGS = 10
 
-# Максимальный размер лог-файла (1 ГБ) - при превышении файл очищается
+# Максимальный размер debug лога сессии (1 ГБ) вместе с ротированной частью .1
 MAX_LOG_SIZE_BYTES = 1024 * 1024 * 1024
 
-# Интервал проверки размера файла (каждые N строк)
-LOG_SIZE_CHECK_INTERVAL = 1000
-
 # Белый список по умолчанию - сайты которые НЕ нужно обрабатывать
 # Эти сайты работают без DPI bypass или требуют особой обработки
 # Встраиваются автоматически при load_whitelist() как системные (нельзя удалить)
@@ -132,22 +150,6 @@ DEFAULT_WHITELIST_DOMAINS = {
 }
 
 
-def _current_ipset_final_files(lists_folder: str) -> list[str]:
-    root = str(lists_folder or "")
-    names: set[str] = set()
-    for layer_name in ("base", "user"):
-        layer_dir = os.path.join(root, layer_name)
-        for path in glob.glob(os.path.join(layer_dir, "ipset-*.txt")):
-            names.add(os.path.basename(path))
-
-    result: list[str] = []
-    for name in sorted(names, key=str.casefold):
-        final_path = os.path.join(root, name)
-        if os.path.isfile(final_path):
-            result.append(final_path)
-    return result
-
-
 def _is_default_whitelist_domain(hostname: str) -> bool:
     """
     Проверяет, является ли домен системным в whitelist (нельзя удалить).
@@ -241,7 +243,7 @@ class OrchestraRunner:
         self.blocked_manager.set_locked_manager(self.locked_manager)
 
         # Кэши ipset подсетей для UDP (игры/Discord/QUIC)
-        self.ipset_networks: list[tuple[ipaddress._BaseNetwork, str]] = []
+        self.ipset_index: Optional[IpsetIndex] = None
 
         # Белый список (exclude list) - домены которые НЕ обрабатываются
         self.user_whitelist: list = []  # Только пользовательские (из settings.json)
@@ -266,6 +268,10 @@ class OrchestraRunner:
         self._startup_forwarded_signatures = deque(maxlen=80)
         self._ignored_runtime_targets_logged: set[str] = set()
 
+        # Конвейер stdout текущего запуска (метрики: get_output_stats)
+        self._output_pipeline: Optional[OutputPipeline] = None
+        self._last_queue_overflow_log: float = 0.0
+
     def _remember_output_line(self, line: str):
         """Запоминает последние строки stdout для диагностики падений."""
         text = (line or "").strip()
@@ -608,6 +614,7 @@ class OrchestraRunner:
             for log_info in logs_to_delete:
                 try:
                     os.remove(log_info['path'])
+                    self._remove_rotated_log(log_info['path'])
                     deleted += 1
                     log(f"Удалён старый лог: {log_info['filename']}", "DEBUG")
                 except Exception as e:
@@ -618,6 +625,15 @@ class OrchestraRunner:
 
         return deleted
 
+    def _remove_rotated_log(self, log_path: str) -> None:
+        """Удаляет ротированную часть лога (orchestra_<id>.log.1), если она есть."""
+        rotated = rotated_log_path(log_path)
+        try:
+            if os.path.exists(rotated):
+                os.remove(rotated)
+        except Exception as e:
+            log(f"Ошибка удаления {os.path.basename(rotated)}: {e}", "DEBUG")
+
     def get_log_history(self) -> List[dict]:
         """
         Возвращает историю логов для UI.
@@ -686,6 +702,7 @@ class OrchestraRunner:
 
         try:
             os.remove(log_path)
+            self._remove_rotated_log(log_path)
             log(f"Удалён лог: orchestra_{log_id}.log", "INFO")
             return True
         except Exception as e:
@@ -709,6 +726,7 @@ class OrchestraRunner:
 
             try:
                 os.remove(log_info['path'])
+                self._remove_rotated_log(log_info['path'])
                 deleted += 1
             except Exception:
                 pass
@@ -913,431 +931,477 @@ class OrchestraRunner:
     # REMOVED: _generate_numbered_strategies() - стратегии теперь встроены в circular-config.txt
 
     def _read_output(self):
-        """Поток чтения stdout от winws2 с использованием LogParser"""
-        parser = LogParser()
-        history_save_counter = 0
-        log_line_counter = 0  # Счётчик строк для периодической проверки размера файла
+        """Поток чтения stdout от winws2 (reader + debug-лог), обучение — в learner-потоке.
 
-        # Открываем файл для записи сырого debug лога (для отправки в техподдержку)
-        log_file = None
+        Строки без ключевых слов LogParser не дают событий и не меняют его
+        состояние, поэтому после стартового окна в очередь learner'а идут
+        только строки с ключевыми словами; в debug-лог и хвост диагностики
+        попадает всё.
+        """
+        pipeline = OutputPipeline()
+        self._output_pipeline = pipeline
+
+        # Файл сырого debug лога (для отправки в техподдержку)
+        sink: Optional[DebugLogSink] = None
         if self.debug_log_path:
             try:
-                log_file = open(self.debug_log_path, 'w', encoding='utf-8', buffering=1)  # line buffered
-                log_file.write(f"=== Orchestra Debug Log Started {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} ===\n")
+                sink = DebugLogSink(self.debug_log_path, MAX_LOG_SIZE_BYTES)
+                sink.open()
             except Exception as e:
                 log(f"Не удалось открыть лог-файл: {e}", "WARNING")
+                sink = None
 
-        if self.running_process and self.running_process.stdout:
-            try:
-                for line in self.running_process.stdout:
-                    if self.stop_event.is_set():
-                        break
-
-                    line = line.rstrip()
-                    if not line:
-                        continue
+        learner = threading.Thread(
+            target=self._learn_from_output,
+            args=(pipeline,),
+            name="orchestra-learner",
+            daemon=True,
+        )
+        learner.start()
 
+        process = self.running_process
+        try:
+            if process and process.stdout:
+                reader = ChunkedLineReader(process.stdout)
+                while not self.stop_event.is_set():
+                    lines = reader.read_lines()
+                    if lines is None:
+                        break
+                    pipeline.note_read(len(lines), reader.bytes_read)
                     timestamp = datetime.now().strftime("%H:%M:%S")
 
-                    self._remember_output_line(line)
+                    for line in lines[-self._recent_output_lines.maxlen:]:
+                        self._remember_output_line(line)
 
-                    # Записываем в debug лог
-                    if log_file:
+                    if sink:
                         try:
-                            log_file.write(f"{line}\n")
-                            log_line_counter += 1
-
-                            # Периодически проверяем размер файла
-                            if log_line_counter >= LOG_SIZE_CHECK_INTERVAL:
-                                log_line_counter = 0
-                                try:
-                                    log_file.flush()
-                                    file_size = os.path.getsize(self.debug_log_path)
-                                    if file_size > MAX_LOG_SIZE_BYTES:
-                                        # Файл превысил лимит - очищаем
-                                        log_file.close()
-                                        log_file = open(self.debug_log_path, 'w', encoding='utf-8', buffering=1)
-                                        log_file.write(f"=== Log truncated at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} (exceeded {MAX_LOG_SIZE_BYTES // (1024*1024*1024)} GB) ===\n")
-                                        log(f"Лог-файл оркестратора очищен (превышен лимит {MAX_LOG_SIZE_BYTES // (1024*1024*1024)} ГБ)", "INFO")
-                                except Exception:
-                                    pass
-                        except Exception:
-                            pass
-
-                    # Парсим строку
+                            rotations = sink.rotations
+                            sink.write_lines(lines)
+                            if sink.rotations != rotations:
+                                pipeline.log_rotations = sink.rotations
+                                log(f"Лог-файл оркестратора ротирован (превышен лимит {MAX_LOG_SIZE_BYTES // (1024*1024*1024)} ГБ)", "INFO")
+                        except Exception as e:
+                            log(f"Ошибка записи debug лога оркестратора: {e}", "DEBUG")
+
+                    if not self._is_startup_phase():
+                        lines = [line for line in lines if has_event_keyword(line)]
+                    if lines and not pipeline.put(timestamp, lines):
+                        self._warn_output_queue_overflow(pipeline)
+        except Exception as e:
+            import traceback
+            log(f"Read output error: {e}", "DEBUG")
+            log(f"Traceback: {traceback.format_exc()}", "DEBUG")
+        finally:
+            pipeline.close()
+            learner.join()
+            # Закрываем лог-файл
+            if sink:
+                try:
+                    sink.close()
+                except Exception:
+                    pass
+            # Сохраняем историю при завершении
+            if self.locked_manager.strategy_history:
+                self.locked_manager.save_history()
+
+        # Диагностика неожиданного завершения процесса
+        process = self.running_process
+        if process and not self.stop_event.is_set():
+            try:
+                exit_code = process.poll()
+            except Exception:
+                exit_code = None
+
+            if exit_code is not None:
+                uptime_sec = 0.0
+                if self.last_start_attempt_ts > 0:
+                    uptime_sec = max(0.0, time.monotonic() - self.last_start_attempt_ts)
+
+                reason = self._guess_start_failure_reason(exit_code)
+                diagnostics = self._build_startup_diagnostics(exit_code, uptime_sec)
+                self.last_exit_info = {
+                    "exit_code": int(exit_code),
+                    "uptime_sec": round(uptime_sec, 2),
+                    "reason": reason,
+                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    "config_path": self.last_launch_config_path,
+                    "command": list(self.last_launch_command),
+                    "recent_output": self._get_recent_output_tail(8),
+                }
+
+                message = (
+                    f"Оркестратор завершился (код: {exit_code}, аптайм: {uptime_sec:.1f}с). "
+                    f"Причина: {reason}"
+                )
+                log(message, "❌ ERROR")
+                if self.output_callback:
+                    self.output_callback(f"[❌ ERROR] {message}")
+
+                self._emit_startup_diagnostics(diagnostics)
+
+                if uptime_sec < 3.0:
+                    self.last_start_error = message
+
+    def _warn_output_queue_overflow(self, pipeline: OutputPipeline) -> None:
+        now = time.monotonic()
+        if now - self._last_queue_overflow_log < 10.0:
+            return
+        self._last_queue_overflow_log = now
+        log(
+            f"Очередь разбора вывода {ENGINE_WINWS2} переполнена, пропущено строк без событий: {pipeline.lines_dropped}",
+            "WARNING",
+        )
+
+    def _learn_from_output(self, pipeline: OutputPipeline) -> None:
+        """Learner-поток: разбор строк, LOCK/UNLOCK, история (сохранение склеивается)."""
+        parser = LogParser()
+        history = HistorySaveCoalescer(self.locked_manager.save_history)
+        while True:
+            batch = pipeline.get(timeout=HISTORY_SAVE_INTERVAL)
+            if batch is None:
+                if pipeline.closed:
+                    break
+                history.flush_if_due()
+                continue
+
+            timestamp, lines = batch
+            events = 0
+            for line in lines:
+                try:
                     event = parser.parse_line(line)
                     if not event:
                         if self._is_startup_phase() and self._looks_like_error_output_line(line):
                             self._forward_startup_raw_output(timestamp, line)
                         continue
-
+                    events += 1
                     if self._should_ignore_orchestra_event(event):
                         continue
+                    self._handle_output_event(parser, event, timestamp, history)
+                except Exception as e:
+                    import traceback
+                    log(f"Orchestra learner error: {e}", "DEBUG")
+                    log(f"Traceback: {traceback.format_exc()}", "DEBUG")
+            pipeline.note_parsed(len(lines), events)
+            history.flush_if_due()
 
-                    is_udp = event.l7proto in ("udp", "quic", "stun", "discord", "wireguard", "dht", "unknown")
-
-                    # === LOCK ===
-                    if event.event_type == EventType.LOCK:
-                        host = event.hostname
-                        strat = event.strategy
-                        proto = event.l7proto or "tls"
+        try:
+            history.flush()
+        except Exception as e:
+            log(f"Ошибка сохранения истории оркестратора: {e}", "DEBUG")
+
+    def _handle_output_event(
+        self,
+        parser: LogParser,
+        event: ParsedEvent,
+        timestamp: str,
+        history: HistorySaveCoalescer,
+    ) -> None:
+        """Обработка одного события winws2: LOCK/UNLOCK, история, сообщения в UI."""
+        is_udp = event.l7proto in ("udp", "quic", "stun", "discord", "wireguard", "dht", "unknown")
+
+        # === LOCK ===
+        if event.event_type == EventType.LOCK:
+            host = event.hostname
+            strat = event.strategy
+            proto = event.l7proto or "tls"
+
+            # Пропускаем заблокированные стратегии
+            if self.blocked_manager.is_blocked(host, strat):
+                return
+
+            # Маппинг l7proto -> askey
+            askey = PROTO_TO_ASKEY.get(proto, proto if proto in ASKEY_ALL else "tls")
+
+            # Пропускаем user locks - их нельзя перезаписать auto-lock
+            if self.locked_manager.is_user_locked(host, askey):
+                log(f"SKIP auto-lock: {host} has user lock [{askey.upper()}]", "DEBUG")
+                return
+
+            # Protocol tag and port for UI
+            if askey in UDP_ASKEYS:
+                proto_tag = f"[{askey.upper()}]"
+                port_str = ""
+            elif askey == "http":
+                proto_tag = "[HTTP]"
+                port_str = ":80"
+            else:
+                proto_tag = f"[{askey.upper()}]"
+                port_str = ":443" if askey in TCP_ASKEYS else ""
+
+            target_dict = self.locked_manager.locked_by_askey[askey]
+            if host not in target_dict or target_dict[host] != strat:
+                target_dict[host] = strat
+                msg = f"[{timestamp}] {proto_tag} 🔒 LOCKED: {host}{port_str} = strategy {strat}"
+                log(msg, "INFO")
+                if self.output_callback:
+                    self.output_callback(msg)
+                if self.lock_callback:
+                    self.lock_callback(host, strat)
+                self.locked_manager.save()
+            return
 
-                        # Пропускаем заблокированные стратегии
-                        if self.blocked_manager.is_blocked(host, strat):
+        # === UNLOCK ===
+        if event.event_type == EventType.UNLOCK:
+            host = (event.hostname or "").strip().lower()
+            proto = (event.l7proto or "tls").strip().lower()
+            askey = PROTO_TO_ASKEY.get(proto, proto if proto in ASKEY_ALL else "tls")
+            removed = False
+
+            if not host:
+                return
+
+            # Ищем хост во всех askey профилях и удаляем.
+            # IMPORTANT: do NOT auto-unlock user-locked entries.
+            for ak in ASKEY_ALL:
+                target_dict = self.locked_manager.locked_by_askey[ak]
+                if host in target_dict:
+                    try:
+                        if self.locked_manager.is_user_locked(host, ak):
+                            # User explicitly pinned this domain; ignore AUTO-UNLOCK/UNLOCK from Lua.
+                            log(f"SKIP auto-unlock: {host} has user lock [{ak.upper()}]", "INFO")
                             continue
+                    except Exception:
+                        pass
 
-                        # Маппинг l7proto -> askey
-                        askey = PROTO_TO_ASKEY.get(proto, proto if proto in ASKEY_ALL else "tls")
+                    del target_dict[host]
+                    removed = True
+                    proto_tag = f"[{ak.upper()}]"
+                    port_str = ":443" if ak == "tls" else (":80" if ak == "http" else "")
+                    msg = f"[{timestamp}] {proto_tag} 🔓 UNLOCKED: {host}{port_str} - re-learning..."
+                    log(msg, "INFO")
+                    if self.output_callback:
+                        self.output_callback(msg)
+                    if self.unlock_callback:
+                        self.unlock_callback(host)
+            if removed:
+                self.locked_manager.save()
+            return
 
-                        # Пропускаем user locks - их нельзя перезаписать auto-lock
-                        if self.locked_manager.is_user_locked(host, askey):
-                            log(f"SKIP auto-lock: {host} has user lock [{askey.upper()}]", "DEBUG")
-                            continue
+        # === RESET ===
+        if event.event_type == EventType.RESET:
+            host = event.hostname
+            msg = f"[{timestamp}] 🔄 RESET: {host} - statistics cleared"
+            log(msg, "INFO")
+            if self.output_callback:
+                self.output_callback(msg)
+            return
 
-                        # Protocol tag and port for UI
-                        if askey in UDP_ASKEYS:
-                            proto_tag = f"[{askey.upper()}]"
-                            port_str = ""
-                        elif askey == "http":
-                            proto_tag = "[HTTP]"
-                            port_str = ":80"
-                        else:
-                            proto_tag = f"[{askey.upper()}]"
-                            port_str = ":443" if askey in TCP_ASKEYS else ""
+        # === APPLIED ===
+        if event.event_type == EventType.APPLIED:
+            host = event.hostname
+            strat = event.strategy
+            proto = event.l7proto or "tls"
+            prev = parser.last_applied.get((host, proto))
+
+            # Protocol tag for APPLIED
+            if is_udp:
+                proto_tag = f"[{proto.upper()}]" if proto else "[UDP]"
+            elif proto == "http":
+                proto_tag = "[HTTP]"
+            else:
+                proto_tag = "[TLS]"
 
+            if prev is None or prev != strat:
+                if prev is None:
+                    msg = f"[{timestamp}] {proto_tag} 🎯 APPLIED: {host} = strategy {strat}"
+                else:
+                    msg = f"[{timestamp}] {proto_tag} 🔄 APPLIED: {host} {prev} → {strat}"
+                if self.output_callback:
+                    self.output_callback(msg)
+            return
+
+        # === SUCCESS (from strategy_quality) ===
+        if event.event_type == EventType.SUCCESS and event.total is not None:
+            host = event.hostname
+            strat = event.strategy
+            proto = event.l7proto or "tls"
+
+            if host and strat:
+                self.locked_manager.increment_history(host, strat, is_success=True)
+                history.mark()
+
+                # Сброс счётчика Discord FAIL при SUCCESS
+                if "discord" in host.lower() and self.discord_fail_count > 0:
+                    self.discord_fail_count = 0
+
+                # Protocol tag for clear identification
+                if is_udp:
+                    proto_tag = f"[{proto.upper()}]" if proto else "[UDP]"
+                    port_str = ""
+                elif proto == "http":
+                    proto_tag = "[HTTP]"
+                    port_str = ":80"
+                else:
+                    proto_tag = "[TLS]"
+                    port_str = ":443"
+                msg = f"[{timestamp}] {proto_tag} ✓ SUCCESS: {host}{port_str} strategy={strat} ({event.successes}/{event.total})"
+                if self.output_callback:
+                    self.output_callback(msg)
+
+            return
+
+        # === SUCCESS (from std_success_detector) ===
+        if event.event_type == EventType.SUCCESS:
+            host = event.hostname
+            strat = event.strategy
+            proto = event.l7proto or "tls"
+
+            if host and strat and not self.blocked_manager.is_blocked(host, strat):
+                self.locked_manager.increment_history(host, strat, is_success=True)
+                history.mark()
+
+                # Сброс счётчика Discord FAIL при SUCCESS
+                if "discord" in host.lower() and self.discord_fail_count > 0:
+                    self.discord_fail_count = 0
+
+                # Protocol tag for clear identification
+                if is_udp:
+                    proto_tag = f"[{proto.upper()}]" if proto else "[UDP]"
+                    port_str = ""
+                elif proto == "http":
+                    proto_tag = "[HTTP]"
+                    port_str = ":80"
+                else:
+                    proto_tag = "[TLS]"
+                    port_str = ":443"
+
+                # Auto-LOCK после успехов
+                host_key = f"{host}:{strat}"
+                if not hasattr(self, '_success_counts'):
+                    self._success_counts = {}
+                self._success_counts[host_key] = self._success_counts.get(host_key, 0) + 1
+
+                lock_threshold = 1 if is_udp else 3
+                if self._success_counts[host_key] >= lock_threshold:
+                    # Маппинг l7proto -> askey
+                    askey = PROTO_TO_ASKEY.get(proto, proto if proto in ASKEY_ALL else "tls")
+
+                    # Пропускаем user locks - их нельзя перезаписать auto-lock
+                    if self.locked_manager.is_user_locked(host, askey):
+                        log(f"SKIP auto-lock: {host} has user lock [{askey.upper()}]", "DEBUG")
+                    else:
                         target_dict = self.locked_manager.locked_by_askey[askey]
+
                         if host not in target_dict or target_dict[host] != strat:
                             target_dict[host] = strat
                             msg = f"[{timestamp}] {proto_tag} 🔒 LOCKED: {host}{port_str} = strategy {strat}"
                             log(msg, "INFO")
                             if self.output_callback:
                                 self.output_callback(msg)
-                            if self.lock_callback:
-                                self.lock_callback(host, strat)
                             self.locked_manager.save()
-                        continue
-
-                    # === UNLOCK ===
-                    if event.event_type == EventType.UNLOCK:
-                        host = (event.hostname or "").strip().lower()
-                        proto = (event.l7proto or "tls").strip().lower()
-                        askey = PROTO_TO_ASKEY.get(proto, proto if proto in ASKEY_ALL else "tls")
-                        removed = False
-
-                        if not host:
-                            continue
-
-                        # Ищем хост во всех askey профилях и удаляем.
-                        # IMPORTANT: do NOT auto-unlock user-locked entries.
-                        for ak in ASKEY_ALL:
-                            target_dict = self.locked_manager.locked_by_askey[ak]
-                            if host in target_dict:
-                                try:
-                                    if self.locked_manager.is_user_locked(host, ak):
-                                        # User explicitly pinned this domain; ignore AUTO-UNLOCK/UNLOCK from Lua.
-                                        log(f"SKIP auto-unlock: {host} has user lock [{ak.upper()}]", "INFO")
-                                        continue
-                                except Exception:
-                                    pass
-
-                                del target_dict[host]
-                                removed = True
-                                proto_tag = f"[{ak.upper()}]"
-                                port_str = ":443" if ak == "tls" else (":80" if ak == "http" else "")
-                                msg = f"[{timestamp}] {proto_tag} 🔓 UNLOCKED: {host}{port_str} - re-learning..."
-                                log(msg, "INFO")
-                                if self.output_callback:
-                                    self.output_callback(msg)
-                                if self.unlock_callback:
-                                    self.unlock_callback(host)
-                        if removed:
-                            self.locked_manager.save()
-                        continue
-
-                    # === RESET ===
-                    if event.event_type == EventType.RESET:
-                        host = event.hostname
-                        msg = f"[{timestamp}] 🔄 RESET: {host} - statistics cleared"
-                        log(msg, "INFO")
-                        if self.output_callback:
-                            self.output_callback(msg)
-                        continue
-
-                    # === APPLIED ===
-                    if event.event_type == EventType.APPLIED:
-                        host = event.hostname
-                        strat = event.strategy
-                        proto = event.l7proto or "tls"
-                        prev = parser.last_applied.get((host, proto))
-
-                        # Protocol tag for APPLIED
-                        if is_udp:
-                            proto_tag = f"[{proto.upper()}]" if proto else "[UDP]"
-                        elif proto == "http":
-                            proto_tag = "[HTTP]"
-                        else:
-                            proto_tag = "[TLS]"
-
-                        if prev is None or prev != strat:
-                            if prev is None:
-                                msg = f"[{timestamp}] {proto_tag} 🎯 APPLIED: {host} = strategy {strat}"
-                            else:
-                                msg = f"[{timestamp}] {proto_tag} 🔄 APPLIED: {host} {prev} → {strat}"
-                            if self.output_callback:
-                                self.output_callback(msg)
-                        continue
+                            history.mark()
+                            history.flush()
 
-                    # === SUCCESS (from strategy_quality) ===
-                    if event.event_type == EventType.SUCCESS and event.total is not None:
-                        host = event.hostname
-                        strat = event.strategy
-                        proto = event.l7proto or "tls"
-
-                        if host and strat:
-                            self.locked_manager.increment_history(host, strat, is_success=True)
-                            history_save_counter += 1
-
-                            # Сброс счётчика Discord FAIL при SUCCESS
-                            if "discord" in host.lower() and self.discord_fail_count > 0:
-                                self.discord_fail_count = 0
-
-                            # Protocol tag for clear identification
-                            if is_udp:
-                                proto_tag = f"[{proto.upper()}]" if proto else "[UDP]"
-                                port_str = ""
-                            elif proto == "http":
-                                proto_tag = "[HTTP]"
-                                port_str = ":80"
-                            else:
-                                proto_tag = "[TLS]"
-                                port_str = ":443"
-                            msg = f"[{timestamp}] {proto_tag} ✓ SUCCESS: {host}{port_str} strategy={strat} ({event.successes}/{event.total})"
-                            if self.output_callback:
-                                self.output_callback(msg)
+                msg = f"[{timestamp}] {proto_tag} ✓ SUCCESS: {host}{port_str} strategy={strat}"
+                if self.output_callback:
+                    self.output_callback(msg)
 
-                            if history_save_counter >= 5:
-                                self.locked_manager.save_history()
-                                history_save_counter = 0
-                        continue
-
-                    # === SUCCESS (from std_success_detector) ===
-                    if event.event_type == EventType.SUCCESS:
-                        host = event.hostname
-                        strat = event.strategy
-                        proto = event.l7proto or "tls"
-
-                        if host and strat and not self.blocked_manager.is_blocked(host, strat):
-                            self.locked_manager.increment_history(host, strat, is_success=True)
-                            history_save_counter += 1
-
-                            # Сброс счётчика Discord FAIL при SUCCESS
-                            if "discord" in host.lower() and self.discord_fail_count > 0:
-                                self.discord_fail_count = 0
-
-                            # Protocol tag for clear identification
-                            if is_udp:
-                                proto_tag = f"[{proto.upper()}]" if proto else "[UDP]"
-                                port_str = ""
-                            elif proto == "http":
-                                proto_tag = "[HTTP]"
-                                port_str = ":80"
-                            else:
-                                proto_tag = "[TLS]"
-                                port_str = ":443"
-
-                            # Auto-LOCK после успехов
-                            host_key = f"{host}:{strat}"
-                            if not hasattr(self, '_success_counts'):
-                                self._success_counts = {}
-                            self._success_counts[host_key] = self._success_counts.get(host_key, 0) + 1
-
-                            lock_threshold = 1 if is_udp else 3
-                            if self._success_counts[host_key] >= lock_threshold:
-                                # Маппинг l7proto -> askey
-                                askey = PROTO_TO_ASKEY.get(proto, proto if proto in ASKEY_ALL else "tls")
-
-                                # Пропускаем user locks - их нельзя перезаписать auto-lock
-                                if self.locked_manager.is_user_locked(host, askey):
-                                    log(f"SKIP auto-lock: {host} has user lock [{askey.upper()}]", "DEBUG")
-                                else:
-                                    target_dict = self.locked_manager.locked_by_askey[askey]
-
-                                    if host not in target_dict or target_dict[host] != strat:
-                                        target_dict[host] = strat
-                                        msg = f"[{timestamp}] {proto_tag} 🔒 LOCKED: {host}{port_str} = strategy {strat}"
-                                        log(msg, "INFO")
-                                        if self.output_callback:
-                                            self.output_callback(msg)
-                                        self.locked_manager.save()
-                                        self.locked_manager.save_history()
-                                        history_save_counter = 0
-
-                            msg = f"[{timestamp}] {proto_tag} ✓ SUCCESS: {host}{port_str} strategy={strat}"
-                            if self.output_callback:
-                                self.output_callback(msg)
-
-                            if history_save_counter >= 5:
-                                self.locked_manager.save_history()
-                                history_save_counter = 0
-                        continue
-
-                    # === FAIL ===
-                    if event.event_type == EventType.FAIL:
-                        host = event.hostname
-                        strat = event.strategy
-                        proto = event.l7proto or "tls"
-
-                        if host and strat:
-                            self.locked_manager.increment_history(host, strat, is_success=False)
-                            history_save_counter += 1
-
-                            # Protocol tag for clear identification
-                            if is_udp:
-                                proto_tag = f"[{proto.upper()}]" if proto else "[UDP]"
-                                port_str = ""
-                            elif proto == "http":
-                                proto_tag = "[HTTP]"
-                                port_str = ":80"
-                            else:
-                                proto_tag = "[TLS]"
-                                port_str = ":443"
-                            msg = f"[{timestamp}] {proto_tag} ✗ FAIL: {host}{port_str} strategy={strat} ({event.successes}/{event.total})"
-                            if self.output_callback:
-                                self.output_callback(msg)
-
-                            # Проверяем Discord FAIL для авторестарта Discord (с подсчётом фейлов)
-                            if self.auto_restart_on_discord_fail and "discord" in host.lower():
-                                self.discord_fail_count += 1
-                                log(f"Discord FAIL #{self.discord_fail_count}/{self.discord_fails_threshold} ({host})", "DEBUG")
-                                if self.discord_fail_count >= self.discord_fails_threshold:
-                                    log(f"🔄 Достигнут порог Discord FAIL ({self.discord_fail_count}), перезапускаю Discord...", "WARNING")
-                                    if self.output_callback:
-                                        self.output_callback(f"[{timestamp}] ⚠️ Discord FAIL x{self.discord_fail_count} - перезапуск Discord...")
-                                    if self.restart_callback:
-                                        # Вызываем callback для перезапуска Discord (через главный поток)
-                                        self.restart_callback()
-                                    self.discord_fail_count = 0  # Сброс после рестарта
-
-                            if history_save_counter >= 5:
-                                self.locked_manager.save_history()
-                                history_save_counter = 0
-                        continue
+            return
 
-                    # === ROTATE ===
-                    if event.event_type == EventType.ROTATE:
-                        host = event.hostname or parser.current_host
-                        proto = event.l7proto or "tls"
-                        # Protocol tag for rotate
-                        if is_udp:
-                            proto_tag = f"[{proto.upper()}]" if proto else "[UDP]"
-                        elif proto == "http":
-                            proto_tag = "[HTTP]"
-                        else:
-                            proto_tag = "[TLS]"
-                        msg = f"[{timestamp}] {proto_tag} 🔄 Strategy rotated to {event.strategy}"
-                        if host:
-                            msg += f" ({host})"
+        # === FAIL ===
+        if event.event_type == EventType.FAIL:
+            host = event.hostname
+            strat = event.strategy
+            proto = event.l7proto or "tls"
+
+            if host and strat:
+                self.locked_manager.increment_history(host, strat, is_success=False)
+                history.mark()
+
+                # Protocol tag for clear identification
+                if is_udp:
+                    proto_tag = f"[{proto.upper()}]" if proto else "[UDP]"
+                    port_str = ""
+                elif proto == "http":
+                    proto_tag = "[HTTP]"
+                    port_str = ":80"
+                else:
+                    proto_tag = "[TLS]"
+                    port_str = ":443"
+                msg = f"[{timestamp}] {proto_tag} ✗ FAIL: {host}{port_str} strategy={strat} ({event.successes}/{event.total})"
+                if self.output_callback:
+                    self.output_callback(msg)
+
+                # Проверяем Discord FAIL для авторестарта Discord (с подсчётом фейлов)
+                if self.auto_restart_on_discord_fail and "discord" in host.lower():
+                    self.discord_fail_count += 1
+                    log(f"Discord FAIL #{self.discord_fail_count}/{self.discord_fails_threshold} ({host})", "DEBUG")
+                    if self.discord_fail_count >= self.discord_fails_threshold:
+                        log(f"🔄 Достигнут порог Discord FAIL ({self.discord_fail_count}), перезапускаю Discord...", "WARNING")
                         if self.output_callback:
-                            self.output_callback(msg)
-                        continue
+                            self.output_callback(f"[{timestamp}] ⚠️ Discord FAIL x{self.discord_fail_count} - перезапуск Discord...")
+                        if self.restart_callback:
+                            # Вызываем callback для перезапуска Discord (через главный поток)
+                            self.restart_callback()
+                        self.discord_fail_count = 0  # Сброс после рестарта
 
-                    # === RST ===
-                    if event.event_type == EventType.RST:
-                        host = event.hostname
-                        strat = event.strategy
-                        proto = event.l7proto or "tls"
-                        # Protocol tag for RST
-                        if is_udp:
-                            proto_tag = f"[{proto.upper()}]" if proto else "[UDP]"
-                            port_str = ""
-                        elif proto == "http":
-                            proto_tag = "[HTTP]"
-                            port_str = ":80"
-                        else:
-                            proto_tag = "[TLS]"
-                            port_str = ":443"
-
-                        if host and strat:
-                            msg = f"[{timestamp}] {proto_tag} ⚡ RST detected: {host}{port_str} strategy={strat}"
-                        elif host:
-                            msg = f"[{timestamp}] {proto_tag} ⚡ RST detected: {host}{port_str}"
-                        else:
-                            msg = f"[{timestamp}] {proto_tag} ⚡ RST detected - DPI block"
-                        if self.output_callback:
-                            self.output_callback(msg)
-                        continue
+            return
 
-                    # === HISTORY ===
-                    if event.event_type == EventType.HISTORY:
-                        self.locked_manager.update_history(event.hostname, event.strategy, event.successes, event.failures)
-                        # Не спамим UI историей - данные и так сохраняются
-                        # msg = f"[{timestamp}] HISTORY: {event.hostname} strat={event.strategy} ({event.successes}✓/{event.failures}✗) = {event.rate}%"
-                        # if self.output_callback:
-                        #     self.output_callback(msg)
-                        self.locked_manager.save_history()
-                        continue
+        # === ROTATE ===
+        if event.event_type == EventType.ROTATE:
+            host = event.hostname or parser.current_host
+            proto = event.l7proto or "tls"
+            # Protocol tag for rotate
+            if is_udp:
+                proto_tag = f"[{proto.upper()}]" if proto else "[UDP]"
+            elif proto == "http":
+                proto_tag = "[HTTP]"
+            else:
+                proto_tag = "[TLS]"
+            msg = f"[{timestamp}] {proto_tag} 🔄 Strategy rotated to {event.strategy}"
+            if host:
+                msg += f" ({host})"
+            if self.output_callback:
+                self.output_callback(msg)
+            return
 
-                    # === PRELOADED ===
-                    if event.event_type == EventType.PRELOADED:
-                        proto_str = f" [{event.l7proto}]" if event.l7proto else ""
-                        msg = f"[{timestamp}] PRELOADED: {event.hostname} = strategy {event.strategy}{proto_str}"
-                        if self.output_callback:
-                            self.output_callback(msg)
-                        continue
+        # === RST ===
+        if event.event_type == EventType.RST:
+            host = event.hostname
+            strat = event.strategy
+            proto = event.l7proto or "tls"
+            # Protocol tag for RST
+            if is_udp:
+                proto_tag = f"[{proto.upper()}]" if proto else "[UDP]"
+                port_str = ""
+            elif proto == "http":
+                proto_tag = "[HTTP]"
+                port_str = ":80"
+            else:
+                proto_tag = "[TLS]"
+                port_str = ":443"
 
-            except Exception as e:
-                import traceback
-                log(f"Read output error: {e}", "DEBUG")
-                log(f"Traceback: {traceback.format_exc()}", "DEBUG")
-            finally:
-                # Закрываем лог-файл
-                if log_file:
-                    try:
-                        log_file.write(f"=== Orchestra Debug Log Ended {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} ===\n")
-                        log_file.close()
-                    except Exception:
-                        pass
-                # Сохраняем историю при завершении
-                if self.locked_manager.strategy_history:
-                    self.locked_manager.save_history()
+            if host and strat:
+                msg = f"[{timestamp}] {proto_tag} ⚡ RST detected: {host}{port_str} strategy={strat}"
+            elif host:
+                msg = f"[{timestamp}] {proto_tag} ⚡ RST detected: {host}{port_str}"
+            else:
+                msg = f"[{timestamp}] {proto_tag} ⚡ RST detected - DPI block"
+            if self.output_callback:
+                self.output_callback(msg)
+            return
 
-                # Диагностика неожиданного завершения процесса
-                process = self.running_process
-                if process and not self.stop_event.is_set():
-                    try:
-                        exit_code = process.poll()
-                    except Exception:
-                        exit_code = None
-
-                    if exit_code is not None:
-                        uptime_sec = 0.0
-                        if self.last_start_attempt_ts > 0:
-                            uptime_sec = max(0.0, time.monotonic() - self.last_start_attempt_ts)
-
-                        reason = self._guess_start_failure_reason(exit_code)
-                        diagnostics = self._build_startup_diagnostics(exit_code, uptime_sec)
-                        self.last_exit_info = {
-                            "exit_code": int(exit_code),
-                            "uptime_sec": round(uptime_sec, 2),
-                            "reason": reason,
-                            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                            "config_path": self.last_launch_config_path,
-                            "command": list(self.last_launch_command),
-                            "recent_output": self._get_recent_output_tail(8),
-                        }
-
-                        message = (
-                            f"Оркестратор завершился (код: {exit_code}, аптайм: {uptime_sec:.1f}с). "
-                            f"Причина: {reason}"
-                        )
-                        log(message, "❌ ERROR")
-                        if self.output_callback:
-                            self.output_callback(f"[❌ ERROR] {message}")
+        # === HISTORY ===
+        if event.event_type == EventType.HISTORY:
+            self.locked_manager.update_history(event.hostname, event.strategy, event.successes, event.failures)
+            # Не спамим UI историей - данные и так сохраняются
+            # msg = f"[{timestamp}] HISTORY: {event.hostname} strat={event.strategy} ({event.successes}✓/{event.failures}✗) = {event.rate}%"
+            # if self.output_callback:
+            #     self.output_callback(msg)
+            history.mark()
+            return
 
-                        self._emit_startup_diagnostics(diagnostics)
+        # === PRELOADED ===
+        if event.event_type == EventType.PRELOADED:
+            proto_str = f" [{event.l7proto}]" if event.l7proto else ""
+            msg = f"[{timestamp}] PRELOADED: {event.hostname} = strategy {event.strategy}{proto_str}"
+            if self.output_callback:
+                self.output_callback(msg)
 
-                        if uptime_sec < 3.0:
-                            self.last_start_error = message
+    def get_output_stats(self) -> Optional[OutputPipelineStats]:
+        """Метрики конвейера stdout: строки/с, глубина очереди, отброшенные строки."""
+        pipeline = self._output_pipeline
+        return pipeline.stats() if pipeline is not None else None
 
     def prepare(self) -> bool:
         """
@@ -1510,8 +1574,8 @@ class OrchestraRunner:
                 stderr=subprocess.STDOUT,
                 startupinfo=self._create_startup_info(),
                 creationflags=CREATE_NO_WINDOW,
-                text=True,
-                bufsize=1
+                # Бинарный буферизованный pipe: _read_output читает его блоками
+                # (ChunkedLineReader) и сам декодирует строки.
             )
 
             # Чтение stdout (парсим LOCKED/UNLOCKING для UI)
@@ -1814,54 +1878,28 @@ class OrchestraRunner:
 
     def _load_ipset_networks(self):
         """
-        Загружает ipset подсети для определения игр/сервисов по IP (UDP/QUIC).
-        Читает итоговые ipset-*.txt из текущей схемы lists/base + lists/user -> lists.
+        Загружает индекс ipset подсетей для определения игр/сервисов по IP (UDP/QUIC).
+        Читает итоговые ipset-*.txt из текущей схемы lists/base + lists/user -> lists;
+        скомпилированный индекс берётся из кэша, пока файлы не менялись.
         """
-        if self.ipset_networks:
-            return
         try:
             ipset_files = _current_ipset_final_files(LISTS_FOLDER)
-
-            networks: list[tuple[ipaddress._BaseNetwork, str]] = []
-            for path in ipset_files:
-                if not os.path.exists(path):
-                    continue
-                base = os.path.basename(path)
-                label = os.path.splitext(base)[0]
-                if label.startswith("ipset-"):
-                    label = label[len("ipset-"):]
-                try:
-                    with open(path, "r", encoding="utf-8", errors="ignore") as f:
-                        for line in f:
-                            line = line.strip()
-                            if not line or line.startswith("#"):
-                                continue
-                            try:
-                                net = ipaddress.ip_network(line, strict=False)
-                                networks.append((net, label))
-                            except ValueError:
-                                continue
-                except Exception as e:
-                    log(f"Ошибка чтения {path}: {e}", "DEBUG")
-
-            self.ipset_networks = networks
-            if networks:
-                log(f"Загружено {len(networks)} ipset подсетей ({len(ipset_files)} файлов)", "DEBUG")
+            index = load_ipset_index(ipset_files)
+            if index is not self.ipset_index and len(index):
+                log(f"Загружено {len(index)} ipset подсетей ({len(ipset_files)} файлов)", "DEBUG")
+            self.ipset_index = index
         except Exception as e:
             log(f"Ошибка загрузки ipset подсетей: {e}", "DEBUG")
 
     def _resolve_ipset_label(self, ip: str) -> Optional[str]:
         """Возвращает имя ipset файла по IP, если найдено соответствие подсети."""
-        if not ip or not self.ipset_networks:
+        if not ip:
             return None
-        try:
-            ip_obj = ipaddress.ip_address(ip)
-        except ValueError:
-            return None
-        for net, label in self.ipset_networks:
-            if ip_obj in net:
-                return label
-        return None
+        if self.ipset_index is None:
+            self._load_ipset_networks()
+            if self.ipset_index is None:
+                return None
+        return self.ipset_index.owner(ip)
 
     # REMOVED: _write_strategies_from_file() - стратегии теперь встроены в circular-config.txt
     # REMOVED: _generate_circular_config() - конфиг теперь статический в /home/privacy/zapret/lua/circular-config.txt
@@ -0,0 +1,317 @@
+# orchestra/output_pipeline.py
+"""
+Конвейер stdout winws2 для OrchestraRunner.
+
+    reader   читает pipe блоками по READ_CHUNK_SIZE и режет их на строки
+    sink     пишет сырой debug-лог блоками, с ротацией по размеру
+    learner  разбирает строки и обучается в своём потоке, из ограниченной очереди
+
+Reader не ждёт ни диска, ни обучения, поэтому всплеск вывода winws2 не
+заполняет pipe и не тормозит сам winws2. Если очередь всё же переполнена,
+из пачки отбрасываются только строки без ключевых слов LogParser (они не
+дают событий) и учитываются в stats(). Строки с ключевыми словами (LOCK,
+UNLOCK, SUCCESS, FAIL и контекст к ним) не теряются никогда: reader ждёт,
+пока learner освободит место.
+"""
+
+from __future__ import annotations
+
+import codecs
+import locale
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Callable, Optional
+
+from orchestra.log_parser import has_event_keyword
+
+
+READ_CHUNK_SIZE = 64 * 1024
+
+# Очередь learner'а ограничена числом строк, а не пачек
+LEARNER_QUEUE_MAX_LINES = 50_000
+
+# История сохраняется не чаще раза в HISTORY_SAVE_INTERVAL секунд
+HISTORY_SAVE_INTERVAL = 2.0
+
+# Предыдущая часть лога после ротации: orchestra_<id>.log.1
+ROTATED_LOG_SUFFIX = ".1"
+
+
+def rotated_log_path(path: str) -> str:
+    return path + ROTATED_LOG_SUFFIX
+
+
+class ChunkedLineReader:
+    """Читает бинарный pipe блоками и отдаёт целые строки.
+
+    read1() возвращает то, что уже есть в pipe (но не больше chunk_size),
+    так что строки приходят без задержки, а при потоке — пачками.
+    Переводы строк как в text-режиме Popen: \\n, \\r\\n и \\r.
+    """
+
+    def __init__(self, stream, *, chunk_size: int = READ_CHUNK_SIZE, encoding: Optional[str] = None):
+        self._stream = stream
+        self._chunk_size = max(1, int(chunk_size))
+        # text=True у Popen декодировал локальной кодировкой — сохраняем это
+        self._decoder = codecs.getincrementaldecoder(encoding or locale.getpreferredencoding(False))(errors="replace")
+        self._tail = ""
+        self.bytes_read = 0
+
+    def read_lines(self) -> Optional[list[str]]:
+        """Следующая пачка непустых строк (без хвостовых пробелов); None — конец потока."""
+        read = getattr(self._stream, "read1", None) or self._stream.read
+        while True:
+            chunk = read(self._chunk_size)
+            if not chunk:
+                text = self._tail + self._decoder.decode(b"", final=True)
+                self._tail = ""
+                lines = _split_lines(text + "\n")[0]
+                return lines or None
+            self.bytes_read += len(chunk)
+            lines, self._tail = _split_lines(self._tail + self._decoder.decode(chunk))
+            if lines:
+                return lines
+
+
+def _split_lines(text: str) -> tuple[list[str], str]:
+    if "\r" in text:
+        # "\r" в конце блока может оказаться половиной "\r\n" — ждём следующий блок
+        hold_cr = text.endswith("\r")
+        if hold_cr:
+            text = text[:-1]
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+        if hold_cr:
+            text += "\r"
+    parts = text.split("\n")
+    tail = parts.pop()
+    lines = []
+    for part in parts:
+        part = part.rstrip()
+        if part:
+            lines.append(part)
+    return lines, tail
+
+
+class DebugLogSink:
+    """Сырой debug-лог winws2: одна запись на пачку строк, ротация по размеру.
+
+    Когда файл дорастает до max_bytes // 2, он переименовывается в
+    <path>.1 (старый .1 удаляется) и лог начинается заново, так что на
+    диске не больше max_bytes, а свежий хвост сессии всегда сохранён.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self._rotate_at = max(1, int(max_bytes) // 2)
+        self._file = None
+        self._size = 0
+        self.rotations = 0
+
+    def open(self) -> None:
+        self._open("w", f"=== Orchestra Debug Log Started {_now()} ===\n")
+
+    def _open(self, mode: str, header: str) -> None:
+        self._file = open(self.path, mode, encoding="utf-8", buffering=READ_CHUNK_SIZE)
+        self._size = 0
+        self._write(header)
+
+    def _write(self, text: str) -> None:
+        self._file.write(text)
+        self._file.flush()
+        # Байты на диске (UTF-8 и \r\n на Windows), а не символы
+        self._size = self._file.buffer.tell()
+
+    def write_lines(self, lines: list[str]) -> None:
+        if self._file is None or not lines:
+            return
+        self._write("\n".join(lines) + "\n")
+        if self._size >= self._rotate_at:
+            self._rotate()
+
+    def _rotate(self) -> None:
+        self._file.close()
+        self._file = None
+        os.replace(self.path, rotated_log_path(self.path))
+        self.rotations += 1
+        self._open("w", f"=== Log rotated at {_now()} (previous part: {os.path.basename(rotated_log_path(self.path))}) ===\n")
+
+    def close(self) -> None:
+        if self._file is None:
+            return
+        try:
+            self._write(f"=== Orchestra Debug Log Ended {_now()} ===\n")
+        finally:
+            self._file.close()
+            self._file = None
+
+
+def _now() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+@dataclass(frozen=True)
+class OutputPipelineStats:
+    lines_read: int
+    bytes_read: int
+    lines_queued: int
+    lines_dropped: int
+    reader_waits: int
+    lines_parsed: int
+    events: int
+    queue_depth: int
+    max_queue_depth: int
+    read_lines_per_sec: float
+    parse_lines_per_sec: float
+    log_rotations: int
+    uptime: float
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class OutputPipeline:
+    """Ограниченная очередь между reader и learner плюс счётчики конвейера."""
+
+    def __init__(self, *, max_lines: int = LEARNER_QUEUE_MAX_LINES, clock: Callable[[], float] = time.monotonic):
+        self._max_lines = max(1, int(max_lines))
+        self._clock = clock
+        self._started = clock()
+        self._condition = threading.Condition()
+        self._batches: deque[tuple[str, list[str]]] = deque()
+        self._depth = 0
+        self._closed = False
+
+        self.lines_read = 0
+        self.bytes_read = 0
+        self.lines_queued = 0
+        self.lines_dropped = 0
+        self.reader_waits = 0
+        self.lines_parsed = 0
+        self.events = 0
+        self.max_queue_depth = 0
+        self.log_rotations = 0
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def note_read(self, lines: int, bytes_read: int) -> None:
+        self.lines_read += lines
+        self.bytes_read = bytes_read
+
+    def put(self, timestamp: str, lines: list[str]) -> bool:
+        """Кладёт пачку строк; False — очередь была полна и часть строк отброшена.
+
+        При переполнении отбрасываются только строки без ключевых слов
+        (has_event_keyword), остальные ждут места в очереди.
+        """
+        if not lines:
+            return True
+        with self._condition:
+            if self._closed:
+                return False
+            if not self._fits(len(lines)):
+                kept = [line for line in lines if has_event_keyword(line)]
+                self.lines_dropped += len(lines) - len(kept)
+                dropped = len(kept) != len(lines)
+                lines = kept
+                if not lines:
+                    return False
+                if not self._fits(len(lines)):
+                    self.reader_waits += 1
+                    while not self._closed and not self._fits(len(lines)):
+                        self._condition.wait()
+                    if self._closed:
+                        return False
+            else:
+                dropped = False
+            self._batches.append((timestamp, lines))
+            self._depth += len(lines)
+            self.lines_queued += len(lines)
+            if self._depth > self.max_queue_depth:
+                self.max_queue_depth = self._depth
+            self._condition.notify_all()
+        return not dropped
+
+    def _fits(self, count: int) -> bool:
+        # Пачка больше всей очереди всё равно проходит, если очередь пуста
+        return self._depth + count <= self._max_lines or not self._depth
+
+    def get(self, timeout: Optional[float] = None) -> Optional[tuple[str, list[str]]]:
+        """Следующая пачка (timestamp, lines); None — таймаут или очередь закрыта и пуста."""
+        with self._condition:
+            if not self._batches and not self._closed:
+                self._condition.wait(timeout)
+            if not self._batches:
+                return None
+            batch = self._batches.popleft()
+            self._depth -= len(batch[1])
+            # Reader может ждать места для строк с событиями
+            self._condition.notify_all()
+            return batch
+
+    def note_parsed(self, lines: int, events: int) -> None:
+        self.lines_parsed += lines
+        self.events += events
+
+    def close(self) -> None:
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def stats(self) -> OutputPipelineStats:
+        uptime = max(1e-9, self._clock() - self._started)
+        with self._condition:
+            depth = self._depth
+        return OutputPipelineStats(
+            lines_read=self.lines_read,
+            bytes_read=self.bytes_read,
+            lines_queued=self.lines_queued,
+            lines_dropped=self.lines_dropped,
+            reader_waits=self.reader_waits,
+            lines_parsed=self.lines_parsed,
+            events=self.events,
+            queue_depth=depth,
+            max_queue_depth=self.max_queue_depth,
+            read_lines_per_sec=self.lines_read / uptime,
+            parse_lines_per_sec=self.lines_parsed / uptime,
+            log_rotations=self.log_rotations,
+            uptime=uptime,
+        )
+
+
+class HistorySaveCoalescer:
+    """Склеивает частые сохранения истории в одно раз в interval секунд."""
+
+    def __init__(self, save: Callable[[], None], *, interval: float = HISTORY_SAVE_INTERVAL,
+                 clock: Callable[[], float] = time.monotonic):
+        self._save = save
+        self._interval = float(interval)
+        self._clock = clock
+        self._dirty = False
+        self._last_save = clock()
+        self.saves = 0
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+    def mark(self) -> None:
+        self._dirty = True
+
+    def flush_if_due(self) -> None:
+        if self._dirty and self._clock() - self._last_save >= self._interval:
+            self.flush()
+
+    def flush(self) -> None:
+        """Сохраняет сейчас (и сбрасывает интервал), если есть изменения."""
+        if not self._dirty:
+            return
+        self._dirty = False
+        self._last_save = self._clock()
+        self.saves += 1
+        self._save()
@@ -1,5 +1,23 @@
+"""Каталоги готовых стратегий (profile/strategy_catalogs/<engine>/*.txt).
+
+Разобранные каталоги кэшируются в процессе и на диске
+(``APPLICATION_PATHS.tmp_dir/strategy_catalogs``, marshal-блоб на engine), ключ —
+подпись дерева файлов, версия программы и ``_CACHE_FORMAT``. Тёплый запуск не парсит
+``.txt`` и не вызывает describe_strategy_visual: каталоги достаются из блоба
+лениво, по имени (tcp/udp/voice), при первом обращении.
+
+Подпись дерева (rglob + stat) пересчитывается не чаще раза в
+``_SIGNATURE_TTL_SECONDS`` — либо сразу, если сменился mtime папки движка
+(файл добавили, удалили или переименовали).
+"""
+
 from __future__ import annotations
 
+import marshal
+import os
+import tempfile
+import time
+from collections.abc import Callable, Iterator, Mapping
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional
@@ -19,30 +37,109 @@ class StrategyEntry:
 
 _STRATEGY_CATALOGS_CACHE: dict[
     tuple[str, str],
-    tuple[tuple[tuple[str, int, int], ...], dict[str, dict[str, StrategyEntry]]],
+    tuple[tuple[tuple[str, int, int], ...], "StrategyCatalogs"],
 ] = {}
 
+# root -> (время проверки, mtime_ns папки, подпись)
+_SIGNATURE_CACHE: dict[str, tuple[float, int, tuple[tuple[str, int, int], ...]]] = {}
+_SIGNATURE_TTL_SECONDS = 2.0
+# Path.resolve() — несколько системных вызовов; корень не меняется за жизнь процесса.
+_RESOLVED_ROOTS: dict[str, str] = {}
+_clock: Callable[[], float] = time.monotonic
+
+STRATEGY_CATALOG_CACHE_DIR_NAME = "strategy_catalogs"
+# Меняется вместе с форматом заголовка блоба.
+_DISK_CACHE_MAGIC = b"ZSCAT001"
+# Поднимать при любой смене строк блоба или того, что выдаёт
+# describe_strategy_visual (подписи, иконки, описания).
+_CACHE_FORMAT = 1
+
+
 def strategy_catalog_root(paths: AppPaths) -> Path:
     """Каталог готовых стратегий рядом с программой, подготовленный установщиком."""
     return paths.user_root / "profile" / "strategy_catalogs"
 
 
+def strategy_catalog_cache_dir() -> Path:
+    from config.runtime_layout import APPLICATION_PATHS
+
+    return APPLICATION_PATHS.tmp_dir / STRATEGY_CATALOG_CACHE_DIR_NAME
+
+
+def invalidate_strategy_catalog_cache() -> None:
+    """Сбрасывает кэши процесса (подписи и разобранные каталоги); диск не трогает."""
+    _SIGNATURE_CACHE.clear()
+    _RESOLVED_ROOTS.clear()
+    _STRATEGY_CATALOGS_CACHE.clear()
+
+
 def _tree_signature(root: Path, pattern: str = "*.txt") -> tuple[tuple[str, int, int], ...]:
     if not root.exists():
         return ()
 
+    suffix = pattern[1:] if pattern.startswith("*") else pattern
     rows: list[tuple[str, int, int]] = []
-    for path in sorted(root.rglob(pattern)):
-        if not path.is_file():
-            continue
+    # scandir вместо rglob + stat: на Windows stat() берётся из записи каталога.
+    pending = [("", str(root))]
+    while pending:
+        prefix, folder = pending.pop()
         try:
-            stat = path.stat()
-            rel = path.relative_to(root).as_posix()
-            rows.append((rel, int(getattr(stat, "st_mtime_ns", 0) or 0), int(getattr(stat, "st_size", 0) or 0)))
-        except Exception:
+            entries = list(os.scandir(folder))
+        except OSError:
             continue
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    pending.append((f"{prefix}{entry.name}/", entry.path))
+                    continue
+                if not entry.name.endswith(suffix) or not entry.is_file():
+                    continue
+                stat = entry.stat()
+                rows.append((f"{prefix}{entry.name}", int(stat.st_mtime_ns or 0), int(stat.st_size or 0)))
+            except OSError:
+                continue
+    rows.sort()
     return tuple(rows)
 
+
+def _debounced_tree_signature(root: Path) -> tuple[tuple[str, int, int], ...]:
+    key = str(root)
+    try:
+        dir_mtime_ns = int(os.stat(key).st_mtime_ns)
+    except OSError:
+        dir_mtime_ns = -1
+    now = _clock()
+    cached = _SIGNATURE_CACHE.get(key)
+    if cached is not None and cached[1] == dir_mtime_ns and now - cached[0] < _SIGNATURE_TTL_SECONDS:
+        return cached[2]
+    signature = _tree_signature(root)
+    _SIGNATURE_CACHE[key] = (now, dir_mtime_ns, signature)
+    return signature
+
+
+class StrategyCatalogs(Mapping[str, dict[str, StrategyEntry]]):
+    """Каталоги по имени; каждый разбирается (или читается из блоба) при первом обращении."""
+
+    def __init__(self, loaders: dict[str, Callable[[], dict[str, StrategyEntry]]]):
+        self._loaders = dict(loaders)
+        self._loaded: dict[str, dict[str, StrategyEntry]] = {}
+
+    def __getitem__(self, name: str) -> dict[str, StrategyEntry]:
+        catalog = self._loaded.get(name)
+        if catalog is None:
+            catalog = self._loaders[name]()
+            self._loaded[name] = catalog
+        return catalog
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._loaders)
+
+    def __len__(self) -> int:
+        return len(self._loaders)
+
+    def __repr__(self) -> str:
+        return f"StrategyCatalogs({sorted(self._loaders)!r}, loaded={sorted(self._loaded)!r})"
+
 def _parse_catalog_file(path: Path, catalog_name: str) -> dict[str, StrategyEntry]:
     strategies: dict[str, StrategyEntry] = {}
     current_id: Optional[str] = None
@@ -120,7 +217,7 @@ def _has_profile_scoped_lines(lines: list[str]) -> bool:
     return False
 
 
-def load_strategy_catalogs(paths: AppPaths, engine: str) -> dict[str, dict[str, StrategyEntry]]:
+def load_strategy_catalogs(paths: AppPaths, engine: str) -> Mapping[str, dict[str, StrategyEntry]]:
     _signature, catalogs = load_strategy_catalogs_with_signature(paths, engine)
     return catalogs
 
@@ -128,7 +225,7 @@ def load_strategy_catalogs(paths: AppPaths, engine: str) -> dict[str, dict[str,
 def load_strategy_catalogs_with_signature(
     paths: AppPaths,
     engine: str,
-) -> tuple[tuple[object, ...], dict[str, dict[str, StrategyEntry]]]:
+) -> tuple[tuple[object, ...], Mapping[str, dict[str, StrategyEntry]]]:
     """Возвращает каталоги вместе с подписью дерева файлов.
 
     Подпись стабильна, пока файлы каталогов не менялись, и пригодна как компонент
@@ -136,15 +233,146 @@ def load_strategy_catalogs_with_signature(
     """
     engine_key = str(engine or "").strip().lower()
     engine_root = strategy_catalog_root(paths) / engine_key
-    cache_key = (str(engine_root.resolve()), engine_key)
-    signature = _tree_signature(engine_root)
+    resolved_root = _RESOLVED_ROOTS.get(str(engine_root))
+    if resolved_root is None:
+        resolved_root = _RESOLVED_ROOTS[str(engine_root)] = str(engine_root.resolve())
+    cache_key = (resolved_root, engine_key)
+    signature = _debounced_tree_signature(engine_root)
     full_signature = (cache_key, signature)
     cached = _STRATEGY_CATALOGS_CACHE.get(cache_key)
     if cached is not None and cached[0] == signature:
         return full_signature, cached[1]
 
-    catalogs: dict[str, dict[str, StrategyEntry]] = {}
-    for path in sorted(engine_root.glob("*.txt")):
-        catalogs[path.stem.lower()] = _parse_catalog_file(path, path.stem.lower())
+    disk_path = strategy_catalog_cache_dir() / f"{engine_key}.bin"
+    disk_key = (_CACHE_FORMAT, _app_version(), cache_key[0], signature)
+    catalogs = _read_disk_cache(disk_path, disk_key, lambda name: _parse_engine_catalogs(engine_root)[name])
+    if catalogs is None:
+        parsed = _parse_engine_catalogs(engine_root)
+        _write_disk_cache(disk_path, disk_key, parsed)
+        catalogs = StrategyCatalogs({name: (lambda catalog=catalog: catalog) for name, catalog in parsed.items()})
     _STRATEGY_CATALOGS_CACHE[cache_key] = (signature, catalogs)
     return full_signature, catalogs
+
+
+def _parse_engine_catalogs(engine_root: Path) -> dict[str, dict[str, StrategyEntry]]:
+    return {path.stem.lower(): _parse_catalog_file(path, path.stem.lower()) for path in sorted(engine_root.glob("*.txt"))}
+
+
+# ---------------------------------------------------------------- дисковый кэш
+
+def _app_version() -> str:
+    """Блоб хранит готовые StrategyVisual — после обновления программы он устаревает."""
+    from config.build_info import APP_VERSION
+
+    return str(APP_VERSION)
+
+
+def _entry_row(entry: StrategyEntry) -> tuple:
+    visual = entry.visual
+    return (
+        entry.strategy_id,
+        entry.name,
+        entry.args,
+        visual.technique_keys,
+        visual.icon_name,
+        visual.color,
+        visual.colors,
+        visual.label,
+        visual.description,
+    )
+
+
+def _catalog_from_rows(catalog_name: str, rows: tuple) -> dict[str, StrategyEntry]:
+    visuals: dict[tuple, StrategyVisual] = {}
+    catalog: dict[str, StrategyEntry] = {}
+    for strategy_id, name, args, *visual_fields in rows:
+        visual_key = tuple(visual_fields)
+        visual = visuals.get(visual_key)
+        if visual is None:
+            technique_keys, icon_name, color, colors, label, description = visual_fields
+            visual = visuals[visual_key] = StrategyVisual(
+                technique_keys=tuple(technique_keys),
+                icon_name=icon_name,
+                color=color,
+                colors=tuple(colors),
+                label=label,
+                description=description,
+            )
+        catalog[strategy_id] = StrategyEntry(
+            strategy_id=strategy_id,
+            catalog_name=catalog_name,
+            name=name,
+            args=args,
+            visual=visual,
+        )
+    return catalog
+
+
+def _read_disk_cache(
+    path: Path,
+    disk_key: tuple,
+    parse_catalog: Callable[[str], dict[str, StrategyEntry]],
+) -> StrategyCatalogs | None:
+    """Каталоги из блоба; parse_catalog(name) — разбор .txt, если секция блоба битая."""
+    try:
+        data = path.read_bytes()
+        if not data.startswith(_DISK_CACHE_MAGIC):
+            return None
+        header_start = len(_DISK_CACHE_MAGIC) + 4
+        header_end = header_start + int.from_bytes(data[len(_DISK_CACHE_MAGIC):header_start], "little")
+        stored_key, sections = marshal.loads(data[header_start:header_end])
+    except (OSError, EOFError, ValueError, TypeError):
+        # Нет блоба, он от другой версии или повреждён — разбираем .txt.
+        return None
+    if stored_key != disk_key:
+        return None
+
+    def _loader(name: str, start: int, end: int) -> Callable[[], dict[str, StrategyEntry]]:
+        def _load() -> dict[str, StrategyEntry]:
+            try:
+                return _catalog_from_rows(name, marshal.loads(data[header_end + start:header_end + end]))
+            except (EOFError, ValueError, TypeError):
+                # Тело блоба повреждено — промах кэша: разбираем .txt, а блоб
+                # удаляем, чтобы следующий запуск записал его заново.
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+                return parse_catalog(name)
+
+        return _load
+
+    try:
+        return StrategyCatalogs({name: _loader(name, start, end) for name, (start, end) in sections.items()})
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def _write_disk_cache(path: Path, disk_key: tuple, catalogs: dict[str, dict[str, StrategyEntry]]) -> None:
+    sections: dict[str, tuple[int, int]] = {}
+    payload = bytearray()
+    for name, catalog in catalogs.items():
+        blob = marshal.dumps(tuple(_entry_row(entry) for entry in catalog.values()))
+        sections[name] = (len(payload), len(payload) + len(blob))
+        payload += blob
+    header = marshal.dumps((disk_key, sections))
+    tmp_name = None
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(prefix=f"{path.stem}_", suffix=".tmp", dir=str(path.parent))
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(_DISK_CACHE_MAGIC)
+            handle.write(len(header).to_bytes(4, "little"))
+            handle.write(header)
+            handle.write(payload)
+        os.replace(tmp_name, str(path))
+        tmp_name = None
+    except OSError:
+        # Без блоба следующий запуск просто разберёт каталоги заново.
+        pass
+    finally:
+        if tmp_name is not None:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
@@ -595,9 +595,10 @@ def load_window_opacity() -> AppearanceOpacityPlan:
 def save_window_opacity(value: int) -> AppearanceOpacityPlan:
     normalized = int(value)
     try:
-        from settings.store import set_window_opacity
+        from settings.store import set_window_opacity, update_settings_debounced
 
-        set_window_opacity(normalized)
+        # Слайдер шлёт значения непрерывно — на диск попадает последнее.
+        update_settings_debounced("appearance.window_opacity", lambda: set_window_opacity(normalized))
     except Exception:
         pass
     store_warmed_window_opacity(normalized)
@@ -758,9 +759,12 @@ def save_tinted_background(enabled: bool) -> AppearanceTogglePlan:
 def save_tinted_background_intensity(value: int) -> AppearanceOpacityPlan:
     normalized = max(0, min(schema.MAX_TINTED_INTENSITY, int(value)))
     try:
-        from settings.store import set_tinted_background_intensity
+        from settings.store import set_tinted_background_intensity, update_settings_debounced
 
-        set_tinted_background_intensity(normalized)
+        update_settings_debounced(
+            "appearance.tinted_background_intensity",
+            lambda: set_tinted_background_intensity(normalized),
+        )
     except Exception:
         pass
     current = peek_warmed_tinted_settings()
@@ -1,7 +1,23 @@
+"""settings.json: кэшированный снапшот, геттеры/сеттеры по путям и транзакции.
+
+Снапшот в кэше заморожен (``_FrozenDict``/``_FrozenList``) и заменяется целиком
+при каждой записи — поэтому геттеры читают его по пути без копирования, а
+``read_settings()`` и секционные геттеры отдают изменяемые копии только того,
+что возвращают.
+
+Несколько сеттеров подряд объединяются ``settings_transaction()`` в одну
+нормализацию и одну атомарную запись; частые значения от слайдеров можно
+отложить через ``update_settings_debounced()``.
+"""
+
 from __future__ import annotations
 
+import atexit
 import copy
 import json
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
 from pathlib import Path
 from threading import RLock
 from typing import Any
@@ -49,6 +65,15 @@ from utils.atomic_text import atomic_write_text
 
 _SETTINGS_LOCK = RLock()
 _SETTINGS_CACHE: dict[str, Any] | None = None
+# Рабочая (размороженная) копия открытой транзакции. Транзакция держит
+# _SETTINGS_LOCK, так что под локом она видна только своему потоку.
+_TRANSACTION_DOC: dict[str, Any] | None = None
+# Нормализованный замороженный вид _TRANSACTION_DOC для геттеров; None —
+# устарел (после сеттера), пересобирается при следующем чтении.
+_TRANSACTION_VIEW: dict[str, Any] | None = None
+_DEBOUNCED_UPDATES: dict[str, Callable[[], object]] = {}
+_DEBOUNCE_TIMER: threading.Timer | None = None
+DEFAULT_SETTINGS_DEBOUNCE_SECONDS = 0.3
 _SETTINGS_CACHE_SIGNATURE: tuple[str, int | None, int | None] | None = None
 # Кэш, заполненный чтением с materialize=False, не гарантирует, что файл на
 # диске починен/создан — materialize-чтение обязано пройти мимо такого кэша.
@@ -63,6 +88,63 @@ _DIRECT_PRESET_SELECTION_PATHS = {
 MAIN_DIRECTORY = str(APPLICATION_PATHS.root)
 
 
+class _FrozenDict(dict):
+    """dict снапшота настроек: isinstance(dict) сохраняется, изменение — TypeError."""
+
+    __slots__ = ()
+
+    def _read_only(self, *_args, **_kwargs):
+        raise TypeError("снапшот настроек только для чтения — используйте сеттеры settings.store")
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __copy__(self) -> dict[str, Any]:
+        return dict(self)
+
+    def __deepcopy__(self, _memo) -> dict[str, Any]:
+        return _thaw(self)
+
+    def __reduce__(self):
+        return (dict, (_thaw(self),))
+
+
+class _FrozenList(list):
+    __slots__ = ()
+
+    def _read_only(self, *_args, **_kwargs):
+        raise TypeError("снапшот настроек только для чтения — используйте сеттеры settings.store")
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = clear = sort = reverse = _read_only
+
+    def __copy__(self) -> list[Any]:
+        return list(self)
+
+    def __deepcopy__(self, _memo) -> list[Any]:
+        return _thaw(self)
+
+    def __reduce__(self):
+        return (list, (_thaw(self),))
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return _FrozenDict((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return _FrozenList(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    """Изменяемая глубокая копия (JSON-дерево: dict/list/скаляры) — быстрее deepcopy."""
+    if isinstance(value, dict):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_thaw(item) for item in value]
+    return value
+
+
 def _settings_root() -> Path:
     return Path(MAIN_DIRECTORY)
 
@@ -91,7 +173,7 @@ def _write_settings_file_locked(data: dict[str, Any]) -> None:
     path = get_settings_path()
     path.parent.mkdir(parents=True, exist_ok=True)
     atomic_write_text(path, _format_settings_json(normalized), encoding="utf-8")
-    _SETTINGS_CACHE = copy.deepcopy(normalized)
+    _SETTINGS_CACHE = _freeze(normalized)
     _SETTINGS_CACHE_SIGNATURE = _settings_file_signature(path)
     _SETTINGS_CACHE_MATERIALIZED = True
 
@@ -151,7 +233,7 @@ def _read_settings_cached_locked(*, materialize: bool = True) -> dict[str, Any]:
         return _SETTINGS_CACHE
 
     data = _read_settings_file_locked(materialize=materialize)
-    _SETTINGS_CACHE = copy.deepcopy(data)
+    _SETTINGS_CACHE = _freeze(data)
     _SETTINGS_CACHE_SIGNATURE = _settings_file_signature()
     # Флаг описывает ИМЕННО этот снапшот: после materialize-чтения файл на
     # диске гарантированно нормализован, после обычного — гарантий нет.
@@ -159,15 +241,46 @@ def _read_settings_cached_locked(*, materialize: bool = True) -> dict[str, Any]:
     return _SETTINGS_CACHE
 
 
+def _settings_snapshot_locked() -> dict[str, Any]:
+    if _TRANSACTION_DOC is not None:
+        return _transaction_view_locked()
+    return _read_settings_cached_locked()
+
+
+def _transaction_view_locked() -> dict[str, Any]:
+    global _TRANSACTION_VIEW
+
+    if _TRANSACTION_VIEW is None:
+        _TRANSACTION_VIEW = _freeze(_normalize_settings(_TRANSACTION_DOC))
+    return _TRANSACTION_VIEW
+
+
+def settings_snapshot() -> dict[str, Any]:
+    """Текущий документ настроек без копирования (только чтение).
+
+    Объект не меняется: запись создаёт новый снапшот. Внутри
+    settings_transaction() возвращается нормализованный замороженный вид её
+    незаписанных изменений.
+    """
+    with _SETTINGS_LOCK:
+        return _settings_snapshot_locked()
+
+
+def read_setting(path: tuple[str, ...], default: Any = None) -> Any:
+    """Значение по пути без копирования документа (контейнеры — только чтение)."""
+    with _SETTINGS_LOCK:
+        return _get_path_value(_settings_snapshot_locked(), path, default)
+
+
 def read_settings() -> dict[str, Any]:
     with _SETTINGS_LOCK:
-        return copy.deepcopy(_read_settings_cached_locked())
+        return _thaw(_settings_snapshot_locked())
 
 
 def materialize_settings_file() -> dict[str, Any]:
     """Гарантирует, что settings.json существует и содержит полный нормализованный JSON."""
     with _SETTINGS_LOCK:
-        return copy.deepcopy(_read_settings_cached_locked(materialize=True))
+        return _thaw(_read_settings_cached_locked(materialize=True))
 
 
 def reset_settings() -> dict[str, Any]:
@@ -195,20 +308,105 @@ def _set_path_value(data: dict[str, Any], path: tuple[str, ...], value: Any) ->
     current[path[-1]] = value
 
 
+def _commit_settings_locked(current: dict[str, Any], working: dict[str, Any]) -> dict[str, Any]:
+    normalized = _normalize_settings(working)
+    if normalized == current:
+        return current
+    _write_settings_file_locked(normalized)
+    return _SETTINGS_CACHE
+
+
 def _update_settings(mutator) -> dict[str, Any]:
+    """Применяет mutator к копии документа и пишет файл, если что-то изменилось.
+
+    Возвращает снапшот (только чтение). Внутри settings_transaction() только
+    меняет её рабочую копию — запись будет одна, при выходе из транзакции, —
+    и возвращает нормализованный замороженный вид этой копии.
+    """
+    global _TRANSACTION_VIEW
+
     with _SETTINGS_LOCK:
+        if _TRANSACTION_DOC is not None:
+            _TRANSACTION_VIEW = None
+            mutator(_TRANSACTION_DOC)
+            return _transaction_view_locked()
         current = _read_settings_cached_locked()
-        working = copy.deepcopy(current)
+        working = _thaw(current)
         mutator(working)
-        normalized = _normalize_settings(working)
-        if normalized == current:
-            return copy.deepcopy(current)
-        _write_settings_file_locked(normalized)
-        return copy.deepcopy(normalized)
+        return _commit_settings_locked(current, working)
+
+
+@contextmanager
+def settings_transaction() -> Iterator[None]:
+    """Объединяет сеттеры внутри блока в одну нормализацию и одну запись.
+
+    Геттеры внутри блока видят незаписанные значения. Исключение откатывает
+    все изменения блока. Вложенная транзакция сливается с внешней. Другие
+    потоки ждут конца транзакции на локе настроек — блок должен быть коротким.
+    """
+    global _TRANSACTION_DOC, _TRANSACTION_VIEW
+
+    with _SETTINGS_LOCK:
+        if _TRANSACTION_DOC is not None:
+            yield
+            return
+        current = _read_settings_cached_locked()
+        _TRANSACTION_DOC = _thaw(current)
+        _TRANSACTION_VIEW = current
+        try:
+            yield
+            working = _TRANSACTION_DOC
+        finally:
+            _TRANSACTION_DOC = None
+            _TRANSACTION_VIEW = None
+        _commit_settings_locked(current, working)
+
+
+def update_settings_debounced(
+    key: str,
+    setter: Callable[[], object],
+    *,
+    delay: float = DEFAULT_SETTINGS_DEBOUNCE_SECONDS,
+) -> None:
+    """Откладывает setter на delay секунд; новый вызов с тем же key заменяет старый.
+
+    Для значений, которые UI шлёт непрерывно (слайдеры): все отложенные
+    сеттеры пишутся одной транзакцией. До сброса геттеры видят прежнее
+    значение; flush_debounced_settings() пишет немедленно (и зовётся при выходе).
+    """
+    global _DEBOUNCE_TIMER
+
+    with _SETTINGS_LOCK:
+        _DEBOUNCED_UPDATES.pop(key, None)
+        _DEBOUNCED_UPDATES[key] = setter
+        if _DEBOUNCE_TIMER is not None:
+            _DEBOUNCE_TIMER.cancel()
+        _DEBOUNCE_TIMER = threading.Timer(max(0.0, float(delay)), flush_debounced_settings)
+        _DEBOUNCE_TIMER.daemon = True
+        _DEBOUNCE_TIMER.start()
+
+
+def flush_debounced_settings() -> None:
+    global _DEBOUNCE_TIMER
+
+    with _SETTINGS_LOCK:
+        if _DEBOUNCE_TIMER is not None:
+            _DEBOUNCE_TIMER.cancel()
+            _DEBOUNCE_TIMER = None
+        setters = list(_DEBOUNCED_UPDATES.values())
+        _DEBOUNCED_UPDATES.clear()
+        if not setters:
+            return
+        with settings_transaction():
+            for setter in setters:
+                setter()
+
+
+atexit.register(flush_debounced_settings)
 
 
 def _get_bool(path: tuple[str, ...], default: bool = False) -> bool:
-    return bool(_get_path_value(read_settings(), path, default))
+    return bool(read_setting(path, default))
 
 
 def _set_bool(path: tuple[str, ...], value: bool) -> bool:
@@ -217,7 +415,7 @@ def _set_bool(path: tuple[str, ...], value: bool) -> bool:
 
 
 def _get_int(path: tuple[str, ...], default: int = 0) -> int:
-    return int(_get_path_value(read_settings(), path, default))
+    return int(read_setting(path, default))
 
 
 def _set_int(path: tuple[str, ...], value: int) -> bool:
@@ -226,7 +424,7 @@ def _set_int(path: tuple[str, ...], value: int) -> bool:
 
 
 def _get_str(path: tuple[str, ...], default: str = "") -> str:
-    return str(_get_path_value(read_settings(), path, default) or "")
+    return str(read_setting(path, default) or "")
 
 
 def _set_str(path: tuple[str, ...], value: str) -> bool:
@@ -247,7 +445,7 @@ def _set_str_in(path: tuple[str, ...], value: str, allowed: frozenset[str], defa
 
 
 def _get_str_list(path: tuple[str, ...]) -> list[str]:
-    value = _get_path_value(read_settings(), path, [])
+    value = read_setting(path, [])
     return list(value) if isinstance(value, list) else []
 
 
@@ -262,7 +460,7 @@ def _set_dc_ip_list(path: tuple[str, ...], value: object) -> bool:
 
 
 def _get_nullable_str(path: tuple[str, ...]) -> str | None:
-    value = _get_path_value(read_settings(), path, None)
+    value = read_setting(path, None)
     return value if isinstance(value, str) and value.strip() else None
 
 
@@ -279,102 +477,102 @@ def _presets_selection_path(engine: str) -> tuple[str, ...]:
 
 
 def get_program_settings() -> dict[str, Any]:
-    return copy.deepcopy(read_settings()["program"])
+    return _thaw(settings_snapshot()["program"])
 
 
 def set_program_settings(values: dict[str, Any]) -> dict[str, Any]:
     updated = _update_settings(lambda data: data["program"].update(_as_dict(values)))
-    return copy.deepcopy(updated["program"])
+    return _thaw(updated["program"])
 
 
 def get_window_settings() -> dict[str, Any]:
-    return copy.deepcopy(read_settings()["window"])
+    return _thaw(settings_snapshot()["window"])
 
 
 def set_window_settings(values: dict[str, Any]) -> dict[str, Any]:
     updated = _update_settings(lambda data: data["window"].update(_as_dict(values)))
-    return copy.deepcopy(updated["window"])
+    return _thaw(updated["window"])
 
 
 def get_appearance_settings() -> dict[str, Any]:
-    return copy.deepcopy(read_settings()["appearance"])
+    return _thaw(settings_snapshot()["appearance"])
 
 
 def set_appearance_settings(values: dict[str, Any]) -> dict[str, Any]:
     updated = _update_settings(lambda data: data["appearance"].update(_as_dict(values)))
-    return copy.deepcopy(updated["appearance"])
+    return _thaw(updated["appearance"])
 
 
 def get_warnings_settings() -> dict[str, Any]:
-    return copy.deepcopy(read_settings()["warnings"])
+    return _thaw(settings_snapshot()["warnings"])
 
 
 def set_warnings_settings(values: dict[str, Any]) -> dict[str, Any]:
     updated = _update_settings(lambda data: data["warnings"].update(_as_dict(values)))
-    return copy.deepcopy(updated["warnings"])
+    return _thaw(updated["warnings"])
 
 
 def get_telegram_proxy_settings() -> dict[str, Any]:
-    return copy.deepcopy(read_settings()["telegram_proxy"])
+    return _thaw(settings_snapshot()["telegram_proxy"])
 
 
 def set_telegram_proxy_settings(values: dict[str, Any]) -> dict[str, Any]:
     updated = _update_settings(lambda data: data["telegram_proxy"].update(_as_dict(values)))
-    return copy.deepcopy(updated["telegram_proxy"])
+    return _thaw(updated["telegram_proxy"])
 
 
 def get_dns_settings() -> dict[str, Any]:
-    return copy.deepcopy(read_settings()["dns"])
+    return _thaw(settings_snapshot()["dns"])
 
 
 def set_dns_settings(values: dict[str, Any]) -> dict[str, Any]:
     updated = _update_settings(lambda data: data["dns"].update(_as_dict(values)))
-    return copy.deepcopy(updated["dns"])
+    return _thaw(updated["dns"])
 
 
 def get_hosts_settings() -> dict[str, Any]:
-    return copy.deepcopy(read_settings()["hosts"])
+    return _thaw(settings_snapshot()["hosts"])
 
 
 def set_hosts_settings(values: dict[str, Any]) -> dict[str, Any]:
     updated = _update_settings(lambda data: data["hosts"].update(_as_dict(values)))
-    return copy.deepcopy(updated["hosts"])
+    return _thaw(updated["hosts"])
 
 
 def get_premium_settings() -> dict[str, Any]:
-    return copy.deepcopy(read_settings()["premium"])
+    return _thaw(settings_snapshot()["premium"])
 
 
 def set_premium_settings(values: dict[str, Any]) -> dict[str, Any]:
     updated = _update_settings(lambda data: data["premium"].update(_as_dict(values)))
-    return copy.deepcopy(updated["premium"])
+    return _thaw(updated["premium"])
 
 
 def get_ui_state_settings() -> dict[str, Any]:
-    return copy.deepcopy(read_settings()["ui_state"])
+    return _thaw(settings_snapshot()["ui_state"])
 
 
 def set_ui_state_settings(values: dict[str, Any]) -> dict[str, Any]:
     updated = _update_settings(lambda data: data["ui_state"].update(_as_dict(values)))
-    return copy.deepcopy(updated["ui_state"])
+    return _thaw(updated["ui_state"])
 
 
 def get_profile_strategy_state_settings() -> dict[str, Any]:
-    return copy.deepcopy(read_settings()["profile_strategy_state"])
+    return _thaw(settings_snapshot()["profile_strategy_state"])
 
 
 def set_profile_strategy_state_settings(values: dict[str, Any]) -> dict[str, Any]:
     updated = _update_settings(lambda data: _set_path_value(data, ("profile_strategy_state",), _as_dict(values)))
-    return copy.deepcopy(updated["profile_strategy_state"])
+    return _thaw(updated["profile_strategy_state"])
 
 
 def get_user_profiles_settings() -> dict[str, Any]:
-    return copy.deepcopy(read_settings()["user_profiles"])
+    return _thaw(settings_snapshot()["user_profiles"])
 
 
 def set_user_profiles_settings(values: dict[str, Any]) -> dict[str, Any]:
     updated = _update_settings(lambda data: _set_path_value(data, ("user_profiles",), _as_dict(values)))
-    return copy.deepcopy(updated["user_profiles"])
+    return _thaw(updated["user_profiles"])
 
 
 def get_user_profiles_revision() -> str:
@@ -391,36 +589,36 @@ def get_user_profiles_revision() -> str:
 
 
 def get_updater_settings() -> dict[str, Any]:
-    return copy.deepcopy(read_settings()["updater"])
+    return _thaw(settings_snapshot()["updater"])
 
 
 def set_updater_settings(values: dict[str, Any]) -> dict[str, Any]:
     updated = _update_settings(lambda data: data["updater"].update(_as_dict(values)))
-    return copy.deepcopy(updated["updater"])
+    return _thaw(updated["updater"])
 
 
 def get_blockcheck_settings() -> dict[str, Any]:
-    return copy.deepcopy(read_settings()["blockcheck"])
+    return _thaw(settings_snapshot()["blockcheck"])
 
 
 def set_blockcheck_settings(values: dict[str, Any]) -> dict[str, Any]:
     updated = _update_settings(lambda data: data["blockcheck"].update(_as_dict(values)))
-    return copy.deepcopy(updated["blockcheck"])
+    return _thaw(updated["blockcheck"])
 
 
 def get_folders_settings() -> dict[str, Any]:
-    return copy.deepcopy(read_settings()["folders"])
+    return _thaw(settings_snapshot()["folders"])
 
 
 def set_folders_settings(values: dict[str, Any]) -> dict[str, Any]:
     updated = _update_settings(lambda data: _set_path_value(data, ("folders",), _as_dict(values)))
-    return copy.deepcopy(updated["folders"])
+    return _thaw(updated["folders"])
 
 
 def get_profile_identity_registry(engine: str) -> dict[str, Any]:
     key = str(engine or "").strip().lower()
-    registries = read_settings()["profile_identity"]
-    return copy.deepcopy(registries.get(key) or {})
+    registries = settings_snapshot()["profile_identity"]
+    return _thaw(registries.get(key) or {})
 
 
 def set_profile_identity_registry(engine: str, registry: dict[str, Any]) -> dict[str, Any]:
@@ -428,16 +626,16 @@ def set_profile_identity_registry(engine: str, registry: dict[str, Any]) -> dict
     updated = _update_settings(
         lambda data: _set_path_value(data, ("profile_identity", key), _as_dict(registry))
     )
-    return copy.deepcopy(updated["profile_identity"].get(key) or {})
+    return _thaw(updated["profile_identity"].get(key) or {})
 
 
 def get_orchestra_settings() -> dict[str, Any]:
-    return copy.deepcopy(read_settings()["orchestra"]["settings"])
+    return _thaw(settings_snapshot()["orchestra"]["settings"])
 
 
 def set_orchestra_settings(values: dict[str, Any]) -> dict[str, Any]:
     updated = _update_settings(lambda data: data["orchestra"]["settings"].update(_as_dict(values)))
-    return copy.deepcopy(updated["orchestra"]["settings"])
+    return _thaw(updated["orchestra"]["settings"])
 
 
 def get_dpi_autostart() -> bool:
@@ -528,15 +726,13 @@ def get_defender_disabled_memory() -> bool:
 
 def get_window_geometry() -> dict[str, Any]:
     data = read_settings()
-    return copy.deepcopy(
-        {
-            "x": _get_path_value(data, ("window", "x"), None),
-            "y": _get_path_value(data, ("window", "y"), None),
-            "width": _get_path_value(data, ("window", "width"), None),
-            "height": _get_path_value(data, ("window", "height"), None),
-            "maximized": bool(_get_path_value(data, ("window", "maximized"), False)),
-        }
-    )
+    return {
+        "x": _get_path_value(data, ("window", "x"), None),
+        "y": _get_path_value(data, ("window", "y"), None),
+        "width": _get_path_value(data, ("window", "width"), None),
+        "height": _get_path_value(data, ("window", "height"), None),
+        "maximized": bool(_get_path_value(data, ("window", "maximized"), False)),
+    }
 
 
 def set_window_geometry(*, x: int | None, y: int | None, width: int | None, height: int | None, maximized: bool) -> bool:
@@ -774,13 +970,13 @@ def set_dns_crash_count(value: int) -> bool:
 
 
 def get_custom_dns_servers() -> list[dict[str, Any]]:
-    value = _get_path_value(read_settings(), ("dns", "custom_servers"), [])
-    return copy.deepcopy(value if isinstance(value, list) else [])
+    value = read_setting(("dns", "custom_servers"), [])
+    return _thaw(value if isinstance(value, list) else [])
 
 
 def set_custom_dns_servers(value: list[dict[str, Any]]) -> list[dict[str, Any]]:
     updated = _update_settings(lambda data: _set_path_value(data, ("dns", "custom_servers"), value))
-    return copy.deepcopy(updated["dns"]["custom_servers"])
+    return _thaw(updated["dns"]["custom_servers"])
 
 
 def increment_dns_crash_count() -> int:
@@ -807,7 +1003,7 @@ def set_hosts_bootstrap_signature(value: str | None) -> bool:
 
 
 def get_active_hosts_domains() -> set[str]:
-    items = _get_path_value(read_settings(), ("hosts", "active_domains"), [])
+    items = read_setting(("hosts", "active_domains"), [])
     if not isinstance(items, list):
         return set()
     return set(_unique_str_list(items))
@@ -838,7 +1034,7 @@ def clear_active_hosts_domains() -> bool:
 
 
 def get_hosts_selection() -> dict[str, str]:
-    data = _get_path_value(read_settings(), ("hosts", "selection"), {})
+    data = read_setting(("hosts", "selection"), {})
     if not isinstance(data, dict):
         return {}
     out: dict[str, str] = {}
@@ -886,7 +1082,7 @@ def set_premium_last_check(value: str | None) -> bool:
 
 
 def get_premium_last_network_failure_ts() -> int | None:
-    value = _get_path_value(read_settings(), ("premium", "last_network_failure_ts"), None)
+    value = read_setting(("premium", "last_network_failure_ts"), None)
     try:
         return int(value) if value is not None else None
     except Exception:
@@ -930,7 +1126,7 @@ def set_premium_pair_code(*, code: str | None, expires_at: int | None) -> bool:
 
 
 def get_premium_pair_expires_at() -> int | None:
-    value = _get_path_value(read_settings(), ("premium", "pair_expires_at"), None)
+    value = read_setting(("premium", "pair_expires_at"), None)
     try:
         return int(value) if value is not None else None
     except Exception:
@@ -938,8 +1134,8 @@ def get_premium_pair_expires_at() -> int | None:
 
 
 def get_premium_cache() -> dict[str, Any] | None:
-    cache = _get_path_value(read_settings(), ("premium", "premium_cache"), None)
-    return copy.deepcopy(cache) if isinstance(cache, dict) else None
+    cache = read_setting(("premium", "premium_cache"), None)
+    return _thaw(cache) if isinstance(cache, dict) else None
 
 
 def set_premium_cache(cache: dict[str, Any] | None) -> bool:
@@ -1178,7 +1374,7 @@ def set_orchestra_unlock_fails(value: int) -> bool:
 
 
 def get_orchestra_whitelist_user_domains() -> list[str]:
-    values = _get_path_value(read_settings(), ("orchestra", "whitelist", "user_domains"), [])
+    values = read_setting(("orchestra", "whitelist", "user_domains"), [])
     return _unique_str_list(values)
 
 
@@ -1208,8 +1404,8 @@ def clear_orchestra_whitelist_user_domains() -> bool:
 
 def get_orchestra_locked_map(askey: str) -> dict[str, int]:
     key = _normalize_askey(askey)
-    data = _get_path_value(read_settings(), ("orchestra", "locked", key), {})
-    return copy.deepcopy(data if isinstance(data, dict) else {})
+    data = read_setting(("orchestra", "locked", key), {})
+    return _thaw(data if isinstance(data, dict) else {})
 
 
 def set_orchestra_locked_map(askey: str, data: dict[str, int]) -> bool:
@@ -1252,7 +1448,7 @@ def clear_orchestra_locked_map(askey: str) -> bool:
 
 def get_orchestra_user_locked(askey: str) -> list[str]:
     key = _normalize_askey(askey)
-    values = _get_path_value(read_settings(), ("orchestra", "user_locked", key), [])
+    values = read_setting(("orchestra", "user_locked", key), [])
     return [_normalize_lookup_key(item) for item in _unique_str_list(values) if _normalize_lookup_key(item)]
 
 
@@ -1283,8 +1479,8 @@ def clear_orchestra_user_locked(askey: str) -> bool:
 
 def get_orchestra_user_blocked(askey: str) -> dict[str, list[int]]:
     key = _normalize_askey(askey)
-    data = _get_path_value(read_settings(), ("orchestra", "user_blocked", key), {})
-    return copy.deepcopy(data if isinstance(data, dict) else {})
+    data = read_setting(("orchestra", "user_blocked", key), {})
+    return _thaw(data if isinstance(data, dict) else {})
 
 
 def set_orchestra_user_blocked(askey: str, data: dict[str, list[int]]) -> bool:
@@ -1330,8 +1526,8 @@ def clear_orchestra_user_blocked(askey: str) -> bool:
 
 
 def get_orchestra_history() -> dict[str, Any]:
-    data = _get_path_value(read_settings(), ("orchestra", "history"), {})
-    return copy.deepcopy(data if isinstance(data, dict) else {})
+    data = read_setting(("orchestra", "history"), {})
+    return _thaw(data if isinstance(data, dict) else {})
 
 
 def set_orchestra_history(data: dict[str, Any]) -> bool:
@@ -1341,7 +1537,8 @@ def set_orchestra_history(data: dict[str, Any]) -> bool:
 
 def get_orchestra_history_for_target(target: str) -> dict[str, Any]:
     lookup_key = _normalize_lookup_key(target)
-    return copy.deepcopy(get_orchestra_history().get(lookup_key, {}))
+    history = read_setting(("orchestra", "history"), {})
+    return _thaw(history.get(lookup_key, {}) if isinstance(history, dict) else {})
 
 
 def set_orchestra_history_for_target(target: str, data: dict[str, Any]) -> bool:
@@ -1375,6 +1572,12 @@ def clear_orchestra_history() -> bool:
 
 
 __all__ = [
+    "DEFAULT_SETTINGS_DEBOUNCE_SECONDS",
+    "flush_debounced_settings",
+    "read_setting",
+    "settings_snapshot",
+    "settings_transaction",
+    "update_settings_debounced",
     "get_accent_color",
     "get_active_hosts_domains",
     "get_animations_enabled",
@@ -57,7 +57,11 @@ def _install_loop_exception_handler(
     loop: asyncio.AbstractEventLoop,
     *,
     on_log: Optional[Callable[[str], None]] = None,
+    on_repeated_log: Optional[Callable[[str], None]] = None,
 ) -> None:
+    # Сбросы соединений приходят пачками: эти строки пишем через rate-limited путь.
+    repeated_log = on_repeated_log or on_log
+
     def _emit_proxy_loop_context(prefix: str, context: dict) -> None:
         if on_log is None:
             return
@@ -80,9 +84,9 @@ def _install_loop_exception_handler(
 
     def _handler(current_loop: asyncio.AbstractEventLoop, context: dict) -> None:
         if _is_ignorable_asyncio_loop_exception(context):
-            if on_log is not None:
+            if repeated_log is not None:
                 try:
-                    on_log(
+                    repeated_log(
                         "Telegram Proxy: удалённая сторона закрыла соединение "
                         "(WinError 10054), это скрыто как сетевой сброс"
                     )
@@ -117,10 +121,13 @@ class TelegramProxyRuntime:
         buffer_kb: int = 256,
         fake_tls_domain: str = "",
         proxy_protocol: bool = False,
+        on_repeated_log: Optional[Callable[[str], None]] = None,
+        stats_jsonl_path: str = "",
     ):
         self._port = port
         self._mode = mode
         self._on_log = on_log
+        self._on_repeated_log = on_repeated_log
         self._on_upstream_state = on_upstream_state
         self._host = host
         self._upstream_config = upstream_config
@@ -131,6 +138,7 @@ class TelegramProxyRuntime:
         self._buffer_kb = int(buffer_kb)
         self._fake_tls_domain = str(fake_tls_domain or "")
         self._proxy_protocol = bool(proxy_protocol)
+        self._stats_jsonl_path = str(stats_jsonl_path or "")
         self._proxy: Optional[TelegramWSProxy] = None
         self._loop: Optional[asyncio.AbstractEventLoop] = None
         self._thread: Optional[threading.Thread] = None
@@ -184,6 +192,7 @@ class TelegramProxyRuntime:
             buffer_kb=self._buffer_kb,
             fake_tls_domain=self._fake_tls_domain,
             proxy_protocol=self._proxy_protocol,
+            stats_jsonl_path=self._stats_jsonl_path,
         )
         self._started.clear()
         self._thread = threading.Thread(
@@ -287,7 +296,11 @@ class TelegramProxyRuntime:
             self._started.set()
             return
         asyncio.set_event_loop(loop)
-        _install_loop_exception_handler(loop, on_log=self._on_log)
+        _install_loop_exception_handler(
+            loop,
+            on_log=self._on_log,
+            on_repeated_log=self._on_repeated_log,
+        )
         try:
             proxy = self._proxy
             if proxy is not None:
@@ -50,6 +50,11 @@ def build_arg_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="Accept PROXY protocol v1 header, for example behind nginx stream",
     )
+    parser.add_argument(
+        "--stats-jsonl",
+        default="",
+        help="Append a stats snapshot (JSON line) to this file every minute",
+    )
     parser.add_argument(
         "-v", "--verbose", action="store_true",
         help="Enable debug logging",
@@ -76,6 +81,7 @@ def main():
         dc_endpoint_overrides=parse_dc_endpoint_overrides(args.dc_ip),
         fake_tls_domain=args.fake_tls_domain,
         proxy_protocol=args.proxy_protocol,
+        stats_jsonl_path=args.stats_jsonl,
         on_log=lambda msg: print(f"[TG-PROXY] {msg}"),
     )
 
@@ -379,14 +379,16 @@ def set_upstream_preset(preset_id: str) -> None:
             set_tg_proxy_upstream_preset_id,
             set_tg_proxy_upstream_port,
             set_tg_proxy_upstream_user,
+            settings_transaction,
         )
 
         normalized_preset_id = str(preset_id or "").strip()
-        set_tg_proxy_upstream_preset_id(normalized_preset_id)
-        set_tg_proxy_upstream_host("")
-        set_tg_proxy_upstream_port(DEFAULT_UPSTREAM_PORT)
-        set_tg_proxy_upstream_user("")
-        set_tg_proxy_upstream_pass("")
+        with settings_transaction():
+            set_tg_proxy_upstream_preset_id(normalized_preset_id)
+            set_tg_proxy_upstream_host("")
+            set_tg_proxy_upstream_port(DEFAULT_UPSTREAM_PORT)
+            set_tg_proxy_upstream_user("")
+            set_tg_proxy_upstream_pass("")
     except Exception:
         pass
 
@@ -399,13 +401,15 @@ def set_manual_upstream(host: str, port: int, user: str, password: str) -> None:
             set_tg_proxy_upstream_preset_id,
             set_tg_proxy_upstream_port,
             set_tg_proxy_upstream_user,
+            settings_transaction,
         )
 
-        set_tg_proxy_upstream_preset_id("")
-        set_tg_proxy_upstream_host(str(host or "").strip())
-        set_tg_proxy_upstream_port(normalize_upstream_port(port))
-        set_tg_proxy_upstream_user(str(user or "").strip())
-        set_tg_proxy_upstream_pass(str(password or ""))
+        with settings_transaction():
+            set_tg_proxy_upstream_preset_id("")
+            set_tg_proxy_upstream_host(str(host or "").strip())
+            set_tg_proxy_upstream_port(normalize_upstream_port(port))
+            set_tg_proxy_upstream_user(str(user or "").strip())
+            set_tg_proxy_upstream_pass(str(password or ""))
     except Exception:
         pass
 
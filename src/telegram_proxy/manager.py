@@ -4,13 +4,16 @@
 Integrates with PyQt6 event system — emits signals on status changes.
 """
 
+import os
+
 from PyQt6.QtCore import QThread, pyqtSignal
 from typing import Optional, Callable
 
 from telegram_proxy import TelegramProxyRuntime
-from telegram_proxy.wss_proxy import CloudflareFallbackConfig, ProxyStats, UpstreamProxyConfig
+from telegram_proxy.wss_proxy import CloudflareFallbackConfig, UpstreamProxyConfig
+from telegram_proxy.proxy.stats import STATS_JSONL_FILE_NAME, ProxyStatsSnapshot
 from telegram_proxy.proxy.upstream_controller import UpstreamRuntimeSnapshot
-from telegram_proxy.proxy_logger import get_proxy_logger
+from telegram_proxy.proxy_logger import LOGS_FOLDER, get_proxy_logger
 
 _shared_proxy_manager: Optional["TelegramProxyManager"] = None
 
@@ -38,9 +41,11 @@ class TelegramProxyManager(QThread):
         return c is not None and c.is_running
 
     @property
-    def stats(self) -> Optional[ProxyStats]:
+    def stats(self) -> Optional[ProxyStatsSnapshot]:
+        """Immutable snapshot — safe to read from the GUI thread."""
         c = self._runtime
-        return c.stats if c else None
+        stats = c.stats if c else None
+        return stats.snapshot() if stats is not None else None
 
     @property
     def upstream_state(self) -> Optional[UpstreamRuntimeSnapshot]:
@@ -87,6 +92,7 @@ class TelegramProxyManager(QThread):
             port=port,
             mode=mode,
             on_log=self._on_log,
+            on_repeated_log=self._proxy_logger.log_throttled,
             on_upstream_state=self._on_upstream_state,
             host=host,
             upstream_config=upstream_config,
@@ -97,6 +103,7 @@ class TelegramProxyManager(QThread):
             buffer_kb=buffer_kb,
             fake_tls_domain=fake_tls_domain,
             proxy_protocol=proxy_protocol,
+            stats_jsonl_path=os.path.join(LOGS_FOLDER, STATS_JSONL_FILE_NAME),
         )
         ok = self._runtime.start()
         if ok:
@@ -8,7 +8,10 @@ DC2/DC4 WSS relays which read the real DC id from the MTProto init packet.
 
 import socket as _socket
 import struct
+from bisect import bisect_right
+from functools import lru_cache
 from ipaddress import IPv4Network, IPv4Address, IPv6Network, IPv6Address
+from typing import Iterable, NamedTuple, Optional
 
 from telegram_proxy.proxy.route_catalog import (
     WSS_PATH,
@@ -84,6 +87,10 @@ TCP_MEDIA_ENDPOINTS = {
     203: ("91.105.192.100", 443),
 }
 
+_MEDIA_ENDPOINT_IPS = frozenset(ip for ip, _port in TCP_MEDIA_ENDPOINTS.values()) - {
+    ip for ip, _port in TCP_ENDPOINTS.values()
+}
+
 # Telegram CIDR ranges -> DC mapping
 # Source: https://core.telegram.org/resources/cidr.txt + known DC assignments
 _SUBNET_TO_DC: list[tuple[IPv4Network, int]] = [
@@ -186,30 +193,191 @@ def _compile() -> None:
         _COMPILED_TG_RANGES.append((net_int, mask))
 
 
+# ---- Compiled lookup index ----
+
+DC_INDEX_CACHE_SIZE = 4096
+
+
+class DcInfo(NamedTuple):
+    """Result of one DcIndex lookup.
+
+    ``dc`` is the CIDR-based DC (what ``ip_to_dc`` returns), ``exact`` is the
+    (dc, is_media) entry from IP_TO_DC or a user override, if any.
+    """
+
+    dc: int
+    is_telegram: bool
+    exact: Optional[tuple[int, bool]] = None
+
+    @property
+    def dc_media(self) -> tuple[int, bool]:
+        return self.exact if self.exact is not None else (self.dc, False)
+
+
+_NOT_TELEGRAM = DcInfo(2, False)
+
+
+_unpack_v4 = struct.Struct("!I").unpack
+
+
+def _parse_v4(ip: str) -> tuple[Optional[int], bool]:
+    """Parse like inet_aton; the flag says IPv4Address would accept it too.
+
+    IPv4Address accepts exactly the canonical dotted quad, so the strict
+    check is a round trip through inet_ntoa.
+    """
+    try:
+        packed = _socket.inet_aton(ip)
+    except (OSError, ValueError):
+        return None, False
+    return _unpack_v4(packed)[0], _socket.inet_ntoa(packed) == ip
+
+
+class DcIndex:
+    """Precompiled Telegram IP -> DC index.
+
+    IPv4: sorted, non-overlapping intervals searched with ``bisect``. Every
+    interval already carries the longest-prefix DC, the Telegram-range flag
+    and the exact-IP (dc, is_media) entry, so one search answers all three.
+    IPv6: a prefix trie with levels only at the prefix lengths in use; the
+    most specific hit wins. Recent addresses are kept in an LRU.
+    """
+
+    def __init__(
+        self,
+        exact: Optional[dict[str, tuple[int, bool]]] = None,
+        *,
+        extra_telegram: Iterable[str] = (),
+        cache_size: int = DC_INDEX_CACHE_SIZE,
+    ) -> None:
+        exact_v4: dict[int, tuple[int, bool]] = {}
+        for ip, entry in (IP_TO_DC if exact is None else exact).items():
+            value, strict = _parse_v4(ip)
+            if strict:
+                exact_v4[value] = (int(entry[0]), bool(entry[1]))
+        telegram_v4: set[int] = set()
+        for ip in extra_telegram:
+            value, strict = _parse_v4(str(ip))
+            if strict:
+                telegram_v4.add(value)
+        self._v4_starts, self._v4_values = self._compile_v4(exact_v4, telegram_v4)
+        self._v6_levels = self._compile_v6()
+        self.lookup = lru_cache(maxsize=cache_size)(self._lookup)
+
+    @staticmethod
+    def _compile_v4(
+        exact_v4: dict[int, tuple[int, bool]],
+        telegram_v4: set[int],
+    ) -> tuple[list[int], list[DcInfo]]:
+        _compile()
+        bounds = {0}
+        for net_addr, mask, _dc in _COMPILED_NETS:
+            bounds.add(net_addr)
+            bounds.add(net_addr + ((~mask) & 0xFFFFFFFF) + 1)
+        for lo, hi in _TG_RANGES:
+            bounds.add(lo)
+            bounds.add(hi + 1)
+        for value in exact_v4.keys() | telegram_v4:
+            bounds.add(value)
+            bounds.add(value + 1)
+        bounds.discard(1 << 32)
+
+        starts: list[int] = []
+        values: list[DcInfo] = []
+        for start in sorted(bounds):
+            dc = 2
+            for net_addr, mask, net_dc in _COMPILED_NETS:
+                if (start & mask) == net_addr:
+                    dc = net_dc
+                    break
+            info = DcInfo(
+                dc=dc,
+                is_telegram=start in telegram_v4 or any(lo <= start <= hi for lo, hi in _TG_RANGES),
+                exact=exact_v4.get(start),
+            )
+            if values and values[-1] == info:
+                continue
+            starts.append(start)
+            values.append(info)
+        return starts, values
+
+    @staticmethod
+    def _compile_v6() -> list[tuple[int, dict[int, DcInfo]]]:
+        prefixes = {net for net, _dc in _V6_SUBNET_TO_DC} | set(TELEGRAM_V6_CIDRS)
+        levels: dict[int, dict[int, DcInfo]] = {}
+        for net in prefixes:
+            # Для любого адреса под этим префиксом более короткие префиксы дают тот же ответ.
+            address = net.network_address
+            dc = next((net_dc for dc_net, net_dc in _V6_SUBNET_TO_DC if address in dc_net), 2)
+            is_telegram = any(address in tg_net for tg_net in TELEGRAM_V6_CIDRS)
+            shift = 128 - net.prefixlen
+            levels.setdefault(shift, {})[int(address) >> shift] = DcInfo(dc, is_telegram)
+        return sorted(levels.items())
+
+    def _lookup(self, ip: str) -> DcInfo:
+        if ":" in ip:
+            try:
+                value = int.from_bytes(_socket.inet_pton(_socket.AF_INET6, ip), "big")
+            except (OSError, ValueError):
+                # Зоны ("fe80::1%eth0") и прочее, что понимает только ipaddress.
+                try:
+                    value = int(IPv6Address(ip))
+                except ValueError:
+                    return _NOT_TELEGRAM
+            for shift, table in self._v6_levels:
+                info = table.get(value >> shift)
+                if info is not None:
+                    return info
+            return _NOT_TELEGRAM
+        value, strict = _parse_v4(ip)
+        if value is None:
+            return _NOT_TELEGRAM
+        info = self._v4_values[bisect_right(self._v4_starts, value) - 1]
+        if not strict:
+            # IPv4Address отверг строку, но inet_aton мягче ("91.108.1").
+            return DcInfo(2, info.is_telegram)
+        return info
+
+    def with_overrides(self, overrides: Optional[dict[int, str]]) -> "DcIndex":
+        """Index where user DC -> IP overrides are Telegram IPs with an exact (dc, is_media) entry.
+
+        В записи "DC:IP" нет признака media — берём его из встроенной
+        таблицы (IP_TO_DC, затем media-адреса TCP_MEDIA_ENDPOINTS);
+        незнакомый адрес считается обычным.
+        """
+        if not overrides:
+            return self
+        exact = dict(IP_TO_DC)
+        for dc, ip in overrides.items():
+            ip = str(ip)
+            known = IP_TO_DC.get(ip)
+            is_media = known[1] if known is not None else ip in _MEDIA_ENDPOINT_IPS
+            exact[ip] = (int(dc), is_media)
+        return DcIndex(exact, extra_telegram=[str(ip) for ip in overrides.values()])
+
+
+_DEFAULT_INDEX: Optional[DcIndex] = None
+
+
+def default_dc_index() -> DcIndex:
+    global _DEFAULT_INDEX
+    if _DEFAULT_INDEX is None:
+        _DEFAULT_INDEX = DcIndex()
+    return _DEFAULT_INDEX
+
+
+def build_dc_index(overrides: Optional[dict[int, str]] = None) -> DcIndex:
+    """Compile the lookup index with user overrides (see parse_dc_endpoint_overrides)."""
+    return default_dc_index().with_overrides(overrides)
+
+
 def ip_to_dc(ip: str) -> int:
     """Map a Telegram IP address to its datacenter number.
 
     Returns DC number (1-5). Falls back to DC2 (most common) if unknown.
     Supports both IPv4 and IPv6.
     """
-    if ":" in ip:
-        try:
-            addr = IPv6Address(ip)
-            for net, dc in _V6_SUBNET_TO_DC:
-                if addr in net:
-                    return dc
-        except ValueError:
-            pass
-        return 2
-    _compile()
-    try:
-        ip_int = int(IPv4Address(ip))
-    except ValueError:
-        return 2
-    for net_addr, mask, dc in _COMPILED_NETS:
-        if (ip_int & mask) == net_addr:
-            return dc
-    return 2  # Default DC
+    return default_dc_index().lookup(ip).dc
 
 
 def ip_to_dc_media(ip: str) -> tuple[int, bool]:
@@ -217,30 +385,15 @@ def ip_to_dc_media(ip: str) -> tuple[int, bool]:
 
     Falls back to CIDR-based lookup if IP not in table.
     """
-    entry = IP_TO_DC.get(ip)
-    if entry is not None:
-        return entry
-    return (ip_to_dc(ip), False)
+    return default_dc_index().lookup(ip).dc_media
 
 
 def is_telegram_ip(ip: str) -> bool:
     """Check if an IP address belongs to Telegram's known ranges.
 
-    Uses fast integer comparison against precomputed ranges.
     Supports both IPv4 and IPv6.
     """
-    if ":" in ip:
-        # IPv6
-        try:
-            addr = IPv6Address(ip)
-            return any(addr in net for net in TELEGRAM_V6_CIDRS)
-        except ValueError:
-            return False
-    try:
-        n = struct.unpack("!I", _socket.inet_aton(ip))[0]
-        return any(lo <= n <= hi for lo, hi in _TG_RANGES)
-    except OSError:
-        return False
+    return default_dc_index().lookup(ip).is_telegram
 
 
 def ws_domains_for_dc(dc: int, is_media: bool = False) -> list[str]:
@@ -4,31 +4,92 @@ import logging
 import struct
 from typing import Optional
 
-from telegram_proxy.proxy.aes_ctr import AesCtrStream, aes_ctr_keystream
+from telegram_proxy.proxy.aes_ctr import AesCtrStream
 
 log = logging.getLogger("tg_proxy")
 
 
+PROTO_TAG_ABRIDGED = b"\xef\xef\xef\xef"
+PROTO_TAG_INTERMEDIATE = b"\xee\xee\xee\xee"
+PROTO_TAG_SECURE = b"\xdd\xdd\xdd\xdd"
+VALID_PROTO_TAGS = frozenset({PROTO_TAG_ABRIDGED, PROTO_TAG_INTERMEDIATE, PROTO_TAG_SECURE})
+
+_DC_IDX = struct.Struct("<h")
+
+
+class InitPacket:
+    """Parsed 64-byte MTProto obfuscation init of one client connection.
+
+    Ключевой поток AES-CTR выводится один раз: расшифровка самого init даёт
+    и proto tag с dc, и байты гаммы для патча dc, а шифратор после этого уже
+    сдвинут на 64 байта — ровно то состояние, с которого начинает сплиттер.
+    """
+
+    __slots__ = ("raw", "proto_tag", "dc_raw", "_plain", "_key", "_iv", "_decryptor")
+
+    def __init__(self, data: bytes):
+        if len(data) < 64:
+            raise ValueError("MTProto init must be at least 64 bytes")
+        self.raw = bytes(data)
+        self._key = self.raw[8:40]
+        self._iv = self.raw[40:56]
+        self._decryptor = AesCtrStream(self._key, self._iv)
+        self._plain = self._decryptor.update(self.raw[:64])
+        self.proto_tag = self._plain[56:60]
+        self.dc_raw = _DC_IDX.unpack_from(self._plain, 60)[0]
+
+    @property
+    def has_valid_proto(self) -> bool:
+        return self.proto_tag in VALID_PROTO_TAGS
+
+    @property
+    def dc(self) -> Optional[int]:
+        if not self.has_valid_proto:
+            return None
+        dc = abs(self.dc_raw)
+        if 1 <= dc <= 1000:
+            return dc
+        return None
+
+    @property
+    def is_media(self) -> bool:
+        return self.dc is not None and self.dc_raw < 0
+
+    def patched(self, dc: int) -> bytes:
+        """Return the init bytes with dc_id replaced (the rest of the data is kept)."""
+        new_dc = _DC_IDX.pack(dc)
+        patched = bytearray(self.raw)
+        # Гамма = шифротекст ^ открытый текст, пересчитывать AES не нужно.
+        patched[60] = self.raw[60] ^ self._plain[60] ^ new_dc[0]
+        patched[61] = self.raw[61] ^ self._plain[61] ^ new_dc[1]
+        return bytes(patched)
+
+    def take_decryptor(self) -> AesCtrStream:
+        """Hand out the client-stream decryptor positioned right after the init.
+
+        Первый вызов отдаёт уже сдвинутый шифратор; повторный строит новый,
+        потому что состояние потока у каждого сплиттера своё.
+        """
+        decryptor = self._decryptor
+        if decryptor is not None:
+            self._decryptor = None
+            return decryptor
+        decryptor = AesCtrStream(self._key, self._iv)
+        decryptor.update(b"\x00" * 64)
+        return decryptor
+
+
 def dc_from_init(data: bytes) -> tuple[Optional[int], bool]:
     """Extract DC id from the 64-byte MTProto obfuscation init packet."""
     if len(data) < 64:
         return None, False
 
     try:
-        key = bytes(data[8:40])
-        iv = bytes(data[40:56])
-        keystream = aes_ctr_keystream(key, iv, 64)
-        plain = bytes(a ^ b for a, b in zip(data[56:64], keystream[56:64]))
-
-        proto = struct.unpack("<I", plain[0:4])[0]
-        dc_raw = struct.unpack("<h", plain[4:6])[0]
-
-        log.debug("dc_from_init: proto=0x%08X dc_raw=%d", proto, dc_raw)
-
-        if proto in (0xEFEFEFEF, 0xEEEEEEEE, 0xDDDDDDDD):
-            dc = abs(dc_raw)
-            if 1 <= dc <= 1000:
-                return dc, (dc_raw < 0)
+        packet = InitPacket(data)
+        log.debug("dc_from_init: proto=0x%08X dc_raw=%d", int.from_bytes(packet.proto_tag, "little"), packet.dc_raw)
+        dc = packet.dc
+        if dc is not None:
+            return dc, packet.is_media
     except ImportError:
         log.warning("tgcrypto library not installed -- cannot parse MTProto init")
     except Exception as exc:
@@ -42,17 +103,9 @@ def patch_init_dc(data: bytes, dc: int) -> bytes:
     if len(data) < 64:
         return data
     try:
-        new_dc = struct.pack("<h", dc)
-        key_raw = bytes(data[8:40])
-        iv = bytes(data[40:56])
-        ks = aes_ctr_keystream(key_raw, iv, 64)
-        patched = bytearray(data[:64])
-        patched[60] = ks[60] ^ new_dc[0]
-        patched[61] = ks[61] ^ new_dc[1]
+        patched = InitPacket(data).patched(dc)
         log.debug("init patched: dc_id -> %d", dc)
-        if len(data) > 64:
-            return bytes(patched) + data[64:]
-        return bytes(patched)
+        return patched
     except Exception:
         return data
 
@@ -67,48 +120,147 @@ def is_http_transport(data: bytes) -> bool:
     )
 
 
-class MsgSplitter:
-    """Split batched MTProto abridged messages into separate WS frames."""
+_INTERMEDIATE_LEN = struct.Struct("<I")
+
+# Больше не бывает ни у клиента, ни у Telegram; всё длиннее — ошибка разметки.
+# Без предела неверная догадка о разметке или битый заголовок копили бы
+# трафик клиента в _pending (до 2 ГБ у intermediate) и стопорили relay до EOF.
+MAX_MTPROTO_PACKET_LEN = 2 * 1024 * 1024
 
-    def __init__(self, init_data: bytes):
-        key_raw = bytes(init_data[8:40])
-        iv = bytes(init_data[40:56])
-        self._dec = AesCtrStream(key_raw, iv)
-        self._dec.update(b"\x00" * 64)
 
-    def split(self, chunk: bytes) -> list[bytes]:
-        plain = self._dec.update(chunk)
-        boundaries: list[int] = []
+class MTProtoPacketSplitter:
+    """Streaming splitter of an obfuscated MTProto stream into packets.
+
+    Держит между чтениями незаконченный заголовок и остаток тела текущего
+    пакета, поэтому границы не зависят от того, как TCP нарезал поток.
+    Целые пакеты внутри одного чанка отдаются срезами ``memoryview`` без
+    копирования; копия появляется только у пакета, разорванного между
+    чтениями. Незнакомая разметка, нулевая длина или длина больше
+    MAX_MTPROTO_PACKET_LEN отключают деление — накопленное и остаток сразу
+    идут дальше как есть.
+    """
+
+    __slots__ = ("_decryptor", "_abridged", "_header", "_remaining", "_pending", "_disabled")
+
+    def __init__(self, decryptor, proto_tag: bytes):
+        self._decryptor = decryptor
+        proto_tag = bytes(proto_tag or b"")
+        self._abridged = proto_tag == PROTO_TAG_ABRIDGED
+        self._header = bytearray()
+        self._remaining = 0
+        self._pending = bytearray()
+        self._disabled = not self._abridged and proto_tag not in (PROTO_TAG_INTERMEDIATE, PROTO_TAG_SECURE)
+
+    def split(self, chunk) -> list:
+        if not chunk:
+            return []
+        if self._disabled:
+            return [chunk]
+
+        plain = self._decryptor.update(chunk)
+        view = memoryview(chunk)
+        size = len(plain)
+        parts: list = []
+        start = 0
         pos = 0
-        while pos < len(plain):
-            first = plain[pos]
-            if first == 0x7F:
-                if pos + 4 > len(plain):
+        header = self._header
+
+        while pos < size:
+            if self._remaining:
+                take = min(self._remaining, size - pos)
+                pos += take
+                self._remaining -= take
+                if self._remaining:
                     break
-                msg_len = (
-                    struct.unpack_from("<I", plain, pos + 1)[0] & 0xFFFFFF
-                ) * 4
-                pos += 4
+                parts.append(self._take(view, start, pos))
+                start = pos
+                continue
+
+            if not header and size - pos >= 4:
+                # Быстрый путь: заголовок целиком внутри чанка.
+                payload_len, header_len = self._parse_header(plain, pos)
+                pos += header_len
             else:
-                msg_len = first * 4
+                header.append(plain[pos])
                 pos += 1
-            if msg_len == 0 or pos + msg_len > len(plain):
-                break
-            pos += msg_len
-            boundaries.append(pos)
+                if len(header) < self._header_len(header[0]):
+                    continue
+                payload_len, _header_len = self._parse_header(header, 0)
+                header.clear()
 
-        if len(boundaries) <= 1:
-            return [chunk]
+            if payload_len <= 0 or payload_len > MAX_MTPROTO_PACKET_LEN:
+                return self._give_up(parts, view, start, size)
+            self._remaining = payload_len
 
-        parts: list[bytes] = []
-        prev = 0
-        for i, boundary in enumerate(boundaries):
-            if i == len(boundaries) - 1:
-                parts.append(chunk[prev:])
-            else:
-                parts.append(chunk[prev:boundary])
-            prev = boundary
+        if start < size:
+            if len(self._pending) + size - start > MAX_MTPROTO_PACKET_LEN + 4:
+                return self._give_up(parts, view, start, size)
+            self._pending += view[start:size]
         return parts
 
+    def _give_up(self, parts: list, view: memoryview, start: int, end: int) -> list:
+        self._disabled = True
+        self._header.clear()
+        self._remaining = 0
+        parts.append(self._take(view, start, end))
+        return parts
+
+    def flush(self) -> list[bytes]:
+        self._header.clear()
+        self._remaining = 0
+        if not self._pending:
+            return []
+        tail = bytes(self._pending)
+        self._pending.clear()
+        return [tail]
+
+    def _take(self, view: memoryview, start: int, end: int):
+        if not self._pending:
+            return view[start:end]
+        self._pending += view[start:end]
+        packet = bytes(self._pending)
+        self._pending.clear()
+        return packet
+
+    def _header_len(self, first: int) -> int:
+        if not self._abridged:
+            return 4
+        return 4 if first in (0x7F, 0xFF) else 1
+
+    def _parse_header(self, buf, offset: int) -> tuple[int, int]:
+        if not self._abridged:
+            return _INTERMEDIATE_LEN.unpack_from(buf, offset)[0] & 0x7FFFFFFF, 4
+        first = buf[offset]
+        if first in (0x7F, 0xFF):
+            return int.from_bytes(buf[offset + 1:offset + 4], "little") * 4, 4
+        return (first & 0x7F) * 4, 1
+
+
+class MsgSplitter(MTProtoPacketSplitter):
+    """Split client MTProto messages (from its obfuscated init) into separate WS frames."""
+
+    __slots__ = ()
+
+    def __init__(self, init_data: "bytes | InitPacket"):
+        packet = init_data if isinstance(init_data, InitPacket) else InitPacket(init_data)
+        proto_tag = packet.proto_tag
+        if proto_tag not in (PROTO_TAG_INTERMEDIATE, PROTO_TAG_SECURE):
+            # Исторически этот сплиттер понимал только abridged — им и
+            # остаётся для init с повреждённым тегом.
+            proto_tag = PROTO_TAG_ABRIDGED
+        super().__init__(packet.take_decryptor(), proto_tag)
+
 
-__all__ = ["MsgSplitter", "dc_from_init", "is_http_transport", "patch_init_dc"]
+__all__ = [
+    "InitPacket",
+    "MAX_MTPROTO_PACKET_LEN",
+    "MTProtoPacketSplitter",
+    "MsgSplitter",
+    "PROTO_TAG_ABRIDGED",
+    "PROTO_TAG_INTERMEDIATE",
+    "PROTO_TAG_SECURE",
+    "VALID_PROTO_TAGS",
+    "dc_from_init",
+    "is_http_transport",
+    "patch_init_dc",
+]
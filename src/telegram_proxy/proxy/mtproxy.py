@@ -11,6 +11,13 @@ from dataclasses import dataclass
 from urllib.parse import urlencode
 
 from telegram_proxy.proxy.aes_ctr import AesCtrStream, aes_ctr_crypt, aes_ctr_keystream
+from telegram_proxy.proxy.mtproto import (
+    PROTO_TAG_ABRIDGED,
+    PROTO_TAG_INTERMEDIATE,
+    PROTO_TAG_SECURE,
+    VALID_PROTO_TAGS,
+    MTProtoPacketSplitter,
+)
 from telegram_proxy.proxy.stats import ProxyStats
 from telegram_proxy.proxy.transport import RawWebSocket
 from telegram_proxy.proxy.fake_tls import build_fake_tls_secret
@@ -23,10 +30,6 @@ IV_LEN = 16
 PROTO_TAG_POS = 56
 DC_IDX_POS = 60
 
-PROTO_TAG_ABRIDGED = b"\xef\xef\xef\xef"
-PROTO_TAG_INTERMEDIATE = b"\xee\xee\xee\xee"
-PROTO_TAG_SECURE = b"\xdd\xdd\xdd\xdd"
-VALID_PROTO_TAGS = frozenset({PROTO_TAG_ABRIDGED, PROTO_TAG_INTERMEDIATE, PROTO_TAG_SECURE})
 ZERO_64 = b"\x00" * 64
 RELAY_BUFFER = 131072
 
@@ -55,92 +58,18 @@ class MTProxyCryptoContext:
         return self.client_encryptor.update(plain)
 
 
-class MTProxyMsgSplitter:
+class MTProxyMsgSplitter(MTProtoPacketSplitter):
     """Делит MTProxy-поток на отдельные MTProto-пакеты для WebSocket."""
 
+    __slots__ = ()
+
     def __init__(self, relay_init: bytes, proto_tag: bytes):
-        self._decryptor = _cipher(
+        decryptor = _cipher(
             bytes(relay_init[SKIP_LEN:SKIP_LEN + PREKEY_LEN]),
             bytes(relay_init[SKIP_LEN + PREKEY_LEN:SKIP_LEN + PREKEY_LEN + IV_LEN]),
         )
-        self._decryptor.update(ZERO_64)
-        self._proto_tag = bytes(proto_tag or b"")
-        self._cipher_buf = bytearray()
-        self._plain_buf = bytearray()
-        self._disabled = False
-
-    def split(self, chunk: bytes) -> list[bytes]:
-        if not chunk:
-            return []
-        if self._disabled:
-            return [chunk]
-
-        self._cipher_buf.extend(chunk)
-        self._plain_buf.extend(self._decryptor.update(chunk))
-        parts: list[bytes] = []
-        offset = 0
-
-        while offset < len(self._cipher_buf):
-            packet_len = self._next_packet_len(offset, len(self._cipher_buf) - offset)
-            if packet_len is None:
-                break
-            if packet_len <= 0:
-                parts.append(bytes(self._cipher_buf[offset:]))
-                offset = len(self._cipher_buf)
-                self._disabled = True
-                break
-            parts.append(bytes(self._cipher_buf[offset:offset + packet_len]))
-            offset += packet_len
-
-        if offset:
-            del self._cipher_buf[:offset]
-            del self._plain_buf[:offset]
-        return parts
-
-    def flush(self) -> list[bytes]:
-        if not self._cipher_buf:
-            return []
-        tail = bytes(self._cipher_buf)
-        self._cipher_buf.clear()
-        self._plain_buf.clear()
-        return [tail]
-
-    def _next_packet_len(self, offset: int, available: int) -> int | None:
-        if available <= 0:
-            return None
-        if self._proto_tag == PROTO_TAG_ABRIDGED:
-            return self._next_abridged_len(offset, available)
-        if self._proto_tag in (PROTO_TAG_INTERMEDIATE, PROTO_TAG_SECURE):
-            return self._next_intermediate_len(offset, available)
-        return 0
-
-    def _next_abridged_len(self, offset: int, available: int) -> int | None:
-        first = self._plain_buf[offset]
-        if first in (0x7F, 0xFF):
-            if available < 4:
-                return None
-            payload_len = int.from_bytes(self._plain_buf[offset + 1:offset + 4], "little") * 4
-            header_len = 4
-        else:
-            payload_len = (first & 0x7F) * 4
-            header_len = 1
-        if payload_len <= 0:
-            return 0
-        packet_len = header_len + payload_len
-        if available < packet_len:
-            return None
-        return packet_len
-
-    def _next_intermediate_len(self, offset: int, available: int) -> int | None:
-        if available < 4:
-            return None
-        payload_len = struct.unpack_from("<I", self._plain_buf, offset)[0] & 0x7FFFFFFF
-        if payload_len <= 0:
-            return 0
-        packet_len = 4 + payload_len
-        if available < packet_len:
-            return None
-        return packet_len
+        decryptor.update(ZERO_64)
+        super().__init__(decryptor, proto_tag)
 
 
 def normalize_secret(value: object) -> str:
@@ -288,6 +217,7 @@ async def relay_mtproxy_wss(
     label: str,
     dc: int = 0,
     splitter: MTProxyMsgSplitter | None = None,
+    route: str = "",
 ) -> None:
     t0 = time.monotonic()
     sent_total = 0
@@ -357,6 +287,8 @@ async def relay_mtproxy_wss(
         except BaseException:
             pass
         elapsed = time.monotonic() - t0
+        if route:
+            stats.record_transfer(route, dc, sent_total, recv_total, elapsed)
         log_fn(f"[{label}] mtproxy relay done: sent={sent_total} recv={recv_total} ({elapsed:.1f}s)")
 
 
@@ -372,6 +304,7 @@ async def relay_mtproxy_tcp(
     label: str,
     dc: int = 0,
     on_first_response: Callable[[], None] | None = None,
+    route: str = "",
 ) -> tuple[int, int]:
     t0 = time.monotonic()
     sent_total = 0
@@ -433,6 +366,8 @@ async def relay_mtproxy_tcp(
             stats.recv_zero_count += 1
             if dc > 0:
                 stats.recv_zero_per_dc[dc] = stats.recv_zero_per_dc.get(dc, 0) + 1
+        if route:
+            stats.record_transfer(route, dc, sent_total, recv_total, elapsed)
         log_fn(f"[{label}] mtproxy tcp relay done: sent={sent_total} recv={recv_total} ({elapsed:.1f}s)")
     return recv_total, sent_total
 
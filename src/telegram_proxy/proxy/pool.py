@@ -2,8 +2,10 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import math
 import time
-from typing import Optional
+from dataclasses import dataclass
+from typing import Callable, Optional
 
 from telegram_proxy.proxy.dc_map import (
     WSS_DOMAINS,
@@ -13,7 +15,7 @@ from telegram_proxy.proxy.dc_map import (
     ws_domains_for_dc,
 )
 from telegram_proxy.proxy.cloudflare import build_worker_path
-from telegram_proxy.proxy.stats import ProxyStats
+from telegram_proxy.proxy.stats import ProxyPoolBucket, ProxyStats
 from telegram_proxy.proxy.transport import RawWebSocket, WsHandshakeError
 
 
@@ -21,6 +23,17 @@ log = logging.getLogger("tg_proxy")
 
 WS_POOL_SIZE = 4
 WS_POOL_MAX_AGE = 120.0
+# Адаптивный пул: корзина растёт до pool_size * WS_POOL_BURST_FACTOR.
+WS_POOL_BURST_FACTOR = 2
+WS_POOL_FAST_WINDOW = 10.0
+WS_POOL_SLOW_WINDOW = 120.0
+# Сколько секунд спроса держим наготове: время рукопожатия WSS плюс запас.
+WS_POOL_LEAD_TIME = 4.0
+WS_POOL_HIT_ALPHA = 0.2
+WS_POOL_LOW_HIT_RATIO = 0.8
+# Как часто пул сам добирает корзины и меняет сокеты, которые истекут раньше,
+# чем их успеют взять: к началу всплеска корзина уже полна свежими.
+WS_POOL_PREWARM_INTERVAL = 5.0
 MAX_CONCURRENT_WSS = 4
 _wss_semaphore: Optional[asyncio.Semaphore] = None
 
@@ -65,15 +78,94 @@ def _websocket_is_unusable(ws: RawWebSocket) -> bool:
         return True
 
 
+@dataclass(slots=True)
+class _BucketDemand:
+    """EWMA-оценка спроса на одну корзину пула (dc, is_media).
+
+    Частота подключений считается двумя экспоненциально затухающими
+    счётчиками: быстрый реагирует на начало всплеска, медленный держит
+    запас после него. Доля попаданий сглаживается отдельно.
+    """
+
+    updated: float
+    target: int
+    fast_rate: float = 0.0
+    slow_rate: float = 0.0
+    hit_ratio: float = 1.0
+
+    def _decay(self, now: float) -> None:
+        elapsed = max(0.0, now - self.updated)
+        if elapsed:
+            self.fast_rate *= math.exp(-elapsed / WS_POOL_FAST_WINDOW)
+            self.slow_rate *= math.exp(-elapsed / WS_POOL_SLOW_WINDOW)
+        self.updated = now
+
+    def observe(self, now: float, *, hit: bool) -> None:
+        self._decay(now)
+        self.fast_rate += 1.0 / WS_POOL_FAST_WINDOW
+        self.slow_rate += 1.0 / WS_POOL_SLOW_WINDOW
+        self.hit_ratio += WS_POOL_HIT_ALPHA * ((1.0 if hit else 0.0) - self.hit_ratio)
+
+    def rate(self, now: float) -> float:
+        self._decay(now)
+        return max(self.fast_rate, self.slow_rate)
+
+    def plan(self, now: float, *, min_size: int, max_size: int, max_age: float) -> int:
+        rate = self.rate(now)
+        desired = math.ceil(rate * WS_POOL_LEAD_TIME)
+        if self.hit_ratio < WS_POOL_LOW_HIT_RATIO:
+            desired = max(desired, self.target + 1)
+        # Больше, чем успеют взять до истечения max_age, держать бессмысленно:
+        # лишние сокеты умрут по возрасту и станут потраченными рукопожатиями.
+        # Оценку даёт медленный счётчик — короткий всплеск её не раздувает.
+        desired = min(desired, round(self.slow_rate * max_age))
+        self.target = max(min_size, min(max_size, desired))
+        return self.target
+
+
 class WsPool:
-    """Pre-opened WebSocket connection pool."""
+    """Pre-opened WebSocket connection pool.
 
-    def __init__(self, stats: ProxyStats, pool_size: int = WS_POOL_SIZE, buffer_size: int = 256 * 1024):
+    With ``adaptive`` enabled each (dc, is_media) bucket is sized from the
+    observed demand between ``min_size`` and ``max_size`` and topped up by
+    ``prewarm()`` every ``WS_POOL_PREWARM_INTERVAL`` seconds after
+    ``warmup()``; otherwise every bucket is refilled to ``pool_size`` as before.
+    """
+
+    def __init__(
+        self,
+        stats: ProxyStats,
+        pool_size: int = WS_POOL_SIZE,
+        buffer_size: int = 256 * 1024,
+        *,
+        adaptive: bool = True,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        max_age: float = WS_POOL_MAX_AGE,
+        clock: Callable[[], float] = time.monotonic,
+    ):
         self._idle: dict[tuple[int, bool], list[tuple[RawWebSocket, float]]] = {}
         self._refilling: set[tuple[int, bool]] = set()
+        self._demand: dict[tuple[int, bool], _BucketDemand] = {}
+        self._routes: dict[tuple[int, bool], tuple[str, list[str]]] = {}
+        self._prewarm_task: Optional[asyncio.Task] = None
         self._stats = stats
         self._pool_size = normalize_pool_size(pool_size)
         self._buffer_size = int(buffer_size)
+        self._adaptive = bool(adaptive) and self._pool_size > 0
+        self._max_size = normalize_pool_size(
+            max_size if max_size is not None else self._pool_size * WS_POOL_BURST_FACTOR
+        )
+        self._min_size = max(0, min(self._max_size, int(min_size if min_size is not None else min(1, self._pool_size))))
+        self._max_age = float(max_age)
+        self._clock = clock
+
+    def target_size(self, dc: int, is_media: bool) -> int:
+        """Current number of idle sockets the bucket is refilled to."""
+        demand = self._demand.get((dc, is_media))
+        if not self._adaptive or demand is None:
+            return self._pool_size
+        return demand.target
 
     async def get(
         self, dc: int, is_media: bool,
@@ -83,7 +175,7 @@ class WsPool:
         if not domains:
             return None
         key = (dc, is_media)
-        now = time.monotonic()
+        now = self._clock()
         allowed_domains = {str(domain) for domain in domains}
 
         bucket = self._idle.get(key, [])
@@ -92,12 +184,14 @@ class WsPool:
             age = now - created
             domain = str(getattr(ws, "domain", "") or "")
             if domain and domain not in allowed_domains:
-                asyncio.create_task(self._quiet_close(ws))
+                self._stats.pool_domain_mismatch += 1
+                self._close_later(ws)
                 continue
-            if age > WS_POOL_MAX_AGE or _websocket_is_unusable(ws):
-                asyncio.create_task(self._quiet_close(ws))
+            if age > self._max_age or _websocket_is_unusable(ws):
+                self._discard(ws)
                 continue
             self._stats.pool_hits += 1
+            self._observe(key, now, hit=True)
             media_tag = "m" if is_media else ""
             log.debug(
                 "WS pool hit for DC%d%s (age=%.1fs, left=%d)",
@@ -110,13 +204,88 @@ class WsPool:
             return ws
 
         self._stats.pool_misses += 1
+        self._observe(key, now, hit=False)
         self._schedule_refill(key, target_ip, domains)
         return None
 
+    def _observe(self, key: tuple[int, bool], now: float, *, hit: bool) -> None:
+        if not self._adaptive:
+            return
+        demand = self._demand.get(key)
+        if demand is None:
+            # Стартуем с pool_size, а не с нуля: иначе первое же подключение
+            # сжимает корзину до ~1, и всплеск сразу за ним идёт мимо пула.
+            # Затравка быстрого счётчика без спроса угасает за десятки секунд.
+            demand = self._demand[key] = _BucketDemand(
+                updated=now,
+                target=self._pool_size,
+                fast_rate=max(0.0, self._pool_size / WS_POOL_LEAD_TIME - 1.0 / WS_POOL_FAST_WINDOW),
+                slow_rate=self._pool_size / self._max_age if self._max_age > 0 else 0.0,
+            )
+        demand.observe(now, hit=hit)
+        self._replan(key, demand, now)
+
+    def _replan(self, key: tuple[int, bool], demand: _BucketDemand, now: float) -> None:
+        target = demand.plan(now, min_size=self._min_size, max_size=self._max_size, max_age=self._max_age)
+        dc, is_media = key
+        self._stats.pool_buckets[key] = ProxyPoolBucket(
+            dc=dc,
+            is_media=is_media,
+            target=target,
+            idle=len(self._idle.get(key, ())),
+            rate_per_min=round(demand.rate(now) * 60.0, 2),
+            hit_ratio=round(demand.hit_ratio, 3),
+        )
+
+    def _discard(self, ws: RawWebSocket) -> None:
+        self._stats.pool_expired += 1
+        self._close_later(ws)
+
+    def _close_later(self, ws: RawWebSocket) -> None:
+        asyncio.create_task(self._quiet_close(ws))
+
+    def prewarm(self) -> None:
+        """Готовит корзины к следующему всплеску, не дожидаясь get().
+
+        Сокеты, которые истекут раньше, чем пройдёт рукопожатие замены,
+        закрываются, и корзина добирается до текущей цели. Цель при этом
+        пересчитывается с затуханием; корзины, куда до истечения max_age
+        не ждут ни одного подключения, не добираются — иначе пул крутил бы
+        рукопожатия впустую.
+        """
+        if not self._adaptive:
+            return
+        now = self._clock()
+        fresh_for = self._max_age - WS_POOL_LEAD_TIME
+        for key, demand in list(self._demand.items()):
+            route = self._routes.get(key)
+            if route is None:
+                continue
+            bucket = self._idle.setdefault(key, [])
+            kept = []
+            for ws, created in bucket:
+                if now - created > fresh_for or _websocket_is_unusable(ws):
+                    self._discard(ws)
+                else:
+                    kept.append((ws, created))
+            bucket[:] = kept
+            self._replan(key, demand, now)
+            if len(bucket) < demand.target and demand.rate(now) * self._max_age >= 1.0:
+                self._schedule_refill(key, *route)
+
+    async def _prewarm_loop(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.prewarm()
+            except Exception as exc:
+                log.debug("WS pool prewarm failed: %s", exc)
+
     def _schedule_refill(
         self, key: tuple[int, bool],
         target_ip: str, domains: list[str],
     ) -> None:
+        self._routes[key] = (target_ip, list(domains))
         if key in self._refilling:
             return
         self._refilling.add(key)
@@ -129,28 +298,37 @@ class WsPool:
         dc, is_media = key
         try:
             bucket = self._idle.setdefault(key, [])
-            needed = self._pool_size - len(bucket)
-            if needed <= 0:
-                return
-            tasks = [
-                asyncio.create_task(self._connect_one(target_ip, domains, self._buffer_size))
-                for _ in range(needed)
-            ]
-            for task in tasks:
-                try:
-                    ws = await task
-                    if ws is not None:
-                        bucket.append((ws, time.monotonic()))
-                except Exception:
-                    pass
-            media_tag = "m" if is_media else ""
-            log.debug("WS pool refilled DC%d%s: %d ready", dc, media_tag, len(bucket))
+            # Пока шёл refill, цель могла вырасти (всплеск) — догоняем её,
+            # но только пока подключения удаются.
+            while True:
+                needed = self.target_size(dc, is_media) - len(bucket)
+                if needed <= 0:
+                    return
+                tasks = [
+                    asyncio.create_task(self._connect_one(target_ip, domains, self._buffer_size, stats=self._stats))
+                    for _ in range(needed)
+                ]
+                opened = 0
+                for task in tasks:
+                    try:
+                        ws = await task
+                        if ws is not None:
+                            bucket.append((ws, self._clock()))
+                            opened += 1
+                    except Exception:
+                        pass
+                self._stats.pool_opened += opened
+                media_tag = "m" if is_media else ""
+                log.debug("WS pool refilled DC%d%s: %d ready", dc, media_tag, len(bucket))
+                if opened < needed:
+                    return
         finally:
             self._refilling.discard(key)
 
     @staticmethod
     async def _connect_one(
         target_ip: str, domains: list[str], buffer_size: int = 256 * 1024,
+        stats: Optional[ProxyStats] = None,
     ) -> Optional[RawWebSocket]:
         sem = get_wss_semaphore()
         async with sem:
@@ -158,7 +336,7 @@ class WsPool:
                 relay_ip = relay_ip_for_domain(domain)
                 try:
                     ws = await RawWebSocket.connect(
-                        relay_ip, domain, WSS_PATH, timeout=8.0, buffer_size=buffer_size,
+                        relay_ip, domain, WSS_PATH, timeout=8.0, buffer_size=buffer_size, stats=stats,
                     )
                     return ws
                 except WsHandshakeError as exc:
@@ -176,15 +354,20 @@ class WsPool:
         except Exception:
             pass
 
-    async def warmup(self) -> None:
+    async def warmup(self, prewarm_interval: float = WS_POOL_PREWARM_INTERVAL) -> None:
         for dc, _domain_list in WSS_DOMAINS.items():
             for is_media in (False, True):
                 key = (dc, is_media)
                 domains = ws_domains_for_dc(dc, is_media)
                 self._schedule_refill(key, WSS_RELAY_IP, domains)
+        if self._adaptive and prewarm_interval > 0 and self._prewarm_task is None:
+            self._prewarm_task = asyncio.create_task(self._prewarm_loop(prewarm_interval))
         log.info("WS pool warmup started for %d DC(s)", len(WSS_DOMAINS))
 
     async def close_all(self) -> None:
+        if self._prewarm_task is not None:
+            self._prewarm_task.cancel()
+            self._prewarm_task = None
         for bucket in self._idle.values():
             for ws, _created in bucket:
                 asyncio.create_task(self._quiet_close(ws))
@@ -234,7 +417,9 @@ class CloudflareWorkerPool:
             if needed <= 0:
                 return
             tasks = [
-                asyncio.create_task(self._connect_one(dc, worker_domain, fallback_dst, self._buffer_size))
+                asyncio.create_task(
+                    self._connect_one(dc, worker_domain, fallback_dst, self._buffer_size, stats=self._stats)
+                )
                 for _ in range(needed)
             ]
             for task in tasks:
@@ -255,7 +440,8 @@ class CloudflareWorkerPool:
 
     @staticmethod
     async def _connect_one(
-        dc: int, worker_domain: str, fallback_dst: str, buffer_size: int = 256 * 1024
+        dc: int, worker_domain: str, fallback_dst: str, buffer_size: int = 256 * 1024,
+        stats: Optional[ProxyStats] = None,
     ) -> Optional[RawWebSocket]:
         path = build_worker_path(fallback_dst, dc)
         sem = get_wss_semaphore()
@@ -267,6 +453,7 @@ class CloudflareWorkerPool:
                     path=path,
                     timeout=8.0,
                     buffer_size=buffer_size,
+                    stats=stats,
                 )
             except Exception:
                 return None
@@ -22,6 +22,7 @@ async def relay_wss(
     log_fn: Callable[[str], None],
     label: str,
     dc: int = 0,
+    route: str = "",
 ) -> tuple[int, int]:
     """Bidirectional relay between TCP client and WebSocket."""
     t0 = time.monotonic()
@@ -47,6 +48,10 @@ async def relay_wss(
                         await ws.send(parts[0])
                 else:
                     await ws.send(data)
+            if splitter:
+                tail = splitter.flush()
+                if tail:
+                    await ws.send_batch(tail)
         except (asyncio.CancelledError, ConnectionError, OSError):
             pass
         except Exception as e:
@@ -91,6 +96,8 @@ async def relay_wss(
             stats.recv_zero_count += 1
             if dc > 0:
                 stats.recv_zero_per_dc[dc] = stats.recv_zero_per_dc.get(dc, 0) + 1
+        if route:
+            stats.record_transfer(route, dc, sent_total, recv_total, elapsed)
         log_fn(f"[{label}] relay done: sent={sent_total} recv={recv_total} ({elapsed:.1f}s)")
     return recv_total, sent_total
 
@@ -107,6 +114,7 @@ async def relay_tcp(
     dc: int = 0,
     recv_zero_timeout: float = 0,
     on_first_response: Optional[Callable[[], None]] = None,
+    route: str = "",
 ) -> tuple[int, bool]:
     """Bidirectional TCP relay (fallback or passthrough)."""
     t0 = time.monotonic()
@@ -179,6 +187,8 @@ async def relay_tcp(
                 stats.recv_zero_count += 1
                 if dc > 0:
                     stats.recv_zero_per_dc[dc] = stats.recv_zero_per_dc.get(dc, 0) + 1
+            if route:
+                stats.record_transfer(route, dc, sent_total, recv_total, elapsed)
             tag = " [watchdog]" if watchdog_fired else ""
             log_fn(f"[{label}] tcp relay done: sent={sent_total} recv={recv_total} ({elapsed:.1f}s){tag}")
     return recv_total, watchdog_fired
@@ -1,7 +1,136 @@
 from __future__ import annotations
 
+import json
+import os
 import time
-from dataclasses import dataclass, field
+from array import array
+from collections import deque
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+from types import MappingProxyType
+from typing import Mapping
+
+
+# Маршруты, для которых ведутся гистограммы.
+ROUTE_WSS = "wss"
+ROUTE_CLOUDFLARE = "cloudflare"
+ROUTE_TCP = "tcp"
+ROUTE_UPSTREAM = "upstream"
+ROUTES = (ROUTE_WSS, ROUTE_CLOUDFLARE, ROUTE_TCP, ROUTE_UPSTREAM)
+
+ROUTE_EVENT_RING = 12
+
+# Выгрузка снимков в JSON lines (logs/tg_proxy_stats.jsonl) для офлайн-анализа.
+STATS_JSONL_FILE_NAME = "tg_proxy_stats.jsonl"
+STATS_JSONL_INTERVAL_SECONDS = 60.0
+_STATS_JSONL_MAX_BYTES = 10 * 1024 * 1024
+
+# Лог-бакеты: 2**_SUB_BITS бакетов на каждую степень двойки (~12% точности),
+# значения до 2**_MAX_BITS (≈ 12 суток в мкс или 1 ТБ/с).
+_SUB_BITS = 3
+_SUB = 1 << _SUB_BITS
+_MAX_BITS = 40
+_BUCKETS = (_MAX_BITS - _SUB_BITS + 1) * _SUB
+
+
+def route_key(route: str) -> str:
+    """Map a human route label ("TCP fallback", "внешний SOCKS5", ...) to a histogram key."""
+    text = str(route or "").strip().lower()
+    if "wss" in text:
+        return ROUTE_WSS
+    if "cloudflare" in text or "worker" in text:
+        return ROUTE_CLOUDFLARE
+    if "socks" in text or "upstream" in text or "внеш" in text:
+        return ROUTE_UPSTREAM
+    if "tcp" in text:
+        return ROUTE_TCP
+    return text
+
+
+def _bucket_index(value: int) -> int:
+    if value < _SUB:
+        return value
+    exponent = value.bit_length() - 1
+    index = (exponent - _SUB_BITS + 1) * _SUB + ((value >> (exponent - _SUB_BITS)) & (_SUB - 1))
+    return index if index < _BUCKETS else _BUCKETS - 1
+
+
+def _bucket_midpoint(index: int) -> float:
+    if index < _SUB:
+        return float(index)
+    exponent = index // _SUB + _SUB_BITS - 1
+    width = 1 << (exponent - _SUB_BITS)
+    lower = (_SUB + index % _SUB) * width
+    return lower + width / 2.0
+
+
+@dataclass(frozen=True, slots=True)
+class HistogramSummary:
+    count: int
+    mean: float
+    p50: float
+    p90: float
+    p99: float
+    max: float
+
+
+class LogHistogram:
+    """Log-bucketed histogram of non-negative integers over a fixed ``array``."""
+
+    __slots__ = ("_buckets", "count", "total", "max")
+
+    def __init__(self) -> None:
+        self._buckets = array("Q", bytes(8 * _BUCKETS))
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, value: int) -> None:
+        value = int(value)
+        if value < 0:
+            value = 0
+        self._buckets[_bucket_index(value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, fraction: float) -> float:
+        return self._percentiles(self._buckets.tolist(), self.count, (fraction,))[0]
+
+    @staticmethod
+    def _percentiles(buckets: list[int], count: int, fractions: tuple[float, ...]) -> list[float]:
+        if count <= 0:
+            return [0.0] * len(fractions)
+        ranks = [max(1, int(fraction * count + 0.5)) for fraction in fractions]
+        results = [0.0] * len(fractions)
+        pending = sorted(range(len(ranks)), key=ranks.__getitem__)
+        seen = 0
+        cursor = 0
+        for index, amount in enumerate(buckets):
+            if not amount:
+                continue
+            seen += amount
+            while cursor < len(pending) and ranks[pending[cursor]] <= seen:
+                results[pending[cursor]] = _bucket_midpoint(index)
+                cursor += 1
+            if cursor == len(pending):
+                break
+        return results
+
+    def summary(self, scale: float = 1.0) -> HistogramSummary:
+        # tolist() — атомарная копия под GIL: GUI-поток читает, пока loop пишет.
+        buckets = self._buckets.tolist()
+        count = sum(buckets)
+        p50, p90, p99 = self._percentiles(buckets, count, (0.50, 0.90, 0.99))
+        return HistogramSummary(
+            count=count,
+            mean=(self.total / count) * scale if count else 0.0,
+            p50=p50 * scale,
+            p90=p90 * scale,
+            p99=p99 * scale,
+            max=self.max * scale,
+        )
 
 
 @dataclass(slots=True)
@@ -15,9 +144,118 @@ class ProxyRouteEvent:
     reason: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
+class ProxyPoolBucket:
+    """Last adaptive WSS pool decision for one (dc, is_media) bucket."""
+
+    dc: int
+    is_media: bool
+    target: int
+    idle: int
+    rate_per_min: float
+    hit_ratio: float
+
+
+@dataclass(frozen=True)
+class ProxyStatsSnapshot:
+    """Immutable copy of ProxyStats for the GUI thread and JSONL export.
+
+    Scalar counters are reachable as attributes (``snapshot.bytes_sent``),
+    so UI code written against ProxyStats reads a snapshot unchanged.
+    Latency summaries are in milliseconds, throughput in bytes/s.
+    """
+
+    taken_at: float
+    uptime_seconds: float
+    counters: Mapping[str, object]
+    recv_zero_per_dc: Mapping[int, int]
+    pool_buckets: Mapping[tuple[int, bool], ProxyPoolBucket]
+    route_events: tuple[ProxyRouteEvent, ...]
+    connect_latency: Mapping[str, HistogramSummary]
+    throughput: Mapping[str, HistogramSummary]
+    dc_connect_latency: Mapping[int, HistogramSummary]
+    dc_throughput: Mapping[int, HistogramSummary]
+
+    def __getattr__(self, name: str):
+        try:
+            return self.counters[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def as_dict(self) -> dict:
+        def summaries(items: Mapping) -> dict:
+            return {str(key): _summary_dict(value) for key, value in items.items()}
+
+        return {
+            "taken_at": self.taken_at,
+            "uptime_seconds": round(self.uptime_seconds, 3),
+            "counters": dict(self.counters),
+            "recv_zero_per_dc": {str(dc): count for dc, count in self.recv_zero_per_dc.items()},
+            "pool_buckets": {
+                f"{dc}{'m' if is_media else ''}": {
+                    "target": bucket.target,
+                    "idle": bucket.idle,
+                    "rate_per_min": bucket.rate_per_min,
+                    "hit_ratio": bucket.hit_ratio,
+                }
+                for (dc, is_media), bucket in self.pool_buckets.items()
+            },
+            "route_events": [
+                {
+                    "dc": event.dc,
+                    "is_media": event.is_media,
+                    "route": event.route,
+                    "status": event.status,
+                    "reason": event.reason,
+                }
+                for event in self.route_events
+            ],
+            "connect_latency_ms": summaries(self.connect_latency),
+            "throughput_bps": summaries(self.throughput),
+            "dc_connect_latency_ms": summaries(self.dc_connect_latency),
+            "dc_throughput_bps": summaries(self.dc_throughput),
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.as_dict(), ensure_ascii=False, separators=(",", ":"))
+
+
+def _summary_dict(summary: HistogramSummary) -> dict:
+    return {
+        "count": summary.count,
+        "mean": round(summary.mean, 3),
+        "p50": round(summary.p50, 3),
+        "p90": round(summary.p90, 3),
+        "p99": round(summary.p99, 3),
+        "max": round(summary.max, 3),
+    }
+
+
+def append_stats_jsonl(
+    path: str | Path,
+    snapshot: ProxyStatsSnapshot,
+    *,
+    max_bytes: int = _STATS_JSONL_MAX_BYTES,
+) -> None:
+    """Append one snapshot as a JSON line; a full file is moved to ``<name>.1``."""
+    path = Path(path)
+    try:
+        if path.stat().st_size >= max_bytes:
+            os.replace(path, path.with_name(path.name + ".1"))
+    except FileNotFoundError:
+        path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as handle:
+        handle.write(snapshot.to_json())
+        handle.write("\n")
+
+
+@dataclass(slots=True)
 class ProxyStats:
-    """Live proxy statistics."""
+    """Live proxy statistics.
+
+    Mutated only from the proxy event loop; other threads read it through
+    ``snapshot()``.
+    """
 
     total_connections: int = 0
     active_connections: int = 0
@@ -31,6 +269,16 @@ class ProxyStats:
     failed_connections: int = 0
     pool_hits: int = 0
     pool_misses: int = 0
+    pool_opened: int = 0
+    pool_expired: int = 0
+    pool_domain_mismatch: int = 0
+    pool_buckets: dict = field(default_factory=dict)
+    tls_full_handshakes: int = 0
+    tls_resumed_handshakes: int = 0
+    wss_connect_count: int = 0
+    wss_connect_tcp_seconds: float = 0.0
+    wss_connect_tls_seconds: float = 0.0
+    wss_connect_upgrade_seconds: float = 0.0
     cloudflare_worker_pool_hits: int = 0
     cloudflare_worker_pool_misses: int = 0
     passthrough_connections: int = 0
@@ -41,13 +289,48 @@ class ProxyStats:
     mtproxy_invalid_init_count: int = 0
     mtproxy_bad_handshake_count: int = 0
     mtproxy_last_problem: str = ""
-    route_events: list[ProxyRouteEvent] = field(default_factory=list)
+    route_events: deque = field(default_factory=lambda: deque(maxlen=ROUTE_EVENT_RING))
+    connect_latency: dict = field(default_factory=dict)
+    throughput: dict = field(default_factory=dict)
+    dc_connect_latency: dict = field(default_factory=dict)
+    dc_throughput: dict = field(default_factory=dict)
     start_time: float = field(default_factory=time.monotonic)
 
+    def __post_init__(self) -> None:
+        if not isinstance(self.route_events, deque) or self.route_events.maxlen != ROUTE_EVENT_RING:
+            self.route_events = deque(self.route_events, maxlen=ROUTE_EVENT_RING)
+
     @property
     def uptime_seconds(self) -> float:
         return time.monotonic() - self.start_time
 
+    def record_wss_connect(self, timing) -> None:
+        """Account one successful WSS connect (``transport.WsConnectTiming``)."""
+        if timing.resumed:
+            self.tls_resumed_handshakes += 1
+        else:
+            self.tls_full_handshakes += 1
+        self.wss_connect_count += 1
+        self.wss_connect_tcp_seconds += timing.tcp
+        self.wss_connect_tls_seconds += timing.tls
+        self.wss_connect_upgrade_seconds += timing.upgrade
+
+    def record_connect(self, route: str, dc: int, seconds: float) -> None:
+        """Time from route attempt to a ready tunnel."""
+        micros = int(seconds * 1_000_000)
+        _histogram(self.connect_latency, route_key(route)).record(micros)
+        if dc:
+            _histogram(self.dc_connect_latency, int(dc)).record(micros)
+
+    def record_transfer(self, route: str, dc: int, sent: int, received: int, seconds: float) -> None:
+        """Average throughput of one finished relay, bytes per second."""
+        if seconds <= 0 or (sent <= 0 and received <= 0):
+            return
+        rate = int((sent + received) / seconds)
+        _histogram(self.throughput, route_key(route)).record(rate)
+        if dc:
+            _histogram(self.dc_throughput, int(dc)).record(rate)
+
     def record_route_event(
         self,
         *,
@@ -66,7 +349,57 @@ class ProxyStats:
                 reason=str(reason or ""),
             )
         )
-        del self.route_events[:-12]
+
+    def snapshot(self) -> ProxyStatsSnapshot:
+        """Cheap immutable copy; safe to call from another thread."""
+        counters = {name: getattr(self, name) for name in _COUNTER_FIELDS}
+        return ProxyStatsSnapshot(
+            taken_at=time.time(),
+            uptime_seconds=self.uptime_seconds,
+            counters=MappingProxyType(counters),
+            recv_zero_per_dc=MappingProxyType(dict(self.recv_zero_per_dc)),
+            pool_buckets=MappingProxyType(dict(self.pool_buckets)),
+            route_events=tuple(self.route_events),
+            connect_latency=_summaries(self.connect_latency, 0.001),
+            throughput=_summaries(self.throughput, 1.0),
+            dc_connect_latency=_summaries(self.dc_connect_latency, 0.001),
+            dc_throughput=_summaries(self.dc_throughput, 1.0),
+        )
+
+
+def _histogram(histograms: dict, key) -> LogHistogram:
+    histogram = histograms.get(key)
+    if histogram is None:
+        histogram = histograms[key] = LogHistogram()
+    return histogram
+
+
+def _summaries(histograms: dict, scale: float) -> Mapping:
+    return MappingProxyType({key: histogram.summary(scale) for key, histogram in list(histograms.items())})
+
+
+_COUNTER_FIELDS = tuple(
+    item.name
+    for item in fields(ProxyStats)
+    if item.type in ("int", "float", "str") and item.name != "start_time"
+)
 
 
-__all__ = ["ProxyRouteEvent", "ProxyStats"]
+__all__ = [
+    "HistogramSummary",
+    "LogHistogram",
+    "ProxyPoolBucket",
+    "ProxyRouteEvent",
+    "ProxyStats",
+    "ProxyStatsSnapshot",
+    "ROUTES",
+    "ROUTE_CLOUDFLARE",
+    "ROUTE_EVENT_RING",
+    "ROUTE_TCP",
+    "ROUTE_UPSTREAM",
+    "ROUTE_WSS",
+    "STATS_JSONL_FILE_NAME",
+    "STATS_JSONL_INTERVAL_SECONDS",
+    "append_stats_jsonl",
+    "route_key",
+]
@@ -5,13 +5,129 @@ import base64
 import os
 import socket as _socket
 import ssl
-import struct
-from typing import Optional
+import sys
+import time
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from telegram_proxy.proxy.stats import ProxyStats
+from telegram_proxy.proxy.ws_codec import WsFrameParser, encode_frame, encode_frames
+
+
+WSS_PORT = 443
+# Сколько байт забирать из StreamReader за раз: одно чтение может
+# содержать несколько кадров, парсер вынимает их все.
+WS_RECV_CHUNK = 256 * 1024
+TLS_SESSION_TTL = 1800.0
+TLS_SESSION_CACHE_SIZE = 64
+
+# Сессия для возобновления передаётся в wrap_bio через contextvar: asyncio
+# создаёт SSLObject сам и не даёт передать session= в start_tls.
+_resume_session: ContextVar[Optional[ssl.SSLSession]] = ContextVar("tg_proxy_resume_session", default=None)
+
+
+class _ResumingSSLContext(ssl.SSLContext):
+    """SSLContext that offers a cached session to every new client SSLObject."""
+
+    def wrap_bio(self, incoming, outgoing, server_side=False, server_hostname=None, session=None):
+        if session is None and not server_side:
+            session = _resume_session.get()
+        return super().wrap_bio(
+            incoming,
+            outgoing,
+            server_side=server_side,
+            server_hostname=server_hostname,
+            session=session,
+        )
+
+
+def _build_ssl_context() -> _ResumingSSLContext:
+    """Client context with the same defaults as ``ssl.create_default_context()``.
+
+    create_default_context() не умеет вернуть подкласс, поэтому повторяем
+    его шаги: опции PROTOCOL_TLS_CLIENT, системные сертификаты и
+    SSLKEYLOGFILE (разбор трафика relay в Wireshark). Проверка сертификата
+    relay выключена, как и раньше.
+    """
+    context = _ResumingSSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.load_default_certs(ssl.Purpose.SERVER_AUTH)
+    if hasattr(context, "keylog_filename"):
+        keylogfile = os.environ.get("SSLKEYLOGFILE")
+        if keylogfile and not sys.flags.ignore_environment:
+            context.keylog_filename = keylogfile
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+_ssl_ctx = _build_ssl_context()
+
+
+class TlsSessionCache:
+    """LRU of TLS sessions per (relay ip, SNI) with TTL.
+
+    Sessions are only valid for the SSLContext that produced them, so the
+    cache is meant to be used together with the module-level context.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = TLS_SESSION_CACHE_SIZE,
+        ttl: float = TLS_SESSION_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._entries: OrderedDict[tuple[str, str], tuple[ssl.SSLSession, float]] = OrderedDict()
+        self._max_entries = max(1, int(max_entries))
+        self._ttl = float(ttl)
+        self._clock = clock
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, ip: str, sni: str) -> Optional[ssl.SSLSession]:
+        key = (str(ip), str(sni))
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        session, expires = entry
+        if self._clock() >= expires:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return session
+
+    def put(self, ip: str, sni: str, session: Optional[ssl.SSLSession]) -> None:
+        if session is None or (not session.has_ticket and not session.id):
+            return
+        key = (str(ip), str(sni))
+        # Сервер сам сообщает срок жизни тикета — не храним дольше.
+        lifetime = min(self._ttl, float(session.timeout or self._ttl))
+        self._entries[key] = (session, self._clock() + lifetime)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def discard(self, ip: str, sni: str) -> None:
+        self._entries.pop((str(ip), str(sni)), None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
 
+_tls_sessions = TlsSessionCache()
 
-_ssl_ctx = ssl.create_default_context()
-_ssl_ctx.check_hostname = False
-_ssl_ctx.verify_mode = ssl.CERT_NONE
+
+@dataclass(slots=True)
+class WsConnectTiming:
+    """Duration of each WSS connect phase, seconds."""
+
+    tcp: float = 0.0
+    tls: float = 0.0
+    upgrade: float = 0.0
+    resumed: bool = False
 
 
 class WsHandshakeError(Exception):
@@ -45,15 +161,6 @@ def apply_socket_options(transport, buffer_size: int = 256 * 1024) -> None:
         pass
 
 
-def _xor_mask(data: bytes, mask: bytes) -> bytes:
-    """XOR data with a 4-byte WebSocket mask key."""
-    if not data:
-        return data
-    n = len(data)
-    mask_rep = (mask * (n // 4 + 1))[:n]
-    return (int.from_bytes(data, "big") ^ int.from_bytes(mask_rep, "big")).to_bytes(n, "big")
-
-
 class RawWebSocket:
     """Lightweight WebSocket client over asyncio reader/writer."""
 
@@ -76,6 +183,9 @@ class RawWebSocket:
         self.domain = str(domain or "")
         self.path = str(path or "")
         self._closed = False
+        self._parser = WsFrameParser()
+        self._frames: deque[tuple[int, bytes]] = deque()
+        self.connect_timing: Optional[WsConnectTiming] = None
 
     @staticmethod
     async def connect(
@@ -84,14 +194,38 @@ class RawWebSocket:
         path: str = "/apiws",
         timeout: float = 10.0,
         buffer_size: int = 256 * 1024,
+        *,
+        port: int = WSS_PORT,
+        stats: Optional[ProxyStats] = None,
+        sessions: Optional[TlsSessionCache] = None,
     ) -> "RawWebSocket":
-        reader, writer = await asyncio.wait_for(
-            asyncio.open_connection(ip, 443, ssl=_ssl_ctx, server_hostname=domain),
-            timeout=min(timeout, 10),
-        )
+        sessions = _tls_sessions if sessions is None else sessions
+        connect_timeout = min(timeout, 10)
+        timing = WsConnectTiming()
+        started = time.perf_counter()
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout=connect_timeout)
+        timing.tcp = time.perf_counter() - started
 
         apply_socket_options(writer.transport, buffer_size)
 
+        cached = sessions.get(ip, domain)
+        token = _resume_session.set(cached)
+        try:
+            await asyncio.wait_for(
+                writer.start_tls(_ssl_ctx, server_hostname=domain),
+                timeout=max(0.1, connect_timeout - timing.tcp),
+            )
+        except BaseException:
+            writer.close()
+            if cached is not None:
+                sessions.discard(ip, domain)
+            raise
+        finally:
+            _resume_session.reset(token)
+        ssl_object = writer.get_extra_info("ssl_object")
+        timing.resumed = bool(ssl_object is not None and ssl_object.session_reused)
+        timing.tls = time.perf_counter() - started - timing.tcp
+
         ws_key = base64.b64encode(os.urandom(16)).decode()
         req = (
             f"GET {path} HTTP/1.1\r\n"
@@ -133,7 +267,16 @@ class RawWebSocket:
             status_code = 0
 
         if status_code == 101:
-            return RawWebSocket(reader, writer, domain=domain, path=path)
+            # Тикет TLS 1.3 приходит после рукопожатия — к ответу 101 он уже
+            # разобран, и сессия пригодна для возобновления.
+            if ssl_object is not None:
+                sessions.put(ip, domain, ssl_object.session)
+            timing.upgrade = time.perf_counter() - started - timing.tcp - timing.tls
+            if stats is not None:
+                stats.record_wss_connect(timing)
+            ws = RawWebSocket(reader, writer, domain=domain, path=path)
+            ws.connect_timing = timing
+            return ws
 
         headers: dict[str, str] = {}
         for hl in response_lines[1:]:
@@ -147,16 +290,13 @@ class RawWebSocket:
     async def send(self, data: bytes) -> None:
         if self._closed:
             raise ConnectionError("WebSocket closed")
-        frame = self._build_frame(self.OP_BINARY, data, mask=True)
-        self.writer.write(frame)
+        self.writer.writelines(encode_frame(self.OP_BINARY, data, mask=True))
         await self.writer.drain()
 
     async def send_batch(self, parts: list[bytes]) -> None:
         if self._closed:
             raise ConnectionError("WebSocket closed")
-        for part in parts:
-            frame = self._build_frame(self.OP_BINARY, part, mask=True)
-            self.writer.write(frame)
+        self.writer.writelines(encode_frames(self.OP_BINARY, parts, mask=True))
         await self.writer.drain()
 
     async def recv(self) -> Optional[bytes]:
@@ -166,8 +306,8 @@ class RawWebSocket:
             if opcode == self.OP_CLOSE:
                 self._closed = True
                 try:
-                    reply = self._build_frame(self.OP_CLOSE, payload[:2] if payload else b"", mask=True)
-                    self.writer.write(reply)
+                    reply = encode_frame(self.OP_CLOSE, payload[:2] if payload else b"", mask=True)
+                    self.writer.writelines(reply)
                     await self.writer.drain()
                 except Exception:
                     pass
@@ -175,8 +315,7 @@ class RawWebSocket:
 
             if opcode == self.OP_PING:
                 try:
-                    pong = self._build_frame(self.OP_PONG, payload, mask=True)
-                    self.writer.write(pong)
+                    self.writer.writelines(encode_frame(self.OP_PONG, payload, mask=True))
                     await self.writer.drain()
                 except Exception:
                     pass
@@ -197,7 +336,7 @@ class RawWebSocket:
             return
         self._closed = True
         try:
-            self.writer.write(self._build_frame(self.OP_CLOSE, b"", mask=True))
+            self.writer.writelines(encode_frame(self.OP_CLOSE, b"", mask=True))
             await self.writer.drain()
         except Exception:
             pass
@@ -207,46 +346,22 @@ class RawWebSocket:
         except Exception:
             pass
 
-    @staticmethod
-    def _build_frame(opcode: int, data: bytes, mask: bool = False) -> bytes:
-        header = bytearray()
-        header.append(0x80 | opcode)
-        length = len(data)
-        mask_bit = 0x80 if mask else 0x00
-
-        if length < 126:
-            header.append(mask_bit | length)
-        elif length < 65536:
-            header.append(mask_bit | 126)
-            header.extend(struct.pack(">H", length))
-        else:
-            header.append(mask_bit | 127)
-            header.extend(struct.pack(">Q", length))
-
-        if mask:
-            mask_key = os.urandom(4)
-            header.extend(mask_key)
-            return bytes(header) + _xor_mask(data, mask_key)
-        return bytes(header) + data
-
     async def _read_frame(self) -> tuple[int, bytes]:
-        hdr = await self.reader.readexactly(2)
-        opcode = hdr[0] & 0x0F
-        is_masked = bool(hdr[1] & 0x80)
-        length = hdr[1] & 0x7F
-
-        if length == 126:
-            length = struct.unpack(">H", await self.reader.readexactly(2))[0]
-        elif length == 127:
-            length = struct.unpack(">Q", await self.reader.readexactly(8))[0]
-
-        if is_masked:
-            mask_key = await self.reader.readexactly(4)
-            payload = await self.reader.readexactly(length)
-            return opcode, _xor_mask(payload, mask_key)
-
-        payload = await self.reader.readexactly(length)
-        return opcode, payload
-
-
-__all__ = ["RawWebSocket", "WsHandshakeError"]
+        while not self._frames:
+            chunk = await self.reader.read(WS_RECV_CHUNK)
+            if not chunk:
+                raise asyncio.IncompleteReadError(self._parser.pending_bytes(), None)
+            self._frames.extend(self._parser.feed(chunk))
+        return self._frames.popleft()
+
+
+__all__ = [
+    "TLS_SESSION_CACHE_SIZE",
+    "TLS_SESSION_TTL",
+    "WSS_PORT",
+    "WS_RECV_CHUNK",
+    "RawWebSocket",
+    "TlsSessionCache",
+    "WsConnectTiming",
+    "WsHandshakeError",
+]
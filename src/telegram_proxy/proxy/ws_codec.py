@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import os
+import struct
+from functools import lru_cache
+from typing import Iterable
+
+
+OP_CONTINUATION = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+_HDR_SHORT = struct.Struct(">BB")
+_HDR_MID = struct.Struct(">BBH")
+_HDR_LONG = struct.Struct(">BBQ")
+_LEN16 = struct.Struct(">H")
+_LEN64 = struct.Struct(">Q")
+
+
+# Ниже этого размера одна XOR-операция над int дешевле четырёх translate.
+_SMALL_MASK = 256
+
+# Таблица «байт XOR k» для каждого k: маска накладывается через bytes.translate.
+_XOR_TABLES = tuple(bytes(value ^ key for value in range(256)) for key in range(256))
+
+
+@lru_cache(maxsize=32)
+def _lane_ones(words: int) -> int:
+    """Integer with 1 in the low bit of each 32-bit little-endian lane."""
+    return int.from_bytes(b"\x01\x00\x00\x00" * words, "little")
+
+
+def mask_into(buffer: bytearray, mask_key: bytes, start: int = 0, end: int | None = None) -> None:
+    """XOR ``buffer[start:end]`` with a 4-byte WebSocket mask key in place.
+
+    Каждый из четырёх байтов ключа накладывается на свою «полосу»
+    ``buffer[start + i::4]`` через ``bytes.translate`` — без big-int и без
+    нового буфера под весь payload. Короткие payload — одним XOR над int.
+    """
+    if end is None:
+        end = len(buffer)
+    n = end - start
+    if n <= 0:
+        return
+    if n < _SMALL_MASK:
+        words, tail = divmod(n, 4)
+        key = int.from_bytes(mask_key, "little")
+        repeated = key * _lane_ones(words) if words else 0
+        if tail:
+            repeated |= (key & ((1 << (8 * tail)) - 1)) << (32 * words)
+        buffer[start:end] = (int.from_bytes(buffer[start:end], "little") ^ repeated).to_bytes(n, "little")
+        return
+    for lane in range(4):
+        key = mask_key[lane]
+        if key:
+            buffer[start + lane:end:4] = buffer[start + lane:end:4].translate(_XOR_TABLES[key])
+
+
+def mask_payload(data, mask_key: bytes) -> bytearray:
+    """XOR payload with a 4-byte WebSocket mask key into a new buffer."""
+    buffer = bytearray(data)
+    mask_into(buffer, mask_key)
+    return buffer
+
+
+def _header_size(length: int, masked: bool) -> int:
+    size = 2 if length < 126 else 4 if length < 65536 else 10
+    return size + 4 if masked else size
+
+
+def _pack_header_into(buffer: bytearray, offset: int, opcode: int, length: int, mask_key: bytes | None) -> int:
+    first = 0x80 | opcode
+    mask_bit = 0x80 if mask_key is not None else 0x00
+    if length < 126:
+        _HDR_SHORT.pack_into(buffer, offset, first, mask_bit | length)
+        offset += 2
+    elif length < 65536:
+        _HDR_MID.pack_into(buffer, offset, first, mask_bit | 126, length)
+        offset += 4
+    else:
+        _HDR_LONG.pack_into(buffer, offset, first, mask_bit | 127, length)
+        offset += 10
+    if mask_key is not None:
+        buffer[offset:offset + 4] = mask_key
+        offset += 4
+    return offset
+
+
+def encode_frame_header(opcode: int, length: int, mask_key: bytes | None = None) -> bytes:
+    first = 0x80 | opcode
+    mask_bit = 0x80 if mask_key is not None else 0x00
+    if length < 126:
+        header = _HDR_SHORT.pack(first, mask_bit | length)
+    elif length < 65536:
+        header = _HDR_MID.pack(first, mask_bit | 126, length)
+    else:
+        header = _HDR_LONG.pack(first, mask_bit | 127, length)
+    if mask_key is not None:
+        return header + mask_key
+    return header
+
+
+def _encode_masked(opcode: int, parts: list, keys: bytes) -> bytearray:
+    # Все кадры пачки — один буфер: заголовок, копия payload, маска на месте.
+    frame = bytearray(sum(_header_size(len(part), True) + len(part) for part in parts))
+    offset = 0
+    for index, part in enumerate(parts):
+        mask_key = keys[4 * index:4 * index + 4]
+        length = len(part)
+        offset = _pack_header_into(frame, offset, opcode, length, mask_key)
+        end = offset + length
+        frame[offset:end] = part
+        mask_into(frame, mask_key, offset, end)
+        offset = end
+    return frame
+
+
+def encode_frame(opcode: int, data, *, mask: bool = False) -> list:
+    """Build one frame as a buffer list for ``writer.writelines``.
+
+    Маскированный кадр — один ``bytearray`` (заголовок + payload, маска
+    наложена на месте); немаскированный — ``[header, data]`` без копии data.
+    """
+    if mask:
+        mask_key = os.urandom(4)
+        frame = bytearray(encode_frame_header(opcode, len(data), mask_key))
+        start = len(frame)
+        frame += data
+        mask_into(frame, mask_key, start)
+        return [frame]
+    return [encode_frame_header(opcode, len(data)), data]
+
+
+def encode_frames(opcode: int, parts: Iterable, *, mask: bool = False) -> list:
+    """Build several frames as one flat buffer list for a single ``writelines``."""
+    if mask:
+        # Один вызов urandom и один буфер на пачку вместо кадра.
+        parts = list(parts)
+        if not parts:
+            return []
+        return [_encode_masked(opcode, parts, os.urandom(4 * len(parts)))]
+    buffers: list = []
+    for part in parts:
+        buffers.append(encode_frame_header(opcode, len(part)))
+        buffers.append(part)
+    return buffers
+
+
+class WsFrameParser:
+    """Incremental WebSocket frame parser.
+
+    Принимает произвольные куски потока и возвращает все кадры, которые
+    в них целиком уместились; хвост неполного кадра остаётся в буфере до
+    следующего ``feed``. Одно чтение из сокета может дать несколько кадров.
+    """
+
+    __slots__ = ("_buf",)
+
+    def __init__(self) -> None:
+        self._buf = bytearray()
+
+    @property
+    def buffered(self) -> int:
+        return len(self._buf)
+
+    def pending_bytes(self) -> bytes:
+        return bytes(self._buf)
+
+    def feed(self, data) -> list[tuple[int, bytes]]:
+        if self._buf:
+            self._buf += data
+            view = self._buf
+        else:
+            # Частый случай: буфер пуст — разбираем прямо входной кусок
+            # и копируем в буфер только недочитанный хвост.
+            view = data
+        frames: list[tuple[int, bytes]] = []
+        size = len(view)
+        pos = 0
+        while size - pos >= 2:
+            first = view[pos]
+            second = view[pos + 1]
+            length = second & 0x7F
+            offset = pos + 2
+            if length == 126:
+                if size - offset < 2:
+                    break
+                length = _LEN16.unpack_from(view, offset)[0]
+                offset += 2
+            elif length == 127:
+                if size - offset < 8:
+                    break
+                length = _LEN64.unpack_from(view, offset)[0]
+                offset += 8
+            mask_key = None
+            if second & 0x80:
+                if size - offset < 4:
+                    break
+                mask_key = bytes(view[offset:offset + 4])
+                offset += 4
+            end = offset + length
+            if end > size:
+                break
+            if mask_key is not None:
+                payload = bytes(mask_payload(view[offset:end], mask_key))
+            else:
+                payload = bytes(view[offset:end])
+            frames.append((first & 0x0F, payload))
+            pos = end
+
+        if view is self._buf:
+            if pos:
+                del self._buf[:pos]
+        elif pos < size:
+            self._buf += memoryview(view)[pos:]
+        return frames
+
+
+__all__ = [
+    "OP_BINARY",
+    "OP_CLOSE",
+    "OP_CONTINUATION",
+    "OP_PING",
+    "OP_PONG",
+    "OP_TEXT",
+    "WsFrameParser",
+    "encode_frame",
+    "encode_frame_header",
+    "encode_frames",
+    "mask_into",
+    "mask_payload",
+]
@@ -1,15 +1,21 @@
 # telegram_proxy/proxy_logger.py
 """File-based rotating logger + ring buffer for Telegram proxy logs.
 
-Writes logs to LOGS_FOLDER/tg_proxy.log with rotation (max 5MB, keep 3 files).
+Writes logs to LOGS_FOLDER/tg_proxy.log with rotation (max 10MB, keep 5 files).
 Maintains a ring buffer of last 100 lines for efficient GUI display.
+
+The asyncio loop only enqueues lines. A background writer thread takes them
+in batches, formats the timestamps and writes each batch with a single
+handler call, so the rotation check and the file I/O stay off the loop.
 """
 
 from __future__ import annotations
 
+import atexit
 import logging
 import os
 import threading
+import time
 from collections import deque
 from logging.handlers import RotatingFileHandler
 from typing import Optional
@@ -24,6 +30,13 @@ _BACKUP_COUNT = 5
 _RING_BUFFER_SIZE = 100
 LOGS_FOLDER = str(APPLICATION_PATHS.logs_dir)
 
+# Writer thread: ждём до _BATCH_DELAY, но пишем сразу, если набралось _BATCH_MAX_LINES.
+_BATCH_DELAY = 0.05
+_BATCH_MAX_LINES = 512
+_MAX_QUEUED_LINES = 16_384
+_THROTTLE_INTERVAL = 10.0
+_THROTTLE_MAX_KEYS = 256
+
 
 class ProxyLogger:
     """Thread-safe logger that writes to file and maintains a ring buffer.
@@ -31,23 +44,48 @@ class ProxyLogger:
     Usage:
         logger = ProxyLogger()
         logger.log("Connection from 127.0.0.1:54321")
+        logger.log_throttled("remote side reset the connection")
         recent = logger.drain()  # returns list of new lines since last drain
     """
 
-    def __init__(self, ring_size: int = _RING_BUFFER_SIZE):
+    def __init__(
+        self,
+        ring_size: int = _RING_BUFFER_SIZE,
+        *,
+        log_dir: str | None = None,
+        batch_delay: float = _BATCH_DELAY,
+        max_queued_lines: int = _MAX_QUEUED_LINES,
+    ):
+        self._log_dir = log_dir
+        self._batch_delay = max(0.0, float(batch_delay))
+        self._max_queued_lines = max(64, int(max_queued_lines))
         self._lock = threading.Lock()
         # Ring buffer for GUI display (bounded deque)
         self._ring: deque[str] = deque(maxlen=ring_size)
         # New lines since last drain() — GUI reads these in batches
         self._pending: list[str] = []
+        # Lines waiting for the writer thread: (time.time(), message)
+        self._queue: deque[tuple[float, str]] = deque()
+        self._condition = threading.Condition(self._lock)
+        self._dropped = 0
+        self._write_in_progress = False
+        self._stopping = False
+        self._writer: Optional[threading.Thread] = None
+        # key -> [last emitted at (monotonic), suppressed repeats]
+        self._throttled: dict[str, list] = {}
         self._logger = self._create_file_logger()
 
+    @property
+    def _folder(self) -> str:
+        return self._log_dir if self._log_dir is not None else LOGS_FOLDER
+
     def _create_file_logger(self) -> logging.Logger:
-        """Create a rotating file logger."""
-        os.makedirs(LOGS_FOLDER, exist_ok=True)
-        log_path = os.path.join(LOGS_FOLDER, _LOG_FILENAME)
+        """Create a rotating file logger (used only from the writer thread)."""
+        os.makedirs(self._folder, exist_ok=True)
+        log_path = os.path.join(self._folder, _LOG_FILENAME)
 
-        logger = logging.getLogger("tg_proxy_file")
+        name = "tg_proxy_file" if self._log_dir is None else f"tg_proxy_file.{log_path}"
+        logger = logging.getLogger(name)
         # Avoid duplicate handlers on re-creation
         if logger.handlers:
             return logger
@@ -64,30 +102,58 @@ class ProxyLogger:
             # только после первой реальной строки Telegram Proxy.
             delay=True,
         )
-        formatter = logging.Formatter(
-            "%(asctime)s  %(message)s",
-            datefmt="%Y-%m-%d %H:%M:%S",
-        )
-        handler.setFormatter(formatter)
+        # Время уже проставлено writer-потоком: один record = одна пачка строк.
+        handler.setFormatter(logging.Formatter("%(message)s"))
         logger.addHandler(handler)
         return logger
 
     def log(self, message: str) -> None:
-        """Write a log line to file and ring buffer. Thread-safe."""
-        # Write to file
-        try:
-            self._logger.info(message)
-        except Exception:
-            pass
-
-        # Add to ring buffer + pending list
-        with self._lock:
+        """Queue a log line for the file and add it to the ring buffer. Thread-safe."""
+        with self._condition:
             self._ring.append(message)
             append_bounded_line(
                 self._pending,
                 message,
                 max_lines=TELEGRAM_PROXY_PENDING_MAX_LINES,
             )
+            if self._stopping:
+                return
+            if len(self._queue) >= self._max_queued_lines:
+                self._queue.popleft()
+                self._dropped += 1
+            self._queue.append((time.time(), message))
+            if self._writer is None:
+                self._start_writer_locked()
+            elif len(self._queue) >= _BATCH_MAX_LINES:
+                self._condition.notify()
+
+    def log_throttled(
+        self,
+        message: str,
+        *,
+        key: str | None = None,
+        interval: float = _THROTTLE_INTERVAL,
+    ) -> bool:
+        """Log ``message`` at most once per ``interval`` seconds per ``key``.
+
+        Suppressed repeats are counted and reported with the next line that
+        gets through. Returns True if the line was logged.
+        """
+        throttle_key = message if key is None else key
+        now = time.monotonic()
+        with self._lock:
+            entry = self._throttled.get(throttle_key)
+            if entry is not None and now - entry[0] < interval:
+                entry[1] += 1
+                return False
+            suppressed = entry[1] if entry is not None else 0
+            if entry is None and len(self._throttled) >= _THROTTLE_MAX_KEYS:
+                self._throttled.pop(next(iter(self._throttled)))
+            self._throttled[throttle_key] = [now, 0]
+        if suppressed:
+            message = f"{message} (ещё {suppressed} таких же за {interval:.0f}с скрыто)"
+        self.log(message)
+        return True
 
     def drain(self) -> list[str]:
         """Return and clear pending log lines (new since last drain).
@@ -107,9 +173,92 @@ class ProxyLogger:
         with self._lock:
             return list(self._ring)
 
+    def flush_pending(self, timeout: float = 2.0) -> bool:
+        """Wait until queued lines reach the file. Returns False on timeout."""
+        deadline = time.monotonic() + max(0.0, float(timeout))
+        with self._condition:
+            self._condition.notify_all()
+            while self._queue or self._write_in_progress:
+                if self._writer is None or not self._writer.is_alive():
+                    return False
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(timeout=min(0.1, remaining))
+            return True
+
+    def shutdown(self, timeout: float = 3.0) -> None:
+        """Write out the queue and stop the writer thread."""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+            writer = self._writer
+        if writer is not None and writer.is_alive() and writer is not threading.current_thread():
+            writer.join(timeout=max(0.0, float(timeout)))
+
     @property
     def log_file_path(self) -> str:
-        return os.path.join(LOGS_FOLDER, _LOG_FILENAME)
+        return os.path.join(self._folder, _LOG_FILENAME)
+
+    def _start_writer_locked(self) -> None:
+        self._writer = threading.Thread(
+            target=self._writer_loop,
+            name="tg-proxy-log-writer",
+            daemon=True,
+        )
+        self._writer.start()
+
+    def _take_batch(self) -> tuple[list[tuple[float, str]], int]:
+        with self._condition:
+            while not self._queue and not self._stopping:
+                self._condition.wait()
+            if self._batch_delay and not self._stopping and len(self._queue) < _BATCH_MAX_LINES:
+                self._condition.wait(timeout=self._batch_delay)
+            batch = list(self._queue)
+            self._queue.clear()
+            dropped = self._dropped
+            self._dropped = 0
+            self._write_in_progress = bool(batch)
+            return batch, dropped
+
+    def _writer_loop(self) -> None:
+        try:
+            while True:
+                batch, dropped = self._take_batch()
+                if not batch:
+                    if self._stopping:
+                        break
+                    continue
+                try:
+                    self._logger.info(_format_batch(batch, dropped))
+                except Exception:
+                    pass
+                with self._condition:
+                    self._write_in_progress = False
+                    self._condition.notify_all()
+        finally:
+            with self._condition:
+                self._write_in_progress = False
+                self._condition.notify_all()
+
+
+def _format_batch(batch: list[tuple[float, str]], dropped: int) -> str:
+    """Prefix lines with "%Y-%m-%d %H:%M:%S"; strftime runs once per distinct second."""
+    lines: list[str] = []
+    last_second = -1
+    stamp = ""
+    if dropped:
+        first_ts = batch[0][0]
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(first_ts))
+        last_second = int(first_ts)
+        lines.append(f"{stamp}  [log] пропущено строк из-за переполнения очереди: {dropped}")
+    for ts, message in batch:
+        second = int(ts)
+        if second != last_second:
+            stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts))
+            last_second = second
+        lines.append(f"{stamp}  {message}")
+    return "\n".join(lines)
 
 
 # Module-level singleton
@@ -124,4 +273,5 @@ def get_proxy_logger() -> ProxyLogger:
         with _instance_lock:
             if _instance is None:
                 _instance = ProxyLogger()
+                atexit.register(_instance.shutdown)
     return _instance
@@ -346,6 +346,15 @@ def build_stats_plan(
         pool_parts.append(f"Worker {worker_pool_hits}/{worker_pool_misses}")
     pool_str = f"  |  Пул: {', '.join(pool_parts)}" if pool_parts else ""
 
+    latency_parts: list[str] = []
+    connect_latency = getattr(stats, "connect_latency", None) or {}
+    for label, key in (("WSS", "wss"), ("CF", "cloudflare"), ("TCP", "tcp"), ("внешний", "upstream")):
+        summary = connect_latency.get(key)
+        p99 = float(getattr(summary, "p99", 0) or 0)
+        if p99 > 0:
+            latency_parts.append(f"{label} {p99:.0f} мс")
+    latency_str = f"  |  p99: {', '.join(latency_parts)}" if latency_parts else ""
+
     mtproxy_problem_parts: list[str] = []
     mtproxy_invalid_init_count = int(getattr(stats, "mtproxy_invalid_init_count", 0) or 0)
     mtproxy_bad_handshake_count = int(getattr(stats, "mtproxy_bad_handshake_count", 0) or 0)
@@ -448,7 +457,7 @@ def build_stats_plan(
         f"{getattr(stats, 'total_connections', 0)} всего  |  "
         f"↑ {_fmt_bytes(now_sent)} ({_fmt_speed(avg_sent, interval)})  "
         f"↓ {_fmt_bytes(now_recv)} ({_fmt_speed(avg_recv, interval)})  |  "
-        f"Uptime: {uptime_str}{routes_str}{pool_str}{recv_zero_str}"
+        f"Uptime: {uptime_str}{routes_str}{pool_str}{latency_str}{recv_zero_str}"
         f"{mtproxy_problem_str}{recent_routes_str}{user_hint_str}"
     )
 
@@ -25,10 +25,8 @@ import time
 from typing import Optional, Callable
 
 from telegram_proxy.proxy.dc_map import (
-    ip_to_dc,
-    is_telegram_ip,
+    build_dc_index,
     ws_domains_for_dc,
-    IP_TO_DC,
     WSS_DOMAINS,
     WSS_RELAY_IP,
     WSS_PATH,
@@ -43,6 +41,7 @@ from telegram_proxy.proxy.cloudflare import (
     should_try_cloudflare,
 )
 from telegram_proxy.proxy.mtproto import (
+    InitPacket,
     MsgSplitter as _MsgSplitter,
     dc_from_init as _dc_from_init,
     is_http_transport as _is_http_transport,
@@ -71,7 +70,7 @@ from telegram_proxy.proxy.routing import (
     check_relay_reachable,
     should_route_upstream,
 )
-from telegram_proxy.proxy.stats import ProxyStats
+from telegram_proxy.proxy.stats import STATS_JSONL_INTERVAL_SECONDS, ProxyStats, append_stats_jsonl
 from telegram_proxy.proxy.transport import RawWebSocket, WsHandshakeError, apply_socket_options
 from telegram_proxy.proxy.upstream_controller import UpstreamRuntimeSnapshot, endpoint_display_name
 from telegram_proxy.proxy.upstream_runtime import (
@@ -184,6 +183,20 @@ class _Socks5UdpRelay:
             pass
 
 
+def _parse_init_packet(init: bytes) -> Optional[InitPacket]:
+    try:
+        return InitPacket(init)
+    except Exception:
+        return None
+
+
+def _init_splitter(init: bytes, init_packet: Optional[InitPacket]) -> Optional[_MsgSplitter]:
+    try:
+        return _MsgSplitter(init_packet if init_packet is not None else init)
+    except Exception:
+        return None
+
+
 # ---- Main proxy class ----
 
 
@@ -212,6 +225,8 @@ class TelegramWSProxy:
         buffer_kb: int = 256,
         fake_tls_domain: str = "",
         proxy_protocol: bool = False,
+        stats_jsonl_path: str = "",
+        stats_jsonl_interval: float = STATS_JSONL_INTERVAL_SECONDS,
     ):
         self._port = port
         self._mode = mode
@@ -223,10 +238,16 @@ class TelegramWSProxy:
         self._cloudflare_domain_balancer = CloudflareDomainBalancer()
         self._mtproxy_secret = normalize_secret(mtproxy_secret)
         self._dc_endpoint_overrides = dict(dc_endpoint_overrides or {})
+        # IP пользовательских DC-оверрайдов тоже считаются Telegram.
+        self._dc_index = build_dc_index(self._dc_endpoint_overrides)
         self._pool_size = max(0, min(32, int(pool_size or 4)))
         self._buffer_size = max(4, min(4096, int(buffer_kb or 256))) * 1024
         self._fake_tls_domain = normalize_fake_tls_domain(fake_tls_domain)
         self._proxy_protocol = bool(proxy_protocol)
+        # Снимки статистики раз в stats_jsonl_interval дописываются в этот файл ("" — выключено).
+        self._stats_jsonl_path = str(stats_jsonl_path or "")
+        self._stats_jsonl_interval = max(1.0, float(stats_jsonl_interval))
+        self._stats_export_task: Optional[asyncio.Task] = None
         self._upstream_runtime = UpstreamConnectionExecutor(
             self._upstream,
             connect_limit=self._pool_size,
@@ -403,6 +424,8 @@ class TelegramWSProxy:
             parts.append(f"next={next_step}")
         if elapsed is not None:
             parts.append(f"elapsed={elapsed:.1f}s")
+            if result == "connected":
+                self.stats.record_connect(route, dc, elapsed)
         self._log(" ".join(parts))
 
     def _has_healthy_upstream_proxy(self) -> bool:
@@ -636,6 +659,9 @@ class TelegramWSProxy:
         self._log(f"{mode_label} proxy started on {self._host}:{self._port}")
         self._upstream_runtime.emit_snapshot(force=True)
 
+        if self._stats_jsonl_path:
+            self._stats_export_task = asyncio.create_task(self._stats_export_loop())
+
         # Pre-fill WebSocket connection pool (non-blocking)
         asyncio.create_task(self._ws_pool.warmup())
         if self._cloudflare.worker_enabled and self._cloudflare.worker_domains:
@@ -673,8 +699,28 @@ class TelegramWSProxy:
             await asyncio.gather(*self._tasks, return_exceptions=True)
         self._tasks.clear()
 
+        export_task, self._stats_export_task = self._stats_export_task, None
+        if export_task is not None:
+            export_task.cancel()
+            await asyncio.gather(export_task, return_exceptions=True)
+            # Последний снимок — чтобы и короткая сессия попала в файл.
+            await self._export_stats()
+
         self._log("Proxy stopped")
 
+    async def _stats_export_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._stats_jsonl_interval)
+            await self._export_stats()
+
+    async def _export_stats(self) -> None:
+        # Снимок берётся в loop (stats меняется только здесь), запись — в пуле потоков.
+        snapshot = self.stats.snapshot()
+        try:
+            await asyncio.to_thread(append_stats_jsonl, self._stats_jsonl_path, snapshot)
+        except OSError as exc:
+            self._log(f"Stats export to {self._stats_jsonl_path} failed: {exc}")
+
     def apply_upstream_config(
         self,
         upstream_config: Optional[UpstreamProxyConfig],
@@ -763,7 +809,8 @@ class TelegramWSProxy:
 
             # Non-Telegram traffic: passthrough (domains + non-Telegram IPs)
             is_domain = _is_domain(target_host)
-            is_tg = not is_domain and is_telegram_ip(target_host)
+            dc_info = None if is_domain else self._dc_index.lookup(target_host)
+            is_tg = dc_info is not None and dc_info.is_telegram
             if not is_tg:
                 self.stats.passthrough_connections += 1
                 log.debug("[%s] passthrough -> %s:%d", label, target_host, target_port)
@@ -884,22 +931,30 @@ class TelegramWSProxy:
                 await self._relay_tcp(reader, writer, rr, rw)
                 return
 
-            # Extract DC from init packet
-            dc, is_media = _dc_from_init(init)
+            # Extract DC from init packet: one AES-CTR pass serves the dc
+            # lookup, the optional patch and the splitter state.
+            init_packet = _parse_init_packet(init)
+            if init_packet is not None:
+                dc, is_media = init_packet.dc, init_packet.is_media
+            else:
+                dc, is_media = _dc_from_init(init)
             init_patched = False
 
             # Fallback: if init parsing failed, use IP lookup
             if dc is None:
-                entry = IP_TO_DC.get(target_host)
+                entry = dc_info.exact
                 if entry is not None:
                     dc, is_media = entry
                     # Patch the init packet with the correct DC
-                    init = _patch_init_dc(init, -dc if is_media else dc)
+                    if init_packet is not None:
+                        init = init_packet.patched(-dc if is_media else dc)
+                    else:
+                        init = _patch_init_dc(init, -dc if is_media else dc)
                     init_patched = True
                     self._log(f"[{label}] DC from IP table: DC{dc} (patched)")
                 else:
                     # Last resort: CIDR-based DC lookup
-                    dc = ip_to_dc(target_host) if not _is_domain(target_host) else 2
+                    dc = dc_info.dc
                     self._log(f"[{label}] DC from CIDR: DC{dc}")
             else:
                 self._log(f"[{label}] DC from init: DC{dc}{' media' if is_media else ''}")
@@ -939,6 +994,7 @@ class TelegramWSProxy:
                 if await self._cloudflare_fallback(
                     reader, writer, target_host, target_port,
                     init, init_patched, label, dc, is_media,
+                    init_packet=init_packet,
                 ):
                     return
                 await self._tcp_fallback(
@@ -950,6 +1006,7 @@ class TelegramWSProxy:
             await self._tunnel_via_wss(
                 reader, writer, dc, is_media, init, init_patched,
                 target_host, target_port, label,
+                init_packet=init_packet,
             )
 
         except (asyncio.CancelledError, ConnectionError, OSError):
@@ -1061,6 +1118,8 @@ class TelegramWSProxy:
         target_host: str,
         target_port: int,
         label: str,
+        *,
+        init_packet: Optional[InitPacket] = None,
     ) -> None:
         """Try WSS tunnel, fall back to direct TCP if WSS fails."""
 
@@ -1081,6 +1140,7 @@ class TelegramWSProxy:
             if await self._cloudflare_fallback(
                 client_reader, client_writer, target_host, target_port,
                 init, init_patched, label, dc, is_media,
+                init_packet=init_packet,
             ):
                 return
             await self._tcp_fallback(
@@ -1104,6 +1164,7 @@ class TelegramWSProxy:
             if await self._cloudflare_fallback(
                 client_reader, client_writer, target_host, target_port,
                 init, init_patched, label, dc, is_media,
+                init_packet=init_packet,
             ):
                 return
             await self._tcp_fallback(
@@ -1133,6 +1194,7 @@ class TelegramWSProxy:
             relay_ip = _relay_ip_for_domain(domain)
             try:
                 self._log(f"[{label}] DC{dc}{media_tag} -> wss://{domain}{WSS_PATH}")
+                t_connect = time.monotonic()
                 async with sem:
                     ws = await RawWebSocket.connect(
                         relay_ip,
@@ -1140,6 +1202,7 @@ class TelegramWSProxy:
                         WSS_PATH,
                         timeout=CONNECT_TIMEOUT,
                         buffer_size=self._buffer_size,
+                        stats=self.stats,
                     )
                 all_redirects = False
                 self._log_route_detail(
@@ -1149,6 +1212,7 @@ class TelegramWSProxy:
                     is_media=is_media,
                     target=f"{domain}{WSS_PATH} via {relay_ip}",
                     result="connected",
+                    elapsed=time.monotonic() - t_connect,
                 )
                 current_domain = domain
                 break
@@ -1238,6 +1302,7 @@ class TelegramWSProxy:
             if await self._cloudflare_fallback(
                 client_reader, client_writer, target_host, target_port,
                 init, init_patched, label, dc, is_media,
+                init_packet=init_packet,
             ):
                 return
 
@@ -1253,20 +1318,15 @@ class TelegramWSProxy:
         self._log(f"[{label}] DC{dc}{media_tag} WSS connected")
 
         # Create splitter ONLY for patched inits (mobile clients with random DC bytes).
-        # Normal Telegram Desktop uses intermediate protocol where the splitter's
-        # abridged-protocol boundary detection would produce wrong splits.
-        splitter = None
-        if init_patched:
-            try:
-                splitter = _MsgSplitter(init)
-            except Exception:
-                pass
+        # The splitter follows the proto tag from the init, but unpatched clients
+        # already frame their traffic the way the relay expects.
+        splitter = _init_splitter(init, init_packet) if init_patched else None
 
         # Send the buffered init packet as the first WS frame
         await ws.send(init)
 
         # Bidirectional bridge
-        relay_result = await self._relay_wss(client_reader, client_writer, ws, splitter, label, dc=dc)
+        relay_result = await self._relay_wss(client_reader, client_writer, ws, splitter, label, dc=dc, route="wss")
         recv_total = 0
         sent_total = 0
         if isinstance(relay_result, tuple) and len(relay_result) >= 2:
@@ -1397,6 +1457,7 @@ class TelegramWSProxy:
             relay_ip = _relay_ip_for_domain(domain)
             try:
                 self._log(f"[{label}] MTProxy DC{dc}{media_tag} -> wss://{domain}{WSS_PATH}")
+                t_connect = time.monotonic()
                 async with sem:
                     ws = await RawWebSocket.connect(
                         relay_ip,
@@ -1404,6 +1465,7 @@ class TelegramWSProxy:
                         WSS_PATH,
                         timeout=CONNECT_TIMEOUT,
                         buffer_size=self._buffer_size,
+                        stats=self.stats,
                     )
                 all_redirects = False
                 self._log_route_detail(
@@ -1413,6 +1475,7 @@ class TelegramWSProxy:
                     is_media=is_media,
                     target=f"{domain}{WSS_PATH} via {relay_ip}",
                     result="connected",
+                    elapsed=time.monotonic() - t_connect,
                 )
                 self._wss_domain_penalty_until.pop((int(dc), bool(is_media), domain), None)
                 break
@@ -1502,6 +1565,7 @@ class TelegramWSProxy:
             label=label,
             dc=dc,
             splitter=splitter,
+            route="wss",
         )
 
     async def _cloudflare_fallback(
@@ -1516,18 +1580,14 @@ class TelegramWSProxy:
         dc: int,
         is_media: bool,
         relay_wss_fn=None,
+        init_packet: Optional[InitPacket] = None,
     ) -> bool:
         """Try Cloudflare Worker/domain fallback before plain TCP fallback."""
         if not should_try_cloudflare(self._cloudflare):
             return False
 
         media_tag = " media" if is_media else ""
-        splitter = None
-        if init_patched:
-            try:
-                splitter = _MsgSplitter(init)
-            except Exception:
-                pass
+        splitter = _init_splitter(init, init_packet) if init_patched else None
 
         if self._cloudflare.worker_enabled and self._cloudflare.worker_domains:
             path = build_worker_path(target_host, dc)
@@ -1551,6 +1611,7 @@ class TelegramWSProxy:
                             path=path,
                             timeout=CONNECT_TIMEOUT,
                             buffer_size=self._buffer_size,
+                            stats=self.stats,
                         )
                     elapsed = time.monotonic() - t_connect
                     self._log_route_detail(
@@ -1573,7 +1634,9 @@ class TelegramWSProxy:
                     )
                     await ws.send(init)
                     if relay_wss_fn is None:
-                        await self._relay_wss(client_reader, client_writer, ws, splitter, label, dc=dc)
+                        await self._relay_wss(
+                            client_reader, client_writer, ws, splitter, label, dc=dc, route="cloudflare",
+                        )
                     else:
                         await relay_wss_fn(
                             client_reader=client_reader,
@@ -1583,6 +1646,7 @@ class TelegramWSProxy:
                             log_fn=self._log,
                             label=label,
                             dc=dc,
+                            route="cloudflare",
                         )
                     return True
                 except Exception as exc:
@@ -1629,6 +1693,7 @@ class TelegramWSProxy:
                         path=WSS_PATH,
                         timeout=CONNECT_TIMEOUT,
                         buffer_size=self._buffer_size,
+                        stats=self.stats,
                     )
                     elapsed = time.monotonic() - t_connect
                     self._log_route_detail(
@@ -1651,7 +1716,9 @@ class TelegramWSProxy:
                     )
                     await ws.send(init)
                     if relay_wss_fn is None:
-                        await self._relay_wss(client_reader, client_writer, ws, splitter, label, dc=dc)
+                        await self._relay_wss(
+                            client_reader, client_writer, ws, splitter, label, dc=dc, route="cloudflare",
+                        )
                     else:
                         await relay_wss_fn(
                             client_reader=client_reader,
@@ -1661,6 +1728,7 @@ class TelegramWSProxy:
                             log_fn=self._log,
                             label=label,
                             dc=dc,
+                            route="cloudflare",
                         )
                     return True
                 except Exception as exc:
@@ -1789,6 +1857,7 @@ class TelegramWSProxy:
             log_fn=self._log,
             label=label,
             dc=dc,
+            route="tcp",
         )
 
     async def _mtproxy_upstream_proxy_connect(
@@ -1848,6 +1917,7 @@ class TelegramWSProxy:
                 label=label,
                 dc=dc,
                 on_first_response=notify_on_first_response,
+                route="upstream",
             )
             recv_total = int(relay_result[0] or 0) if isinstance(relay_result, tuple) else 0
             if recv_total > 0:
@@ -1977,7 +2047,7 @@ class TelegramWSProxy:
         await rw.drain()
         recv_total, watchdog_fired = await self._relay_tcp(
             client_reader, client_writer, rr, rw, label,
-            dc=dc, recv_zero_timeout=_RECV_ZERO_TIMEOUT,
+            dc=dc, recv_zero_timeout=_RECV_ZERO_TIMEOUT, route="tcp",
         )
 
         # Learn from watchdog timeout: server silence = DC is blocked by DPI.
@@ -2062,6 +2132,7 @@ class TelegramWSProxy:
                 label,
                 dc=dc,
                 on_first_response=notify_on_first_response,
+                route="upstream",
             )
             if recv_total > 0:
                 if not upstream_notified:
@@ -2081,7 +2152,7 @@ class TelegramWSProxy:
     ) -> tuple[str, int]:
         if ":" not in str(target_host) or int(dc or 0) <= 0 or int(target_port or 0) != 443:
             return target_host, target_port
-        if not is_telegram_ip(str(target_host)):
+        if not self._dc_index.lookup(str(target_host)).is_telegram:
             return target_host, target_port
         return dc_to_tcp_endpoint(dc, self._dc_endpoint_overrides, is_media=is_media)
 
@@ -2093,6 +2164,7 @@ class TelegramWSProxy:
         splitter: Optional[_MsgSplitter],
         label: str,
         dc: int = 0,
+        route: str = "",
     ) -> tuple[int, int]:
         return await relay_wss(
             client_reader=client_reader,
@@ -2103,6 +2175,7 @@ class TelegramWSProxy:
             log_fn=self._log,
             label=label,
             dc=dc,
+            route=route,
         )
 
     async def _relay_tcp(
@@ -2115,6 +2188,7 @@ class TelegramWSProxy:
         dc: int = 0,
         recv_zero_timeout: float = 0,
         on_first_response: Optional[Callable[[], None]] = None,
+        route: str = "",
     ) -> tuple[int, bool]:
         return await relay_tcp(
             client_reader=client_reader,
@@ -2127,6 +2201,7 @@ class TelegramWSProxy:
             dc=dc,
             recv_zero_timeout=recv_zero_timeout,
             on_first_response=on_first_response,
+            route=route,
         )
 
 
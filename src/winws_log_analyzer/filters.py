@@ -1,9 +1,34 @@
-"""Фильтрация списка соединений для таблицы (чистые функции, без Qt)."""
+"""Фильтрация списка соединений для таблицы (чистые функции, без Qt).
+
+``filter_connections`` — простой линейный проход (эталон). Для таблицы
+используется ``ConnectionFilterIndex``: строится один раз на результат разбора
+(в потоке воркера) и отвечает на ввод в поле поиска без прохода по всем
+соединениям:
+
+* hostname и IP приводятся к нижнему регистру один раз и дедуплицируются —
+  в длинных логах тысячи соединений делят один hostname;
+* подстрока длиной ≥ 3 ищется через триграммный индекс по различным значениям
+  (пересечение списков, затем проверка ``in`` только у кандидатов);
+* флаги only_with_hostname/only_affected — заранее посчитанные маски по строкам;
+* если новый запрос содержит один из недавних (пользователь дописывает
+  символы), проверяются только значения, совпавшие с ним; недавние запросы
+  (стирание символов) отдаются из кэша.
+"""
 
 from __future__ import annotations
 
+from array import array
+from itertools import compress
+
 from .models import VERDICT_DROP, VERDICT_MODIFIED, ConnectionRecord
 
+_NGRAM = 3
+_QUERY_CACHE_LIMIT = 32
+
+
+def _is_affected(conn: ConnectionRecord) -> bool:
+    return bool(conn.verdict_counts.get(VERDICT_MODIFIED) or conn.verdict_counts.get(VERDICT_DROP))
+
 
 def filter_connections(
     connections: list[ConnectionRecord],
@@ -21,9 +46,7 @@ def filter_connections(
     for conn in connections:
         if only_with_hostname and not conn.hostname:
             continue
-        if only_affected and not (
-            conn.verdict_counts.get(VERDICT_MODIFIED) or conn.verdict_counts.get(VERDICT_DROP)
-        ):
+        if only_affected and not _is_affected(conn):
             continue
         if needle and needle not in conn.hostname.lower() and needle not in conn.remote_ip.lower():
             continue
@@ -31,4 +54,139 @@ def filter_connections(
     return filtered
 
 
-__all__ = ["filter_connections"]
+class ConnectionFilterIndex:
+    """Предпостроенный индекс для filter_connections по одному списку соединений.
+
+    Результат ``filter()`` совпадает с filter_connections (тот же порядок).
+    Объект хранит недавние запросы, поэтому рассчитан на одного владельца
+    (страницу) и не потокобезопасен.
+    """
+
+    def __init__(self, connections: list[ConnectionRecord]):
+        self._connections = list(connections)
+        values: list[str] = []
+        value_ids: dict[str, int] = {}
+        value_rows: list[array] = []
+        has_hostname = bytearray(len(self._connections))
+        affected = bytearray(len(self._connections))
+
+        def _value_id(value: str) -> int:
+            vid = value_ids.get(value)
+            if vid is None:
+                vid = value_ids[value] = len(values)
+                values.append(value)
+                value_rows.append(array("I"))
+            return vid
+
+        for row, conn in enumerate(self._connections):
+            hostname = conn.hostname.lower()
+            if conn.hostname:
+                has_hostname[row] = 1
+                value_rows[_value_id(hostname)].append(row)
+            ip_vid = _value_id(conn.remote_ip.lower())
+            # hostname может совпасть с IP (SNI по адресу) — строка уже там.
+            if not value_rows[ip_vid] or value_rows[ip_vid][-1] != row:
+                value_rows[ip_vid].append(row)
+            if _is_affected(conn):
+                affected[row] = 1
+
+        # Списки при сборке быстрее array.append; повторы id внутри одного
+        # значения («1.1.1.1») безвредны — кандидаты всё равно сводятся в set.
+        grams: dict[str, list[int]] = {}
+        for vid, value in enumerate(values):
+            for i in range(len(value) - _NGRAM + 1):
+                grams.setdefault(value[i:i + _NGRAM], []).append(vid)
+        postings = {gram: array("I", vids) for gram, vids in grams.items()}
+        del grams
+
+        self._values = values
+        self._value_rows = value_rows
+        self._postings = postings
+        self._has_hostname = has_hostname
+        self._affected = affected
+        self._flag_masks: dict[tuple[bool, bool], bytearray | None] = {}
+        self._unfiltered: dict[tuple[bool, bool], list[ConnectionRecord]] = {}
+        # Недавние текстовые запросы: needle -> id совпавших значений.
+        self._recent: dict[str, list[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._connections)
+
+    def filter(
+        self,
+        *,
+        text: str = "",
+        only_with_hostname: bool = False,
+        only_affected: bool = False,
+    ) -> list[ConnectionRecord]:
+        flags = (bool(only_with_hostname), bool(only_affected))
+        needle = text.strip().lower()
+        if not needle:
+            cached = self._unfiltered.get(flags)
+            if cached is None:
+                mask = self._flag_mask(flags)
+                cached = self._connections if mask is None else list(compress(self._connections, mask))
+                self._unfiltered[flags] = cached
+            return list(cached)
+
+        rows: set[int] = set()
+        value_rows = self._value_rows
+        for vid in self._match_values(needle):
+            rows.update(value_rows[vid])
+        mask = self._flag_mask(flags)
+        connections = self._connections
+        if mask is None:
+            return [connections[row] for row in sorted(rows)]
+        return [connections[row] for row in sorted(rows) if mask[row]]
+
+    def _flag_mask(self, flags: tuple[bool, bool]) -> bytearray | None:
+        if flags not in self._flag_masks:
+            only_with_hostname, only_affected = flags
+            if only_with_hostname and only_affected:
+                mask = bytearray(a & b for a, b in zip(self._has_hostname, self._affected))
+            elif only_with_hostname:
+                mask = self._has_hostname
+            elif only_affected:
+                mask = self._affected
+            else:
+                mask = None
+            self._flag_masks[flags] = mask
+        return self._flag_masks[flags]
+
+    def _match_values(self, needle: str) -> list[int]:
+        recent = self._recent
+        matched = recent.pop(needle, None)
+        if matched is None:
+            values = self._values
+            # Запрос уточнил недавний: совпадения — подмножество его совпадений.
+            narrowed = [ids for previous, ids in recent.items() if previous in needle]
+            if narrowed:
+                candidates = min(narrowed, key=len)
+            elif len(needle) >= _NGRAM:
+                candidates = self._ngram_candidates(needle)
+            else:
+                candidates = range(len(values))
+            matched = [vid for vid in candidates if needle in values[vid]]
+        recent[needle] = matched
+        if len(recent) > _QUERY_CACHE_LIMIT:
+            del recent[next(iter(recent))]
+        return matched
+
+    def _ngram_candidates(self, needle: str) -> list[int]:
+        grams = {needle[i:i + _NGRAM] for i in range(len(needle) - _NGRAM + 1)}
+        postings = []
+        for gram in grams:
+            posting = self._postings.get(gram)
+            if posting is None:
+                return []
+            postings.append(posting)
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                break
+        return sorted(candidates)
+
+
+__all__ = ["ConnectionFilterIndex", "filter_connections"]
@@ -0,0 +1,490 @@
+"""Индексированный разбор больших debug-логов winws2.
+
+Обычный парсер держит в памяти все ``PacketRecord`` (до 5000 на соединение),
+и многогигабайтный лог съедает гигабайты RAM. Здесь файл проходится один раз
+через mmap, побайтово: строки, которые не влияют на сводку соединений
+(TLS-детали, DELAY/REPLAY, вывод lua и т.п.), пропускаются без декодирования.
+Для каждого соединения запоминаются только смещения заголовков его пакетных
+блоков, а сами ``PacketRecord`` разбираются лениво (seek + readline), когда UI
+открывает соединение.
+
+Индекс сохраняется в ``tmp/winws_log_index`` и при повторном открытии того же
+файла (тот же размер и mtime) берётся оттуда без повторного прохода.
+
+При workers > 1 проход делится на диапазоны по заголовкам пакетов
+(см. ``parallel``) и идёт в нескольких процессах; смещения в блоках
+абсолютные, номера строк сдвигаются при слиянии.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from collections.abc import Callable
+from pathlib import Path
+
+from .models import ConnectionRecord, PacketRecord, WinwsLogParseResult
+from .parallel import (
+    PARALLEL_PARSE_MIN_BYTES,
+    LogChunkResult,
+    default_parse_workers,
+    merge_log_chunks,
+    parse_winws_log_file_parallel,
+    plan_log_ranges,
+    run_log_ranges,
+)
+from .parser import (
+    _CALLBACK_LINE_INTERVAL,
+    DEFAULT_MAX_PACKETS_PER_CONNECTION,
+    WinwsLogParser,
+    parse_winws_log_file,
+)
+
+# Файлы меньше этого разбираются целиком — индекс для них не окупается.
+INDEXED_PARSE_MIN_BYTES = 64 * 1024 * 1024
+
+WINWS_LOG_INDEX_DIR_NAME = "winws_log_index"
+WINWS_LOG_INDEX_CACHE_LIMIT = 8
+
+# Кратно mmap.ALLOCATIONGRANULARITY (64 КиБ на Windows).
+_INDEX_WINDOW_BYTES = 64 * 1024 * 1024
+
+_INDEX_MAGIC = b"ZWLIDX02"
+_INDEX_HEADER = struct.Struct("<8sQ")
+
+# Строки, которые могут изменить сводку соединения или преамбулу. Остальные
+# (TLS ..., DELAY/REPLAYING/SENDING, lua-вывод) трогают только поля пакета,
+# а пакеты при индексации не хранятся.
+_INDEX_LINE_PREFIXES = (
+    b"packet: id=",
+    b"IP4: ",
+    b"IP6: ",
+    b"desync profile ",
+    b"using ",
+    b"dpi desync",
+    b"hostname: ",
+    b"* ",
+    b"profile ",
+    b"Loaded ",
+)
+_INDEX_LINE_MARKER = b"check for "
+
+
+class WinwsLogIndex:
+    """Смещения пакетных блоков по соединениям одного файла лога."""
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        size: int,
+        mtime_ns: int,
+        blocks: dict[tuple[str, str, int], tuple[array, array]],
+    ):
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        # key -> (смещения заголовков, номера строк заголовков)
+        self._blocks = blocks
+
+    def packet_count(self, conn: ConnectionRecord) -> int:
+        entry = self._blocks.get(conn.key)
+        return len(entry[0]) if entry is not None else 0
+
+    def packets(self, conn: ConnectionRecord, *, start: int = 0, limit: int | None = None) -> list[PacketRecord]:
+        """Разбирает пакеты соединения [start, start + limit) прямо из файла."""
+        entry = self._blocks.get(conn.key)
+        if entry is None:
+            return []
+        offsets, line_numbers = entry
+        stop = len(offsets) if limit is None else min(len(offsets), start + max(0, limit))
+        if start >= stop:
+            return []
+        if os.path.getsize(self.path) < self.size:
+            # Лог дописывается (winws2 ещё работает) — смещения остаются верными,
+            # а вот усечённый или заменённый файл читать нельзя.
+            raise ValueError("лог изменился после индексации, откройте его заново")
+        packets = []
+        # Обычное чтение, а не mmap: блоки разбросаны по файлу, и отображённые
+        # страницы (с упреждающим чтением) раздували бы рабочий набор процесса.
+        with open(self.path, "rb") as f:
+            for index in range(start, stop):
+                packets.append(_read_block(f, offsets[index], line_numbers[index]))
+        return packets
+
+
+def _read_block(f, offset: int, line_no: int) -> PacketRecord:
+    parser = WinwsLogParser(max_packets_per_connection=1)
+    result = parser._result
+    f.seek(offset)
+    readline = f.readline
+    while result.packets_total == 0:
+        raw = readline()
+        if not raw:
+            parser.finish()
+            break
+        parser.feed_line(raw.decode("utf-8", "replace"), line_no)
+        line_no += 1
+    return result.connections[0].packets[0]
+
+
+class _IndexingParser(WinwsLogParser):
+    """WinwsLogParser, который вместо PacketRecord запоминает смещения блоков."""
+
+    def __init__(self):
+        super().__init__(max_packets_per_connection=0)
+        self.blocks: dict[tuple[str, str, int], tuple[array, array]] = {}
+        self._block_offset = 0
+
+    def feed_indexed(self, line: str, line_no: int, offset: int) -> None:
+        current = self._current
+        self.feed_line(line, line_no)
+        if self._current is not None and self._current is not current:
+            self._block_offset = offset
+
+    def _keep_packet(self, conn: ConnectionRecord, pkt: PacketRecord) -> None:
+        key = (conn.proto, conn.remote_ip, conn.remote_port)
+        entry = self.blocks.get(key)
+        if entry is None:
+            entry = self.blocks[key] = (array("Q"), array("Q"))
+        entry[0].append(self._block_offset)
+        entry[1].append(pkt.line_no)
+
+
+def _file_signature(path: str) -> tuple[int, int]:
+    st = os.stat(path)
+    return int(st.st_size), int(st.st_mtime_ns)
+
+
+def _iter_raw_lines(path: str, size: int, start: int = 0):
+    """Строки байтов [start, size) файла (с переводами строк) через окна mmap.
+
+    Файл отображается кусками по _INDEX_WINDOW_BYTES, чтобы прочитанные
+    страницы не копились в рабочем наборе процесса на многогигабайтных логах.
+    """
+    if size <= start:
+        return
+    # Смещение mmap должно быть кратно ALLOCATIONGRANULARITY.
+    position = start - start % mmap.ALLOCATIONGRANULARITY
+    skip = start - position
+    with open(path, "rb") as f:
+        carry = b""
+        while position < size:
+            length = min(_INDEX_WINDOW_BYTES, size - position)
+            with mmap.mmap(f.fileno(), length, access=mmap.ACCESS_READ, offset=position) as mm:
+                begin = skip
+                skip = 0
+                if carry:
+                    newline = mm.find(b"\n")
+                    if newline < 0:
+                        carry += mm[:]
+                        position += length
+                        continue
+                    yield carry + mm[:newline + 1]
+                    carry = b""
+                    begin = newline + 1
+                end = mm.rfind(b"\n", begin) + 1
+                if end > begin:
+                    mm.seek(begin)
+                    readline = mm.readline
+                    while mm.tell() < end:
+                        yield readline()
+                    begin = end
+                carry = mm[begin:length]
+            position += length
+        if carry:
+            yield carry
+
+
+def _index_lines(
+    parser: _IndexingParser,
+    lines,
+    offset: int,
+    *,
+    total: int = 0,
+    progress_cb: Callable[[int, int], None] | None = None,
+    cancel_cb: Callable[[], bool] | None = None,
+) -> tuple[int, bool]:
+    """Кормит parser строками с абсолютного offset; возвращает (число строк, отменено)."""
+    line_no = 0
+    try:
+        for raw in lines:
+            line_no += 1
+            if raw.startswith(_INDEX_LINE_PREFIXES) or _INDEX_LINE_MARKER in raw:
+                parser.feed_indexed(raw.decode("utf-8", "replace"), line_no, offset)
+            offset += len(raw)
+            if line_no % _CALLBACK_LINE_INTERVAL == 0:
+                if cancel_cb is not None and cancel_cb():
+                    return line_no, True
+                if progress_cb is not None:
+                    progress_cb(offset, total)
+    finally:
+        lines.close()
+    return line_no, False
+
+
+def _index_range(path: str, start: int, end: int) -> LogChunkResult:
+    """Воркер пула: индексирует байты [start, end)."""
+    parser = _IndexingParser()
+    line_count, _cancelled = _index_lines(parser, _iter_raw_lines(path, end, start), start)
+    result = parser.finish()
+    return LogChunkResult(start, end, result, parser._profiles, line_count, parser.blocks)
+
+
+def _merge_index_chunks(chunks: list[LogChunkResult]) -> tuple[WinwsLogParseResult, dict]:
+    blocks: dict[tuple[str, str, int], tuple[array, array]] = {}
+    line_base = 0
+    for chunk in chunks:
+        for key, (offsets, line_numbers) in chunk.blocks.items():
+            entry = blocks.get(key)
+            if entry is None:
+                entry = blocks[key] = (array("Q"), array("Q"))
+            entry[0].extend(offsets)
+            if line_base:
+                line_numbers = array("Q", (line_no + line_base for line_no in line_numbers))
+            entry[1].extend(line_numbers)
+        line_base += chunk.line_count
+    return merge_log_chunks(chunks, max_packets_per_connection=0), blocks
+
+
+def index_winws_log_file(
+    path: str,
+    *,
+    progress_cb: Callable[[int, int], None] | None = None,
+    cancel_cb: Callable[[], bool] | None = None,
+    cache_dir: str | os.PathLike | None = None,
+    workers: int | None = 1,
+) -> WinwsLogParseResult:
+    """Сводка как у parse_winws_log_file, но пакеты — через result.packet_index.
+
+    workers > 1 — проход в пуле процессов (None — по числу ядер).
+    """
+    if workers is None:
+        workers = default_parse_workers()
+    size, mtime_ns = _file_signature(path)
+    cache_path = _cache_path_for(path, cache_dir)
+    cached = _read_index(cache_path, path, size, mtime_ns)
+    if cached is not None:
+        if progress_cb is not None:
+            progress_cb(size, size)
+        return cached
+
+    if workers > 1:
+        chunks, cancelled = run_log_ranges(
+            _index_range,
+            path,
+            plan_log_ranges(path, workers, size=size),
+            workers=workers,
+            progress_cb=progress_cb,
+            cancel_cb=cancel_cb,
+        )
+        result, blocks = _merge_index_chunks(chunks)
+    else:
+        parser = _IndexingParser()
+        _line_count, cancelled = _index_lines(
+            parser,
+            _iter_raw_lines(path, size),
+            0,
+            total=size,
+            progress_cb=progress_cb,
+            cancel_cb=cancel_cb,
+        )
+        result = parser.finish()
+        blocks = parser.blocks
+
+    result.file_path = path
+    for conn in result.connections:
+        # UI читает не больше DEFAULT_MAX_PACKETS_PER_CONNECTION блоков — как обычный разбор.
+        conn.packets_truncated = conn.packets_total > DEFAULT_MAX_PACKETS_PER_CONNECTION
+    result.packet_index = WinwsLogIndex(path, size=size, mtime_ns=mtime_ns, blocks=blocks)
+    if cancelled:
+        result.cancelled = True
+        return result
+    if progress_cb is not None:
+        progress_cb(size, size)
+    _write_index(cache_path, result)
+    return result
+
+
+def load_winws_log_file(
+    path: str,
+    *,
+    progress_cb: Callable[[int, int], None] | None = None,
+    cancel_cb: Callable[[], bool] | None = None,
+    workers: int | None = None,
+) -> WinwsLogParseResult:
+    """Небольшие логи разбираются целиком, большие — индексируются.
+
+    Начиная с PARALLEL_PARSE_MIN_BYTES разбор идёт в нескольких процессах
+    (workers, по умолчанию — по числу ядер, не больше 8).
+    """
+    if workers is None:
+        workers = default_parse_workers()
+    size = os.path.getsize(path)
+    if size >= INDEXED_PARSE_MIN_BYTES:
+        return index_winws_log_file(path, progress_cb=progress_cb, cancel_cb=cancel_cb, workers=workers)
+    if workers > 1 and size >= PARALLEL_PARSE_MIN_BYTES:
+        return parse_winws_log_file_parallel(path, workers=workers, progress_cb=progress_cb, cancel_cb=cancel_cb)
+    return parse_winws_log_file(path, progress_cb=progress_cb, cancel_cb=cancel_cb)
+
+
+# ---------------------------------------------------------------- кэш индекса
+
+def default_winws_log_index_dir() -> Path:
+    from config.runtime_layout import APPLICATION_PATHS
+
+    return APPLICATION_PATHS.tmp_dir / WINWS_LOG_INDEX_DIR_NAME
+
+
+def _cache_path_for(path: str, cache_dir: str | os.PathLike | None) -> Path:
+    folder = Path(cache_dir) if cache_dir is not None else default_winws_log_index_dir()
+    digest = hashlib.blake2b(os.path.normcase(os.path.abspath(path)).encode("utf-8"), digest_size=12).hexdigest()
+    return folder / f"{digest}.idx"
+
+
+def _connection_row(conn: ConnectionRecord) -> list:
+    return [
+        conn.proto,
+        conn.remote_ip,
+        conn.remote_port,
+        conn.hostname,
+        conn.l7proto,
+        list(conn.profile_ids),
+        list(conn.profile_names),
+        conn.packets_total,
+        conn.packets_out,
+        conn.packets_in,
+        conn.verdict_counts,
+        list(conn.positive_lists),
+        list(conn.lua_applied),
+        conn.first_line_no,
+        conn.packets_truncated,
+    ]
+
+
+def _connection_from_row(row: list) -> ConnectionRecord:
+    return ConnectionRecord(
+        proto=row[0],
+        remote_ip=row[1],
+        remote_port=int(row[2]),
+        hostname=row[3],
+        l7proto=row[4],
+        profile_ids=tuple(row[5]),
+        profile_names=tuple(row[6]),
+        packets_total=int(row[7]),
+        packets_out=int(row[8]),
+        packets_in=int(row[9]),
+        verdict_counts=dict(row[10]),
+        positive_lists=tuple(row[11]),
+        lua_applied=tuple(row[12]),
+        first_line_no=int(row[13]),
+        packets_truncated=bool(row[14]),
+    )
+
+
+def _write_index(cache_path: Path, result: WinwsLogParseResult) -> None:
+    index: WinwsLogIndex = result.packet_index
+    meta = {
+        "path": os.path.abspath(index.path),
+        "size": index.size,
+        "mtime_ns": index.mtime_ns,
+        "profiles": {str(key): value for key, value in result.profiles.items()},
+        "hostlists": [list(item) for item in result.hostlists],
+        "ipsets": [list(item) for item in result.ipsets],
+        "packets_total": result.packets_total,
+        "positive_checks_total": result.positive_checks_total,
+        "unparsed_blocks": result.unparsed_blocks,
+        "unrecognized_packet_lines": result.unrecognized_packet_lines,
+        "connections": [_connection_row(conn) for conn in result.connections],
+    }
+    payload = json.dumps(meta, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    tmp_name = None
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(prefix=f"{cache_path.stem}_", suffix=".tmp", dir=str(cache_path.parent))
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(_INDEX_HEADER.pack(_INDEX_MAGIC, len(payload)))
+            handle.write(payload)
+            for conn in result.connections:
+                for column in index._blocks[conn.key]:
+                    if sys.byteorder != "little":
+                        column = array("Q", column)
+                        column.byteswap()
+                    column.tofile(handle)
+        os.replace(tmp_name, str(cache_path))
+        tmp_name = None
+        _prune_index_dir(cache_path.parent)
+    except OSError:
+        # Без кэша индекс просто построится заново при следующем открытии.
+        pass
+    finally:
+        if tmp_name is not None:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+
+
+def _read_index(cache_path: Path, path: str, size: int, mtime_ns: int) -> WinwsLogParseResult | None:
+    try:
+        with open(cache_path, "rb") as handle:
+            magic, meta_len = _INDEX_HEADER.unpack(handle.read(_INDEX_HEADER.size))
+            if magic != _INDEX_MAGIC:
+                return None
+            meta = json.loads(handle.read(meta_len).decode("utf-8"))
+            if (meta["path"], meta["size"], meta["mtime_ns"]) != (os.path.abspath(path), size, mtime_ns):
+                return None
+            connections = [_connection_from_row(row) for row in meta["connections"]]
+            blocks: dict[tuple[str, str, int], tuple[array, array]] = {}
+            for conn in connections:
+                columns = []
+                for _column in range(2):
+                    column = array("Q")
+                    column.fromfile(handle, conn.packets_total)
+                    if sys.byteorder != "little":
+                        column.byteswap()
+                    columns.append(column)
+                blocks[conn.key] = (columns[0], columns[1])
+    except (OSError, EOFError, ValueError, KeyError, IndexError, TypeError, struct.error):
+        # Нет кэша, он от другой версии файла или повреждён — строим заново.
+        return None
+
+    return WinwsLogParseResult(
+        file_path=path,
+        profiles={int(key): value for key, value in meta["profiles"].items()},
+        hostlists=tuple((item[0], int(item[1])) for item in meta["hostlists"]),
+        ipsets=tuple((item[0], int(item[1])) for item in meta["ipsets"]),
+        packets_total=int(meta["packets_total"]),
+        connections=connections,
+        positive_checks_total=int(meta["positive_checks_total"]),
+        unparsed_blocks=int(meta["unparsed_blocks"]),
+        unrecognized_packet_lines=int(meta["unrecognized_packet_lines"]),
+        packet_index=WinwsLogIndex(path, size=size, mtime_ns=mtime_ns, blocks=blocks),
+    )
+
+
+def _prune_index_dir(folder: Path) -> None:
+    try:
+        files = sorted(folder.glob("*.idx"), key=lambda item: item.stat().st_mtime, reverse=True)
+    except OSError:
+        return
+    for stale in files[WINWS_LOG_INDEX_CACHE_LIMIT:]:
+        try:
+            stale.unlink()
+        except OSError:
+            pass
+
+
+__all__ = [
+    "INDEXED_PARSE_MIN_BYTES",
+    "WinwsLogIndex",
+    "default_winws_log_index_dir",
+    "index_winws_log_file",
+    "load_winws_log_file",
+]
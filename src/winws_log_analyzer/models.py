@@ -98,3 +98,8 @@ class WinwsLogParseResult:
     # намеренно не поддерживается, GUI только для Windows).
     unrecognized_packet_lines: int = 0
     cancelled: bool = False
+    # WinwsLogIndex при индексированном разборе: connections[*].packets пусты,
+    # пакеты читаются из файла по запросу (packet_index.packets(conn)).
+    packet_index: object | None = None
+    # ConnectionFilterIndex по connections — строится в потоке воркера.
+    filter_index: object | None = None
@@ -0,0 +1,272 @@
+"""Параллельный разбор debug-лога winws2 в пуле процессов.
+
+Пакетный блок всегда начинается с заголовка ``packet: id=N len=...``, а на
+заголовке состояние парсера сбрасывается (предыдущий блок закрывается).
+Поэтому файл режется на байтовые диапазоны по заголовкам, каждый диапазон
+разбирается своим ``WinwsLogParser`` с нуля, а результаты сливаются по порядку
+диапазонов. Итог совпадает с однопоточным разбором, включая номера строк,
+порядок соединений и лимит пакетов на соединение.
+
+Строки преамбулы (profile/Loaded) могут встретиться в любом диапазоне — каждый
+диапазон собирает свои, и они сливаются так же, как их накапливал бы один парсер.
+"""
+
+from __future__ import annotations
+
+import io
+import mmap
+import multiprocessing
+import os
+import re
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+
+from .models import ConnectionRecord, WinwsLogParseResult
+from .parser import DEFAULT_MAX_PACKETS_PER_CONNECTION, WinwsLogParser, format_profiles
+
+# Меньше этого пул процессов не окупает свой запуск.
+PARALLEL_PARSE_MIN_BYTES = 16 * 1024 * 1024
+PARALLEL_PARSE_MAX_WORKERS = 8
+
+# Диапазон не больше ~32 МиБ: чаще прогресс и отмена, меньше памяти на воркер.
+_RANGE_TARGET_BYTES = 32 * 1024 * 1024
+# Как часто проверять cancel_cb, пока воркеры заняты.
+_CANCEL_POLL_SECONDS = 0.1
+
+_HEADER_SEARCH = b"\npacket: id="
+_RE_PACKET_HEADER_BYTES = re.compile(rb"packet: id=\d+ len=\d+ (?:outbound|inbound) IPv6=\d")
+
+
+@dataclass(slots=True)
+class LogChunkResult:
+    """Итог разбора одного диапазона (возвращается из процесса-воркера)."""
+
+    start: int
+    end: int
+    result: WinwsLogParseResult
+    profiles: dict[int, tuple[str, list[str]]]
+    line_count: int
+    # key -> (смещения, номера строк) — только для индексированного режима
+    blocks: dict | None = None
+
+
+def default_parse_workers() -> int:
+    return max(1, min(PARALLEL_PARSE_MAX_WORKERS, os.cpu_count() or 1))
+
+
+def split_log_ranges(path: str, parts: int, *, size: int | None = None) -> list[tuple[int, int]]:
+    """Делит первые size байт файла на ≤ parts диапазонов, каждый — с заголовка блока."""
+    if size is None:
+        size = os.path.getsize(path)
+    if parts <= 1 or size == 0:
+        return [(0, size)]
+    bounds = [0]
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for part in range(1, parts):
+            target = max(bounds[-1] + 1, size * part // parts)
+            start = _next_header(mm, target, size)
+            if start is None:
+                break
+            if start > bounds[-1]:
+                bounds.append(start)
+    bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+
+def _next_header(mm: mmap.mmap, position: int, size: int) -> int | None:
+    """Начало первой строки-заголовка не раньше position (но строго внутри size)."""
+    search = position - 1
+    while True:
+        found = mm.find(_HEADER_SEARCH, search, size)
+        if found < 0:
+            return None
+        line_start = found + 1
+        if _RE_PACKET_HEADER_BYTES.match(mm, line_start):
+            return line_start if line_start < size else None
+        search = line_start
+
+
+def plan_log_ranges(path: str, workers: int, *, size: int | None = None) -> list[tuple[int, int]]:
+    if size is None:
+        size = os.path.getsize(path)
+    parts = max(workers * 2, -(-size // _RANGE_TARGET_BYTES))
+    return split_log_ranges(path, parts, size=size)
+
+
+def run_log_ranges(
+    fn: Callable[..., LogChunkResult],
+    path: str,
+    ranges: list[tuple[int, int]],
+    *args,
+    workers: int,
+    progress_cb: Callable[[int, int], None] | None = None,
+    cancel_cb: Callable[[], bool] | None = None,
+) -> tuple[list[LogChunkResult], bool]:
+    """Выполняет fn(path, start, end, *args) для диапазонов в пуле процессов.
+
+    Возвращает результаты по порядку и флаг отмены. При отмене отдаётся только
+    непрерывный префикс готовых диапазонов — как у однопоточного разбора,
+    прерванного на середине.
+    """
+    total = ranges[-1][1] if ranges else 0
+    done: dict[int, LogChunkResult] = {}
+    done_bytes = 0
+    cancelled = False
+    # spawn, а не fork: разбор запускается из QThread, форк Qt-процесса небезопасен.
+    executor = ProcessPoolExecutor(max_workers=max(1, workers), mp_context=multiprocessing.get_context("spawn"))
+    try:
+        pending = {
+            executor.submit(fn, path, start, end, *args): index
+            for index, (start, end) in enumerate(ranges)
+        }
+        while pending:
+            if cancel_cb is not None and cancel_cb():
+                cancelled = True
+                break
+            finished, _still_running = wait(pending, timeout=_CANCEL_POLL_SECONDS, return_when=FIRST_COMPLETED)
+            for future in finished:
+                index = pending.pop(future)
+                chunk = future.result()
+                done[index] = chunk
+                done_bytes += chunk.end - chunk.start
+            if finished and progress_cb is not None:
+                progress_cb(done_bytes, total)
+    finally:
+        executor.shutdown(wait=not cancelled, cancel_futures=True)
+
+    ordered: list[LogChunkResult] = []
+    for index in range(len(ranges)):
+        chunk = done.get(index)
+        if chunk is None:
+            break
+        ordered.append(chunk)
+    if not cancelled and progress_cb is not None:
+        progress_cb(total, total)
+    return ordered, cancelled
+
+
+def merge_log_chunks(
+    chunks: list[LogChunkResult],
+    *,
+    max_packets_per_connection: int = DEFAULT_MAX_PACKETS_PER_CONNECTION,
+) -> WinwsLogParseResult:
+    """Сливает диапазоны по порядку так, как их разобрал бы один парсер."""
+    merged = WinwsLogParseResult()
+    profiles: dict[int, tuple[str, list[str]]] = {}
+    hostlists: list[tuple[str, int]] = []
+    ipsets: list[tuple[str, int]] = []
+    connections: dict[tuple[str, str, int], ConnectionRecord] = {}
+    line_base = 0
+    for chunk in chunks:
+        part = chunk.result
+        for profile_id, (name, funcs) in chunk.profiles.items():
+            _name, merged_funcs = profiles.setdefault(profile_id, (name, []))
+            for func in funcs:
+                if func not in merged_funcs:
+                    merged_funcs.append(func)
+        hostlists.extend(part.hostlists)
+        ipsets.extend(part.ipsets)
+        merged.packets_total += part.packets_total
+        merged.positive_checks_total += part.positive_checks_total
+        merged.unparsed_blocks += part.unparsed_blocks
+        merged.unrecognized_packet_lines += part.unrecognized_packet_lines
+
+        for conn in part.connections:
+            if line_base:
+                conn.first_line_no += line_base
+                for pkt in conn.packets:
+                    pkt.line_no += line_base
+            existing = connections.get(conn.key)
+            if existing is None:
+                connections[conn.key] = conn
+                merged.connections.append(conn)
+            else:
+                _merge_connection(existing, conn, max_packets_per_connection)
+        line_base += chunk.line_count
+
+    merged.profiles = format_profiles(profiles)
+    merged.hostlists = tuple(hostlists)
+    merged.ipsets = tuple(ipsets)
+    return merged
+
+
+def _merge_connection(into: ConnectionRecord, conn: ConnectionRecord, max_packets: int) -> None:
+    into.packets_total += conn.packets_total
+    into.packets_out += conn.packets_out
+    into.packets_in += conn.packets_in
+    for verdict, count in conn.verdict_counts.items():
+        into.verdict_counts[verdict] = into.verdict_counts.get(verdict, 0) + count
+    if conn.hostname and not into.hostname:
+        into.hostname = conn.hostname
+    if conn.l7proto and not into.l7proto:
+        into.l7proto = conn.l7proto
+    for profile_id, profile_name in zip(conn.profile_ids, conn.profile_names):
+        if profile_id not in into.profile_ids:
+            into.profile_ids = into.profile_ids + (profile_id,)
+            into.profile_names = into.profile_names + (profile_name,)
+    for name in conn.positive_lists:
+        if name not in into.positive_lists:
+            into.positive_lists = into.positive_lists + (name,)
+    for lua_name in conn.lua_applied:
+        if lua_name not in into.lua_applied:
+            into.lua_applied = into.lua_applied + (lua_name,)
+    room = max(0, max_packets - len(into.packets))
+    if room:
+        into.packets.extend(conn.packets[:room])
+    if conn.packets_truncated or len(conn.packets) > room:
+        into.packets_truncated = True
+
+
+def _parse_range(path: str, start: int, end: int, max_packets_per_connection: int) -> LogChunkResult:
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    # Как text-режим open(): errors="replace" и универсальные переводы строк.
+    stream = io.StringIO(data.decode("utf-8", "replace"), newline=None)
+    del data
+    parser = WinwsLogParser(max_packets_per_connection=max_packets_per_connection)
+    line_count = 0
+    for line_count, line in enumerate(stream, start=1):
+        parser.feed_line(line, line_count)
+    result = parser.finish()
+    return LogChunkResult(start, end, result, parser._profiles, line_count)
+
+
+def parse_winws_log_file_parallel(
+    path: str,
+    *,
+    workers: int | None = None,
+    progress_cb: Callable[[int, int], None] | None = None,
+    cancel_cb: Callable[[], bool] | None = None,
+    max_packets_per_connection: int = DEFAULT_MAX_PACKETS_PER_CONNECTION,
+) -> WinwsLogParseResult:
+    """То же, что parse_winws_log_file, но диапазонами в нескольких процессах."""
+    workers = default_parse_workers() if workers is None else max(1, int(workers))
+    size = os.path.getsize(path)
+    ranges = plan_log_ranges(path, workers, size=size)
+    chunks, cancelled = run_log_ranges(
+        _parse_range,
+        path,
+        ranges,
+        max_packets_per_connection,
+        workers=workers,
+        progress_cb=progress_cb,
+        cancel_cb=cancel_cb,
+    )
+    result = merge_log_chunks(chunks, max_packets_per_connection=max_packets_per_connection)
+    result.file_path = path
+    result.cancelled = cancelled
+    return result
+
+
+__all__ = [
+    "PARALLEL_PARSE_MIN_BYTES",
+    "LogChunkResult",
+    "default_parse_workers",
+    "merge_log_chunks",
+    "parse_winws_log_file_parallel",
+    "plan_log_ranges",
+    "run_log_ranges",
+    "split_log_ranges",
+]
@@ -270,6 +270,10 @@ class WinwsLogParser:
         for lua_name in pkt.lua_applied:
             if lua_name not in conn.lua_applied:
                 conn.lua_applied = conn.lua_applied + (lua_name,)
+        self._keep_packet(conn, pkt)
+
+    def _keep_packet(self, conn: ConnectionRecord, pkt: PacketRecord) -> None:
+        """Сохраняет пакет в соединении (до max_packets_per_connection)."""
         if len(conn.packets) < self._max_packets:
             conn.packets.append(pkt)
         else:
@@ -277,15 +281,20 @@ class WinwsLogParser:
 
     def finish(self) -> WinwsLogParseResult:
         self._close_current()
-        self._result.profiles = {
-            profile_id: f"{name or 'noname'}: {', '.join(funcs)}"
-            for profile_id, (name, funcs) in sorted(self._profiles.items())
-        }
+        self._result.profiles = format_profiles(self._profiles)
         self._result.hostlists = tuple(self._hostlists)
         self._result.ipsets = tuple(self._ipsets)
         return self._result
 
 
+def format_profiles(profiles: dict[int, tuple[str, list[str]]]) -> dict[int, str]:
+    """id -> "имя: func1, func2" в порядке id."""
+    return {
+        profile_id: f"{name or 'noname'}: {', '.join(funcs)}"
+        for profile_id, (name, funcs) in sorted(profiles.items())
+    }
+
+
 def parse_winws_log_stream(
     stream: TextIO,
     *,
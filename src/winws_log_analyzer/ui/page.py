@@ -13,7 +13,7 @@ from config.runtime_layout import APPLICATION_PATHS
 from ui.one_shot_worker_runtime import OneShotWorkerRuntime
 from ui.pages.base_page import BasePage
 
-from ..filters import filter_connections
+from ..filters import ConnectionFilterIndex
 from ..models import (
     VERDICT_DROP,
     VERDICT_MODIFIED,
@@ -21,7 +21,7 @@ from ..models import (
     ConnectionRecord,
     WinwsLogParseResult,
 )
-from ..worker import WinwsLogParseWorker
+from ..worker import WinwsLogPacketsWorker, WinwsLogParseWorker
 from .build import PACKETS_PLACEHOLDER_TITLE, build_winws_log_analyzer_ui
 
 LOGS_FOLDER = str(APPLICATION_PATHS.logs_dir)
@@ -59,7 +59,10 @@ class WinwsLogAnalyzerPage(BasePage):
             subtitle_key="page.winws_log_analyzer.subtitle",
         )
         self._runtime = OneShotWorkerRuntime()
+        # Пакеты индексированного лога читаются с диска — тоже в фоне.
+        self._packets_runtime = OneShotWorkerRuntime()
         self._result: WinwsLogParseResult | None = None
+        self._filter_index: ConnectionFilterIndex | None = None
         self._filtered: list[ConnectionRecord] = []
         self._ui = build_winws_log_analyzer_ui(self)
         # Debounce текстового фильтра: не пересобирать таблицу на каждый символ.
@@ -90,6 +93,7 @@ class WinwsLogAnalyzerPage(BasePage):
         super().cleanup()
         self._filter_timer.stop()
         self._runtime.stop(blocking=False)
+        self._packets_runtime.stop(blocking=False)
 
     # ------------------------------------------------------------ drag&drop
 
@@ -188,6 +192,7 @@ class WinwsLogAnalyzerPage(BasePage):
         if not self._runtime.is_current(request_id, cleanup_in_progress=self._cleanup_in_progress):
             return
         self._result = result
+        self._filter_index = result.filter_index or ConnectionFilterIndex(result.connections)
         self._ui.progress_bar.setVisible(False)
         self._show_summary(result)
         self._refresh_connections_table()
@@ -220,13 +225,14 @@ class WinwsLogAnalyzerPage(BasePage):
 
     def _refresh_connections_table(self) -> None:
         ui = self._ui
-        connections = self._result.connections if self._result is not None else []
-        self._filtered = filter_connections(
-            connections,
-            text=ui.search_edit.text(),
-            only_with_hostname=ui.only_hostname_cb.isChecked(),
-            only_affected=ui.only_affected_cb.isChecked(),
-        )
+        if self._filter_index is None:
+            self._filtered = []
+        else:
+            self._filtered = self._filter_index.filter(
+                text=ui.search_edit.text(),
+                only_with_hostname=ui.only_hostname_cb.isChecked(),
+                only_affected=ui.only_affected_cb.isChecked(),
+            )
         table = ui.connections_table
         table.setUpdatesEnabled(False)
         try:
@@ -289,18 +295,51 @@ class WinwsLogAnalyzerPage(BasePage):
     def _show_packets(self, conn: ConnectionRecord | None) -> None:
         # Секция пакетов всегда видима — layout не прыгает при выборе строки.
         ui = self._ui
+        self._packets_runtime.stop(blocking=False)
+        self._packets_runtime.cancel()
         if conn is None:
             ui.packets_title.setText(PACKETS_PLACEHOLDER_TITLE)
             ui.packets_table.setRowCount(0)
             return
-        title = conn.hostname or f"{conn.remote_ip}:{conn.remote_port}"
-        suffix = f" (показаны первые {len(conn.packets)})" if conn.packets_truncated else ""
-        ui.packets_title.setText(f"Пакеты соединения {title} — {conn.packets_total}{suffix}")
+        packet_index = self._result.packet_index if self._result is not None else None
+        if packet_index is None:
+            self._fill_packets_table(conn, conn.packets)
+            return
+        # Индексированный лог: пакеты читаются из файла только для открытого
+        # соединения и в потоке воркера — до 5000 блоков это заметная пауза.
+        ui.packets_title.setText(f"Пакеты соединения {self._connection_title(conn)} — загрузка…")
+        ui.packets_table.setRowCount(0)
+        self._packets_runtime.start_qobject_worker(
+            parent=self,
+            worker_factory=lambda _req: WinwsLogPacketsWorker(packet_index=packet_index, conn=conn),
+            on_loaded=self._on_packets_loaded,
+            on_failed=self._on_packets_failed,
+        )
+
+    def _on_packets_loaded(self, request_id: int, conn: ConnectionRecord, packets: list) -> None:
+        if not self._packets_runtime.is_current(request_id, cleanup_in_progress=self._cleanup_in_progress):
+            return
+        self._fill_packets_table(conn, packets)
+
+    def _on_packets_failed(self, request_id: int, message: str) -> None:
+        if not self._packets_runtime.is_current(request_id, cleanup_in_progress=self._cleanup_in_progress):
+            return
+        self._ui.packets_title.setText(f"Пакеты соединения: {message}")
+        self._ui.packets_table.setRowCount(0)
+
+    @staticmethod
+    def _connection_title(conn: ConnectionRecord) -> str:
+        return conn.hostname or f"{conn.remote_ip}:{conn.remote_port}"
+
+    def _fill_packets_table(self, conn: ConnectionRecord, packets: list) -> None:
+        ui = self._ui
+        suffix = f" (показаны первые {len(packets)})" if conn.packets_truncated else ""
+        ui.packets_title.setText(f"Пакеты соединения {self._connection_title(conn)} — {conn.packets_total}{suffix}")
         table = ui.packets_table
         table.setUpdatesEnabled(False)
         try:
-            table.setRowCount(len(conn.packets))
-            for row, pkt in enumerate(conn.packets):
+            table.setRowCount(len(packets))
+            for row, pkt in enumerate(packets):
                 profile = f"{pkt.profile_id}" if pkt.profile_id is not None else "—"
                 if pkt.profile_name:
                     profile += f" ({pkt.profile_name})"
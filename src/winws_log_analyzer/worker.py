@@ -6,7 +6,9 @@ from PyQt6.QtCore import QObject, pyqtSignal
 
 from app.performance_metrics import log_ui_timing_since
 
-from .parser import parse_winws_log_file
+from .filters import ConnectionFilterIndex
+from .log_index import load_winws_log_file
+from .parser import DEFAULT_MAX_PACKETS_PER_CONNECTION
 
 
 class WinwsLogParseWorker(QObject):
@@ -23,11 +25,14 @@ class WinwsLogParseWorker(QObject):
     def run(self) -> None:
         started_at = time.perf_counter()
         try:
-            result = parse_winws_log_file(
+            result = load_winws_log_file(
                 self._file_path,
                 progress_cb=self._emit_progress,
                 cancel_cb=lambda: self._stopped,
             )
+            if not self._stopped:
+                # Индекс поиска — здесь, а не в UI-потоке: на 1M соединений это секунды.
+                result.filter_index = ConnectionFilterIndex(result.connections)
             if not self._stopped:
                 self.loaded.emit(result)
         except Exception as exc:
@@ -47,4 +52,36 @@ class WinwsLogParseWorker(QObject):
         self._stopped = True
 
 
-__all__ = ["WinwsLogParseWorker"]
+class WinwsLogPacketsWorker(QObject):
+    """Читает пакеты одного соединения из индексированного лога (до 5000 блоков)."""
+
+    loaded = pyqtSignal(object, object)  # ConnectionRecord, list[PacketRecord]
+    failed = pyqtSignal(str)
+    finished = pyqtSignal()
+
+    def __init__(self, *, packet_index, conn):
+        super().__init__()
+        self._packet_index = packet_index
+        self._conn = conn
+        self._stopped = False
+
+    def run(self) -> None:
+        started_at = time.perf_counter()
+        try:
+            packets = self._packet_index.packets(self._conn, limit=DEFAULT_MAX_PACKETS_PER_CONNECTION)
+            if not self._stopped:
+                self.loaded.emit(self._conn, packets)
+        except (OSError, ValueError) as exc:
+            if not self._stopped:
+                self.failed.emit(str(exc))
+        finally:
+            log_ui_timing_since(
+                "worker", "winws_log_analyzer", "winws_log_analyzer.packets_worker.total", started_at
+            )
+            self.finished.emit()
+
+    def stop(self) -> None:
+        self._stopped = True
+
+
+__all__ = ["WinwsLogPacketsWorker", "WinwsLogParseWorker"]
@@ -0,0 +1,135 @@
+"""Локальный UDP DNS-сервер для тестов blockcheck.dns_resolver и tools/bench_blockcheck_dns_resolver.py."""
+
+from __future__ import annotations
+
+import heapq
+import select
+import socket
+import struct
+import threading
+import time
+
+from blockcheck.dns_resolver import QTYPE_A, QTYPE_AAAA, QTYPE_CNAME, encode_name
+
+
+class StubDnsServer:
+    """UDP DNS-сервер на 127.0.0.1 для тестов и бенчмарка.
+
+    records: имя -> список (тип, значение): "A"/"AAAA" — адрес, "CNAME" — имя.
+    Неизвестное имя — NXDOMAIN. delays задаёт задержку ответа для имени
+    (иначе latency), drop_first — имена, первый запрос которых теряется.
+    """
+
+    def __init__(
+        self,
+        records: dict[str, list[tuple[str, str]]] | None = None,
+        *,
+        latency: float = 0.0,
+        delays: dict[str, float] | None = None,
+        drop_first: set[str] | None = None,
+        ttl: int = 60,
+    ) -> None:
+        self.records = {name.lower(): list(values) for name, values in (records or {}).items()}
+        self.latency = float(latency)
+        self.delays = {name.lower(): float(delay) for name, delay in (delays or {}).items()}
+        self.drop_first = {name.lower() for name in (drop_first or ())}
+        self.ttl = int(ttl)
+        self.queries_received = 0
+        self._dropped: set[str] = set()
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.bind(("127.0.0.1", 0))
+        self._sock.setblocking(False)
+        self.address = self._sock.getsockname()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._serve, name="stub-dns", daemon=True)
+
+    def __enter__(self) -> StubDnsServer:
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=2)
+        self._sock.close()
+
+    def _serve(self) -> None:
+        outgoing: list[tuple[float, int, bytes, tuple]] = []
+        sequence = 0
+        while not self._stop.is_set():
+            wait = 0.05
+            if outgoing:
+                wait = max(0.0, min(wait, outgoing[0][0] - time.monotonic()))
+            readable, _, _ = select.select([self._sock], [], [], wait)
+            if readable:
+                while True:
+                    try:
+                        data, addr = self._sock.recvfrom(4096)
+                    except (BlockingIOError, OSError):
+                        break
+                    self.queries_received += 1
+                    reply = self._answer(data)
+                    if reply is None:
+                        continue
+                    response, name = reply
+                    delay = self.delays.get(name, self.latency)
+                    sequence += 1
+                    heapq.heappush(outgoing, (time.monotonic() + delay, sequence, response, addr))
+            now = time.monotonic()
+            while outgoing and outgoing[0][0] <= now:
+                _due, _seq, response, addr = heapq.heappop(outgoing)
+                try:
+                    self._sock.sendto(response, addr)
+                except OSError:
+                    pass
+
+    def _answer(self, query: bytes) -> tuple[bytes, str] | None:
+        if len(query) < 12:
+            return None
+        offset = 12
+        labels = []
+        while offset < len(query) and query[offset]:
+            length = query[offset]
+            labels.append(query[offset + 1:offset + 1 + length].decode("ascii", "replace"))
+            offset += 1 + length
+        question_end = offset + 5
+        if question_end > len(query):
+            return None
+        name = ".".join(labels).lower()
+        qtype = struct.unpack_from(">H", query, offset + 1)[0]
+        if name in self.drop_first and name not in self._dropped:
+            self._dropped.add(name)
+            return None
+
+        answers: list[bytes] = []
+        owner = b"\xc0\x0c"  # указатель на имя из вопроса
+        current = name
+        found = current in self.records
+        for _hop in range(8):
+            values = self.records.get(current, [])
+            cname = next((value for rtype, value in values if rtype == "CNAME"), None)
+            if cname is not None and qtype != QTYPE_CNAME:
+                answers.append(self._rr(owner, QTYPE_CNAME, encode_name(cname)))
+                owner = encode_name(cname)
+                current = cname.lower()
+                continue
+            for rtype, value in values:
+                if rtype == "A" and qtype == QTYPE_A:
+                    answers.append(self._rr(owner, QTYPE_A, socket.inet_aton(value)))
+                elif rtype == "AAAA" and qtype == QTYPE_AAAA:
+                    answers.append(self._rr(owner, QTYPE_AAAA, socket.inet_pton(socket.AF_INET6, value)))
+                elif rtype == "CNAME" and qtype == QTYPE_CNAME:
+                    answers.append(self._rr(owner, QTYPE_CNAME, encode_name(value)))
+            break
+
+        flags = 0x8180 if found else 0x8183
+        header = query[:2] + struct.pack(">HHHHH", flags, 1, len(answers), 0, 0)
+        return header + query[12:question_end] + b"".join(answers), name
+
+    def _rr(self, owner: bytes, rtype: int, rdata: bytes) -> bytes:
+        return owner + struct.pack(">HHIH", rtype, 1, self.ttl, len(rdata)) + rdata
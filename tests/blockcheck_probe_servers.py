@@ -0,0 +1,187 @@
+"""Локальные серверы для проб blockcheck (тесты и tools/bench_blockcheck_async_probes.py).
+
+LocalProbeServers — серверы на 127.0.0.1 в фоновом потоке: HTTPS
+(самоподписанный сертификат из tests/fixtures), HTTP с телом заданного
+размера и режимом RST после N байт, «EOF» (закрывает соединение сразу —
+обрыв рукопожатия), «hang» (молчит) и STUN. Задержка ответа эмулирует RTT
+до удалённого сервера.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import socket
+import struct
+import threading
+
+from telegram_proxy_fakes import CERT_PATH, build_server_ssl_context
+
+_STUN_COOKIE = 0x2112A442
+
+
+def stun_success_response(request: bytes, addr: tuple) -> bytes:
+    """Binding Success Response с XOR-MAPPED-ADDRESS клиента (IPv4)."""
+    transaction_id = request[8:20]
+    ip_int = struct.unpack(">I", socket.inet_aton(addr[0]))[0]
+    value = struct.pack(">BBHI", 0, 0x01, addr[1] ^ (_STUN_COOKIE >> 16), ip_int ^ _STUN_COOKIE)
+    attr = struct.pack(">HH", 0x0020, len(value)) + value
+    return struct.pack(">HHI", 0x0101, len(attr), _STUN_COOKIE) + transaction_id + attr
+
+
+class _StunServerProtocol(asyncio.DatagramProtocol):
+    def __init__(self, owner: LocalProbeServers) -> None:
+        self._owner = owner
+        self.transport = None
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        if len(data) >= 20 and data[:2] == b"\x00\x01":
+            delay = self._owner.latency
+            loop = asyncio.get_running_loop()
+            loop.call_later(delay, self.transport.sendto, stun_success_response(data, addr), addr)
+
+
+class LocalProbeServers:
+    """Набор локальных серверов для проб; порты в атрибутах после start()."""
+
+    def __init__(self, *, latency: float = 0.0, body_size: int = 30_000, reset_after: int | None = None) -> None:
+        self.latency = float(latency)
+        self.body_size = int(body_size)
+        self.reset_after = reset_after
+        self.cafile = str(CERT_PATH)
+        self.https_port = 0
+        self.http_port = 0
+        self.eof_port = 0
+        self.hang_port = 0
+        self.stun_port = 0
+        self.active_connections = 0
+        self.max_active_connections = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._servers: list = []
+        self._ready = threading.Event()
+
+    def __enter__(self) -> LocalProbeServers:
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="local-probe-servers", daemon=True)
+        self._thread.start()
+        self._ready.wait(5)
+
+    def stop(self) -> None:
+        loop = self._loop
+        if loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._close(), loop).result(timeout=5)
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join(timeout=5)
+        self._loop = None
+
+    def http_url(self, path: str = "/") -> str:
+        return f"http://127.0.0.1:{self.http_port}{path}"
+
+    # ---- внутреннее ----
+
+    def _run(self) -> None:
+        loop = asyncio.new_event_loop()
+        self._loop = loop
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(self._open())
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            loop.close()
+
+    async def _open(self) -> None:
+        loop = asyncio.get_running_loop()
+        https = await asyncio.start_server(self._serve_https, "127.0.0.1", 0, ssl=build_server_ssl_context())
+        http = await asyncio.start_server(self._serve_http, "127.0.0.1", 0)
+        eof = await asyncio.start_server(self._serve_eof, "127.0.0.1", 0)
+        hang = await asyncio.start_server(self._serve_hang, "127.0.0.1", 0)
+        stun_transport, _ = await loop.create_datagram_endpoint(
+            lambda: _StunServerProtocol(self), local_addr=("127.0.0.1", 0)
+        )
+        self._servers = [https, http, eof, hang, stun_transport]
+        self.https_port = https.sockets[0].getsockname()[1]
+        self.http_port = http.sockets[0].getsockname()[1]
+        self.eof_port = eof.sockets[0].getsockname()[1]
+        self.hang_port = hang.sockets[0].getsockname()[1]
+        self.stun_port = stun_transport.get_extra_info("sockname")[1]
+
+    async def _close(self) -> None:
+        for server in self._servers:
+            server.close()
+
+    def _enter(self) -> None:
+        self.active_connections += 1
+        self.max_active_connections = max(self.max_active_connections, self.active_connections)
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> bytes:
+        head = b""
+        while b"\r\n\r\n" not in head:
+            chunk = await reader.read(4096)
+            if not chunk:
+                break
+            head += chunk
+        return head
+
+    async def _serve_https(self, reader, writer) -> None:
+        self._enter()
+        try:
+            await self._read_request(reader)
+            await asyncio.sleep(self.latency)
+            body = b"ok"
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nConnection: close\r\n\r\n" + body)
+            await writer.drain()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self.active_connections -= 1
+            writer.close()
+
+    async def _serve_http(self, reader, writer) -> None:
+        self._enter()
+        try:
+            head = await self._read_request(reader)
+            path = head.split(b" ", 2)[1] if head.count(b" ") >= 2 else b"/"
+            await asyncio.sleep(self.latency)
+            if path.startswith(b"/redirect"):
+                writer.write(b"HTTP/1.1 302 Found\r\nLocation: /data\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                await writer.drain()
+                return
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: %d\r\nConnection: close\r\n\r\n" % self.body_size)
+            limit = self.body_size if self.reset_after is None else min(self.body_size, self.reset_after)
+            writer.write(b"x" * limit)
+            await writer.drain()
+            if self.reset_after is not None and self.reset_after < self.body_size:
+                await asyncio.sleep(0.05)
+                sock = writer.get_extra_info("socket")
+                # SO_LINGER 0 — закрытие отправляет RST, как DPI.
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+                writer.transport.abort()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self.active_connections -= 1
+            writer.close()
+
+    async def _serve_eof(self, reader, writer) -> None:
+        writer.close()
+
+    async def _serve_hang(self, reader, writer) -> None:
+        self._enter()
+        try:
+            await reader.read()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self.active_connections -= 1
+            writer.close()
@@ -0,0 +1,73 @@
+"""Split hosts-каталог для тестов hosts.catalog_cache и tools/bench_hosts_catalog_cache.py.
+
+write_catalog_tree пишет dns_sources.json и по файлу на сервис, mtime
+сдвигается в прошлое — как у установленного каталога. reference_full_load —
+прежний _load_catalog (подпись по всем байтам + разбор всех файлов), эталон.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import time
+from pathlib import Path
+
+from hosts import proxy_domains
+
+_PROFILES = ["zapret_dns", "xbox_dns", "xbox_dns_old", "comss_dns", "malw_dns"]
+
+
+def write_catalog_tree(root: Path, *, services: int = 3000, domains_per_service: int = 6, seed: int = 1) -> Path:
+    """Пишет split-каталог в root/hosts_catalog; mtime — час назад."""
+    rng = random.Random(seed)
+    catalog = root / "hosts_catalog"
+    (catalog / "dns").mkdir(parents=True, exist_ok=True)
+    (catalog / "hosts").mkdir(parents=True, exist_ok=True)
+    (catalog / "dns_sources.json").write_text(
+        json.dumps({"version": 1, "dns_sources": [{"id": pid, "name": pid.upper()} for pid in _PROFILES]}),
+        encoding="utf-8",
+    )
+
+    def ip() -> str:
+        return ".".join(str(rng.randint(1, 254)) for _ in range(4))
+
+    for index in range(services):
+        name = f"Service {index:05d}"
+        if index % 10 == 9:
+            payload = {
+                "name": name,
+                "hosts": [{"host": f"h{d}.svc{index}.example", "ip": ip()} for d in range(domains_per_service)],
+            }
+            (catalog / "hosts" / f"{index:05d}.json").write_text(json.dumps(payload, indent=2), encoding="utf-8")
+            continue
+        payload = {
+            "name": name,
+            "domains": [
+                {
+                    "host": f"d{d}.svc{index}.example",
+                    "ips": {pid: [ip() for _ in range(rng.randint(1, 2))] for pid in rng.sample(_PROFILES, 3)},
+                }
+                for d in range(domains_per_service)
+            ],
+        }
+        (catalog / "dns" / f"{index:05d}.json").write_text(json.dumps(payload, indent=2), encoding="utf-8")
+
+    settle_tree(catalog)
+    return catalog
+
+
+def settle_tree(catalog: Path, *, age_seconds: float = 3600.0) -> None:
+    past = time.time_ns() - int(age_seconds * 1_000_000_000)
+    for path in catalog.rglob("*.json"):
+        os.utime(path, ns=(past, past))
+
+
+def reference_full_load(catalog: Path) -> proxy_domains.HostsCatalog:
+    """Прежний _load_catalog: подпись по всем байтам, затем чтение и разбор всех файлов."""
+    entries = []
+    for child in proxy_domains._split_catalog_files(catalog):
+        entries.append(proxy_domains._content_sig_entry(root=catalog, path=child, raw=child.read_bytes()))
+    proxy_domains._combine_content_sig(entries)
+    data, _sig = proxy_domains._load_split_catalog_data_with_sig(catalog)
+    return proxy_domains._parse_hosts_catalog_json(json.dumps(data, ensure_ascii=False, sort_keys=True))
@@ -0,0 +1,158 @@
+"""Эталон и данные для тестов hosts.hosts_document и tools/bench_hosts_document.py.
+
+reference_apply — прежний конвейер apply_domain_ip_rows построчно, с ним
+сверяется HostsDocument.plan(); managed_hosts_block_rows — прежнее чтение
+блока ZapretGUI для HostsDocument.managed_rows. build_hosts_text — большой
+hosts в духе ad-block списков.
+"""
+
+from __future__ import annotations
+
+import random
+
+from hosts.hosts import _remove_managed_hosts_block
+from hosts.hosts_document import (
+    MANAGED_HOSTS_BEGIN,
+    MANAGED_HOSTS_END,
+    MANAGED_HOSTS_NOTICE,
+    format_hosts_mapping_line,
+    parse_hosts_mapping_line,
+)
+
+
+def remove_top_domain_entries(lines: list[str], domain_keys: set[str]) -> tuple[list[str], set[str], int | None]:
+    """Убирает первое вхождение каждого нужного домена и возвращает место для нового блока."""
+    if not domain_keys:
+        return lines, set(), None
+
+    new_lines: list[str] = []
+    removed_keys: set[str] = set()
+    insert_at: int | None = None
+
+    for line in lines:
+        parsed = parse_hosts_mapping_line(line)
+        if parsed is None:
+            new_lines.append(line)
+            continue
+
+        ip, domains, comment = parsed
+        matched_keys = {
+            domain.casefold()
+            for domain in domains
+            if domain.casefold() in domain_keys and domain.casefold() not in removed_keys
+        }
+        if not matched_keys:
+            new_lines.append(line)
+            continue
+
+        if insert_at is None:
+            insert_at = len(new_lines)
+        removed_keys.update(matched_keys)
+
+        remaining_domains = [domain for domain in domains if domain.casefold() not in matched_keys]
+        if remaining_domains:
+            new_lines.append(format_hosts_mapping_line(ip, remaining_domains, comment))
+
+    return new_lines, removed_keys, insert_at
+
+
+def managed_hosts_block_rows(lines: list[str]) -> list[tuple[str, str]]:
+    """Возвращает строки (domain, ip), которые лежат внутри блока ZapretGUI."""
+    rows: list[tuple[str, str]] = []
+    inside_block = False
+
+    for line in lines:
+        stripped = line.strip()
+        if stripped == MANAGED_HOSTS_BEGIN:
+            inside_block = True
+            continue
+        if not inside_block:
+            continue
+        if stripped == MANAGED_HOSTS_END:
+            break
+        if not stripped or stripped.startswith("#"):
+            continue
+
+        parsed = parse_hosts_mapping_line(stripped)
+        if parsed is None:
+            continue
+        ip, domains, _comment = parsed
+        for domain in domains:
+            rows.append((domain, ip))
+
+    return rows
+
+
+def insert_managed_hosts_block(new_lines: list[str], rows: list[tuple[str, str]], insert_at: int | None = None) -> None:
+    """Добавляет блок ZapretGUI перед обычными строками hosts."""
+    if not rows:
+        return
+
+    if insert_at is None:
+        insert_at = len(new_lines)
+        for index, line in enumerate(new_lines):
+            if parse_hosts_mapping_line(line) is not None:
+                insert_at = index
+                break
+    insert_at = max(0, min(insert_at, len(new_lines)))
+
+    while insert_at > 0 and new_lines[insert_at - 1].strip() == "":
+        del new_lines[insert_at - 1]
+        insert_at -= 1
+    while insert_at < len(new_lines) and new_lines[insert_at].strip() == "":
+        del new_lines[insert_at]
+
+    block: list[str] = []
+    if insert_at > 0 and new_lines[insert_at - 1].strip() != "":
+        block.append("\n")
+    block.append(f"{MANAGED_HOSTS_BEGIN}\n")
+    block.append(f"{MANAGED_HOSTS_NOTICE}\n")
+    for domain, ip in rows:
+        block.append(f"{ip} {domain}\n")
+    block.append(f"{MANAGED_HOSTS_END}\n")
+    if insert_at < len(new_lines) and new_lines[insert_at].strip() != "":
+        block.append("\n")
+
+    new_lines[insert_at:insert_at] = block
+
+
+def reference_apply(content: str, rows: list[tuple[str, str]]) -> str:
+    """Прежний apply_domain_ip_rows (без фильтра строк): новый текст hosts."""
+    new_lines, _removed = _remove_managed_hosts_block(content.splitlines(keepends=True))
+    while new_lines and new_lines[-1].strip() == "":
+        new_lines.pop()
+    if not rows:
+        if new_lines and not new_lines[-1].endswith("\n"):
+            new_lines[-1] += "\n"
+        return "".join(new_lines)
+    domain_keys = {domain.casefold() for domain, _ip in rows}
+    new_lines, _replaced, insert_at = remove_top_domain_entries(new_lines, domain_keys)
+    insert_managed_hosts_block(new_lines, rows, insert_at=insert_at)
+    return "".join(new_lines)
+
+
+def build_hosts_text(*, lines: int = 200_000, manual: int = 20, seed: int = 1) -> str:
+    """Большой hosts в духе ad-block списков; manual — ручные строки svcN.example."""
+    rng = random.Random(seed)
+    out = [
+        "# Copyright (c) 1993-2009 Microsoft Corp.\n",
+        "#\n",
+        "# localhost name resolution is handled within DNS itself.\n",
+        "#\t127.0.0.1       localhost\n",
+        "\n",
+    ]
+    manual_at = set(rng.sample(range(lines), manual))
+    manual_index = 0
+    for index in range(lines - len(out)):
+        if index in manual_at:
+            out.append(f"10.0.0.{manual_index % 250 + 1} svc{manual_index * 7}.example # manual\n")
+            manual_index += 1
+        elif index % 1000 == 0:
+            out.append(f"\n# ---- block list section {index // 1000} ----\n")
+        else:
+            out.append(f"0.0.0.0 ad{index}.tracker{rng.randint(0, 999)}.example\n")
+    return "".join(out)
+
+
+def service_rows(*, start: int, count: int) -> list[tuple[str, str]]:
+    return [(f"svc{index}.example", f"203.0.113.{index % 250 + 1}") for index in range(start, start + count)]
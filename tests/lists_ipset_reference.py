@@ -0,0 +1,97 @@
+"""Эталоны и данные для тестов lists (ip_entries, IpsetIndex) и бенчмарков в tools/.
+
+    synthetic_ipset_lines       синтетический пользовательский ipset
+    reference_effective_entries ipaddress на каждую строку + дедупликация (как раньше)
+    parse_networks_linear       список подсетей, как его строил старый _load_ipset_networks
+    owner_linear                первая подсеть, содержащая ip (линейный проход)
+"""
+
+from __future__ import annotations
+
+import ipaddress
+import random
+from typing import Optional
+
+from lists.core.embedded_defaults import get_ipset_all_base_text, get_ipset_ru_base_text
+from lists.core.ip_entries import normalize_ip_entry_reference
+
+
+def synthetic_ipset_lines(count: int, *, seed: int = 1) -> list[str]:
+    rng = random.Random(seed)
+    lines: list[str] = []
+    for index in range(count):
+        roll = rng.random()
+        if roll < 0.02:
+            lines.append(f"# block {index}")
+        elif roll < 0.10 and lines:
+            lines.append(lines[rng.randrange(len(lines))])
+        elif roll < 0.13:
+            lines.append(str(ipaddress.IPv6Address(rng.getrandbits(128))) + rng.choice(("", "/48", "/64")))
+        elif roll < 0.45:
+            prefix = rng.randint(12, 30)
+            lines.append(f"{rng.randint(1, 223)}.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(256)}/{prefix}")
+        else:
+            lines.append(f"{rng.randint(1, 223)}.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(256)}")
+    return lines
+
+
+def reference_effective_entries(lines) -> list[str]:
+    result: list[str] = []
+    seen: set[str] = set()
+    for raw in lines:
+        norm = normalize_ip_entry_reference(raw)
+        if not norm or norm in seen:
+            continue
+        seen.add(norm)
+        result.append(norm)
+    return result
+
+
+def embedded_ipset_sources() -> list[tuple[str, list[str]]]:
+    return [
+        ("all", get_ipset_all_base_text().splitlines()),
+        ("ru", get_ipset_ru_base_text().splitlines()),
+    ]
+
+
+def parse_networks_linear(sources) -> list[tuple[ipaddress._BaseNetwork, str]]:
+    """Список (подсеть, label) как его строил старый _load_ipset_networks."""
+    networks = []
+    for label, lines in sources:
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                networks.append((ipaddress.ip_network(line, strict=False), label))
+            except ValueError:
+                continue
+    return networks
+
+
+def owner_linear(networks, ip: str) -> Optional[str]:
+    """Эталон: первая подсеть, содержащая ip."""
+    try:
+        ip_obj = ipaddress.ip_address(ip)
+    except ValueError:
+        return None
+    for net, label in networks:
+        if ip_obj in net:
+            return label
+    return None
+
+
+def sample_addresses(networks, count: int, *, seed: int = 1) -> list[str]:
+    """Половина адресов внутри подсетей из списка, половина случайных."""
+    rng = random.Random(seed)
+    result = []
+    for index in range(count):
+        if index % 2:
+            net = rng.choice(networks)[0]
+            value = int(net.network_address) + rng.randrange(net.num_addresses)
+            result.append(str(ipaddress.ip_address(value) if net.version == 4 else ipaddress.IPv6Address(value)))
+        elif index % 8 == 0:
+            result.append(str(ipaddress.IPv6Address(rng.getrandbits(128))))
+        else:
+            result.append(str(ipaddress.IPv4Address(rng.getrandbits(32))))
+    return result
@@ -0,0 +1,59 @@
+"""Синтетический debug-лог winws2 для тестов orchestra.log_parser и tools/bench_orchestra_log_parser.py.
+
+В основном packet:/IP4:/TCP: шум плюс события slm_quality, APPLIED и т.д.
+"""
+
+from __future__ import annotations
+
+import random
+from typing import Iterator
+
+
+_HOSTS = ("youtube.com", "rr1---sn-abc.googlevideo.com", "discord.com", "github.com", "dns.sb", "x.com")
+_REMOTE_IPS = ("64.233.162.198", "142.250.74.206", "151.101.1.140", "108.177.122.95", "162.159.128.233")
+
+# (доля, шаблон); {…} подставляются случайно
+_LINE_TEMPLATES: tuple[tuple[float, str], ...] = (
+    (0.32, "packet: id={id} len={len} {dir} IPv6=0 IPv4=1 TCP=1 UDP=0"),
+    (0.26, "IP4: {ip} => 192.168.1.100 proto=tcp ttl={ttl} sport=443 dport={port} flags=A"),
+    (0.12, "TCP: seq={id} ack={len} win=65535 flags=A len={len}"),
+    (0.04, "IP4: {ip} => 192.168.1.100 proto=udp ttl={ttl} sport=443 dport={port}"),
+    (0.04, "desync profile search for tcp ip={ip} port=443 l7proto=tls ssid='' hostname='{host}'"),
+    (0.02, "desync profile search for udp ip={ip} port=443 l7proto=quic"),
+    (0.03, "using cached desync profile {profile} (noname)"),
+    (0.02, "desync profile {profile} (noname) matches"),
+    (0.02, "packet contains QUIC initial"),
+    (0.01, "packet contains stun payload"),
+    (0.03, "dpi desync src=192.168.1.100:{port} dst={ip}:443 ttl=64 connection_proto=tls"),
+    (0.02, "LUA: automate: host record key 'autostate.circular_quality_{profile}_1.{host}'"),
+    (0.02, "LUA: strategy-stats: APPLIED {host} [tls] = strategy {strat}"),
+    (0.02, "LUA: slm_quality: [tls] {host} strat={strat} SUCCESS 1/1"),
+    (0.02, "LUA: slm_quality: {host} strat={strat} FAIL 0/{strat}"),
+    (0.005, "LUA: slm_quality: [tls] LOCK: {host} -> strat={strat}"),
+    (0.005, "LUA: slm_quality: UNLOCK {host} strat={strat} (now blocked)"),
+    (0.01, "LUA: circular: rotate strategy to {strat}"),
+    (0.01, "LUA: standard_failure_detector: incoming RST s1 in range s4096"),
+    (0.01, "LUA: standard_success_detector: treating connection as successful"),
+    (0.005, "LUA: udp_protocol_success_detector: QUIC (QUIC_SHORT_HEADER) - SUCCESS"),
+    (0.005, "LUA: strategy-stats: HISTORY {host} s{strat} successes=10 failures=2 rate=83%"),
+)
+
+
+def generate_log_lines(count: int, *, seed: int = 1) -> Iterator[str]:
+    """Синтетический debug-лог winws2 с реалистичной долей шума."""
+    rng = random.Random(seed)
+    weights = [weight for weight, _template in _LINE_TEMPLATES]
+    templates = [template for _weight, template in _LINE_TEMPLATES]
+    for _ in range(count):
+        template = rng.choices(templates, weights)[0]
+        yield template.format(
+            id=rng.randint(1, 10_000_000),
+            len=rng.randint(40, 1500),
+            dir=rng.choice(("inbound", "outbound")),
+            ip=rng.choice(_REMOTE_IPS),
+            ttl=rng.randint(40, 128),
+            port=rng.randint(1024, 65535),
+            host=rng.choice(_HOSTS),
+            profile=rng.randint(1, 4),
+            strat=rng.randint(1, 30),
+        )
@@ -0,0 +1,480 @@
+"""Эталон для тестов orchestra.log_parser: LogParser.parse_line до разбора по ключевым словам.
+
+BaselineLogParser.parse_line — замороженная копия прежней цепочки regex (все
+паттерны подряд, без has_event_keyword и _LINE_HANDLERS). Вспомогательные
+методы и Patterns берутся из LogParser: их разбор по ключевым словам не менял.
+Не править вместе с log_parser.py — иначе эталон перестанет быть эталоном.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Optional
+
+from orchestra.log_parser import EventType, LogParser, ParsedEvent, Patterns, get_remote_ip, is_local_ip, nld_cut
+
+
+class BaselineLogParser(LogParser):
+    """LogParser с прежним последовательным parse_line."""
+
+    def parse_line(self, line: str) -> Optional[ParsedEvent]:
+        """
+        Парсит строку лога и возвращает событие или None.
+        Обновляет внутреннее состояние парсера.
+        """
+        if not line:
+            return None
+
+        # === TCP Profile Search ===
+        # desync profile search for tcp ip=... port=443 l7proto=tls hostname='youtube.com'
+        m = Patterns.tcp_profile_search.search(line)
+        if m:
+            ip, port, l7proto, hostname = m.groups()
+            self.current_ip = ip
+            self.current_port = int(port)
+            self.current_proto = "tcp"
+            self.current_l7proto = l7proto
+
+            if hostname and not hostname.replace('.', '').isdigit():
+                self.current_host = nld_cut(hostname, 2)
+                self._cache_hostname(ip, self.current_host)
+                # Сохраняем протокол для hostname (TLS или HTTP)
+                proto_key = "http" if l7proto == "http" or int(port) == 80 else "tls"
+                self.host_to_proto[self.current_host] = proto_key
+            else:
+                self.current_host = self.ip_to_hostname.get(ip)
+
+            return ParsedEvent(
+                event_type=EventType.TCP_PROFILE_SEARCH,
+                hostname=self.current_host,
+                ip=ip,
+                port=int(port),
+                l7proto=l7proto,
+                raw_line=line
+            )
+
+        # === UDP Profile Search ===
+        # desync profile search for udp ip=... port=443 l7proto=quic
+        m = Patterns.udp_profile_search.search(line)
+        if m:
+            ip, port, l7proto = m.groups()
+            self.current_ip = ip
+            self.current_port = int(port)
+            self.current_proto = "udp"
+            self.current_l7proto = l7proto
+
+            if not is_local_ip(ip):
+                self.current_host = ip  # Для UDP используем полный IP
+                # Сохраняем протокол для IP (UDP)
+                self.host_to_proto[ip] = "udp"
+                # Ограничиваем размер кэша
+                if len(self.host_to_proto) > 2000:
+                    keys = list(self.host_to_proto.keys())
+                    for k in keys[:1000]:
+                        del self.host_to_proto[k]
+            else:
+                self.current_host = None
+
+            return ParsedEvent(
+                event_type=EventType.UDP_PROFILE_SEARCH,
+                ip=ip,
+                port=int(port),
+                l7proto=l7proto,
+                raw_line=line
+            )
+
+        # === UDP Packet IP (fallback для cached profile) ===
+        # IP4: 151.101.1.140 => 192.168.1.100 proto=udp
+        m = Patterns.ip4_udp.search(line)
+        if m:
+            src_ip, dst_ip = m.groups()
+            remote_ip = get_remote_ip(src_ip, dst_ip)
+            if remote_ip:
+                self.current_host = remote_ip
+                self.current_ip = remote_ip
+                self.current_proto = "udp"
+                return ParsedEvent(
+                    event_type=EventType.UDP_PACKET,
+                    ip=remote_ip,
+                    raw_line=line
+                )
+
+        # === Cached Profile ===
+        m = Patterns.cached_profile.search(line)
+        if m:
+            profile_num = int(m.group(1))
+            self.current_profile = profile_num
+            if profile_num >= 3:
+                self.current_proto = "udp"
+            return ParsedEvent(
+                event_type=EventType.CACHED_PROFILE,
+                profile=profile_num,
+                raw_line=line
+            )
+
+        # === Profile Matches ===
+        m = Patterns.profile_matches.search(line)
+        if m:
+            self.current_profile = int(m.group(1))
+
+        # === Protocol Detection by Packet Content (NOT ports) ===
+        # Эти паттерны появляются ДО dpi desync строки и устанавливают протокол
+
+        # STUN - определяется по Magic Cookie 0x2112A442, НЕ по портам
+        # "packet contains stun payload"
+        if Patterns.stun_payload.search(line):
+            self.current_proto = "udp"
+            self.current_l7proto = "stun"
+
+        # QUIC - определяется по long header (первый байт 0xC0-0xFF)
+        # "packet contains QUIC initial"
+        if Patterns.quic_initial.search(line):
+            self.current_proto = "udp"
+            self.current_l7proto = "quic"
+
+        # Discord IP Discovery
+        if Patterns.discord_payload.search(line):
+            self.current_proto = "udp"
+            self.current_l7proto = "discord"
+
+        # WireGuard
+        if Patterns.wireguard_payload.search(line):
+            self.current_proto = "udp"
+            self.current_l7proto = "wireguard"
+
+        # DHT (BitTorrent)
+        if Patterns.dht_payload.search(line):
+            self.current_proto = "udp"
+            self.current_l7proto = "dht"
+
+        # === DPI Desync (connection_proto) ===
+        m = Patterns.dpi_desync.search(line)
+        if m:
+            src_ip, _, dst_ip, _, conn_proto = m.groups()
+            self.current_l7proto = conn_proto
+            if self.current_profile >= 3:
+                remote_ip = get_remote_ip(src_ip, dst_ip)
+                if remote_ip:
+                    self.current_host = remote_ip
+                    self.current_ip = remote_ip
+                    self.current_proto = "udp"
+
+        # === UDP Protocol Success Detector ===
+        # LUA: udp_protocol_success_detector: QUIC (QUIC_SHORT_HEADER) - SUCCESS
+        # Устанавливает UDP контекст для последующих событий slm_quality.
+        m = Patterns.udp_success.search(line)
+        if m:
+            proto_detail = m.group(1)  # "QUIC (QUIC_SHORT_HEADER)" or just "QUIC"
+            # Извлекаем базовый протокол
+            base_proto = proto_detail.split()[0].lower() if proto_detail else "quic"
+            self.current_proto = "udp"
+            self.current_l7proto = base_proto
+            # Не возвращаем событие - это информационная строка
+            # Контекст будет использован следующим slm_quality событием.
+
+        # === UDP Aggressive Failure Detector ===
+        # LUA: udp_aggressive_failure_detector: FAIL out=2>=2 in=0<=0
+        # Устанавливает UDP контекст для последующих событий
+        if Patterns.udp_fail.search(line):
+            self.current_proto = "udp"
+            # Не возвращаем событие - это информационная строка
+
+        # === Automate Hostkey ===
+        # LUA: automate: host record key 'autostate.circular_quality_1_1.youtube.com'
+        # Profile 1 = TLS, Profile 2 = HTTP, Profile 3+ = UDP
+        m = Patterns.automate_hostkey.search(line)
+        if m:
+            profile_num, hostname = m.groups()
+            profile = int(profile_num)
+            is_ip = hostname.replace('.', '').replace(':', '').isdigit()
+
+            # Для UDP (profile >= 3) используем IP как hostname
+            # Для TCP/TLS/HTTP - только домены (не IP)
+            if profile >= 3:
+                # UDP: используем IP адрес как есть
+                self.current_host = hostname
+                self.current_proto = "udp"
+            elif not is_ip:
+                # TCP: используем домен с NLD-cut
+                self.current_host = nld_cut(hostname, 2)
+                if self.current_ip:
+                    self._cache_hostname(self.current_ip, self.current_host)
+
+            return ParsedEvent(
+                event_type=EventType.HOSTKEY,
+                hostname=self.current_host,
+                profile=profile,
+                raw_line=line
+            )
+
+        # === APPLIED ===
+        # LUA: strategy-stats: APPLIED youtube.com [tls] = strategy 2
+        m = Patterns.applied.search(line)
+        if m:
+            hostname = m.group(1)
+            proto_tag = m.group(2)  # [tls] между hostname и =
+            strategy = int(m.group(3))
+            tag = m.group(4)  # [circular_quality_1_1] после strategy
+
+            host_key = nld_cut(hostname, 2)
+
+            # Определяем протокол из тега
+            proto_key = None
+            if tag:
+                tag_m = re.match(r"circular_quality_(\d+)_", tag)
+                if tag_m:
+                    prof = int(tag_m.group(1))
+                    proto_key = {1: "tls", 2: "http", 3: "udp", 4: "udp"}.get(prof, "tls")
+            if not proto_key and proto_tag:
+                proto_key = proto_tag.lower()
+            if not proto_key:
+                proto_key = self._get_proto_key()
+
+            self.last_applied[(host_key, proto_key)] = strategy
+            self.last_host_by_proto[proto_key] = host_key
+            self.current_host = host_key
+
+            return ParsedEvent(
+                event_type=EventType.APPLIED,
+                hostname=host_key,
+                strategy=strategy,
+                l7proto=proto_key,
+                tag=tag,
+                raw_line=line
+            )
+
+        # === LOCK ===
+        # Patterns.lock: Groups: 1=protocol, 2=hostname, 3=strategy
+        m = Patterns.lock.search(line)
+        if m:
+            proto_from_log = m.group(1)  # [tls], [quic], [unknown], or None
+            hostname = m.group(2)
+            strategy = int(m.group(3))
+
+            # Приоритет 1: протокол из Lua лога (самый точный источник)
+            if proto_from_log:
+                proto = proto_from_log.lower()
+                is_udp = proto in ("udp", "quic", "stun", "discord", "wireguard", "dht", "unknown")
+            else:
+                # Приоритет 2: контекст из предыдущих строк
+                proto = self._get_proto_from_context()
+                is_udp = proto in ("udp", "quic", "stun", "discord", "wireguard", "dht")
+
+            # Fallback: проверяем hostname если контекст не определён
+            if not proto_from_log and not self.current_proto and not is_udp:
+                is_udp = self._is_udp_hostname(hostname)
+                if is_udp:
+                    proto = "udp"
+
+            # Для UDP НЕ режем IP (используем полный)
+            host_key = hostname if is_udp else nld_cut(hostname, 2)
+
+            return ParsedEvent(
+                event_type=EventType.LOCK,
+                hostname=host_key,
+                strategy=strategy,
+                l7proto=proto,
+                raw_line=line
+            )
+
+        # === UNLOCK ===
+        # Patterns.unlock: Groups: 1=protocol (or None), 2=hostname
+        m = Patterns.unlock.search(line)
+        if m:
+            proto_from_log = m.group(1)  # [tls], [quic], [unknown], or None
+            hostname = m.group(2)
+
+            # Определяем протокол
+            if proto_from_log:
+                proto = proto_from_log.lower()
+            else:
+                proto = self._get_proto_from_context()
+
+            return ParsedEvent(
+                event_type=EventType.UNLOCK,
+                hostname=hostname,
+                l7proto=proto,
+                raw_line=line
+            )
+
+        # === RESET ===
+        m = Patterns.reset.search(line)
+        if m:
+            hostname = m.group(1)
+            return ParsedEvent(
+                event_type=EventType.RESET,
+                hostname=hostname,
+                raw_line=line
+            )
+
+        # === SUCCESS ===
+        # Groups: 1=protocol (tls/quic/unknown/discord/None), 2=hostname, 3=strategy, 4=successes, 5=total
+        m = Patterns.success.search(line)
+        if m:
+            proto_from_log, hostname, strat, successes, total = m.groups()
+            host_key = nld_cut(hostname, 2)
+
+            # Приоритет 1: протокол из Lua лога (самый точный источник)
+            if proto_from_log:
+                proto = proto_from_log.lower()
+            else:
+                # Приоритет 2: сохранённый протокол для hostname (решает race condition)
+                proto = self.host_to_proto.get(host_key)
+                if not proto:
+                    # Приоритет 3: текущий контекст
+                    proto = self._get_proto_from_context()
+
+            is_udp = proto in ("udp", "quic", "stun", "discord", "wireguard", "dht", "unknown")
+
+            # Fallback: проверяем hostname ТОЛЬКО если протокол не был явно указан в логе
+            # НЕ перезаписываем proto_from_log - это приоритетный источник
+            if not proto_from_log and (not proto or proto == "tls"):
+                if self._is_udp_hostname(hostname):
+                    is_udp = True
+                    proto = "udp"
+                    host_key = hostname  # Для UDP НЕ режем IP
+
+            return ParsedEvent(
+                event_type=EventType.SUCCESS,
+                hostname=host_key,
+                strategy=int(strat),
+                successes=int(successes),
+                total=int(total),
+                l7proto=proto,
+                raw_line=line
+            )
+
+        # === FAIL ===
+        # Groups: 1=protocol (tls/quic/unknown/discord/None), 2=hostname, 3=strategy, 4=successes, 5=total
+        m = Patterns.fail.search(line)
+        if m:
+            proto_from_log, hostname, strat, successes, total = m.groups()
+            host_key = nld_cut(hostname, 2)
+
+            # Приоритет 1: протокол из Lua лога (самый точный источник)
+            if proto_from_log:
+                proto = proto_from_log.lower()
+            else:
+                # Приоритет 2: сохранённый протокол для hostname (решает race condition)
+                proto = self.host_to_proto.get(host_key)
+                if not proto:
+                    # Приоритет 3: текущий контекст
+                    proto = self._get_proto_from_context()
+
+            is_udp = proto in ("udp", "quic", "stun", "discord", "wireguard", "dht", "unknown")
+
+            # Fallback: проверяем hostname ТОЛЬКО если протокол не был явно указан в логе
+            # НЕ перезаписываем proto_from_log - это приоритетный источник
+            if not proto_from_log and (not proto or proto == "tls"):
+                if self._is_udp_hostname(hostname):
+                    is_udp = True
+                    proto = "udp"
+                    host_key = hostname  # Для UDP НЕ режем IP
+
+            return ParsedEvent(
+                event_type=EventType.FAIL,
+                hostname=host_key,
+                strategy=int(strat),
+                successes=int(successes),
+                total=int(total),
+                l7proto=proto,
+                raw_line=line
+            )
+
+        # === ROTATE ===
+        m = Patterns.rotate.search(line) or Patterns.cq_rotate.search(line)
+        if m:
+            new_strat = int(m.group(1))
+            # НЕ обновляем last_applied! Только APPLIED должен это делать
+            return ParsedEvent(
+                event_type=EventType.ROTATE,
+                strategy=new_strat,
+                hostname=self.current_host,
+                raw_line=line
+            )
+
+        # === Current Strategy ===
+        m = Patterns.current_strategy.search(line) or Patterns.cq_current_strategy.search(line)
+        if m:
+            self.current_strategy = int(m.group(1))
+
+        # === RST ===
+        if Patterns.std_rst.search(line):
+            proto_key = self._get_proto_key()
+            host_key = self.current_host
+            if not host_key and self.current_ip:
+                host_key = self.ip_to_hostname.get(self.current_ip)
+            if not host_key:
+                host_key = self.last_host_by_proto.get(proto_key)
+
+            applied_strat = self.last_applied.get((host_key, proto_key)) if host_key else None
+
+            return ParsedEvent(
+                event_type=EventType.RST,
+                hostname=host_key,
+                strategy=applied_strat,
+                l7proto=proto_key,
+                raw_line=line
+            )
+
+        # === Automate Success ===
+        if Patterns.automate_success.search(line):
+            return ParsedEvent(
+                event_type=EventType.AUTOMATE_SUCCESS,
+                hostname=self.current_host,
+                raw_line=line
+            )
+
+        # === Automate Failure ===
+        if Patterns.automate_failure.search(line):
+            return ParsedEvent(
+                event_type=EventType.AUTOMATE_FAILURE,
+                hostname=self.current_host,
+                raw_line=line
+            )
+
+        # === Standard Success ===
+        if Patterns.std_success.search(line):
+            proto_key = self._get_proto_key()
+            host_key = self.current_host
+            if not host_key and self.current_ip:
+                host_key = self.ip_to_hostname.get(self.current_ip)
+
+            applied_strat = self.last_applied.get((host_key, proto_key)) if host_key else None
+
+            return ParsedEvent(
+                event_type=EventType.SUCCESS,
+                hostname=host_key,
+                strategy=applied_strat,
+                l7proto=proto_key,
+                raw_line=line
+            )
+
+        # === HISTORY ===
+        # Format: HISTORY youtube.com s2 successes=10 failures=2 rate=83%
+        m = Patterns.history.search(line)
+        if m:
+            hostname, strat, successes, failures, rate = m.groups()
+            return ParsedEvent(
+                event_type=EventType.HISTORY,
+                hostname=nld_cut(hostname, 2),
+                strategy=int(strat),
+                successes=int(successes),
+                failures=int(failures),
+                rate=int(rate),
+                raw_line=line
+            )
+
+        # === PRELOADED ===
+        m = Patterns.preloaded.search(line)
+        if m:
+            hostname, strat, proto = m.groups()
+            return ParsedEvent(
+                event_type=EventType.PRELOADED,
+                hostname=hostname,
+                strategy=int(strat),
+                l7proto=proto,
+                raw_line=line
+            )
+
+        return None
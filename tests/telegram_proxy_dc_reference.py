@@ -0,0 +1,49 @@
+"""Эталон классификации Telegram IP (тесты и tools/bench_dc_lookup.py).
+
+Прежний линейный проход по CIDR (ip_to_dc_media + is_telegram_ip до
+DcIndex): DcIndex собирается из тех же таблиц dc_map и сверяется с ним.
+"""
+
+from __future__ import annotations
+
+import socket
+import struct
+from ipaddress import IPv4Address, IPv6Address
+
+from telegram_proxy.proxy import dc_map
+
+
+def ip_to_dc_linear(ip: str) -> int:
+    """DC по первой (самой узкой) подсети; по умолчанию DC2."""
+    if ":" in ip:
+        try:
+            addr = IPv6Address(ip)
+            for net, dc in dc_map._V6_SUBNET_TO_DC:
+                if addr in net:
+                    return dc
+        except ValueError:
+            pass
+        return 2
+    dc_map._compile()
+    try:
+        ip_int = int(IPv4Address(ip))
+    except ValueError:
+        return 2
+    for net_addr, mask, dc in dc_map._COMPILED_NETS:
+        if (ip_int & mask) == net_addr:
+            return dc
+    return 2
+
+
+def is_telegram_ip_linear(ip: str) -> bool:
+    if ":" in ip:
+        try:
+            addr = IPv6Address(ip)
+            return any(addr in net for net in dc_map.TELEGRAM_V6_CIDRS)
+        except ValueError:
+            return False
+    try:
+        n = struct.unpack("!I", socket.inet_aton(ip))[0]
+        return any(lo <= n <= hi for lo, hi in dc_map._TG_RANGES)
+    except OSError:
+        return False
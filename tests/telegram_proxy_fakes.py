@@ -0,0 +1,257 @@
+"""Local stand-ins for the network the proxy talks to (tests and tools/ benches).
+
+FakeWssRelay — TLS + WebSocket relay (self-signed cert), FakeTcpDc — plain
+TCP datacenter, FakeSocks5Upstream — external SOCKS5. All of them skip the
+64-byte obfuscated init and echo the MTProto stream back
+``download_factor`` times, so the download direction can be made heavier
+than the upload one (media downloads).
+
+LoopbackRedirect patches ``asyncio.open_connection`` so that every dial
+the proxy makes to a non-loopback address lands on these fakes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import ipaddress
+import socket
+import ssl
+import struct
+from pathlib import Path
+
+from telegram_proxy.proxy.dc_map import WSS_RELAY_IP, WSS_RELAY_IPS
+from telegram_proxy.proxy.ws_codec import OP_BINARY, OP_CLOSE, WsFrameParser, encode_frame, encode_frames
+
+
+# Самоподписанный localhost/127.0.0.1 (сертификат и ключ) — только для тестов.
+CERT_PATH = Path(__file__).resolve().parent / "fixtures" / "selfsigned.pem"
+INIT_LEN = 64
+READ_CHUNK = 256 * 1024
+_LOOPBACK_HOSTS = frozenset({"127.0.0.1", "localhost", "::1"})
+_RELAY_HOSTS = frozenset({WSS_RELAY_IP, *WSS_RELAY_IPS.values()})
+
+
+def _is_ip(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return True
+
+
+def build_server_ssl_context(cert_path: Path = CERT_PATH) -> ssl.SSLContext:
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(str(cert_path))
+    return context
+
+
+class _FakeServer:
+    def __init__(self) -> None:
+        self._server: asyncio.Server | None = None
+        self._handlers: set[asyncio.Task] = set()
+        self.port = 0
+        self.connections = 0
+
+    async def _start(self, ssl_context: ssl.SSLContext | None = None) -> int:
+        self._server = await asyncio.start_server(self._on_client, "127.0.0.1", 0, ssl=ssl_context)
+        self.port = int(self._server.sockets[0].getsockname()[1])
+        return self.port
+
+    async def stop(self) -> None:
+        if self._server is None:
+            return
+        self._server.close()
+        for task in list(self._handlers):
+            task.cancel()
+        if self._handlers:
+            await asyncio.gather(*self._handlers, return_exceptions=True)
+        await self._server.wait_closed()
+        self._server = None
+
+    async def _on_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        if task is not None:
+            self._handlers.add(task)
+        self.connections += 1
+        try:
+            await self._serve(reader, writer)
+        except (asyncio.CancelledError, asyncio.IncompleteReadError, ConnectionError, OSError, ssl.SSLError):
+            pass
+        finally:
+            try:
+                writer.close()
+            except Exception:
+                pass
+            if task is not None:
+                self._handlers.discard(task)
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        raise NotImplementedError
+
+
+async def _echo_stream(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, factor: int) -> None:
+    while True:
+        data = await reader.read(READ_CHUNK)
+        if not data:
+            return
+        if factor == 1:
+            writer.write(data)
+        else:
+            writer.writelines([data] * factor)
+        await writer.drain()
+
+
+class FakeWssRelay(_FakeServer):
+    """TLS WebSocket relay that echoes binary frames after the init frame."""
+
+    def __init__(self, *, download_factor: int = 1, cert_path: Path = CERT_PATH) -> None:
+        super().__init__()
+        self.download_factor = max(1, int(download_factor))
+        self._cert_path = cert_path
+
+    async def start(self) -> int:
+        return await self._start(build_server_ssl_context(self._cert_path))
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+        writer.write(
+            b"HTTP/1.1 101 Switching Protocols\r\n"
+            b"Upgrade: websocket\r\n"
+            b"Connection: Upgrade\r\n"
+            b"Sec-WebSocket-Protocol: binary\r\n"
+            b"\r\n"
+        )
+        await writer.drain()
+
+        parser = WsFrameParser()
+        init_seen = False
+        while True:
+            chunk = await reader.read(READ_CHUNK)
+            if not chunk:
+                return
+            buffers: list[bytes] = []
+            for opcode, payload in parser.feed(chunk):
+                if opcode == OP_CLOSE:
+                    writer.writelines(buffers + encode_frame(OP_CLOSE, b""))
+                    await writer.drain()
+                    return
+                if opcode != OP_BINARY:
+                    continue
+                if not init_seen:
+                    init_seen = True
+                    continue
+                buffers.extend(encode_frames(OP_BINARY, [payload] * self.download_factor))
+            if buffers:
+                writer.writelines(buffers)
+                await writer.drain()
+
+
+class FakeTcpDc(_FakeServer):
+    """Plain TCP datacenter: reads the obfuscated init and echoes the rest."""
+
+    def __init__(self, *, download_factor: int = 1) -> None:
+        super().__init__()
+        self.download_factor = max(1, int(download_factor))
+
+    async def start(self) -> int:
+        return await self._start()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        await reader.readexactly(INIT_LEN)
+        await _echo_stream(reader, writer, self.download_factor)
+
+
+class FakeSocks5Upstream(_FakeServer):
+    """No-auth SOCKS5 server that dials targets through ``asyncio.open_connection``.
+
+    Под LoopbackRedirect адрес Telegram превращается в FakeTcpDc, поэтому
+    маршрут «внешний SOCKS5» проходит весь путь без сети.
+    """
+
+    async def start(self) -> int:
+        return await self._start()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        _version, nmethods = await reader.readexactly(2)
+        await reader.readexactly(nmethods)
+        writer.write(b"\x05\x00")
+        await writer.drain()
+
+        _version, _cmd, _reserved, atyp = await reader.readexactly(4)
+        if atyp == 0x01:
+            host = socket.inet_ntoa(await reader.readexactly(4))
+        elif atyp == 0x04:
+            host = socket.inet_ntop(socket.AF_INET6, await reader.readexactly(16))
+        else:
+            size = (await reader.readexactly(1))[0]
+            host = (await reader.readexactly(size)).decode("ascii", errors="replace")
+        port = struct.unpack(">H", await reader.readexactly(2))[0]
+
+        remote_reader, remote_writer = await asyncio.open_connection(host, port)
+        writer.write(b"\x05\x00\x00\x01\x00\x00\x00\x00\x00\x00")
+        await writer.drain()
+
+        async def pipe(src: asyncio.StreamReader, dst: asyncio.StreamWriter) -> None:
+            try:
+                while True:
+                    data = await src.read(READ_CHUNK)
+                    if not data:
+                        break
+                    dst.write(data)
+                    await dst.drain()
+            except (ConnectionError, OSError):
+                pass
+            finally:
+                try:
+                    dst.close()
+                except Exception:
+                    pass
+
+        await asyncio.gather(pipe(reader, remote_writer), pipe(remote_reader, writer))
+
+
+class LoopbackRedirect:
+    """Route the proxy's outgoing dials to the local fakes.
+
+    Relay dials (WSS relay IP, Cloudflare domains) go to ``tls_port``, plain dials to
+    Telegram addresses go to ``tcp_port``; loopback targets (the fake
+    upstream SOCKS5, the proxy itself) are left untouched.
+    """
+
+    def __init__(self, *, tls_port: int, tcp_port: int) -> None:
+        self.tls_port = int(tls_port)
+        self.tcp_port = int(tcp_port)
+        self._original = None
+
+    def __enter__(self) -> "LoopbackRedirect":
+        self._original = asyncio.open_connection
+        asyncio.open_connection = self._open_connection
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        if self._original is not None:
+            asyncio.open_connection = self._original
+            self._original = None
+
+    async def _open_connection(self, host=None, port=None, **kwargs):
+        host = str(host or "")
+        if host not in _LOOPBACK_HOSTS:
+            # RawWebSocket поднимает TLS поверх уже открытого TCP, поэтому
+            # relay узнаём по адресу: IP relay или доменное имя (Cloudflare).
+            is_relay = kwargs.get("ssl") is not None or host in _RELAY_HOSTS or not _is_ip(host)
+            port = self.tls_port if is_relay else self.tcp_port
+            host = "127.0.0.1"
+        return await self._original(host, port, **kwargs)
+
+
+__all__ = [
+    "CERT_PATH",
+    "FakeSocks5Upstream",
+    "FakeTcpDc",
+    "FakeWssRelay",
+    "LoopbackRedirect",
+    "build_server_ssl_context",
+]
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import asyncio
+import socket
+import time
+from unittest import mock
+import unittest
+
+
+def _run(engine, coro):
+    holder: dict = {}
+
+    async def _collect():
+        holder["result"] = await coro
+
+    completed = engine.run(_collect())
+    return completed, holder.get("result")
+
+
+def _closed_port() -> int:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+class AsyncProbeEquivalenceTests(unittest.TestCase):
+    """Async-пробы дают те же status/error_code, что и потоковые."""
+
+    def test_https_results_match_sync_probe(self) -> None:
+        from blockcheck.async_probes import AsyncProbeEngine
+        from blockcheck_probe_servers import LocalProbeServers
+        from blockcheck.models import TestStatus
+        from blockcheck.tls_tester import test_https
+
+        addresses = ["127.0.0.1"]
+        with LocalProbeServers() as servers:
+            cases = {
+                "self-signed": servers.https_port,
+                "eof": servers.eof_port,
+                "refused": _closed_port(),
+            }
+            engine = AsyncProbeEngine()
+            for name, port in cases.items():
+                with self.subTest(case=name):
+                    sync_result = test_https("localhost", port=port, timeout=3, addresses=addresses)
+                    _ok, async_result = _run(
+                        engine, engine.probe_https("localhost", port=port, timeout=3, addresses=addresses)
+                    )
+                    self.assertEqual(async_result.status, sync_result.status)
+                    self.assertEqual(async_result.error_code, sync_result.error_code)
+                    self.assertEqual(async_result.test_type, sync_result.test_type)
+                    self.assertNotEqual(async_result.status, TestStatus.OK)
+
+            trusted = AsyncProbeEngine(cafile=servers.cafile)
+            _ok, result = _run(
+                trusted,
+                trusted.probe_https("localhost", port=servers.https_port, timeout=3, addresses=addresses),
+            )
+            self.assertEqual(result.status, TestStatus.OK)
+            self.assertEqual(result.raw_data.get("status_code"), 200)
+
+    def test_tcp_16_20_detects_reset_after_16kb(self) -> None:
+        from blockcheck.async_probes import AsyncProbeEngine
+        from blockcheck_probe_servers import LocalProbeServers
+        from blockcheck.models import TestStatus
+
+        engine = AsyncProbeEngine()
+        with LocalProbeServers(body_size=30_000) as servers:
+            _ok, full = _run(engine, engine.probe_tcp_16_20(servers.http_url("/redirect"), retries=1, timeout=3))
+        self.assertEqual(full.status, TestStatus.OK)
+
+        with LocalProbeServers(body_size=30_000, reset_after=18_000) as servers:
+            _ok, cut = _run(engine, engine.probe_tcp_16_20(servers.http_url("/data"), retries=2, timeout=3))
+        self.assertEqual(cut.status, TestStatus.FAIL)
+        self.assertEqual(cut.error_code, "TCP_16_20")
+
+    def test_stun_success_and_timeout(self) -> None:
+        from blockcheck.async_probes import AsyncProbeEngine
+        from blockcheck_probe_servers import LocalProbeServers
+        from blockcheck.models import TestStatus
+
+        silent = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        silent.bind(("127.0.0.1", 0))
+        engine = AsyncProbeEngine()
+        try:
+            with LocalProbeServers() as servers:
+                _ok, good = _run(
+                    engine,
+                    engine.probe_stun("127.0.0.1", servers.stun_port, timeout=2, addresses=["127.0.0.1"]),
+                )
+            _ok, lost = _run(
+                engine,
+                engine.probe_stun(
+                    "127.0.0.1", silent.getsockname()[1], timeout=0.3, retries=1, addresses=["127.0.0.1"]
+                ),
+            )
+        finally:
+            silent.close()
+
+        self.assertEqual(good.status, TestStatus.OK)
+        self.assertEqual(lost.status, TestStatus.TIMEOUT)
+
+
+class AsyncProbeEngineTests(unittest.TestCase):
+    def test_cancel_tears_down_hanging_probes(self) -> None:
+        from blockcheck.async_probes import AsyncProbeEngine
+        from blockcheck_probe_servers import LocalProbeServers
+
+        with LocalProbeServers() as servers:
+            cancel_at = time.monotonic() + 0.2
+            engine = AsyncProbeEngine(cancelled=lambda: time.monotonic() >= cancel_at)
+
+            async def _hanging():
+                await asyncio.gather(
+                    *(
+                        engine.probe_https("localhost", port=servers.hang_port, timeout=30, addresses=["127.0.0.1"])
+                        for _ in range(20)
+                    )
+                )
+
+            completed = engine.run(_hanging())
+            elapsed = time.monotonic() - cancel_at
+
+        self.assertFalse(completed)
+        self.assertLess(elapsed, 1.0)
+
+    def test_per_host_limit_caps_parallel_connections(self) -> None:
+        from blockcheck.async_probes import AsyncProbeEngine
+        from blockcheck_probe_servers import LocalProbeServers
+        from blockcheck.models import TestStatus
+
+        with LocalProbeServers(latency=0.05) as servers:
+            engine = AsyncProbeEngine(per_host=2, cafile=servers.cafile)
+
+            async def _many():
+                return await asyncio.gather(
+                    *(
+                        engine.probe_https("localhost", port=servers.https_port, timeout=5, addresses=["127.0.0.1"])
+                        for _ in range(8)
+                    )
+                )
+
+            _ok, results = _run(engine, _many())
+            peak = servers.max_active_connections
+
+        self.assertEqual([r.status for r in results], [TestStatus.OK] * 8)
+        self.assertLessEqual(peak, 2)
+
+    def test_tcp_ping_measures_connect_time(self) -> None:
+        from blockcheck.async_probes import AsyncProbeEngine
+        from blockcheck_probe_servers import LocalProbeServers
+        from blockcheck.models import TestStatus, TestType
+
+        engine = AsyncProbeEngine()
+        with LocalProbeServers() as servers:
+            _ok, result = _run(
+                engine, engine.probe_tcp_ping("127.0.0.1", port=servers.http_port, count=2, timeout=2)
+            )
+        self.assertEqual(result.test_type, TestType.PING)
+        self.assertEqual(result.status, TestStatus.OK)
+
+
+class RunnerAsyncPhaseTests(unittest.TestCase):
+    def test_https_phase_runs_on_engine(self) -> None:
+        from blockcheck.async_probes import AsyncProbeEngine
+        from blockcheck.host_resolution import HostResolutionStage
+        from blockcheck.models import HostAddresses, SingleTestResult, TestStatus, TestType
+        from blockcheck.runner import BlockcheckRunner
+
+        seen: list[tuple[str, str, list[str] | None]] = []
+
+        async def _fake_probe_https(self, host, port=443, timeout=0, tls_version=None, ip_family="auto", addresses=None):
+            seen.append((host, ip_family, addresses))
+            return SingleTestResult(target_name=host, test_type=TestType.HTTP, status=TestStatus.OK)
+
+        runner = BlockcheckRunner(parallel=2)
+        runner._hosts = HostResolutionStage(
+            resolver=lambda host: HostAddresses(host=host, ipv4=["198.51.100.1"])
+        )
+        targets = [{"name": "A", "value": "https://a.test"}, {"name": "B", "value": "https://b.test"}]
+        try:
+            with mock.patch.object(AsyncProbeEngine, "probe_https", _fake_probe_https):
+                results = runner._run_https_phase(targets)
+        finally:
+            runner._hosts.shutdown()
+
+        self.assertEqual([tr.name for tr in results], ["A", "B"])
+        self.assertEqual([len(tr.tests) for tr in results], [3, 3])
+        self.assertIn(("a.test", "ipv4", ["198.51.100.1"]), seen)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import socket
+from unittest import mock
+import unittest
+
+
+_RECORDS = {
+    "a.test": [("A", "192.0.2.1"), ("A", "192.0.2.2"), ("AAAA", "2001:db8::1")],
+    "www.alias.test": [("CNAME", "edge.cdn.test")],
+    "edge.cdn.test": [("A", "198.51.100.7")],
+}
+
+
+class DnsResolverTests(unittest.TestCase):
+    def test_parses_a_aaaa_cname_and_nxdomain(self) -> None:
+        from blockcheck.dns_resolver import RCODE_NXDOMAIN, DnsResolver
+        from blockcheck_dns_stub import StubDnsServer
+
+        with StubDnsServer(_RECORDS) as stub:
+            resolver = DnsResolver(timeout=2, retries=0, port=stub.address[1])
+            try:
+                self.assertEqual(resolver.resolve("a.test", "127.0.0.1").addresses, ("192.0.2.1", "192.0.2.2"))
+                self.assertEqual(resolver.resolve("A.TEST.", "127.0.0.1", "AAAA").addresses, ("2001:db8::1",))
+
+                alias = resolver.resolve("www.alias.test", "127.0.0.1")
+                self.assertEqual(alias.cnames, ("edge.cdn.test",))
+                self.assertEqual(alias.addresses, ("198.51.100.7",))
+
+                missing = resolver.resolve("missing.test", "127.0.0.1")
+                self.assertEqual(missing.rcode, RCODE_NXDOMAIN)
+                self.assertEqual(missing.addresses, ())
+            finally:
+                resolver.close()
+
+    def test_concurrent_queries_share_one_socket_and_demux_out_of_order(self) -> None:
+        from blockcheck.dns_resolver import DnsResolver
+        from blockcheck_dns_stub import StubDnsServer
+
+        names = [f"host{index}.test" for index in range(40)]
+        records = {name: [("A", f"203.0.113.{index + 1}")] for index, name in enumerate(names)}
+        # Первые запросы отвечают последними.
+        delays = {name: 0.005 * (len(names) - index) for index, name in enumerate(names)}
+        with StubDnsServer(records, delays=delays) as stub:
+            resolver = DnsResolver(timeout=3, retries=0)
+            try:
+                results = resolver.resolve_many([(name, stub.address) for name in names])
+                self.assertEqual(len(resolver._engine._channels), 1)
+            finally:
+                resolver.close()
+
+        self.assertEqual([result.addresses for result in results], [tuple(value for _t, value in records[name]) for name in names])
+
+    def test_retries_lost_query_and_times_out_silent_server(self) -> None:
+        from blockcheck.dns_resolver import DnsResolver, DnsTimeout
+        from blockcheck_dns_stub import StubDnsServer
+
+        with StubDnsServer(_RECORDS, drop_first={"a.test"}) as stub:
+            resolver = DnsResolver(timeout=1.5, retries=2)
+            silent = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            silent.bind(("127.0.0.1", 0))
+            try:
+                self.assertEqual(resolver.resolve("a.test", stub.address).addresses, ("192.0.2.1", "192.0.2.2"))
+                self.assertEqual(stub.queries_received, 2)
+
+                results = resolver.resolve_many([("a.test", silent.getsockname())], timeout=0.3)
+                self.assertIsInstance(results[0], DnsTimeout)
+            finally:
+                resolver.close()
+                silent.close()
+
+    def test_ttl_cache_expires_with_clock(self) -> None:
+        from blockcheck import dns_resolver
+        from blockcheck_dns_stub import StubDnsServer
+
+        now = [1000.0]
+        with StubDnsServer(_RECORDS, ttl=30) as stub, mock.patch.object(dns_resolver, "_clock", lambda: now[0]):
+            resolver = dns_resolver.DnsResolver(timeout=2, retries=0)
+            try:
+                self.assertFalse(resolver.resolve("a.test", stub.address).cached)
+                self.assertTrue(resolver.resolve("a.test", stub.address).cached)
+                self.assertEqual(stub.queries_received, 1)
+
+                now[0] += 31
+                self.assertFalse(resolver.resolve("a.test", stub.address).cached)
+                self.assertEqual(stub.queries_received, 2)
+            finally:
+                resolver.close()
+
+    def test_callers_use_resolver(self) -> None:
+        from blockcheck import dns_integrity
+        from blockcheck.dns_resolver import DnsResolver
+        from blockcheck_dns_stub import StubDnsServer
+        from dns_checker import DNSChecker
+
+        with StubDnsServer(_RECORDS) as stub:
+            resolver = DnsResolver(timeout=1, retries=0, port=stub.address[1])
+            try:
+                with mock.patch.object(dns_integrity, "get_uncached_resolver", return_value=resolver):
+                    results = dns_integrity._resolve_udp_many(["a.test", "www.alias.test"], ["127.0.0.1"])
+                self.assertEqual(results, {"a.test": ["192.0.2.1", "192.0.2.2"], "www.alias.test": ["198.51.100.7"]})
+
+                checker = DNSChecker(resolver=resolver)
+                checker.dns_servers = {"Stub": "127.0.0.1"}
+                checker.known_ranges["youtube"]["domains"] = ["a.test", "missing.test"]
+                service = checker._check_service("youtube", log_callback=lambda _message: None)
+                self.assertEqual(service["domains"]["a.test"]["Stub"]["ip"], "192.0.2.1")
+                self.assertIsNone(service["domains"]["missing.test"]["Stub"]["ip"])
+                self.assertTrue(service["poisoned"])
+            finally:
+                resolver.close()
+
+    def test_integrity_check_always_asks_the_server(self) -> None:
+        from blockcheck import dns_integrity
+        from blockcheck.config import DNS_TIMEOUT
+        from blockcheck.dns_resolver import DnsResolver, get_uncached_resolver
+        from blockcheck_dns_stub import StubDnsServer
+
+        shared = get_uncached_resolver()
+        self.assertIs(get_uncached_resolver(), shared)
+        self.assertEqual(shared.timeout, DNS_TIMEOUT)
+
+        with StubDnsServer(_RECORDS) as stub:
+            resolver = DnsResolver(timeout=1, retries=0, port=stub.address[1], cache=False)
+            try:
+                with mock.patch.object(dns_integrity, "get_uncached_resolver", return_value=resolver):
+                    for _ in range(2):
+                        self.assertEqual(dns_integrity._resolve_udp("a.test", "127.0.0.1"), ["192.0.2.1", "192.0.2.2"])
+                self.assertEqual(stub.queries_received, 2)
+            finally:
+                resolver.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
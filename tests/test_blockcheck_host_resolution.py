@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import threading
+from unittest import mock
+import unittest
+
+
+def _addresses(host: str, *ipv4: str, ipv6: tuple[str, ...] = ()):
+    from blockcheck.models import HostAddresses
+
+    return HostAddresses(host=host, ipv4=list(ipv4), ipv6=list(ipv6))
+
+
+class HostResolutionStageTests(unittest.TestCase):
+    def test_each_host_is_resolved_once_and_snapshotted(self) -> None:
+        from blockcheck.host_resolution import HostResolutionStage
+
+        calls: list[str] = []
+        lock = threading.Lock()
+
+        def _resolver(host: str):
+            with lock:
+                calls.append(host)
+            return _addresses(host, "192.0.2.1")
+
+        stage = HostResolutionStage(max_workers=4, resolver=_resolver)
+        try:
+            stage.start(["A.test", "b.test", "a.test.", "b.test"])
+            self.assertEqual(stage.get("a.test").ipv4, ["192.0.2.1"])
+            self.assertEqual(stage.get("B.TEST").host, "b.test")
+            self.assertEqual(sorted(calls), ["a.test", "b.test"])
+            self.assertEqual(list(stage.snapshot()), ["a.test", "b.test"])
+        finally:
+            stage.shutdown()
+
+    def test_run_hosts_cover_https_ping_and_stun_targets(self) -> None:
+        from blockcheck.runner import BlockcheckRunner
+
+        targets = [
+            {"name": "A", "value": "https://a.test/path"},
+            {"name": "B", "value": "http://A.test"},
+            {"name": "P", "value": "PING:ping.test"},
+            {"name": "S", "value": "STUN:stun.test:19302"},
+            {"name": "S6", "value": "STUN:[2001:db8::1]:3478"},
+        ]
+        self.assertEqual(
+            BlockcheckRunner._extract_run_hosts(targets),
+            ["a.test", "ping.test", "stun.test", "2001:db8::1"],
+        )
+
+
+class HttpsPhaseResolutionTests(unittest.TestCase):
+    def test_probes_start_before_slow_hosts_resolve_and_use_cached_addresses(self) -> None:
+        from blockcheck import runner as runner_module
+        from blockcheck.host_resolution import HostResolutionStage
+        from blockcheck.models import SingleTestResult, TestStatus, TestType
+
+        fast_probed = threading.Event()
+        events: list[str] = []
+        seen_addresses: dict[tuple[str, str], list[str] | None] = {}
+
+        def _resolver(host: str):
+            if host == "slow.test":
+                fast_probed.wait(5)
+                events.append("slow resolved")
+                return _addresses(host, "198.51.100.2", ipv6=("2001:db8::2",))
+            if host == "missing.test":
+                return _addresses(host)
+            return _addresses(host, "198.51.100.1")
+
+        def _fake_test_https(host, timeout=0, tls_version=None, ip_family="auto", addresses=None):
+            seen_addresses[(host, ip_family)] = addresses
+            if host == "fast.test":
+                events.append("fast probed")
+                fast_probed.set()
+            return SingleTestResult(target_name=host, test_type=TestType.HTTP, status=TestStatus.OK)
+
+        runner = runner_module.BlockcheckRunner(parallel=2, use_async_probes=False)
+        runner._hosts = HostResolutionStage(max_workers=4, resolver=_resolver)
+        targets = [
+            {"name": "Slow", "value": "https://slow.test"},
+            {"name": "Fast", "value": "https://fast.test"},
+            {"name": "Missing", "value": "https://missing.test"},
+        ]
+        try:
+            with mock.patch.object(runner_module, "test_https", _fake_test_https):
+                results = runner._run_https_phase(targets)
+        finally:
+            runner._hosts.shutdown()
+
+        self.assertEqual(events[0], "fast probed")
+        self.assertEqual([tr.name for tr in results], ["Slow", "Fast", "Missing"])
+        self.assertEqual([len(tr.tests) for tr in results], [6, 3, 3])
+        self.assertEqual(seen_addresses[("slow.test", "ipv4")], ["198.51.100.2"])
+        self.assertEqual(seen_addresses[("slow.test", "ipv6")], ["2001:db8::2"])
+        self.assertEqual(seen_addresses[("fast.test", "ipv4")], ["198.51.100.1"])
+        # Unresolved host: test_https resolves by itself and reports DNS_ERR.
+        self.assertIsNone(seen_addresses[("missing.test", "ipv4")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import socket
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+import unittest
+from unittest.mock import Mock, patch
+
+
+_ADDR_INFO = [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("192.0.2.1", 443))]
+
+
+def _make_scanner(work_dir: str, *, pipelined: bool, cancel_after: int | None = None):
+    from blockcheck.strategy_scan_engine import StrategyEngineLauncher
+    from blockcheck.strategy_scanner import StrategyScanner
+
+    events: list[tuple] = []
+    running = threading.Lock()
+
+    class FakeProcess:
+        returncode = None
+        stdout = None
+        stderr = None
+        pid = 0
+
+        def poll(self):
+            return self.returncode
+
+    class FakeLauncher(StrategyEngineLauncher):
+        startup_wait = 0.0
+        release_pause = 0.01
+
+        def __init__(self) -> None:
+            self.presets: list[str] = []
+            self.paths: list[str] = []
+            self.overlaps = 0
+
+        def launch(self, preset_path: str):
+            self.paths.append(preset_path)
+            # Двух движков одновременно быть не должно.
+            if not running.acquire(blocking=False):
+                self.overlaps += 1
+            with open(preset_path, encoding="utf-8") as f:
+                self.presets.append(f.read().rsplit("\n", 2)[-2])
+            return FakeProcess()
+
+        def stop(self, process) -> None:
+            time.sleep(0.005)
+            running.release()
+
+    class Callback:
+        def on_strategy_started(self, name, index, total):
+            events.append(("started", name, index, total))
+
+        def on_strategy_result(self, result):
+            events.append(("result", result.strategy_id, result.success, result.error))
+            if cancel_after is not None and len([e for e in events if e[0] == "result"]) >= cancel_after:
+                scanner._cancelled = True
+
+        def on_phase(self, phase):
+            pass
+
+        def on_log(self, message):
+            pass
+
+        def is_cancelled(self):
+            return False
+
+    class Scanner(StrategyScanner):
+        def _find_work_dir(self) -> str:
+            return work_dir
+
+        def _select_strategies(self, mode, start_index=0):
+            strategies = [
+                {"id": f"s{i}", "name": f"strategy {i}", "args": f"--lua-desync=fake:repeats={i}"}
+                for i in range(10)
+            ]
+            return strategies[start_index:start_index + 6], start_index, len(strategies)
+
+        def _run_preflight_check(self) -> bool:
+            return True
+
+        def _run_baseline_test(self) -> bool:
+            return False
+
+        def _test_https(self, host, timeout=0, af=0):
+            socket.getaddrinfo(host, 443, af, socket.SOCK_STREAM)
+            ok = self._launcher.presets[-1].endswith(("repeats=3", "repeats=5"))
+            return ok, 10.0, "" if ok else "timeout"
+
+    launcher = FakeLauncher()
+    scanner = Scanner(
+        "example.com",
+        mode="quick",
+        start_index=2,
+        callback=Callback(),
+        shutdown_sync=Mock(return_value=SimpleNamespace(still_running=False)),
+        launcher=launcher,
+        pipelined=pipelined,
+    )
+    return scanner, launcher, events
+
+
+def _summary(report) -> tuple:
+    return (
+        report.total_tested,
+        report.total_available,
+        report.cancelled,
+        [(r.strategy_id, r.success, r.error, r.time_ms) for r in report.working_strategies],
+        [(r.strategy_id, r.success, r.error, r.time_ms) for r in report.failed_strategies],
+    )
+
+
+class StrategyScanPipelineTests(unittest.TestCase):
+    def _run(self, *, pipelined: bool, cancel_after: int | None = None, failing_prepare: str = ""):
+        with tempfile.TemporaryDirectory() as tmp:
+            scanner, launcher, events = _make_scanner(tmp, pipelined=pipelined, cancel_after=cancel_after)
+            prepare = scanner._prepare_strategy
+
+            def _prepare(strat, slot):
+                if strat["id"] == failing_prepare:
+                    raise OSError("disk full")
+                return prepare(strat, slot)
+
+            scanner._prepare_strategy = _prepare
+            with patch.object(socket, "getaddrinfo", return_value=_ADDR_INFO):
+                report = scanner._run_scan()
+            self.assertEqual(launcher.overlaps, 0)
+            return report, launcher, events
+
+    def test_pipelined_scan_matches_serial_results_and_resume_cursor(self) -> None:
+        serial, serial_launcher, serial_events = self._run(pipelined=False)
+        pipelined, pipelined_launcher, pipelined_events = self._run(pipelined=True)
+
+        self.assertEqual(_summary(pipelined), _summary(serial))
+        self.assertEqual(pipelined_events, serial_events)
+        self.assertEqual(pipelined_launcher.presets, serial_launcher.presets)
+        self.assertEqual(serial.total_tested, 8)
+        self.assertEqual([r.strategy_id for r in serial.working_strategies], ["s3", "s5"])
+
+    def test_inline_preset_after_failed_prepare_keeps_its_own_slot(self) -> None:
+        import os
+
+        from blockcheck.strategy_scanner import _PROBE_TEMP_PRESET_SLOTS
+
+        serial, serial_launcher, _events = self._run(pipelined=False)
+        # s3 — вторая стратегия (слот 1), пока она пишется inline, prepare lane
+        # уже пишет s4 в слот 0.
+        pipelined, launcher, _events = self._run(pipelined=True, failing_prepare="s3")
+
+        self.assertEqual(_summary(pipelined), _summary(serial))
+        self.assertEqual(launcher.presets, serial_launcher.presets)
+        self.assertEqual(
+            [os.path.basename(path) for path in launcher.paths],
+            [_PROBE_TEMP_PRESET_SLOTS[index % 2] for index in range(len(launcher.paths))],
+        )
+
+    def test_cancel_mid_scan_keeps_same_cursor(self) -> None:
+        serial, _launcher, serial_events = self._run(pipelined=False, cancel_after=3)
+        pipelined, _launcher, pipelined_events = self._run(pipelined=True, cancel_after=3)
+
+        self.assertEqual(_summary(pipelined), _summary(serial))
+        self.assertEqual(pipelined_events, serial_events)
+        self.assertTrue(pipelined.cancelled)
+        self.assertEqual(pipelined.total_tested, 5)
+
+    def test_resolution_runs_only_under_the_strategys_own_engine(self) -> None:
+        resolved: list[tuple[str, str]] = []
+
+        with tempfile.TemporaryDirectory() as tmp:
+            scanner, launcher, _events = _make_scanner(tmp, pipelined=True)
+
+            def _getaddrinfo(host, port, af=0, *args):
+                # Поток и пресет движка, под которым идёт резолв.
+                resolved.append((threading.current_thread().name, launcher.presets[-1]))
+                return _ADDR_INFO
+
+            with patch.object(socket, "getaddrinfo", side_effect=_getaddrinfo):
+                scanner._run_scan()
+
+        self.assertEqual(len(resolved), 6)
+        self.assertEqual({name for name, _preset in resolved}, {threading.current_thread().name})
+        self.assertEqual([preset for _name, preset in resolved], launcher.presets)
+
+    def test_fake_launcher_needs_no_winws2(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            scanner, launcher, _events = _make_scanner(tmp, pipelined=True)
+            self.assertEqual(scanner._winws2_exe, "")
+            self.assertIs(scanner._engine_launcher(), launcher)
+
+    def test_temp_presets_are_removed_after_pipelined_scan(self) -> None:
+        import os
+
+        from blockcheck.config import PROBE_TEMP_PRESET, PROBE_TEMP_PRESET_NEXT
+
+        with tempfile.TemporaryDirectory() as tmp:
+            scanner, _launcher, _events = _make_scanner(tmp, pipelined=True)
+            scanner._run_scan()
+            self.assertFalse(os.path.exists(os.path.join(tmp, PROBE_TEMP_PRESET)))
+            self.assertFalse(os.path.exists(os.path.join(tmp, PROBE_TEMP_PRESET_NEXT)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -23,6 +23,7 @@ class BlockcheckStrategyScannerCleanupTests(unittest.TestCase):
             preset_path = scanner._write_temp_preset(
                 "--lua-desync=fake:blob=fake_default_tls",
                 "discord.com",
+                slot=0,
             )
 
             lines = Path(preset_path).read_text(encoding="utf-8").splitlines()
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+
+PROJECT_SRC = Path(__file__).resolve().parents[1] / "src"
+if str(PROJECT_SRC) not in sys.path:
+    sys.path.insert(0, str(PROJECT_SRC))
+
+
+class HostsCatalogCacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        from hosts import catalog_cache, proxy_domains
+
+        self.proxy_domains = proxy_domains
+        self.reset = catalog_cache.reset_split_catalog_caches
+        self.reset()
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.addCleanup(self.reset)
+        self.cache_dir = Path(self._tmp.name) / "cache"
+        self.default_cache_dir = catalog_cache.default_hosts_catalog_cache_dir
+        patcher = patch.object(catalog_cache, "default_hosts_catalog_cache_dir", return_value=self.cache_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _catalog(self, services: int = 30) -> Path:
+        from hosts_catalog_fixtures import write_catalog_tree
+
+        return write_catalog_tree(Path(self._tmp.name) / "json", services=services, domains_per_service=3)
+
+    def _reference(self, catalog: Path):
+        from hosts_catalog_fixtures import reference_full_load
+
+        return reference_full_load(catalog)
+
+    def test_warm_startup_reuses_compiled_catalog_without_reading_files(self) -> None:
+        catalog = self._catalog()
+        first, first_sig = self.proxy_domains._load_split_catalog_with_sig(catalog)
+        _data, full_sig = self.proxy_domains._load_split_catalog_data_with_sig(catalog)
+
+        self.reset()
+        with patch.object(Path, "read_bytes", side_effect=AssertionError("catalog file reread")):
+            warm, warm_sig = self.proxy_domains._load_split_catalog_with_sig(catalog)
+            watcher_sig = self.proxy_domains._get_split_catalog_content_sig(catalog)
+
+        self.assertEqual(first, self._reference(catalog))
+        self.assertEqual(warm, first)
+        self.assertEqual(first_sig, full_sig)
+        self.assertEqual(warm_sig, full_sig)
+        self.assertEqual(watcher_sig, full_sig)
+
+    def test_only_changed_service_is_normalized_again(self) -> None:
+        catalog = self._catalog()
+        self.proxy_domains._load_split_catalog_with_sig(catalog)
+
+        changed = catalog / "dns" / "00004.json"
+        data = json.loads(changed.read_text(encoding="utf-8"))
+        data["name"] = "Renamed"
+        changed.write_text(json.dumps(data), encoding="utf-8")
+        past = time.time_ns() - 60_000_000_000
+        os.utime(changed, ns=(past, past))
+
+        self.reset()
+        with patch.object(
+            self.proxy_domains,
+            "_decode_json_bytes",
+            wraps=self.proxy_domains._decode_json_bytes,
+        ) as decode:
+            reloaded, sig = self.proxy_domains._load_split_catalog_with_sig(catalog)
+
+        self.assertEqual(decode.call_count, 1)
+        self.assertIn("Renamed", reloaded.service_order)
+        self.assertEqual(reloaded, self._reference(catalog))
+        self.assertEqual(sig, self.proxy_domains._load_split_catalog_data_with_sig(catalog)[1])
+
+    def test_recently_written_file_is_rehashed_despite_equal_stat(self) -> None:
+        catalog = self._catalog(services=3)
+        item = catalog / "dns" / "00000.json"
+        item.write_text('{"name": "A"}\n', encoding="utf-8")
+        stat = item.stat()
+        first = self.proxy_domains._get_split_catalog_content_sig(catalog)
+
+        item.write_text('{"name": "B"}\n', encoding="utf-8")
+        os.utime(item, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        second = self.proxy_domains._get_split_catalog_content_sig(catalog)
+
+        self.assertNotEqual(first, second)
+
+    def test_broken_cache_files_fall_back_to_full_load(self) -> None:
+        from hosts.catalog_cache import SplitCatalogCache
+
+        catalog = self._catalog()
+        self.proxy_domains._load_split_catalog_with_sig(catalog)
+        cache = SplitCatalogCache(catalog)
+        for path in (cache.manifest_path, cache.catalog_path, cache.services_path):
+            self.assertTrue(path.is_file())
+            path.write_text("{broken", encoding="utf-8")
+
+        self.reset()
+        reloaded, _sig = self.proxy_domains._load_split_catalog_with_sig(catalog)
+
+        self.assertEqual(reloaded, self._reference(catalog))
+
+    def test_cache_files_live_in_app_tmp_dir_keyed_by_catalog_path(self) -> None:
+        from config.runtime_layout import APPLICATION_PATHS
+        from hosts.catalog_cache import HOSTS_CATALOG_CACHE_DIR_NAME, SplitCatalogCache
+
+        self.assertEqual(self.default_cache_dir(), APPLICATION_PATHS.tmp_dir / HOSTS_CATALOG_CACHE_DIR_NAME)
+
+        catalog = self._catalog()
+        self.proxy_domains._load_split_catalog_with_sig(catalog)
+        self.assertEqual(sorted(path.name for path in catalog.parent.iterdir()), ["hosts_catalog"])
+        self.assertEqual(len(list(self.cache_dir.iterdir())), 3)
+
+        other = SplitCatalogCache(Path(self._tmp.name) / "other" / "hosts_catalog")
+        self.assertEqual(other.manifest_path.parent, self.cache_dir)
+        self.assertNotEqual(other.manifest_path, SplitCatalogCache(catalog).manifest_path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import random
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+
+PROJECT_SRC = Path(__file__).resolve().parents[1] / "src"
+if str(PROJECT_SRC) not in sys.path:
+    sys.path.insert(0, str(PROJECT_SRC))
+
+
+_BEGIN = "# >>> zapretgui:hosts managed begin >>>"
+_END = "# <<< zapretgui:hosts managed end <<<"
+_DOMAINS = ["a.example", "B.example", "c.example", "d.example", "e.example", "f.example"]
+
+
+def _random_hosts(rng: random.Random) -> str:
+    lines: list[str] = []
+    for _ in range(rng.randint(0, 14)):
+        kind = rng.random()
+        if kind < 0.15:
+            lines.append("")
+        elif kind < 0.25:
+            lines.append("# comment")
+        elif kind < 0.35:
+            lines.append("   ")
+        elif kind < 0.45:
+            lines.append(_BEGIN)
+            for _ in range(rng.randint(0, 3)):
+                lines.append(f"10.1.1.{rng.randint(1, 9)} {rng.choice(_DOMAINS)}")
+            if rng.random() < 0.8:
+                lines.append(_END)
+        else:
+            domains = rng.sample(_DOMAINS + [d.upper() for d in _DOMAINS], rng.randint(1, 3))
+            comment = " # keep" if rng.random() < 0.3 else ""
+            lines.append(f"10.0.0.{rng.randint(1, 9)} {' '.join(domains)}{comment}")
+    text = "\n".join(lines)
+    if lines and rng.random() < 0.7:
+        text += "\n"
+    return text
+
+
+def _random_rows(rng: random.Random) -> list[tuple[str, str]]:
+    if rng.random() < 0.2:
+        return []
+    return [(rng.choice(_DOMAINS), f"203.0.113.{rng.randint(1, 9)}") for _ in range(rng.randint(1, 4))]
+
+
+class HostsDocumentTests(unittest.TestCase):
+    def test_plan_matches_old_pipeline_on_random_hosts(self) -> None:
+        from hosts.hosts_document import HostsDocument
+        from hosts_document_reference import reference_apply
+
+        rng = random.Random(25)
+        for case in range(400):
+            text = _random_hosts(rng)
+            document = HostsDocument(text)
+            expected = text
+            for step in range(5):
+                rows = _random_rows(rng)
+                expected = reference_apply(expected, rows)
+                plan = document.plan(rows)
+                with self.subTest(case=case, step=step):
+                    self.assertEqual(plan.text, expected)
+                    self.assertEqual(plan.changed, plan.text != document.text)
+                document.commit(plan)
+                self.assertIs(document.text, plan.text)
+
+    def test_block_after_last_line_without_newline(self) -> None:
+        from hosts.hosts_document import HostsDocument
+        from hosts_document_reference import reference_apply
+
+        document = HostsDocument("# comment")
+        expected = "# comment"
+        for rows in ([("a.example", "1.1.1.1")], [("b.example", "2.2.2.2")], []):
+            expected = reference_apply(expected, rows)
+            plan = document.plan(rows)
+            self.assertEqual(plan.text, expected)
+            document.commit(plan)
+
+    def test_compaction_keeps_plans_equivalent(self) -> None:
+        from hosts import hosts_document
+        from hosts_document_reference import reference_apply
+
+        rng = random.Random(3)
+        with patch.object(hosts_document, "_COMPACT_MIN_DEAD", 0):
+            for case in range(200):
+                text = _random_hosts(rng)
+                document = hosts_document.HostsDocument(text)
+                expected = text
+                for step in range(6):
+                    rows = _random_rows(rng)
+                    expected = reference_apply(expected, rows)
+                    plan = document.plan(rows)
+                    with self.subTest(case=case, step=step):
+                        self.assertEqual(plan.text, expected)
+                    document.commit(plan)
+
+    def test_managed_rows_match_block_reader(self) -> None:
+        from hosts.hosts_document import HostsDocument
+        from hosts_document_reference import managed_hosts_block_rows
+
+        rng = random.Random(7)
+        for case in range(200):
+            text = _random_hosts(rng)
+            document = HostsDocument(text)
+            with self.subTest(case=case):
+                self.assertEqual(document.managed_rows, managed_hosts_block_rows(text.splitlines(keepends=True)))
+            plan = document.plan(_random_rows(rng))
+            document.commit(plan)
+            with self.subTest(case=case, committed=True):
+                self.assertEqual(
+                    document.managed_rows,
+                    managed_hosts_block_rows(plan.text.splitlines(keepends=True)),
+                )
+
+    def test_plan_touches_only_edited_lines_of_large_file(self) -> None:
+        from hosts.hosts_document import HostsDocument
+        from hosts_document_reference import build_hosts_text, reference_apply, service_rows
+
+        text = build_hosts_text(lines=20_000, manual=5)
+        document = HostsDocument(text)
+        rows = service_rows(start=0, count=40)
+
+        # Первое применение ставит блок на место снятой ручной строки, второе —
+        # перед первой строкой-сопоставлением (как и прежний конвейер).
+        expected = text
+        for _ in range(2):
+            plan = document.plan(rows)
+            expected = reference_apply(expected, rows)
+            self.assertEqual(plan.text, expected)
+            self.assertLessEqual(len(plan.edits), 8)
+            document.commit(plan)
+
+        again = document.plan(rows)
+        self.assertFalse(again.changed)
+        self.assertIs(again.text, document.text)
+
+        other = document.plan(service_rows(start=20, count=40))
+        self.assertTrue(other.changed)
+        self.assertEqual(other.text, reference_apply(expected, service_rows(start=20, count=40)))
+        # Старый блок лежит одним элементом — правка не растёт с числом строк в нём.
+        self.assertLessEqual(len(other.edits), 8)
+
+
+class HostsDocumentCacheTests(unittest.TestCase):
+    def test_apply_reuses_document_while_hosts_text_is_unchanged(self) -> None:
+        from hosts import hosts as hosts_module
+        from hosts.hosts_document import HostsDocument
+
+        current = {"text": "# header\n10.0.0.1 manual.example\n"}
+        manager = hosts_module.HostsManager(status_callback=lambda _msg: None)
+        manager.is_hosts_file_accessible = lambda: True
+
+        def _write(text: str) -> bool:
+            current["text"] = text
+            return True
+
+        parsed: list[str] = []
+        original_reset = HostsDocument._reset
+
+        def _counting_reset(document, text):
+            parsed.append(text)
+            return original_reset(document, text)
+
+        hosts_module.invalidate_hosts_file_cache()
+        self.addCleanup(hosts_module.invalidate_hosts_file_cache)
+        with patch.object(hosts_module, "safe_read_hosts_file", side_effect=lambda: current["text"]), patch.object(
+            hosts_module, "safe_write_hosts_file", side_effect=_write
+        ), patch.object(hosts_module, "is_ipv6_available", return_value=True), patch.object(
+            HostsDocument, "_reset", _counting_reset
+        ):
+            self.assertTrue(manager.apply_domain_ip_rows([("chatgpt.com", "1.1.1.1")]))
+            self.assertTrue(manager.apply_domain_ip_rows([("claude.ai", "2.2.2.2")]))
+            self.assertTrue(manager.apply_domain_ip_rows([("claude.ai", "2.2.2.2")]))
+            active = manager.get_active_domain_ip_map()
+
+        self.assertEqual(len(parsed), 1)
+        self.assertEqual(active, {"claude.ai": ["2.2.2.2"]})
+        self.assertEqual(
+            current["text"],
+            "# header\n\n"
+            f"{_BEGIN}\n"
+            "# Generated by ZapretGUI. Do not edit this block manually.\n"
+            "2.2.2.2 claude.ai\n"
+            f"{_END}\n\n"
+            "10.0.0.1 manual.example\n",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
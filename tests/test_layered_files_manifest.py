@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+import unittest
+
+
+class LayeredListManifestTests(unittest.TestCase):
+    def setUp(self) -> None:
+        from lists.core import layered_files
+
+        self.layered = layered_files
+        temp_dir = TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.lists_dir = Path(temp_dir.name) / "lists"
+        (self.lists_dir / "base").mkdir(parents=True)
+        (self.lists_dir / "user").mkdir()
+        for name in ("other.txt", "youtube.txt", "ipset-all.txt"):
+            (self.lists_dir / "base" / name).write_text(f"base-{name}\n", encoding="utf-8")
+        (self.lists_dir / "user" / "youtube.txt").write_text("user-youtube\n", encoding="utf-8")
+
+    def _rebuild_spy(self):
+        return mock.patch.object(
+            self.layered,
+            "_reconcile_list_file",
+            wraps=self.layered._reconcile_list_file,
+        )
+
+    def test_unchanged_tree_is_not_reconciled_again(self) -> None:
+        self.assertEqual(self.layered.rebuild_all_layered_list_files(self.lists_dir), 3)
+        manifest = json.loads((self.lists_dir / ".layered_manifest.json").read_text(encoding="utf-8"))
+        self.assertEqual(sorted(manifest["files"]), ["ipset-all.txt", "other.txt", "youtube.txt"])
+
+        with mock.patch.object(self.layered, "_reconcile_list_file", side_effect=AssertionError("no-op startup")):
+            with mock.patch.object(self.layered, "write_text_file", side_effect=AssertionError("no writes")):
+                self.assertEqual(self.layered.rebuild_all_layered_list_files(self.lists_dir), 3)
+
+        self.assertEqual((self.lists_dir / "youtube.txt").read_text(encoding="utf-8"), "base-youtube.txt\nuser-youtube\n")
+
+    def test_only_changed_lists_are_rebuilt(self) -> None:
+        self.layered.rebuild_all_layered_list_files(self.lists_dir)
+
+        (self.lists_dir / "user" / "youtube.txt").write_text("user-youtube\nyoutu.be\n", encoding="utf-8")
+        # Переустановленная база с тем же текстом: другой mtime, тот же хэш.
+        base_other = self.lists_dir / "base" / "other.txt"
+        st = base_other.stat()
+        os.utime(base_other, ns=(st.st_atime_ns, st.st_mtime_ns + 5_000_000_000))
+        (self.lists_dir / "ipset-all.txt").unlink()
+
+        with self._rebuild_spy() as reconcile:
+            self.layered.rebuild_all_layered_list_files(self.lists_dir)
+
+        self.assertEqual(sorted(call.args[1] for call in reconcile.call_args_list), ["ipset-all.txt", "youtube.txt"])
+        self.assertEqual(
+            (self.lists_dir / "youtube.txt").read_text(encoding="utf-8"),
+            "base-youtube.txt\nuser-youtube\nyoutu.be\n",
+        )
+        self.assertEqual((self.lists_dir / "ipset-all.txt").read_text(encoding="utf-8"), "base-ipset-all.txt\n")
+
+        with self._rebuild_spy() as reconcile:
+            self.layered.rebuild_all_layered_list_files(self.lists_dir)
+        self.assertEqual(reconcile.call_count, 0)
+
+    def test_broken_manifest_falls_back_to_full_reconcile(self) -> None:
+        self.layered.rebuild_all_layered_list_files(self.lists_dir)
+        (self.lists_dir / ".layered_manifest.json").write_text("{not json", encoding="utf-8")
+
+        with self._rebuild_spy() as reconcile:
+            self.assertEqual(self.layered.rebuild_all_layered_list_files(self.lists_dir), 3)
+
+        self.assertEqual(reconcile.call_count, 3)
+        manifest = json.loads((self.lists_dir / ".layered_manifest.json").read_text(encoding="utf-8"))
+        self.assertEqual(len(manifest["files"]), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
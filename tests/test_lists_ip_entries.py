@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import ipaddress
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+import unittest
+
+
+_EDGE_LINES = [
+    "1.2.3.4", " 8.8.8.8 \n", "1.2.3.4/24", "1.2.3.0/24", "1.2.3.4/32", "0.0.0.0/0", "255.255.255.255",
+    "01.2.3.4", "1.2.3", "1.2.3.256", "1.2.3.4/33", "1.2.3.0/024", "1.2.3.0/255.255.255.0", "1.2.3.4/08",
+    "1.2.3.4-1.2.3.5", "http://1.2.3.4:80/path", "https://example.com/", "::1", "2001:DB8::1/32",
+    "fe80::1%eth0", "# 1.2.3.4", "", "garbage", "١.2.3.4",
+]
+
+
+class IpEntriesTests(unittest.TestCase):
+    def test_fast_path_matches_reference(self) -> None:
+        from lists.core.ip_entries import iter_ip_entries, normalize_ip_entry, normalize_ip_entry_reference
+        from lists_ipset_reference import reference_effective_entries, synthetic_ipset_lines
+
+        for line in _EDGE_LINES:
+            self.assertEqual(normalize_ip_entry(line), normalize_ip_entry_reference(line), line)
+
+        lines = _EDGE_LINES + synthetic_ipset_lines(20_000, seed=3) + _EDGE_LINES
+        self.assertEqual(list(iter_ip_entries(lines)), reference_effective_entries(lines))
+
+    def test_collapse_matches_ipaddress(self) -> None:
+        from lists.core.ip_entries import collapse_ip_entries, normalize_ip_entries
+        from lists_ipset_reference import synthetic_ipset_lines
+
+        lines = synthetic_ipset_lines(20_000, seed=4) + ["10.0.0.0/25", "10.0.0.128/25", "10.0.1.0", "10.0.0.5"]
+        entries = normalize_ip_entries(lines)
+        networks = [ipaddress.ip_network(entry) for entry in entries]
+        expected = [
+            str(net.network_address) if net.prefixlen == net.max_prefixlen else net.with_prefixlen
+            for version in (4, 6)
+            for net in ipaddress.collapse_addresses(net for net in networks if net.version == version)
+        ]
+
+        self.assertEqual(collapse_ip_entries(entries), expected)
+        self.assertEqual(normalize_ip_entries(lines, collapse=True), expected)
+        self.assertIn("10.0.0.0/31", normalize_ip_entries(["10.0.0.1", "10.0.0.0"], collapse=True))
+        self.assertIn("10.0.0.0/23", collapse_ip_entries(["10.0.0.0/25", "10.0.0.128/25", "10.0.1.0/24"]))
+
+    def test_ipsets_manager_reuses_entries_until_file_changes(self) -> None:
+        from lists import ipsets_manager
+
+        ipsets_manager._invalidate_base_cache()
+        self.addCleanup(ipsets_manager._invalidate_base_cache)
+        with TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "ipset-all.txt"
+            path.write_text("1.2.3.4\n1.2.3.4\n10.0.0.1/8\n", encoding="utf-8")
+
+            self.assertEqual(ipsets_manager._read_effective_ip_entries(str(path)), ["1.2.3.4", "10.0.0.0/8"])
+            with mock.patch.object(ipsets_manager, "iter_ip_entries", side_effect=AssertionError("cached")):
+                self.assertEqual(ipsets_manager._count_effective_entries(str(path)), 2)
+
+            path.write_text("1.2.3.4\n10.0.0.1/8\n2001:db8::/32\n", encoding="utf-8")
+            st = path.stat()
+            os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+            self.assertEqual(ipsets_manager._count_effective_entries(str(path)), 3)
+            self.assertEqual(ipsets_manager._count_effective_entries(str(Path(temp_dir) / "missing.txt")), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import unittest
+
+
+class IpsetIndexTests(unittest.TestCase):
+    def test_index_matches_linear_scan_on_embedded_lists(self) -> None:
+        from lists.ipset_index import IpsetIndex
+        from lists_ipset_reference import embedded_ipset_sources, owner_linear, parse_networks_linear, sample_addresses
+
+        sources = embedded_ipset_sources()
+        networks = parse_networks_linear(sources)
+        index = IpsetIndex.from_sources(sources)
+        restored = IpsetIndex.from_bytes(index.to_bytes())
+
+        addresses = sample_addresses(networks, 600, seed=5)
+        for net, _label in networks[::50]:
+            addresses.append(str(net.network_address))
+            addresses.append(str(net.broadcast_address))
+        addresses += ["", "1.2.3", "01.2.3.4", "garbage", "fe80::1%eth0"]
+
+        for ip in addresses:
+            expected = owner_linear(networks, ip)
+            self.assertEqual(index.owner(ip), expected, ip)
+            self.assertEqual(restored.owner(ip), expected, ip)
+        self.assertEqual(len(restored), len(networks))
+
+    def test_first_network_wins_across_overlapping_lists(self) -> None:
+        from lists.ipset_index import IpsetIndex
+
+        index = IpsetIndex.from_sources(
+            [
+                ("games", ["# comment", "10.1.0.0/16", "2a00:1450::/32", "10.1.2.3"]),
+                ("all", ["10.0.0.0/8", "10.1.2.0/24", "2a00::/12", "2a00:1450:4000::/36", "not-an-ip"]),
+                ("any", ["0.0.0.0/0", "::/0"]),
+            ]
+        )
+
+        self.assertEqual(index.owner("10.1.2.3"), "games")
+        self.assertEqual(index.owner("10.2.0.1"), "all")
+        self.assertEqual(index.owner("11.0.0.0"), "any")
+        self.assertEqual(index.owner("2a00:1450:4001::1"), "games")
+        self.assertEqual(index.owner("2a00:1451::1"), "all")
+        self.assertEqual(index.owner("2001:db8::1"), "any")
+        self.assertEqual(len(index), 9)
+
+    def test_disk_cache_is_reused_until_files_change(self) -> None:
+        from lists import ipset_index
+
+        with TemporaryDirectory() as temp_dir:
+            lists_root = Path(temp_dir)
+            (lists_root / "base").mkdir()
+            (lists_root / "base" / "ipset-discord.txt").write_text("162.159.128.0/19\n", encoding="utf-8")
+            list_path = lists_root / "ipset-discord.txt"
+            list_path.write_text("162.159.128.0/19\n", encoding="utf-8")
+            cache_path = lists_root / "cache" / "ipset_index.bin"
+            paths = ipset_index.current_ipset_final_files(str(lists_root))
+
+            ipset_index.clear_ipset_index_cache()
+            first = ipset_index.load_ipset_index(paths, cache_path=cache_path)
+            self.assertEqual(first.owner("162.159.130.234"), "discord")
+            self.assertTrue(cache_path.is_file())
+
+            ipset_index.clear_ipset_index_cache()
+            cached = ipset_index.load_ipset_index(paths, cache_path=cache_path)
+            self.assertIsNot(cached, first)
+            self.assertEqual(cached.signature, first.signature)
+            self.assertIs(ipset_index.load_ipset_index(paths, cache_path=cache_path), cached)
+
+            list_path.write_text("162.159.128.0/19\n66.22.196.0/22\n", encoding="utf-8")
+            stat = list_path.stat()
+            os.utime(list_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            rebuilt = ipset_index.load_ipset_index(paths, cache_path=cache_path)
+            self.assertEqual(rebuilt.owner("66.22.197.1"), "discord")
+
+            cache_path.write_bytes(b"broken")
+            ipset_index.clear_ipset_index_cache()
+            self.assertEqual(ipset_index.load_ipset_index(paths, cache_path=cache_path).owner("66.22.197.1"), "discord")
+            ipset_index.clear_ipset_index_cache()
+
+
+if __name__ == "__main__":
+    unittest.main()
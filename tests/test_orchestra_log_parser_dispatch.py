@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from dataclasses import astuple
+from pathlib import Path
+import random
+import unittest
+
+
+FIXTURE = Path(__file__).parent / "fixtures" / "orchestra_debug_sample.log"
+
+
+def _event_tuple(event):
+    return None if event is None else astuple(event)
+
+
+class OrchestraLogParserDispatchTests(unittest.TestCase):
+    def _assert_matches_baseline(self, lines) -> int:
+        from orchestra.log_parser import LogParser
+        from orchestra_log_reference import BaselineLogParser
+
+        dispatch = LogParser()
+        baseline = BaselineLogParser()
+        events = 0
+        for line in lines:
+            expected = baseline.parse_line(line)
+            self.assertEqual(_event_tuple(dispatch.parse_line(line)), _event_tuple(expected), line)
+            events += expected is not None
+
+        self.assertEqual(vars(dispatch), vars(baseline))
+        return events
+
+    def test_dispatch_matches_baseline_parser_on_recorded_log(self) -> None:
+        lines = FIXTURE.read_text(encoding="utf-8").splitlines()
+
+        events = self._assert_matches_baseline(lines)
+        self.assertGreater(events, 60)
+
+    def test_dispatch_matches_baseline_parser_on_generated_log(self) -> None:
+        from orchestra_log_fixtures import generate_log_lines
+
+        self.assertGreater(self._assert_matches_baseline(generate_log_lines(40_000, seed=7)), 5_000)
+
+    def test_dispatch_matches_baseline_parser_on_mixed_log(self) -> None:
+        from orchestra_log_fixtures import generate_log_lines
+
+        # Строки записанного лога вперемешку с шумом: контекст тянется через чужие соединения.
+        recorded = FIXTURE.read_text(encoding="utf-8").splitlines()
+        rng = random.Random(11)
+        lines = list(generate_log_lines(4_000, seed=3)) + recorded * 10
+        rng.shuffle(lines)
+        self._assert_matches_baseline(lines)
+
+    def test_edge_lines_keep_previous_events(self) -> None:
+        from orchestra.log_parser import EventType, LogParser
+
+        parser = LogParser()
+        parser.parse_line("desync profile search for tcp ip=142.250.74.206 port=443 l7proto=tls ssid='' hostname='rr1.googlevideo.com'")
+        parser.parse_line("LUA: strategy-stats: APPLIED googlevideo.com = strategy 4 [circular_quality_1_1]")
+
+        rst = parser.parse_line("LUA: standard_failure_detector: incoming RST s1 in range s4096")
+        self.assertEqual((rst.event_type, rst.hostname, rst.strategy, rst.l7proto), (EventType.RST, "googlevideo.com", 4, "tls"))
+
+        # Строка с двумя ключевыми словами: LOCK стоит в цепочке раньше SUCCESS.
+        lock = parser.parse_line("LUA: slm_quality: [quic] LOCK: google.com -> strat=2 SUCCESS 1/1")
+        self.assertEqual((lock.event_type, lock.l7proto), (EventType.LOCK, "quic"))
+
+        # Локальный UDP-пакет не даёт события и проваливается дальше по цепочке.
+        self.assertIsNone(parser.parse_line("IP4: 192.168.1.5 => 192.168.1.100 proto=udp ttl=64"))
+        self.assertIsNone(parser.parse_line("packet: id=1 len=40 inbound IPv6=0"))
+        self.assertIsNone(parser.parse_line("LUA: circular_quality: current strategy 9"))
+        self.assertEqual(parser.current_strategy, 9)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+from collections import deque
+import io
+import os
+import tempfile
+import threading
+from types import SimpleNamespace
+import unittest
+from unittest.mock import Mock
+
+
+class OrchestraOutputPipelineTests(unittest.TestCase):
+    def test_chunked_reader_splits_lines_across_chunk_boundaries(self) -> None:
+        from orchestra.output_pipeline import ChunkedLineReader
+
+        data = "первая строка\r\nLUA: slm_quality: LOCK a.com -> strat=2\n\n  \rtail без перевода".encode("utf-8")
+        for chunk_size in (1, 2, 3, 7, 64 * 1024):
+            reader = ChunkedLineReader(io.BytesIO(data), chunk_size=chunk_size, encoding="utf-8")
+            lines: list[str] = []
+            while (batch := reader.read_lines()) is not None:
+                lines.extend(batch)
+            self.assertEqual(
+                lines,
+                ["первая строка", "LUA: slm_quality: LOCK a.com -> strat=2", "tail без перевода"],
+                chunk_size,
+            )
+            self.assertEqual(reader.bytes_read, len(data))
+
+    def test_debug_log_sink_rotates_instead_of_truncating(self) -> None:
+        from orchestra.output_pipeline import DebugLogSink, rotated_log_path
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "orchestra_20260101_000000.log")
+            sink = DebugLogSink(path, max_bytes=2_000)
+            sink.open()
+            for index in range(40):
+                sink.write_lines([f"line {index:03d} " + "x" * 40])
+            sink.close()
+
+            with open(path, encoding="utf-8") as f:
+                current = f.read()
+            with open(rotated_log_path(path), encoding="utf-8") as f:
+                previous = f.read()
+
+        self.assertGreaterEqual(sink.rotations, 1)
+        self.assertIn("line 039", current)
+        self.assertIn("=== Log rotated at", current)
+        self.assertTrue(current.rstrip().endswith("==="))
+        self.assertIn("line 0", previous)
+        self.assertLessEqual(len(previous), 1_000 + 60)
+
+    def test_debug_log_sink_counts_bytes_not_characters(self) -> None:
+        from orchestra.output_pipeline import DebugLogSink, rotated_log_path
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "orchestra_20260101_000000.log")
+            sink = DebugLogSink(path, max_bytes=4_000)
+            sink.open()
+            line = "строка " + "ж" * 40
+            batch = len((line + os.linesep).encode("utf-8"))
+            for _ in range(60):
+                sink.write_lines([line])
+            sink.close()
+            previous = os.path.getsize(rotated_log_path(path))
+
+        self.assertGreaterEqual(sink.rotations, 2)
+        # Ротация по байтам: в .1 не больше половины лимита плюс последняя пачка
+        self.assertLessEqual(previous, 2_000 + batch)
+
+    def test_queue_is_bounded_and_reports_depth(self) -> None:
+        from orchestra.output_pipeline import OutputPipeline
+
+        now = [100.0]
+        pipeline = OutputPipeline(max_lines=5, clock=lambda: now[0])
+        self.assertTrue(pipeline.put("10:00:00", ["a", "b", "c"]))
+        self.assertFalse(pipeline.put("10:00:00", ["d", "e", "f"]))
+        self.assertTrue(pipeline.put("10:00:01", ["g", "h"]))
+        pipeline.note_read(8, 80)
+        now[0] += 2.0
+
+        stats = pipeline.stats()
+        self.assertEqual((stats.queue_depth, stats.max_queue_depth, stats.lines_dropped), (5, 5, 3))
+        self.assertEqual(stats.read_lines_per_sec, 4.0)
+
+        self.assertEqual(pipeline.get(timeout=0), ("10:00:00", ["a", "b", "c"]))
+        pipeline.close()
+        self.assertEqual(pipeline.get(timeout=0), ("10:00:01", ["g", "h"]))
+        self.assertIsNone(pipeline.get(timeout=0))
+        self.assertEqual(pipeline.stats().queue_depth, 0)
+
+    def test_overfill_drops_only_lines_without_events(self) -> None:
+        from orchestra.output_pipeline import OutputPipeline
+
+        pipeline = OutputPipeline(max_lines=3)
+        self.assertTrue(pipeline.put("10:00:00", ["packet: id=1", "TCP: seq=1", "IP4: a => b proto=tcp"]))
+        batch = [
+            "packet: id=2 len=40 inbound",
+            "LUA: slm_quality: [tls] LOCK: youtube.com -> strat=4",
+            "TCP: seq=2 ack=1",
+        ]
+        result: list[bool] = []
+        reader = threading.Thread(target=lambda: result.append(pipeline.put("10:00:01", batch)))
+        reader.start()
+        reader.join(0.2)
+        # Место в очереди ещё не освободилось — строка с LOCK ждёт, а не теряется
+        self.assertTrue(reader.is_alive())
+
+        self.assertEqual(pipeline.get(timeout=1)[0], "10:00:00")
+        reader.join(5)
+        self.assertFalse(reader.is_alive())
+        self.assertEqual(result, [False])
+        self.assertEqual(pipeline.get(timeout=0), ("10:00:01", [batch[1]]))
+        stats = pipeline.stats()
+        self.assertEqual((stats.lines_dropped, stats.reader_waits), (2, 1))
+
+    def test_overfilled_queue_loses_no_events(self) -> None:
+        from orchestra.log_parser import LogParser
+        from orchestra.output_pipeline import OutputPipeline
+        from orchestra_log_fixtures import generate_log_lines
+
+        lines = list(generate_log_lines(20_000, seed=5))
+        expected_parser = LogParser()
+        expected = [event for line in lines if (event := expected_parser.parse_line(line)) is not None]
+
+        pipeline = OutputPipeline(max_lines=16)
+        parser = LogParser()
+        events = []
+
+        def _learn() -> None:
+            while (batch := pipeline.get(timeout=1)) is not None or not pipeline.closed:
+                if batch is None:
+                    continue
+                for line in batch[1]:
+                    event = parser.parse_line(line)
+                    if event is not None:
+                        events.append(event)
+                # Learner медленнее reader'а — очередь всё время переполнена
+                threading.Event().wait(0.0005)
+
+        learner = threading.Thread(target=_learn)
+        learner.start()
+        for start in range(0, len(lines), 40):
+            pipeline.put("10:00:00", lines[start:start + 40])
+        pipeline.close()
+        learner.join(60)
+
+        stats = pipeline.stats()
+        self.assertGreater(stats.lines_dropped, 0)
+        self.assertGreater(stats.reader_waits, 0)
+        self.assertEqual(events, expected)
+
+    def test_history_saves_are_coalesced(self) -> None:
+        from orchestra.output_pipeline import HistorySaveCoalescer
+
+        now = [0.0]
+        save = Mock()
+        history = HistorySaveCoalescer(save, interval=2.0, clock=lambda: now[0])
+        for _ in range(50):
+            history.mark()
+            history.flush_if_due()
+        save.assert_not_called()
+
+        now[0] = 2.5
+        history.flush_if_due()
+        history.flush_if_due()
+        self.assertEqual(save.call_count, 1)
+        history.flush()
+        self.assertEqual(save.call_count, 1)
+
+    def test_runner_reads_output_through_pipeline(self) -> None:
+        from orchestra.orchestra_runner import OrchestraRunner
+
+        output = (
+            "packet: id=1 len=40 inbound IPv6=0\n"
+            "desync profile search for tcp ip=142.250.74.206 port=443 l7proto=tls ssid='' hostname='rr1.youtube.com'\n"
+            "IP4: 64.233.162.198 => 192.168.1.100 proto=tcp ttl=116 sport=443 dport=55666 flags=A\n"
+            "LUA: slm_quality: [tls] LOCK: youtube.com -> strat=4\n"
+            "LUA: slm_quality: [tls] youtube.com strat=4 SUCCESS 3/3\n"
+        ).encode("utf-8")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            runner = object.__new__(OrchestraRunner)
+            runner.stop_event = threading.Event()
+            runner.running_process = SimpleNamespace(stdout=io.BytesIO(output), poll=lambda: None)
+            runner.debug_log_path = os.path.join(tmp, "orchestra_test.log")
+            runner._output_pipeline = None
+            runner._last_queue_overflow_log = 0.0
+            runner._recent_output_lines = deque(maxlen=60)
+            runner._ignored_runtime_targets_logged = set()
+            runner.last_start_attempt_ts = 0.0
+            runner.discord_fail_count = 0
+            runner.auto_restart_on_discord_fail = False
+            runner.blocked_manager = Mock(is_blocked=Mock(return_value=False))
+            runner.locked_manager = Mock(
+                locked_by_askey={"tls": {}, "http": {}, "udp": {}},
+                strategy_history={},
+                is_user_locked=Mock(return_value=False),
+            )
+            messages: list[str] = []
+            runner.output_callback = messages.append
+            runner.lock_callback = Mock()
+            runner.unlock_callback = None
+
+            runner._read_output()
+
+            with open(runner.debug_log_path, encoding="utf-8") as f:
+                debug_log = f.read()
+
+        self.assertEqual(runner.locked_manager.locked_by_askey["tls"], {"youtube.com": 4})
+        runner.lock_callback.assert_called_once_with("youtube.com", 4)
+        runner.locked_manager.increment_history.assert_called_once_with("youtube.com", 4, is_success=True)
+        runner.locked_manager.save_history.assert_called_once_with()
+        self.assertTrue(any("LOCKED: youtube.com:443 = strategy 4" in message for message in messages))
+        self.assertIn("packet: id=1 len=40 inbound IPv6=0\n", debug_log)
+
+        stats = runner.get_output_stats()
+        self.assertEqual(stats.lines_read, 5)
+        # packet:/IP4: шум не доходит до learner'а
+        self.assertEqual(stats.lines_parsed, 3)
+        self.assertEqual(stats.events, 3)
+        self.assertEqual(stats.queue_depth, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+import unittest
+
+
+_CATALOG = """
+[fake_split]
+name = fake + split
+--lua-desync=fake:blob=fake_default_tls
+--lua-desync=multisplit:pos=2
+
+[disorder]
+--lua-desync=multidisorder:pos=1,midsld
+"""
+
+
+class StrategyCatalogCacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        from profile import strategy_catalog
+
+        self.catalog = strategy_catalog
+        strategy_catalog.invalidate_strategy_catalog_cache()
+        self.addCleanup(strategy_catalog.invalidate_strategy_catalog_cache)
+        temp_dir = TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.root = Path(temp_dir.name)
+        self.catalog_dir = self.root / "profile" / "strategy_catalogs" / "winws2"
+        self.catalog_dir.mkdir(parents=True)
+        (self.catalog_dir / "tcp.txt").write_text(_CATALOG, encoding="utf-8")
+        (self.catalog_dir / "udp.txt").write_text("[quic_fake]\n--lua-desync=fake:blob=quic\n", encoding="utf-8")
+
+        from core.paths import AppPaths
+
+        self.paths = AppPaths(user_root=self.root, local_root=self.root)
+        self.blob = self.root / "tmp" / "strategy_catalogs" / "winws2.bin"
+        self.default_cache_dir = strategy_catalog.strategy_catalog_cache_dir
+        patcher = mock.patch.object(strategy_catalog, "strategy_catalog_cache_dir", return_value=self.blob.parent)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_disk_blob_restores_parsed_catalogs_lazily(self) -> None:
+        parsed = dict(self.catalog.load_strategy_catalogs(self.paths, "winws2"))
+        self.assertTrue(self.blob.is_file())
+
+        self.catalog.invalidate_strategy_catalog_cache()
+        with mock.patch.object(self.catalog, "_parse_catalog_file", side_effect=AssertionError("must use blob")):
+            with mock.patch.object(self.catalog, "describe_strategy_visual", side_effect=AssertionError("must use blob")):
+                cached = self.catalog.load_strategy_catalogs(self.paths, "winws2")
+                self.assertEqual(sorted(cached), ["tcp", "udp"])
+                tcp = cached["tcp"]
+                self.assertNotIn("udp", repr(cached).split("loaded=")[1])
+                self.assertEqual(dict(cached), parsed)
+        self.assertIs(cached["tcp"], tcp)
+        self.assertEqual(tcp["fake_split"].name, "fake + split")
+        self.assertEqual(tcp["fake_split"].visual, parsed["tcp"]["fake_split"].visual)
+
+    def test_signature_is_debounced_until_ttl_or_directory_change(self) -> None:
+        now = [100.0]
+        with mock.patch.object(self.catalog, "_clock", lambda: now[0]):
+            first_signature, first = self.catalog.load_strategy_catalogs_with_signature(self.paths, "winws2")
+
+            tcp_path = self.catalog_dir / "tcp.txt"
+            tcp_path.write_text(_CATALOG + "\n[extra]\n--lua-desync=fake:blob=x\n", encoding="utf-8")
+            stat = tcp_path.stat()
+            os.utime(tcp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            with mock.patch.object(self.catalog, "_tree_signature", side_effect=AssertionError("debounced")):
+                signature, catalogs = self.catalog.load_strategy_catalogs_with_signature(self.paths, "winws2")
+            self.assertEqual(signature, first_signature)
+            self.assertIs(catalogs, first)
+
+            now[0] += self.catalog._SIGNATURE_TTL_SECONDS
+            signature, catalogs = self.catalog.load_strategy_catalogs_with_signature(self.paths, "winws2")
+            self.assertNotEqual(signature, first_signature)
+            self.assertIn("extra", catalogs["tcp"])
+
+            # Новый файл меняет mtime папки — подпись пересчитывается сразу.
+            (self.catalog_dir / "voice.txt").write_text("[stun]\n--lua-desync=fake:blob=stun\n", encoding="utf-8")
+            dir_stat = self.catalog_dir.stat()
+            os.utime(self.catalog_dir, ns=(dir_stat.st_atime_ns, dir_stat.st_mtime_ns + 1_000_000_000))
+            _signature, catalogs = self.catalog.load_strategy_catalogs_with_signature(self.paths, "winws2")
+            self.assertIn("stun", catalogs["voice"])
+
+    def test_broken_blob_falls_back_to_parsing(self) -> None:
+        self.catalog.load_strategy_catalogs(self.paths, "winws2")
+        blob = self.blob
+        blob.write_bytes(b"ZSCAT001\xff\xff")
+        self.catalog.invalidate_strategy_catalog_cache()
+
+        catalogs = self.catalog.load_strategy_catalogs(self.paths, "winws2")
+        self.assertIn("quic_fake", catalogs["udp"])
+        self.assertTrue(blob.read_bytes().startswith(b"ZSCAT001") and len(blob.read_bytes()) > 10)
+
+    def test_corrupt_blob_body_is_a_cache_miss(self) -> None:
+        expected = dict(self.catalog.load_strategy_catalogs(self.paths, "winws2"))
+        data = self.blob.read_bytes()
+        # Заголовок цел, тело обрезано: секции не читаются marshal'ом.
+        self.blob.write_bytes(data[: len(data) - 40])
+        self.catalog.invalidate_strategy_catalog_cache()
+
+        catalogs = self.catalog.load_strategy_catalogs(self.paths, "winws2")
+        self.assertEqual(dict(catalogs), expected)
+        self.assertFalse(self.blob.exists())
+
+        self.catalog.invalidate_strategy_catalog_cache()
+        self.assertEqual(dict(self.catalog.load_strategy_catalogs(self.paths, "winws2")), expected)
+        self.assertTrue(self.blob.is_file())
+
+    def test_app_version_or_cache_format_change_drops_blob(self) -> None:
+        self.catalog.load_strategy_catalogs(self.paths, "winws2")
+        for patched in (
+            mock.patch.object(self.catalog, "_app_version", return_value="0.0.0-upgraded"),
+            mock.patch.object(self.catalog, "_CACHE_FORMAT", self.catalog._CACHE_FORMAT + 1),
+        ):
+            self.catalog.invalidate_strategy_catalog_cache()
+            with patched, mock.patch.object(
+                self.catalog, "_parse_catalog_file", wraps=self.catalog._parse_catalog_file
+            ) as parse:
+                catalogs = self.catalog.load_strategy_catalogs(self.paths, "winws2")
+                self.assertIn("fake_split", catalogs["tcp"])
+            self.assertEqual(parse.call_count, 2)
+
+    def test_default_cache_dir_is_application_tmp_dir(self) -> None:
+        from config.runtime_layout import APPLICATION_PATHS
+
+        self.assertEqual(
+            self.default_cache_dir(),
+            APPLICATION_PATHS.tmp_dir / self.catalog.STRATEGY_CATALOG_CACHE_DIR_NAME,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
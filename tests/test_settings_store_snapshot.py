@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import copy
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+
+class SettingsStoreSnapshotTests(unittest.TestCase):
+    def setUp(self) -> None:
+        from settings import store as settings_store
+
+        self.store = settings_store
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        main_directory = patch("settings.store.MAIN_DIRECTORY", str(Path(temp_dir.name)))
+        main_directory.start()
+        self.addCleanup(main_directory.stop)
+        self.addCleanup(settings_store.flush_debounced_settings)
+        settings_store.reset_settings()
+
+    def test_snapshot_is_shared_and_read_only(self) -> None:
+        snapshot = self.store.settings_snapshot()
+
+        self.assertIs(self.store.settings_snapshot(), snapshot)
+        self.assertIsInstance(snapshot["window"], dict)
+        with self.assertRaises(TypeError):
+            snapshot["window"]["opacity"] = 10
+        with self.assertRaises(TypeError):
+            snapshot["blockcheck"]["user_domains"].append("example.org")
+
+        copied = copy.deepcopy(snapshot)
+        copied["window"]["opacity"] = 10
+        self.assertEqual(type(copied["window"]), dict)
+
+        data = self.store.read_settings()
+        data["window"]["opacity"] = 10
+        self.assertEqual(self.store.get_window_opacity(), 100)
+
+        self.store.set_window_opacity(50)
+        self.assertIsNot(self.store.settings_snapshot(), snapshot)
+        self.assertEqual(snapshot["window"]["opacity"], 100)
+        self.assertEqual(self.store.read_setting(("window", "opacity")), 50)
+
+    def test_transaction_writes_once_and_reads_its_own_changes(self) -> None:
+        with patch.object(self.store, "atomic_write_text", wraps=self.store.atomic_write_text) as write:
+            with self.store.settings_transaction():
+                self.store.set_tg_proxy_upstream_host("proxy.example.org")
+                self.store.set_tg_proxy_upstream_port(1080)
+                self.store.set_tg_proxy_upstream_user("user")
+                with self.store.settings_transaction():
+                    self.store.set_tg_proxy_upstream_pass("secret")
+                self.assertEqual(self.store.get_tg_proxy_upstream_host(), "proxy.example.org")
+                self.assertEqual(write.call_count, 0)
+
+        self.assertEqual(write.call_count, 1)
+        self.store._SETTINGS_CACHE = None
+        self.assertEqual(self.store.get_tg_proxy_upstream_port(), 1080)
+        self.assertEqual(self.store.get_tg_proxy_upstream_pass(), "secret")
+
+    def test_transaction_reads_are_normalized_and_read_only(self) -> None:
+        with self.store.settings_transaction():
+            self.store.set_window_opacity(500)
+            self.assertEqual(self.store.get_window_opacity(), 100)
+            window = self.store.set_window_settings({"width": "640", "tray_close_mode": "bogus"})
+            self.assertEqual(window["width"], 640)
+            self.assertEqual(window["tray_close_mode"], self.store.get_tray_close_mode())
+
+            snapshot = self.store.settings_snapshot()
+            self.assertIs(self.store.settings_snapshot(), snapshot)
+            with self.assertRaises(TypeError):
+                snapshot["window"]["opacity"] = 10
+            with self.assertRaises(TypeError):
+                self.store.read_setting(("blockcheck", "user_domains")).append("example.org")
+
+            self.store.set_window_opacity(40)
+            self.assertIsNot(self.store.settings_snapshot(), snapshot)
+            self.assertEqual(snapshot["window"]["opacity"], 100)
+            self.assertEqual(self.store.read_setting(("window", "opacity")), 40)
+
+        self.assertEqual(self.store.get_window_geometry()["width"], 640)
+        self.assertEqual(self.store.get_window_opacity(), 40)
+
+    def test_transaction_rolls_back_on_error(self) -> None:
+        with patch.object(self.store, "atomic_write_text", side_effect=AssertionError("rolled back")):
+            with self.assertRaises(RuntimeError):
+                with self.store.settings_transaction():
+                    self.store.set_window_opacity(40)
+                    raise RuntimeError("boom")
+
+        self.assertEqual(self.store.get_window_opacity(), 100)
+
+    def test_debounced_updates_coalesce_into_one_write(self) -> None:
+        with patch.object(self.store, "atomic_write_text", wraps=self.store.atomic_write_text) as write:
+            for value in (90, 80, 70):
+                self.store.update_settings_debounced(
+                    "window_opacity", lambda value=value: self.store.set_window_opacity(value), delay=60
+                )
+            self.store.update_settings_debounced(
+                "tinted", lambda: self.store.set_tinted_background_intensity(33), delay=60
+            )
+            self.assertEqual(self.store.get_window_opacity(), 100)
+
+            self.store.flush_debounced_settings()
+            self.store.flush_debounced_settings()
+
+        self.assertEqual(write.call_count, 1)
+        self.assertEqual(self.store.get_window_opacity(), 70)
+        self.assertEqual(self.store.get_tinted_background_intensity(), 33)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import sys
+import unittest
+from pathlib import Path
+
+
+TOOLS_DIR = Path(__file__).resolve().parents[1] / "tools"
+if str(TOOLS_DIR) not in sys.path:
+    sys.path.insert(0, str(TOOLS_DIR))
+
+
+class TelegramProxyBenchTests(unittest.TestCase):
+    def _run(self, mode: str, route: str):
+        from bench_telegram_proxy import LoadConfig, run_load
+
+        return run_load(
+            LoadConfig(
+                mode=mode,
+                route=route,
+                clients=3,
+                packets=4,
+                packet_size=2048,
+                download_factor=2,
+                pool_size=1,
+                warmup=0.1,
+                timeout=30.0,
+            )
+        )
+
+    def test_socks5_clients_round_trip_through_local_wss_relay(self) -> None:
+        report = self._run("socks5", "wss")
+
+        self.assertEqual((report.completed, report.failures), (3, 0), report.errors)
+        self.assertGreater(report.relay_handshakes, 0)
+        self.assertGreater(report.download_mb_s, report.upload_mb_s)
+        self.assertLessEqual(report.connect_p50_ms, report.connect_p99_ms)
+
+    def test_mtproxy_clients_round_trip_over_tcp_and_upstream_routes(self) -> None:
+        for route in ("tcp", "upstream"):
+            with self.subTest(route=route):
+                report = self._run("mtproxy", route)
+                self.assertEqual((report.completed, report.failures), (3, 0), report.errors)
+                self.assertIn("proxy_cpu_seconds", report.as_dict())
+
+
+if __name__ == "__main__":
+    unittest.main()
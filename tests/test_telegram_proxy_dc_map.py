@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import random
+import unittest
+from ipaddress import IPv4Address, IPv6Address
+
+
+def _reference(dc_map, ip: str) -> tuple[int, tuple[int, bool], bool]:
+    from telegram_proxy_dc_reference import ip_to_dc_linear, is_telegram_ip_linear
+
+    entry = dc_map.IP_TO_DC.get(ip)
+    dc = ip_to_dc_linear(ip)
+    return dc, entry if entry is not None else (dc, False), is_telegram_ip_linear(ip)
+
+
+def _v4_candidates(dc_map) -> list[str]:
+    values: set[int] = set()
+    # Всё пространство Telegram целиком плюс окрестности каждой границы.
+    for lo, hi in dc_map._TG_RANGES:
+        values.update(range(max(0, lo - 256), min(1 << 32, hi + 257)))
+    for net, _dc in dc_map._SUBNET_TO_DC:
+        for edge in (int(net.network_address), int(net.broadcast_address)):
+            values.update(range(max(0, edge - 3), min(1 << 32, edge + 4)))
+    rng = random.Random(9)
+    values.update(rng.getrandbits(32) for _ in range(20_000))
+    values.update((0, (1 << 32) - 1))
+    return [str(IPv4Address(value)) for value in sorted(values)]
+
+
+def _v6_candidates(dc_map) -> list[str]:
+    rng = random.Random(11)
+    result: list[str] = []
+    prefixes = [net for net, _dc in dc_map._V6_SUBNET_TO_DC] + list(dc_map.TELEGRAM_V6_CIDRS)
+    for net in prefixes:
+        first = int(net.network_address)
+        last = int(net.broadcast_address)
+        for value in (first - 1, first, first + 1, last - 1, last, last + 1):
+            result.append(str(IPv6Address(value % (1 << 128))))
+        for _ in range(200):
+            result.append(str(IPv6Address(first + rng.randrange(last - first + 1))))
+    result.extend(str(IPv6Address(rng.getrandbits(128))) for _ in range(2_000))
+    return result
+
+
+class TelegramProxyDcMapIndexTests(unittest.TestCase):
+    def test_index_matches_linear_lookup_for_ipv4_space(self) -> None:
+        from telegram_proxy.proxy import dc_map
+
+        index = dc_map.DcIndex()
+        candidates = _v4_candidates(dc_map) + list(dc_map.IP_TO_DC)
+        for ip in candidates:
+            info = index.lookup(ip)
+            self.assertEqual((info.dc, info.dc_media, info.is_telegram), _reference(dc_map, ip), ip)
+        self.assertGreater(len(candidates), 70_000)
+
+    def test_index_matches_linear_lookup_for_ipv6_and_odd_input(self) -> None:
+        from telegram_proxy.proxy import dc_map
+
+        odd = [
+            "", "example.com", "91.108.1", "149.154.167", "01.108.4.1", "91.108.004.1",
+            "256.1.1.1", "1.2.3.4.5", "0x5b.108.4.1", "::", "::ffff:149.154.167.51",
+            "2001:67c:4e8:f002::a%eth0", "2001:67C:4E8:F002:0:0:0:A", "fe80::1", "not:an:ip",
+        ]
+        index = dc_map.DcIndex()
+        for ip in _v6_candidates(dc_map) + odd:
+            info = index.lookup(ip)
+            self.assertEqual((info.dc, info.dc_media, info.is_telegram), _reference(dc_map, ip), ip)
+
+    def test_public_helpers_use_index(self) -> None:
+        from telegram_proxy.proxy import dc_map
+
+        self.assertEqual(dc_map.ip_to_dc("149.154.175.50"), 1)
+        self.assertEqual(dc_map.ip_to_dc_media("149.154.167.151"), (2, True))
+        self.assertEqual(dc_map.ip_to_dc_media("149.154.167.91"), (4, False))
+        self.assertTrue(dc_map.is_telegram_ip("2a0a:f280:203::1"))
+        self.assertFalse(dc_map.is_telegram_ip("8.8.8.8"))
+
+    def test_user_overrides_merge_as_exact_entries(self) -> None:
+        from telegram_proxy.proxy import dc_map
+
+        overrides = dc_map.parse_dc_endpoint_overrides("4:203.0.113.7, 2:149.154.167.220")
+        index = dc_map.build_dc_index(overrides)
+
+        self.assertEqual(index.lookup("203.0.113.7").dc_media, (4, False))
+        self.assertTrue(index.lookup("203.0.113.7").is_telegram)
+        self.assertFalse(dc_map.is_telegram_ip("203.0.113.7"))
+        self.assertEqual(index.lookup("149.154.167.220").dc_media, (2, False))
+        self.assertIsNone(dc_map.default_dc_index().lookup("203.0.113.7").exact)
+        self.assertIs(dc_map.build_dc_index({}), dc_map.default_dc_index())
+
+    def test_user_override_keeps_media_flag_of_known_address(self) -> None:
+        from telegram_proxy.proxy import dc_map
+
+        overrides = dc_map.parse_dc_endpoint_overrides("2:149.154.167.151 4:149.154.167.91 5:203.0.113.9")
+        index = dc_map.build_dc_index(overrides)
+
+        self.assertEqual(index.lookup("149.154.167.151").dc_media, (2, True))
+        self.assertEqual(index.lookup("149.154.167.91").dc_media, (4, False))
+        self.assertEqual(index.lookup("203.0.113.9").dc_media, (5, False))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import os
+import struct
+import unittest
+from unittest.mock import patch
+
+
+def _build_client_init(proto_tag: bytes, dc_idx: int) -> bytes:
+    from telegram_proxy.proxy.aes_ctr import aes_ctr_keystream
+
+    init = bytearray(os.urandom(64))
+    keystream = aes_ctr_keystream(bytes(init[8:40]), bytes(init[40:56]), 64)
+    tail = proto_tag + struct.pack("<h", dc_idx) + b"\x00\x00"
+    init[56:64] = bytes(a ^ b for a, b in zip(tail, keystream[56:64]))
+    return bytes(init)
+
+
+def _legacy_patch(data: bytes, dc: int) -> bytes:
+    from telegram_proxy.proxy.aes_ctr import aes_ctr_keystream
+
+    new_dc = struct.pack("<h", dc)
+    ks = aes_ctr_keystream(bytes(data[8:40]), bytes(data[40:56]), 64)
+    patched = bytearray(data[:64])
+    patched[60] = ks[60] ^ new_dc[0]
+    patched[61] = ks[61] ^ new_dc[1]
+    return bytes(patched) + data[64:]
+
+
+class TelegramProxyInitPacketTests(unittest.TestCase):
+    def test_init_packet_reports_dc_media_and_proto_tag(self) -> None:
+        from telegram_proxy.proxy.mtproto import (
+            PROTO_TAG_ABRIDGED,
+            PROTO_TAG_INTERMEDIATE,
+            InitPacket,
+            dc_from_init,
+        )
+
+        media = InitPacket(_build_client_init(PROTO_TAG_INTERMEDIATE, -4))
+        self.assertEqual((media.dc, media.is_media, media.proto_tag), (4, True, PROTO_TAG_INTERMEDIATE))
+
+        plain = InitPacket(_build_client_init(PROTO_TAG_ABRIDGED, 2))
+        self.assertEqual((plain.dc, plain.is_media), (2, False))
+
+        broken = _build_client_init(b"\x01\x02\x03\x04", 2)
+        self.assertIsNone(InitPacket(broken).dc)
+        self.assertEqual(dc_from_init(broken), (None, False))
+
+    def test_patched_init_matches_keystream_patch_and_keeps_trailing_data(self) -> None:
+        from telegram_proxy.proxy.mtproto import PROTO_TAG_INTERMEDIATE, InitPacket, patch_init_dc
+
+        init = _build_client_init(PROTO_TAG_INTERMEDIATE, 999) + b"tail"
+
+        self.assertEqual(InitPacket(init).patched(-5), _legacy_patch(init, -5))
+        self.assertEqual(patch_init_dc(init, 3), _legacy_patch(init, 3))
+        self.assertEqual(InitPacket(InitPacket(init).patched(-5)).dc, 5)
+
+    def test_init_packet_runs_one_aes_pass_for_dc_patch_and_splitter(self) -> None:
+        from telegram_proxy.proxy import aes_ctr
+        from telegram_proxy.proxy.mtproto import PROTO_TAG_INTERMEDIATE, InitPacket, MsgSplitter
+
+        init = _build_client_init(PROTO_TAG_INTERMEDIATE, 700)
+        reference = MsgSplitter(init)
+        tgcrypto = aes_ctr._tgcrypto()
+
+        with patch.object(tgcrypto, "ctr256_encrypt", wraps=tgcrypto.ctr256_encrypt) as encrypt:
+            packet = InitPacket(init)
+            packet.patched(2)
+            splitter = MsgSplitter(packet)
+
+        self.assertEqual(encrypt.call_count, 1)
+        payload = os.urandom(40)
+        self.assertEqual(splitter.split(payload), reference.split(payload))
+
+    def test_second_splitter_gets_fresh_decryptor(self) -> None:
+        from telegram_proxy.proxy.mtproto import PROTO_TAG_ABRIDGED, InitPacket, MsgSplitter
+
+        init = _build_client_init(PROTO_TAG_ABRIDGED, 700)
+        packet = InitPacket(init)
+        first = MsgSplitter(packet)
+        second = MsgSplitter(packet)
+        payload = os.urandom(9)
+
+        self.assertEqual(first.split(payload), second.split(payload))
+
+
+if __name__ == "__main__":
+    unittest.main()
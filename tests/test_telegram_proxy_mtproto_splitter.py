@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import os
+import random
+import struct
+import unittest
+
+
+def _abridged_packet(rng: random.Random) -> bytes:
+    words = rng.choice((1, 2, 31, 126, 127, 128, 600))
+    if words < 0x7F:
+        header = bytes([words | (0x80 if rng.random() < 0.1 else 0)])
+    else:
+        header = b"\x7f" + words.to_bytes(3, "little")
+    return header + rng.randbytes(words * 4)
+
+
+def _intermediate_packet(rng: random.Random) -> bytes:
+    size = rng.choice((4, 8, 17, 1024, 70000))
+    return struct.pack("<I", size) + rng.randbytes(size)
+
+
+def _rechunk(data: bytes, rng: random.Random) -> list[bytes]:
+    chunks = []
+    offset = 0
+    while offset < len(data):
+        step = rng.choice((1, 2, 3, 5, 64, 4096, 131072))
+        chunks.append(data[offset:offset + step])
+        offset += step
+    return chunks
+
+
+def _build_client_init(proto_tag: bytes) -> bytes:
+    from telegram_proxy.proxy.aes_ctr import aes_ctr_keystream
+
+    init = bytearray(os.urandom(64))
+    keystream = aes_ctr_keystream(bytes(init[8:40]), bytes(init[40:56]), 64)
+    tail = proto_tag + struct.pack("<h", 2) + b"\x00\x00"
+    init[56:64] = bytes(a ^ b for a, b in zip(tail, keystream[56:64]))
+    return bytes(init)
+
+
+class TelegramProxyMTProtoSplitterTests(unittest.TestCase):
+    def _assert_boundaries_survive_rechunking(self, proto_tag: bytes, make_packet) -> None:
+        # Рандомизированный регрессионный тест: пакеты и нарезка целиком
+        # выводятся из seed, упавший seed воспроизводится.
+        from telegram_proxy.proxy.aes_ctr import AesCtrStream
+        from telegram_proxy.proxy.mtproxy import MTProxyMsgSplitter, generate_relay_init
+
+        for seed in range(25):
+            rng = random.Random(seed)
+            relay_init = generate_relay_init(proto_tag, dc=2, is_media=False)
+            packets = [make_packet(rng) for _ in range(rng.randint(1, 12))]
+            encryptor = AesCtrStream(relay_init[8:40], relay_init[40:56])
+            encryptor.update(b"\x00" * 64)
+            encrypted = [encryptor.update(packet) for packet in packets]
+
+            splitter = MTProxyMsgSplitter(relay_init, proto_tag)
+            frames = []
+            for chunk in _rechunk(b"".join(encrypted), rng):
+                frames.extend(bytes(part) for part in splitter.split(chunk))
+            frames.extend(splitter.flush())
+
+            self.assertEqual(frames, encrypted, f"seed={seed}")
+
+    def test_abridged_boundaries_do_not_depend_on_tcp_segmentation(self) -> None:
+        from telegram_proxy.proxy.mtproto import PROTO_TAG_ABRIDGED
+
+        self._assert_boundaries_survive_rechunking(PROTO_TAG_ABRIDGED, _abridged_packet)
+
+    def test_intermediate_boundaries_do_not_depend_on_tcp_segmentation(self) -> None:
+        from telegram_proxy.proxy.mtproto import PROTO_TAG_INTERMEDIATE, PROTO_TAG_SECURE
+
+        self._assert_boundaries_survive_rechunking(PROTO_TAG_INTERMEDIATE, _intermediate_packet)
+        self._assert_boundaries_survive_rechunking(PROTO_TAG_SECURE, _intermediate_packet)
+
+    def test_whole_packets_are_returned_as_views_and_tail_waits_for_flush(self) -> None:
+        from telegram_proxy.proxy.aes_ctr import AesCtrStream
+        from telegram_proxy.proxy.mtproto import PROTO_TAG_INTERMEDIATE, MsgSplitter
+
+        init = _build_client_init(PROTO_TAG_INTERMEDIATE)
+        encryptor = AesCtrStream(init[8:40], init[40:56])
+        encryptor.update(b"\x00" * 64)
+        first = encryptor.update(struct.pack("<I", 8) + b"12345678")
+        partial = encryptor.update(struct.pack("<I", 16) + b"abcd")
+
+        splitter = MsgSplitter(init)
+        parts = splitter.split(first + partial)
+
+        self.assertEqual(parts, [first])
+        self.assertIsInstance(parts[0], memoryview)
+        self.assertEqual(splitter.flush(), [partial])
+        self.assertEqual(splitter.flush(), [])
+
+    def test_zero_length_packet_disables_splitting_for_the_rest_of_stream(self) -> None:
+        from telegram_proxy.proxy.aes_ctr import AesCtrStream
+        from telegram_proxy.proxy.mtproto import PROTO_TAG_ABRIDGED, MsgSplitter
+
+        init = _build_client_init(PROTO_TAG_ABRIDGED)
+        encryptor = AesCtrStream(init[8:40], init[40:56])
+        encryptor.update(b"\x00" * 64)
+        good = encryptor.update(b"\x01abcd")
+        broken = encryptor.update(b"\x00garbage")
+        later = encryptor.update(b"\x01wxyz")
+
+        splitter = MsgSplitter(init)
+
+        self.assertEqual(splitter.split(good + broken), [good, broken])
+        self.assertEqual(splitter.split(later), [later])
+
+    def test_bogus_length_header_forwards_bytes_immediately(self) -> None:
+        from telegram_proxy.proxy.aes_ctr import AesCtrStream
+        from telegram_proxy.proxy.mtproto import (
+            MAX_MTPROTO_PACKET_LEN,
+            PROTO_TAG_ABRIDGED,
+            PROTO_TAG_INTERMEDIATE,
+            MsgSplitter,
+        )
+
+        cases = (
+            (PROTO_TAG_INTERMEDIATE, struct.pack("<I", 0x7FFFFFF0)),
+            (PROTO_TAG_INTERMEDIATE, struct.pack("<I", MAX_MTPROTO_PACKET_LEN + 4)),
+            (PROTO_TAG_ABRIDGED, b"\x7f\xff\xff\xff"),
+        )
+        for proto_tag, header in cases:
+            init = _build_client_init(proto_tag)
+            encryptor = AesCtrStream(init[8:40], init[40:56])
+            encryptor.update(b"\x00" * 64)
+            head = encryptor.update(header[:2])
+            broken = encryptor.update(header[2:] + b"payload")
+            later = encryptor.update(os.urandom(4096))
+
+            splitter = MsgSplitter(init)
+
+            with self.subTest(proto_tag=proto_tag, header=header):
+                # Заголовок разорван между чтениями: первые байты ждут остаток.
+                self.assertEqual(splitter.split(head), [])
+                self.assertEqual([bytes(part) for part in splitter.split(broken)], [head + broken])
+                self.assertEqual(splitter.split(later), [later])
+                self.assertEqual(splitter.flush(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
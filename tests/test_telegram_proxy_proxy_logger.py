@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import logging
+import sys
 import tempfile
 import unittest
 from pathlib import Path
@@ -9,6 +10,11 @@ from unittest.mock import patch
 from telegram_proxy import proxy_logger
 
 
+TOOLS_DIR = Path(__file__).resolve().parents[1] / "tools"
+if str(TOOLS_DIR) not in sys.path:
+    sys.path.insert(0, str(TOOLS_DIR))
+
+
 class TelegramProxyLoggerTests(unittest.TestCase):
     def setUp(self) -> None:
         self._file_logger = logging.getLogger("tg_proxy_file")
@@ -38,6 +44,7 @@ class TelegramProxyLoggerTests(unittest.TestCase):
                 self.assertFalse(log_path.exists())
 
                 logger.log("первая строка Telegram Proxy")
+                self.assertTrue(logger.flush_pending())
                 for handler in self._file_logger.handlers:
                     handler.flush()
 
@@ -47,8 +54,61 @@ class TelegramProxyLoggerTests(unittest.TestCase):
                     log_path.read_text(encoding="utf-8"),
                 )
 
+                logger.shutdown()
                 self._close_current_handlers()
 
+    def test_writer_thread_keeps_order_and_drain_semantics(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            logger = proxy_logger.ProxyLogger(ring_size=5, log_dir=temp_dir)
+            try:
+                for index in range(1000):
+                    logger.log(f"line {index}")
+
+                self.assertEqual(logger.drain(), [f"line {index}" for index in range(1000)])
+                self.assertEqual(logger.drain(), [])
+                self.assertEqual(logger.get_recent(), [f"line {index}" for index in range(995, 1000)])
+                self.assertTrue(logger.flush_pending())
+
+                written = Path(logger.log_file_path).read_text(encoding="utf-8").splitlines()
+                self.assertEqual([line.split("  ", 1)[1] for line in written], [f"line {index}" for index in range(1000)])
+                self.assertRegex(written[0], r"^\d{4}-\d\d-\d\d \d\d:\d\d:\d\d  line 0$")
+            finally:
+                logger.shutdown()
+                for handler in list(logger._logger.handlers):
+                    logger._logger.removeHandler(handler)
+                    handler.close()
+
+    def test_throttled_lines_are_suppressed_and_counted(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            logger = proxy_logger.ProxyLogger(log_dir=temp_dir)
+            clock = [100.0]
+            try:
+                with patch.object(proxy_logger.time, "monotonic", lambda: clock[0]):
+                    results = [logger.log_throttled("сброс соединения", interval=10.0) for _ in range(5)]
+                    clock[0] += 11.0
+                    results.append(logger.log_throttled("сброс соединения", interval=10.0))
+
+                self.assertEqual(results, [True, False, False, False, False, True])
+                lines = logger.drain()
+                self.assertEqual(len(lines), 2)
+                self.assertIn("ещё 4", lines[1])
+            finally:
+                logger.shutdown()
+                for handler in list(logger._logger.handlers):
+                    logger._logger.removeHandler(handler)
+                    handler.close()
+
+    def test_log_lag_benchmark_reports_each_mode(self) -> None:
+        from bench_proxy_log_lag import LogLagConfig, run_log_lag
+
+        config = LogLagConfig(duration=0.2, burst=10)
+        for mode in ("off", "queued"):
+            with self.subTest(mode=mode):
+                report = run_log_lag(mode, config)
+                self.assertGreater(report.probes, 0)
+                self.assertLessEqual(report.lag_p50_ms, report.lag_max_ms)
+                self.assertEqual(report.lines > 0, mode == "queued")
+
 
 if __name__ == "__main__":
     unittest.main()
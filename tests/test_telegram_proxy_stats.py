@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import random
+import tempfile
+import unittest
+
+
+class TelegramProxyStatsTests(unittest.TestCase):
+    def test_log_histogram_percentiles_stay_within_bucket_precision(self) -> None:
+        from telegram_proxy.proxy.stats import LogHistogram
+
+        rng = random.Random(3)
+        values = sorted(int(rng.lognormvariate(11.0, 0.8)) for _ in range(5000))
+        histogram = LogHistogram()
+        for value in values:
+            histogram.record(value)
+
+        for fraction in (0.5, 0.9, 0.99):
+            exact = values[int(fraction * len(values)) - 1]
+            self.assertAlmostEqual(histogram.percentile(fraction) / exact, 1.0, delta=0.13)
+        self.assertEqual(histogram.count, len(values))
+        self.assertEqual(histogram.max, values[-1])
+
+    def test_route_events_are_a_fixed_ring(self) -> None:
+        from telegram_proxy.proxy.stats import ROUTE_EVENT_RING, ProxyStats
+
+        stats = ProxyStats(route_events=[])
+        for dc in range(1, 31):
+            stats.record_route_event(dc=dc, is_media=False, route="WSS", status="OK")
+
+        self.assertEqual(len(stats.route_events), ROUTE_EVENT_RING)
+        self.assertEqual(stats.route_events[0].dc, 31 - ROUTE_EVENT_RING)
+        self.assertEqual(stats.route_events[-1].dc, 30)
+
+    def test_snapshot_is_immutable_and_reads_like_stats(self) -> None:
+        from telegram_proxy.proxy.stats import ProxyStats
+
+        stats = ProxyStats(bytes_sent=10, pool_hits=7, pool_misses=2)
+        stats.recv_zero_per_dc[2] = 1
+        stats.record_connect("TCP fallback", 2, 0.120)
+        stats.record_connect("WSS", 4, 0.050)
+        stats.record_transfer("upstream", 2, 1_000_000, 3_000_000, 2.0)
+        stats.record_route_event(dc=2, is_media=True, route="WSS", status="OK")
+
+        snapshot = stats.snapshot()
+        stats.bytes_sent = 99
+        stats.recv_zero_per_dc[4] = 5
+        stats.record_route_event(dc=4, is_media=False, route="TCP", status="OK")
+
+        self.assertEqual(snapshot.bytes_sent, 10)
+        self.assertEqual(snapshot.pool_hits, 7)
+        self.assertEqual(dict(snapshot.recv_zero_per_dc), {2: 1})
+        self.assertEqual(len(snapshot.route_events), 1)
+        self.assertAlmostEqual(snapshot.connect_latency["tcp"].p99, 120.0, delta=120.0 * 0.07)
+        self.assertEqual(set(snapshot.dc_connect_latency), {2, 4})
+        self.assertAlmostEqual(snapshot.throughput["upstream"].p50, 2_000_000, delta=2_000_000 * 0.07)
+        with self.assertRaises(AttributeError):
+            snapshot.bytes_sent = 1
+        with self.assertRaises(TypeError):
+            snapshot.recv_zero_per_dc[3] = 1
+        with self.assertRaises(AttributeError):
+            snapshot.missing_counter
+
+    def test_snapshot_feeds_gui_stats_plan(self) -> None:
+        from telegram_proxy.proxy.stats import ProxyStats
+        from telegram_proxy.ui.page_runtime import build_stats_plan
+
+        stats = ProxyStats(pool_hits=7, pool_misses=2)
+        stats.record_connect("WSS", 2, 0.2)
+
+        plan = build_stats_plan(
+            stats=stats.snapshot(),
+            prev_sent=0,
+            prev_recv=0,
+            speed_hist_up=(),
+            speed_hist_down=(),
+        )
+
+        self.assertIn("Пул: WSS 7/2", plan.stats_text)
+        self.assertIn("p99: WSS ", plan.stats_text)
+
+    def test_snapshot_serializes_to_one_json_line(self) -> None:
+        from telegram_proxy.proxy.stats import ProxyPoolBucket, ProxyStats
+
+        stats = ProxyStats(total_connections=3)
+        stats.pool_buckets[(2, True)] = ProxyPoolBucket(2, True, 4, 1, 6.0, 0.9)
+        stats.record_connect("Cloudflare", 203, 0.3)
+
+        lines = [stats.snapshot().to_json()]
+        stats.total_connections += 1
+        lines.append(stats.snapshot().to_json())
+        self.assertFalse(any("\n" in line for line in lines))
+        rows = [json.loads(line) for line in lines]
+
+        self.assertEqual([row["counters"]["total_connections"] for row in rows], [3, 4])
+        self.assertEqual(rows[0]["pool_buckets"]["2m"]["target"], 4)
+        self.assertEqual(rows[0]["connect_latency_ms"]["cloudflare"]["count"], 1)
+        self.assertIn("203", rows[0]["dc_connect_latency_ms"])
+    def test_append_stats_jsonl_moves_a_full_file_aside(self) -> None:
+        from telegram_proxy.proxy.stats import ProxyStats, append_stats_jsonl
+
+        stats = ProxyStats(total_connections=1)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "logs", "stats.jsonl")
+            append_stats_jsonl(path, stats.snapshot())
+            size = os.path.getsize(path)
+            stats.total_connections = 2
+            append_stats_jsonl(path, stats.snapshot(), max_bytes=size)
+
+            with open(path + ".1", encoding="utf-8") as handle:
+                old = [json.loads(line) for line in handle]
+            with open(path, encoding="utf-8") as handle:
+                new = [json.loads(line) for line in handle]
+
+        self.assertEqual([row["counters"]["total_connections"] for row in old], [1])
+        self.assertEqual([row["counters"]["total_connections"] for row in new], [2])
+
+    def test_running_proxy_exports_snapshots_as_json_lines(self) -> None:
+        from telegram_proxy.wss_proxy import TelegramWSProxy
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "tg_proxy_stats.jsonl")
+            proxy = TelegramWSProxy(port=0, pool_size=0, stats_jsonl_path=path)
+
+            async def scenario() -> None:
+                proxy._stats_jsonl_interval = 0.01
+                proxy._running = True
+                proxy._stats_export_task = asyncio.create_task(proxy._stats_export_loop())
+                proxy.stats.record_connect("WSS", 2, 0.05)
+                while not os.path.exists(path):
+                    await asyncio.sleep(0.01)
+                proxy.stats.total_connections = 7
+                await proxy.stop()
+
+            asyncio.run(asyncio.wait_for(scenario(), 5.0))
+            with open(path, encoding="utf-8") as handle:
+                rows = [json.loads(line) for line in handle]
+
+        self.assertGreaterEqual(len(rows), 2)
+        self.assertEqual(rows[0]["connect_latency_ms"]["wss"]["count"], 1)
+        # stop() дописывает последний снимок.
+        self.assertEqual(rows[-1]["counters"]["total_connections"], 7)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import asyncio
+import unittest
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TelegramProxyTlsResumptionTests(unittest.TestCase):
+    def test_second_connect_resumes_session_and_records_phases(self) -> None:
+        from telegram_proxy_fakes import FakeWssRelay
+        from telegram_proxy.proxy.stats import ProxyStats
+        from telegram_proxy.proxy.transport import RawWebSocket, TlsSessionCache
+
+        async def scenario():
+            relay = FakeWssRelay()
+            port = await relay.start()
+            stats = ProxyStats()
+            sessions = TlsSessionCache()
+            try:
+                timings = []
+                for _ in range(3):
+                    ws = await RawWebSocket.connect(
+                        "127.0.0.1", "localhost", port=port, stats=stats, sessions=sessions,
+                    )
+                    timings.append(ws.connect_timing)
+                    await ws.send(b"init")
+                    await ws.send(b"payload")
+                    self.assertEqual(await ws.recv(), b"payload")
+                    await ws.close()
+            finally:
+                await relay.stop()
+            return timings, stats, len(sessions)
+
+        timings, stats, cached = asyncio.run(scenario())
+
+        self.assertEqual([timing.resumed for timing in timings], [False, True, True])
+        self.assertEqual((stats.tls_full_handshakes, stats.tls_resumed_handshakes), (1, 2))
+        self.assertEqual(stats.wss_connect_count, 3)
+        self.assertGreater(stats.wss_connect_tls_seconds, 0.0)
+        self.assertGreater(stats.wss_connect_upgrade_seconds, 0.0)
+        self.assertTrue(all(timing.tcp > 0.0 for timing in timings))
+        self.assertEqual(cached, 1)
+
+    def test_session_cache_is_keyed_by_ip_and_sni(self) -> None:
+        from telegram_proxy_fakes import FakeWssRelay
+        from telegram_proxy.proxy.transport import RawWebSocket, TlsSessionCache
+
+        async def scenario():
+            relay = FakeWssRelay()
+            port = await relay.start()
+            sessions = TlsSessionCache()
+            try:
+                resumed = []
+                for sni in ("kws2.web.telegram.org", "kws4.web.telegram.org", "kws2.web.telegram.org"):
+                    ws = await RawWebSocket.connect("127.0.0.1", sni, port=port, sessions=sessions)
+                    resumed.append(ws.connect_timing.resumed)
+                    await ws.close()
+            finally:
+                await relay.stop()
+            return resumed
+
+        self.assertEqual(asyncio.run(scenario()), [False, False, True])
+
+    def test_client_context_keeps_default_context_settings(self) -> None:
+        import os
+        import ssl
+        import tempfile
+        from unittest import mock
+
+        from telegram_proxy.proxy import transport
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            keylog = os.path.join(temp_dir, "keys.log")
+            with mock.patch.dict(os.environ, {"SSLKEYLOGFILE": keylog}):
+                context = transport._build_ssl_context()
+                defaults = ssl.create_default_context()
+
+            self.assertIsInstance(context, transport._ResumingSSLContext)
+            self.assertEqual(context.options, defaults.options)
+            self.assertEqual(context.minimum_version, defaults.minimum_version)
+            self.assertEqual(context.keylog_filename, keylog)
+            self.assertEqual(context.cert_store_stats(), defaults.cert_store_stats())
+            self.assertEqual((context.check_hostname, context.verify_mode), (False, ssl.CERT_NONE))
+
+    def test_session_cache_expires_and_evicts_least_recent(self) -> None:
+        from telegram_proxy.proxy.transport import TlsSessionCache
+
+        class _Session:
+            has_ticket = True
+            id = b"session"
+            timeout = 7200
+
+        clock = _Clock()
+        cache = TlsSessionCache(max_entries=2, ttl=60.0, clock=clock)
+        first, second, third = _Session(), _Session(), _Session()
+
+        cache.put("149.154.167.220", "kws1.web.telegram.org", first)
+        cache.put("149.154.167.220", "kws2.web.telegram.org", second)
+        self.assertIs(cache.get("149.154.167.220", "kws1.web.telegram.org"), first)
+        cache.put("149.154.167.220", "kws4.web.telegram.org", third)
+
+        self.assertIsNone(cache.get("149.154.167.220", "kws2.web.telegram.org"))
+        self.assertIs(cache.get("149.154.167.220", "kws1.web.telegram.org"), first)
+
+        clock.now = 61.0
+        self.assertIsNone(cache.get("149.154.167.220", "kws4.web.telegram.org"))
+        self.assertEqual(len(cache), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
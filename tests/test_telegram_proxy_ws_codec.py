@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import struct
+import unittest
+
+
+def _legacy_xor_mask(data: bytes, mask: bytes) -> bytes:
+    if not data:
+        return data
+    n = len(data)
+    mask_rep = (mask * (n // 4 + 1))[:n]
+    return (int.from_bytes(data, "big") ^ int.from_bytes(mask_rep, "big")).to_bytes(n, "big")
+
+
+def _legacy_frame(opcode: int, data: bytes, mask_key: bytes | None) -> bytes:
+    header = bytearray([0x80 | opcode])
+    mask_bit = 0x80 if mask_key is not None else 0x00
+    length = len(data)
+    if length < 126:
+        header.append(mask_bit | length)
+    elif length < 65536:
+        header.append(mask_bit | 126)
+        header.extend(struct.pack(">H", length))
+    else:
+        header.append(mask_bit | 127)
+        header.extend(struct.pack(">Q", length))
+    if mask_key is None:
+        return bytes(header) + data
+    return bytes(header) + mask_key + _legacy_xor_mask(data, mask_key)
+
+
+class TelegramProxyWsCodecTests(unittest.TestCase):
+    def test_mask_payload_matches_legacy_xor_for_every_tail_length(self) -> None:
+        from telegram_proxy.proxy.ws_codec import mask_payload
+
+        for size in (0, 1, 2, 3, 4, 5, 7, 125, 126, 65535, 65536, 131073):
+            data = os.urandom(size)
+            mask_key = os.urandom(4)
+            self.assertEqual(mask_payload(data, mask_key), _legacy_xor_mask(data, mask_key), size)
+            self.assertEqual(mask_payload(memoryview(data), mask_key), _legacy_xor_mask(data, mask_key))
+
+    def test_frame_header_matches_legacy_layout(self) -> None:
+        from telegram_proxy.proxy.ws_codec import encode_frame_header, mask_payload
+
+        mask_key = b"\x01\x02\x03\x04"
+        for size in (0, 125, 126, 65535, 65536):
+            data = os.urandom(size)
+            frame = encode_frame_header(0x2, size, mask_key) + mask_payload(data, mask_key)
+            self.assertEqual(frame, _legacy_frame(0x2, data, mask_key))
+            self.assertEqual(encode_frame_header(0x2, size) + data, _legacy_frame(0x2, data, None))
+
+    def test_masked_frames_are_built_in_one_buffer(self) -> None:
+        from unittest import mock
+
+        from telegram_proxy.proxy import ws_codec
+
+        parts = [os.urandom(size) for size in (0, 5, 126, 600, 70000)]
+        keys = os.urandom(4 * len(parts))
+        with mock.patch.object(ws_codec.os, "urandom", return_value=keys):
+            buffers = ws_codec.encode_frames(0x2, parts, mask=True)
+        self.assertEqual(len(buffers), 1)
+        self.assertEqual(
+            bytes(buffers[0]),
+            b"".join(_legacy_frame(0x2, part, keys[4 * i:4 * i + 4]) for i, part in enumerate(parts)),
+        )
+
+        payload = os.urandom(1000)
+        with mock.patch.object(ws_codec.os, "urandom", return_value=b"\x05\x06\x07\x08"):
+            self.assertEqual(
+                b"".join(ws_codec.encode_frame(0x2, payload, mask=True)),
+                _legacy_frame(0x2, payload, b"\x05\x06\x07\x08"),
+            )
+        plain = ws_codec.encode_frame(0x2, payload)
+        self.assertIs(plain[1], payload)
+
+        buffer = bytearray(b"\xff" * 8 + payload + b"\xff" * 8)
+        ws_codec.mask_into(buffer, b"\x05\x06\x07\x08", 8, 8 + len(payload))
+        self.assertEqual(bytes(buffer[8:-8]), _legacy_xor_mask(payload, b"\x05\x06\x07\x08"))
+        self.assertEqual(bytes(buffer[:8] + buffer[-8:]), b"\xff" * 16)
+
+    def test_parser_returns_all_frames_from_one_read_and_keeps_tail(self) -> None:
+        from telegram_proxy.proxy.ws_codec import WsFrameParser
+
+        payloads = [os.urandom(size) for size in (3, 200, 70000, 0, 125)]
+        stream = b"".join(
+            _legacy_frame(0x2, payload, os.urandom(4) if index % 2 else None)
+            for index, payload in enumerate(payloads)
+        )
+
+        parser = WsFrameParser()
+        self.assertEqual(parser.feed(stream), [(0x2, payload) for payload in payloads])
+        self.assertEqual(parser.buffered, 0)
+
+        for step in (1, 7, 4096):
+            parser = WsFrameParser()
+            frames = []
+            for offset in range(0, len(stream), step):
+                frames.extend(parser.feed(stream[offset:offset + step]))
+            self.assertEqual([payload for _opcode, payload in frames], payloads, step)
+            self.assertEqual(parser.buffered, 0)
+
+    def test_raw_websocket_batch_uses_writelines_and_recv_reads_buffered_frames(self) -> None:
+        from telegram_proxy.proxy.transport import RawWebSocket
+        from telegram_proxy.proxy.ws_codec import WsFrameParser
+
+        class _Writer:
+            def __init__(self) -> None:
+                self.buffers: list[bytes] = []
+
+            def write(self, data) -> None:
+                raise AssertionError("frames must go through writelines")
+
+            def writelines(self, buffers) -> None:
+                self.buffers.extend(buffers)
+
+            async def drain(self) -> None:
+                return None
+
+        async def scenario() -> tuple[list[bytes | None], list[bytes]]:
+            reader = asyncio.StreamReader()
+            writer = _Writer()
+            ws = RawWebSocket(reader, writer)
+            reader.feed_data(
+                _legacy_frame(0x2, b"first", None)
+                + _legacy_frame(0x9, b"ping", None)
+                + _legacy_frame(0x2, b"second", None)
+            )
+            received = [await ws.recv(), await ws.recv()]
+            writer.buffers.clear()
+            await ws.send_batch([b"a" * 10, b"b" * 300])
+            sent = list(writer.buffers)
+            reader.feed_data(_legacy_frame(0x8, b"\x03\xe8", None))
+            received.append(await ws.recv())
+            return received, sent
+
+        received, buffers = asyncio.run(scenario())
+        self.assertEqual(received, [b"first", b"second", None])
+        frames = WsFrameParser().feed(b"".join(buffers))
+        self.assertEqual(frames, [(0x2, b"a" * 10), (0x2, b"b" * 300)])
+        self.assertEqual(len(buffers), 1)
+        joined = b"".join(buffers)
+        # Второй кадр начинается после 2 байт заголовка, 4 байт ключа и 10 байт payload.
+        self.assertTrue(joined[1] & 0x80 and joined[17] & 0x80)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import unittest
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class _FakeWebSocket:
+    def __init__(self, domain: str) -> None:
+        self.domain = domain
+        self._closed = False
+
+    async def close(self) -> None:
+        self._closed = True
+
+
+class _SimulatedRelay:
+    """WSS handshakes that complete ``latency`` seconds of simulated time later."""
+
+    def __init__(self, clock: _Clock, latency: float) -> None:
+        self._clock = clock
+        self._latency = latency
+        self._pending: list[tuple[float, str, asyncio.Future]] = []
+        self.opened = 0
+
+    async def connect(self, _target_ip, domains, _buffer_size=0, **_kwargs):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((self._clock.now + self._latency, domains[0], future))
+        return await future
+
+    def release(self) -> None:
+        ready = [item for item in self._pending if item[0] <= self._clock.now]
+        self._pending = [item for item in self._pending if item[0] > self._clock.now]
+        for _ready_at, domain, future in ready:
+            self.opened += 1
+            future.set_result(_FakeWebSocket(domain))
+
+
+def _workload(seed: int, duration: float) -> list[tuple[float, int, bool]]:
+    rng = random.Random(seed)
+    events: list[tuple[float, int, bool]] = []
+    # DC2 media: Telegram Desktop грузит альбом — всплеск раз в полторы минуты.
+    burst_start = 30.0
+    while burst_start < duration:
+        events.extend((burst_start + index * 0.2, 2, True) for index in range(25))
+        burst_start += 90.0
+    # DC2: ровный фон, DC4: редкие подключения.
+    for dc, is_media, mean_gap in ((2, False, 15.0), (4, False, 300.0), (4, True, 400.0)):
+        moment = rng.expovariate(1.0 / mean_gap)
+        while moment < duration:
+            events.append((moment, dc, is_media))
+            moment += rng.expovariate(1.0 / mean_gap)
+    return sorted(events)
+
+
+async def _simulate(pool_factory, events) -> tuple[int, int, int]:
+    from telegram_proxy.proxy.dc_map import ws_domains_for_dc
+    from telegram_proxy.proxy.pool import WS_POOL_PREWARM_INTERVAL
+    from telegram_proxy.proxy.stats import ProxyStats
+
+    clock = _Clock()
+    relay = _SimulatedRelay(clock, latency=0.5)
+    stats = ProxyStats()
+    pool = pool_factory(stats, clock)
+    pool._connect_one = relay.connect
+
+    async def settle() -> None:
+        for _ in range(8):
+            await asyncio.sleep(0)
+
+    # Фоновый prewarm идёт по реальному времени — в симуляции зовём его сами.
+    await pool.warmup(prewarm_interval=0)
+    await settle()
+    hits = 0
+    next_prewarm = WS_POOL_PREWARM_INTERVAL
+    for moment, dc, is_media in events:
+        step = clock.now
+        while step < moment:
+            step = min(moment, step + 0.1)
+            clock.now = step
+            if step >= next_prewarm:
+                pool.prewarm()
+                next_prewarm += WS_POOL_PREWARM_INTERVAL
+            relay.release()
+            await settle()
+        ws = await pool.get(dc, is_media, "149.154.167.220", ws_domains_for_dc(dc, is_media))
+        hits += ws is not None
+        await settle()
+    await pool.close_all()
+    return hits, len(events) - hits, relay.opened - hits
+
+
+class TelegramProxyWsPoolTests(unittest.TestCase):
+    def test_adaptive_pool_beats_static_pool_on_hit_ratio_and_wasted_handshakes(self) -> None:
+        from telegram_proxy.proxy.pool import WsPool
+
+        events = _workload(seed=7, duration=1800.0)
+        static = asyncio.run(_simulate(
+            lambda stats, clock: WsPool(stats, pool_size=4, adaptive=False, clock=clock),
+            events,
+        ))
+        adaptive = asyncio.run(_simulate(
+            lambda stats, clock: WsPool(stats, pool_size=4, clock=clock),
+            events,
+        ))
+
+        static_hits, _static_misses, static_wasted = static
+        adaptive_hits, _adaptive_misses, adaptive_wasted = adaptive
+        self.assertGreater(adaptive_hits / len(events), static_hits / len(events), (static, adaptive))
+        self.assertLess(adaptive_wasted, static_wasted, (static, adaptive))
+
+    def test_bucket_grows_under_burst_and_shrinks_when_idle(self) -> None:
+        from telegram_proxy.proxy.pool import WsPool
+        from telegram_proxy.proxy.stats import ProxyStats
+
+        async def scenario() -> tuple[int, int, int]:
+            clock = _Clock()
+            relay = _SimulatedRelay(clock, latency=0.5)
+            stats = ProxyStats()
+            pool = WsPool(stats, pool_size=4, clock=clock)
+            pool._connect_one = relay.connect
+            domains = ["kws2-1.web.telegram.org"]
+
+            for _ in range(40):
+                clock.now += 0.1
+                await pool.get(2, True, "149.154.167.220", domains)
+                await asyncio.sleep(0)
+            burst_target = pool.target_size(2, True)
+
+            clock.now += 1000.0
+            await pool.get(2, True, "149.154.167.220", domains)
+            idle_target = pool.target_size(2, True)
+            bucket = stats.pool_buckets[(2, True)]
+            await pool.close_all()
+            return burst_target, idle_target, bucket.target
+
+        burst_target, idle_target, reported = asyncio.run(scenario())
+
+        self.assertEqual(burst_target, 8)
+        self.assertEqual(idle_target, 1)
+        self.assertEqual(reported, idle_target)
+
+    def test_first_connection_keeps_configured_size_and_decays_without_demand(self) -> None:
+        from telegram_proxy.proxy.pool import WsPool
+        from telegram_proxy.proxy.stats import ProxyStats
+
+        async def scenario() -> tuple[int, int, int]:
+            clock = _Clock()
+            relay = _SimulatedRelay(clock, latency=0.5)
+            pool = WsPool(ProxyStats(), pool_size=4, clock=clock)
+            pool._connect_one = relay.connect
+            domains = ["kws2.web.telegram.org"]
+
+            await pool.get(2, False, "149.154.167.220", domains)
+            first = pool.target_size(2, False)
+            for _ in range(8):
+                await asyncio.sleep(0)
+            clock.now += 0.6
+            relay.release()
+            for _ in range(8):
+                await asyncio.sleep(0)
+            ready = len(pool._idle[(2, False)])
+
+            clock.now += 300.0
+            pool.prewarm()
+            idle = pool.target_size(2, False)
+            await pool.close_all()
+            return first, ready, idle
+
+        self.assertEqual(asyncio.run(scenario()), (4, 4, 1))
+
+    def test_prewarm_replaces_sockets_before_they_expire(self) -> None:
+        from telegram_proxy.proxy.pool import WS_POOL_MAX_AGE, WsPool
+        from telegram_proxy.proxy.stats import ProxyStats
+
+        async def scenario() -> tuple[int, int, int]:
+            clock = _Clock()
+            relay = _SimulatedRelay(clock, latency=0.5)
+            stats = ProxyStats()
+            pool = WsPool(stats, pool_size=2, clock=clock)
+            pool._connect_one = relay.connect
+            domains = ["kws2-1.web.telegram.org"]
+
+            # Ровный спрос: подключение раз в 10 секунд.
+            for _ in range(12):
+                clock.now += 10.0
+                relay.release()
+                await asyncio.sleep(0)
+                await pool.get(2, True, "149.154.167.220", domains)
+                for _ in range(8):
+                    await asyncio.sleep(0)
+            clock.now += 1.0
+            relay.release()
+            for _ in range(8):
+                await asyncio.sleep(0)
+            opened_before = relay.opened
+
+            # Тишина почти до max_age: prewarm меняет стареющие сокеты заранее.
+            clock.now += WS_POOL_MAX_AGE - 2.0
+            pool.prewarm()
+            for _ in range(8):
+                await asyncio.sleep(0)
+            clock.now += 1.0
+            relay.release()
+            for _ in range(8):
+                await asyncio.sleep(0)
+            clock.now += 5.0
+            ws = await pool.get(2, True, "149.154.167.220", domains)
+            await pool.close_all()
+            return relay.opened - opened_before, stats.pool_expired, ws is not None
+
+        replaced, expired, hit = asyncio.run(scenario())
+        self.assertGreater(replaced, 0)
+        self.assertGreater(expired, 0)
+        self.assertTrue(hit)
+
+    def test_domain_mismatch_is_not_counted_as_expiration(self) -> None:
+        from telegram_proxy.proxy.pool import WsPool
+        from telegram_proxy.proxy.stats import ProxyStats
+
+        async def scenario() -> ProxyStats:
+            clock = _Clock()
+            stats = ProxyStats()
+            pool = WsPool(stats, pool_size=2, clock=clock)
+            pool._idle[(2, False)] = [(_FakeWebSocket("kws2.web.telegram.org"), 0.0)]
+            self.assertIsNone(await pool.get(2, False, "149.154.167.220", ["kws2-1.web.telegram.org"]))
+            await pool.close_all()
+            return stats
+
+        stats = asyncio.run(scenario())
+        self.assertEqual((stats.pool_domain_mismatch, stats.pool_expired), (1, 0))
+
+    def test_static_pool_keeps_configured_size(self) -> None:
+        from telegram_proxy.proxy.pool import WsPool
+        from telegram_proxy.proxy.stats import ProxyStats
+
+        async def scenario() -> int:
+            pool = WsPool(ProxyStats(), pool_size=3, adaptive=False, clock=_Clock())
+            pool._connect_one = _SimulatedRelay(_Clock(), latency=0.0).connect
+            await pool.get(2, False, "149.154.167.220", ["kws2.web.telegram.org"])
+            return pool.target_size(2, False)
+
+        self.assertEqual(asyncio.run(scenario()), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from pathlib import Path
+import time
 
 import pytest
 
@@ -111,6 +112,27 @@ def test_page_smoke_fills_tables(result, tmp_path, monkeypatch):
         assert packets_table.rowCount() == 0
         assert packets_table.isVisibleTo(page)
         assert page._ui.packets_title.text() == PACKETS_PLACEHOLDER_TITLE
+
+        # Индексированный лог: пакеты читаются в потоке воркера, таблица
+        # заполняется по его сигналу.
+        from winws_log_analyzer.log_index import index_winws_log_file
+        from winws_log_fixtures import write_synthetic_log
+
+        big_log = tmp_path / "indexed_debug.log"
+        write_synthetic_log(str(big_log), size_mb=0.2, connections=5, seed=1)
+        indexed = index_winws_log_file(str(big_log), cache_dir=tmp_path / "index")
+        page._ui.only_hostname_cb.setChecked(False)
+        page._on_parse_loaded(page._runtime.next_request_id(), indexed)
+        table.selectRow(0)
+        assert packets_table.rowCount() == 0
+        assert page._ui.packets_title.text().endswith("загрузка…")
+        conn = page._filtered[0]
+        deadline = time.monotonic() + 10
+        while packets_table.rowCount() == 0 and time.monotonic() < deadline:
+            QApplication.processEvents()
+            time.sleep(0.01)
+        assert packets_table.rowCount() == conn.packets_total
+        assert f"— {conn.packets_total}" in page._ui.packets_title.text()
     finally:
         # Удаление виджета делает teardown из conftest — ручной deleteLater
         # здесь провоцирует гибель глобального qconfig (см. conftest).
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import pytest
+
+from winws_log_fixtures import synthetic_connections
+from winws_log_analyzer.filters import ConnectionFilterIndex, filter_connections
+from winws_log_analyzer.models import VERDICT_MODIFIED, ConnectionRecord
+
+
+@pytest.fixture(scope="module")
+def connections():
+    conns = synthetic_connections(3000, seed=11)
+    # SNI по IP: hostname совпадает с remote_ip — строка не должна задвоиться.
+    conns.append(ConnectionRecord("tcp", "85.172.10.20", 443, hostname="85.172.10.20", verdict_counts={VERDICT_MODIFIED: 2}))
+    conns.append(ConnectionRecord("udp", "1.1.1.1", 53, hostname="One.One.One.One"))
+    return conns
+
+
+def test_index_matches_linear_filter_while_typing_and_erasing(connections):
+    index = ConnectionFilterIndex(connections)
+    typed = [query[:length] for query in ("googlevideo", "85.172.", "ONE.one", "zzz") for length in range(1, len(query) + 1)]
+    erased = list(reversed(typed))
+    for text in typed + erased + ["  discord ", "", "1.1.1", "video.", "e.c"]:
+        for only_with_hostname in (False, True):
+            for only_affected in (False, True):
+                expected = filter_connections(
+                    connections, text=text, only_with_hostname=only_with_hostname, only_affected=only_affected
+                )
+                actual = index.filter(text=text, only_with_hostname=only_with_hostname, only_affected=only_affected)
+                assert actual == expected, (text, only_with_hostname, only_affected)
+
+
+def test_unfiltered_result_is_a_copy(connections):
+    index = ConnectionFilterIndex(connections)
+    first = index.filter()
+    first.clear()
+    assert index.filter() == connections
+    assert len(index) == len(connections)
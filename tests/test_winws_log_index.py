@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from dataclasses import astuple
+import mmap
+import os
+
+import pytest
+
+from winws_log_analyzer import log_index
+from winws_log_fixtures import write_synthetic_log
+from winws_log_analyzer.log_index import index_winws_log_file
+from winws_log_analyzer.parser import parse_winws_log_file
+
+
+def _summary(result):
+    return (
+        result.profiles,
+        result.hostlists,
+        result.ipsets,
+        result.packets_total,
+        result.positive_checks_total,
+        result.unparsed_blocks,
+        result.unrecognized_packet_lines,
+        [
+            (
+                conn.key,
+                conn.hostname,
+                conn.l7proto,
+                conn.profile_ids,
+                conn.profile_names,
+                conn.packets_total,
+                conn.packets_out,
+                conn.packets_in,
+                conn.verdict_counts,
+                conn.positive_lists,
+                conn.lua_applied,
+                conn.first_line_no,
+            )
+            for conn in result.connections
+        ],
+    )
+
+
+@pytest.fixture()
+def synthetic_log(tmp_path):
+    path = tmp_path / "synthetic_debug.log"
+    write_synthetic_log(str(path), size_mb=0.5, connections=40, seed=3)
+    # Хвост без вердикта и без перевода строки.
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("packet: id=999999 len=80 outbound IPv6=0\nIP4: 10.0.0.1 => 1.2.3.4 proto=tcp ttl=128 sport=1 dport=443")
+    return path
+
+
+def test_index_matches_full_parse_and_materializes_same_packets(synthetic_log, tmp_path, monkeypatch):
+    # Маленькое окно mmap — строки гарантированно пересекают границы окон.
+    monkeypatch.setattr(log_index, "_INDEX_WINDOW_BYTES", mmap.ALLOCATIONGRANULARITY)
+    full = parse_winws_log_file(str(synthetic_log), max_packets_per_connection=10**9)
+    indexed = index_winws_log_file(str(synthetic_log), cache_dir=tmp_path / "index")
+
+    assert _summary(indexed) == _summary(full)
+    assert all(not conn.packets for conn in indexed.connections)
+    for full_conn, indexed_conn in zip(full.connections, indexed.connections):
+        packets = indexed.packet_index.packets(indexed_conn)
+        assert [astuple(pkt) for pkt in packets] == [astuple(pkt) for pkt in full_conn.packets]
+
+    busiest = max(full.connections, key=lambda conn: conn.packets_total)
+    window = indexed.packet_index.packets(busiest, start=5, limit=3)
+    assert [astuple(pkt) for pkt in window] == [astuple(pkt) for pkt in busiest.packets[5:8]]
+
+
+def test_reopen_uses_index_until_file_changes(synthetic_log, tmp_path, monkeypatch):
+    cache_dir = tmp_path / "index"
+    first = index_winws_log_file(str(synthetic_log), cache_dir=cache_dir)
+    assert len(list(cache_dir.glob("*.idx"))) == 1
+
+    def _no_reparse(*_args, **_kwargs):
+        raise AssertionError("лог не должен читаться заново")
+
+    progress = []
+    with monkeypatch.context() as patch:
+        patch.setattr(log_index, "_iter_raw_lines", _no_reparse)
+        reopened = index_winws_log_file(
+            str(synthetic_log), cache_dir=cache_dir, progress_cb=lambda done, total: progress.append((done, total))
+        )
+    assert _summary(reopened) == _summary(first)
+    assert progress == [(os.path.getsize(synthetic_log),) * 2]
+    conn = first.connections[0]
+    assert [astuple(p) for p in reopened.packet_index.packets(conn)] == [astuple(p) for p in first.packet_index.packets(conn)]
+
+    with open(synthetic_log, "a", encoding="utf-8") as f:
+        f.write("\npacket: id=1000000 len=80 inbound IPv6=0\nIP4: 5.6.7.8 => 10.0.0.1 proto=udp ttl=50 sport=53 dport=5353\n")
+    grown = index_winws_log_file(str(synthetic_log), cache_dir=cache_dir)
+    assert grown.packets_total == first.packets_total + 1
+
+    # Дописанный лог по старому индексу читается, усечённый — нет.
+    assert first.packet_index.packets(conn, limit=1)
+    with open(synthetic_log, "r+b") as f:
+        f.truncate(1000)
+    with pytest.raises(ValueError):
+        first.packet_index.packets(conn)
+
+
+def test_cancelled_index_is_not_cached(synthetic_log, tmp_path):
+    cache_dir = tmp_path / "index"
+    result = index_winws_log_file(str(synthetic_log), cache_dir=cache_dir, cancel_cb=lambda: True)
+    assert result.cancelled
+    assert not list(cache_dir.glob("*.idx"))
+
+
+def test_packets_truncated_is_stored_in_index(synthetic_log, tmp_path, monkeypatch):
+    monkeypatch.setattr(log_index, "DEFAULT_MAX_PACKETS_PER_CONNECTION", 20)
+    cache_dir = tmp_path / "index"
+    first = index_winws_log_file(str(synthetic_log), cache_dir=cache_dir)
+    expected = [conn.packets_total > 20 for conn in first.connections]
+    assert any(expected) and not all(expected)
+    assert [conn.packets_truncated for conn in first.connections] == expected
+
+    monkeypatch.setattr(log_index, "_iter_raw_lines", lambda *_args, **_kwargs: pytest.fail("лог читается заново"))
+    reopened = index_winws_log_file(str(synthetic_log), cache_dir=cache_dir)
+    assert [conn.packets_truncated for conn in reopened.connections] == expected
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from dataclasses import astuple
+
+import pytest
+
+from winws_log_analyzer import parallel
+from winws_log_fixtures import write_synthetic_log
+from winws_log_analyzer.log_index import index_winws_log_file
+from winws_log_analyzer.parallel import parse_winws_log_file_parallel, split_log_ranges
+from winws_log_analyzer.parser import parse_winws_log_file
+
+
+def _full(result):
+    return (
+        result.profiles,
+        result.hostlists,
+        result.ipsets,
+        result.packets_total,
+        result.positive_checks_total,
+        result.unparsed_blocks,
+        result.unrecognized_packet_lines,
+        [
+            (
+                conn.key,
+                conn.hostname,
+                conn.l7proto,
+                conn.profile_ids,
+                conn.profile_names,
+                conn.packets_total,
+                conn.packets_out,
+                conn.packets_in,
+                conn.verdict_counts,
+                conn.positive_lists,
+                conn.lua_applied,
+                conn.first_line_no,
+                conn.packets_truncated,
+                [astuple(pkt) for pkt in conn.packets],
+            )
+            for conn in result.connections
+        ],
+    )
+
+
+@pytest.fixture()
+def synthetic_log(tmp_path):
+    path = tmp_path / "synthetic_debug.log"
+    write_synthetic_log(str(path), size_mb=0.4, connections=40, seed=7)
+    with open(path, "a", encoding="utf-8") as f:
+        # Профиль, объявленный посреди лога, и хвост без вердикта.
+        f.write("profile 11 (noname) lua fake(\nprofile 42 (games) lua send(\n")
+        f.write("packet: id=999999 len=80 outbound IPv6=0\nIP4: 10.0.0.1 => 1.2.3.4 proto=tcp ttl=128 sport=1 dport=443")
+    return path
+
+
+def test_ranges_start_at_packet_headers(synthetic_log):
+    data = synthetic_log.read_bytes()
+    ranges = split_log_ranges(str(synthetic_log), 7)
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+    assert all(prev[1] == cur[0] for prev, cur in zip(ranges, ranges[1:]))
+    for start, _end in ranges[1:]:
+        assert data[start - 1:start] == b"\n"
+        assert data[start:].startswith(b"packet: id=") and b" len=" in data[start:start + 40]
+
+
+@pytest.mark.parametrize("max_packets", [5, 10**9])
+def test_parallel_parse_matches_sequential(synthetic_log, monkeypatch, max_packets):
+    # Мелкие диапазоны — соединения гарантированно размазаны по нескольким.
+    monkeypatch.setattr(parallel, "_RANGE_TARGET_BYTES", 32 * 1024)
+    sequential = parse_winws_log_file(str(synthetic_log), max_packets_per_connection=max_packets)
+    progress = []
+    merged = parse_winws_log_file_parallel(
+        str(synthetic_log),
+        workers=2,
+        max_packets_per_connection=max_packets,
+        progress_cb=lambda done, total: progress.append((done, total)),
+    )
+    assert not merged.cancelled
+    assert _full(merged) == _full(sequential)
+    assert progress[-1][0] == progress[-1][1] == synthetic_log.stat().st_size
+    assert [done for done, _total in progress] == sorted(done for done, _total in progress)
+
+
+def test_parallel_index_matches_sequential_index(synthetic_log, tmp_path, monkeypatch):
+    monkeypatch.setattr(parallel, "_RANGE_TARGET_BYTES", 64 * 1024)
+    sequential = index_winws_log_file(str(synthetic_log), cache_dir=tmp_path / "seq")
+    merged = index_winws_log_file(str(synthetic_log), cache_dir=tmp_path / "par", workers=2)
+    assert _full(merged) == _full(sequential)
+    for conn in sequential.connections:
+        assert [astuple(p) for p in merged.packet_index.packets(conn)] == [
+            astuple(p) for p in sequential.packet_index.packets(conn)
+        ]
+
+
+def test_cancelled_parallel_parse_returns_prefix(synthetic_log):
+    result = parse_winws_log_file_parallel(str(synthetic_log), workers=2, cancel_cb=lambda: True)
+    assert result.cancelled
+    assert result.packets_total == 0
@@ -0,0 +1,133 @@
+"""Синтетические данные winws2 для тестов winws_log_analyzer и бенчмарков в tools/.
+
+write_synthetic_log пишет debug-лог winws2 заданного размера,
+synthetic_connections — соединения, похожие на длинный захват.
+"""
+
+from __future__ import annotations
+
+import random
+
+from winws_log_analyzer.models import VERDICT_DROP, VERDICT_MODIFIED, VERDICT_UNMODIFIED, ConnectionRecord
+
+_HOSTS = (
+    "rr1---sn-abc.googlevideo.com",
+    "www.youtube.com",
+    "discord.com",
+    "gateway.discord.gg",
+    "merchandise.opera-api.com",
+    "github.com",
+    "",
+)
+_LISTS = ("D:\\ZapretTwo\\lists\\ipset-discord.txt", "D:\\ZapretTwo\\lists\\russia-blacklist.txt")
+
+
+def _preamble() -> str:
+    return (
+        "profile 3 (noname) lua tls_multisplit_sni(\n"
+        "profile 11 (noname) lua multisplit(\n"
+        "profile 17 (noname) lua send(\n"
+        "profile 17 (noname) lua syndata(\n"
+        f"Loaded 117144 hosts from {_LISTS[1]}\n"
+        f"Loaded 62 ip/subnets from {_LISTS[0]}\n"
+    )
+
+
+def _block(rng: random.Random, packet_id: int, remote: tuple[str, str, int, str]) -> str:
+    proto, ip, port, host = remote
+    outbound = rng.random() < 0.6
+    sport = rng.randint(1024, 65535)
+    if outbound:
+        ip_line = f"IP4: 192.168.1.5 => {ip} proto={proto} ttl=128 sport={sport} dport={port}"
+    else:
+        ip_line = f"IP4: {ip} => 192.168.1.5 proto={proto} ttl=57 sport={port} dport={sport}"
+    if proto == "tcp":
+        ip_line += " flags=A seq=1 ack_seq=0"
+    lines = [
+        f"packet: id={packet_id} len={rng.randint(40, 1500)} {'outbound' if outbound else 'inbound'} "
+        "IPv6=0 IPChecksum=1 TCPChecksum=1 UDPChecksum=1 IfIdx=8.0",
+        ip_line,
+    ]
+    l7 = "tls" if proto == "tcp" else "quic"
+    lines.append(f"desync profile search for {proto} ip={ip} port={port} l7proto={l7} ssid='' hostname='{host}'")
+    if rng.random() < 0.3:
+        profile = rng.choice((3, 11))
+        lines.append(f"* ipset check for profile {profile}")
+        lines.append(f" [{_LISTS[0]}] include ipset check for {ip} : {rng.choice(('positive', 'negative'))}")
+        lines.append(f"desync profile {profile} (noname) matches")
+    else:
+        lines.append("using cached desync profile 0 (no_action)")
+    verdict = "reinject unmodified"
+    if outbound and rng.random() < 0.4:
+        lines.append(f"dpi desync src=192.168.1.5:{sport} dst={ip}:{port} ttl=128 connection_proto={l7} payload_type=tls_client_hello")
+        if host:
+            lines.append(f"hostname: {host}")
+        lines.append("TLS handshake version: TLS 1.2")
+        lines.append("TLS ALPN ext : h2")
+        lines.append("TLS ECH ext : present")
+        lines.append("LUA: multisplit: splitting at pos 2")
+        lines.append("* lua 'multisplit_11_1' : desync")
+        verdict = rng.choice(("reinject modified len 517 => 1034", "drop"))
+        if verdict == "drop" and rng.random() < 0.5:
+            lines.append("DELAY desync")
+            lines.append("REPLAYING delayed packet #1")
+            lines.append(f"REPLAY IP4: 192.168.1.5 => {ip} proto=tcp ttl=128")
+    lines.append(f"packet: id={packet_id} {verdict}")
+    return "\n".join(lines) + "\n"
+
+
+def write_synthetic_log(path: str, *, size_mb: float, connections: int = 20_000, seed: int = 1) -> int:
+    """Пишет синтетический лог winws2 размером ~size_mb и возвращает число пакетов."""
+    rng = random.Random(seed)
+    remotes = []
+    for index in range(connections):
+        proto = "udp" if index % 5 == 0 else "tcp"
+        ip = f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}"
+        remotes.append((proto, ip, 443 if rng.random() < 0.9 else rng.randint(1, 65535), rng.choice(_HOSTS)))
+    # Немного «горячих» соединений, у которых больше пакетов, чем лимит полного парсера.
+    hot = remotes[:20]
+
+    target = int(size_mb * 1024 * 1024)
+    written = 0
+    packets = 0
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        written += f.write(_preamble())
+        chunk: list[str] = []
+        while written < target:
+            packets += 1
+            remote = rng.choice(hot) if rng.random() < 0.2 else rng.choice(remotes)
+            chunk.append(_block(rng, packets, remote))
+            if len(chunk) >= 2_000:
+                written += f.write("".join(chunk))
+                chunk = []
+        written += f.write("".join(chunk))
+    return packets
+
+
+_HOST_WORDS = (
+    "youtube", "googlevideo", "discord", "gateway", "media", "cdn", "api", "static",
+    "telegram", "opera", "github", "cloudflare", "akamai", "ggpht", "ytimg", "twitch",
+)
+_TLDS = ("com", "net", "org", "gg", "ru", "io")
+
+
+def synthetic_connections(count: int, *, seed: int = 1) -> list[ConnectionRecord]:
+    """Соединения, похожие на длинный захват: hostname повторяются, IP — нет."""
+    rng = random.Random(seed)
+    hostnames = [""] * 40
+    for index in range(max(100, count // 50)):
+        words = rng.sample(_HOST_WORDS, 2)
+        hostnames.append(f"{words[0]}{index % 97}.{words[1]}.{rng.choice(_TLDS)}")
+    connections = []
+    for _index in range(count):
+        verdict = rng.choice((VERDICT_UNMODIFIED, VERDICT_UNMODIFIED, VERDICT_MODIFIED, VERDICT_DROP))
+        connections.append(
+            ConnectionRecord(
+                proto=rng.choice(("tcp", "udp")),
+                remote_ip=f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+                remote_port=443,
+                hostname=rng.choice(hostnames),
+                verdict_counts={verdict: 1},
+            )
+        )
+    return connections
@@ -0,0 +1,127 @@
+"""Бенчмарк движка проб blockcheck (blockcheck.async_probes) против пула потоков.
+
+Серверы — LocalProbeServers из tests/blockcheck_probe_servers.py.
+
+    threads  test_https из ThreadPoolExecutor(parallel) — как раньше в runner
+    async    AsyncProbeEngine.probe_https, все пробы на одном loop
+
+Запуск (из корня репозитория):
+    PYTHONPATH=src python tools/bench_blockcheck_async_probes.py
+    PYTHONPATH=src python tools/bench_blockcheck_async_probes.py --probes 600 --latency-ms 80 --json
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from unittest import mock
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+for _path in (PROJECT_ROOT / "src", PROJECT_ROOT / "tests"):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+from bench_common import BenchReport, bench_parser, print_report  # noqa: E402
+from blockcheck import tls_tester  # noqa: E402
+from blockcheck.async_probes import AsyncProbeEngine  # noqa: E402
+from blockcheck.config import DEFAULT_PARALLEL  # noqa: E402
+from blockcheck.models import TestStatus  # noqa: E402
+from blockcheck_probe_servers import LocalProbeServers  # noqa: E402
+
+
+@dataclass
+class AsyncProbesBenchReport(BenchReport):
+    probes: int
+    latency_ms: float
+    parallel: int
+    threads_seconds: float = 0.0
+    async_seconds: float = 0.0
+    threads_ok: int = 0
+    async_ok: int = 0
+    cancel_ms: float = 0.0
+
+    def format(self) -> str:
+        speedup = self.threads_seconds / self.async_seconds if self.async_seconds else 0.0
+        return "\n".join(
+            [
+                f"HTTPS probes, {self.probes} probes, {self.latency_ms:.0f} ms server latency",
+                f"  {'thread pool (' + str(self.parallel) + ' workers)':<28}{self.threads_seconds:8.3f} s  ({self.threads_ok} ok)",
+                f"  {'asyncio engine':<28}{self.async_seconds:8.3f} s  ({self.async_ok} ok, x{speedup:.1f})",
+                f"  {'cancel with probes hanging':<28}{self.cancel_ms:8.1f} ms",
+            ]
+        )
+
+
+def _https_cafile_context(cafile: str):
+    build = tls_tester._build_tls_context
+    return mock.patch.object(tls_tester, "_build_tls_context", lambda tls_version, _cafile=None: build(tls_version, cafile))
+
+
+def run_async_probes_bench(*, probes: int = 200, latency_ms: float = 50.0, parallel: int = DEFAULT_PARALLEL) -> AsyncProbesBenchReport:
+    report = AsyncProbesBenchReport(probes=probes, latency_ms=latency_ms, parallel=parallel)
+    # Одни и те же 20 «хостов» — per-host лимит движка тоже работает.
+    hosts = [f"host{index % 20}" for index in range(probes)]
+    with LocalProbeServers(latency=latency_ms / 1000.0) as servers:
+        addresses = ["127.0.0.1"]
+
+        with _https_cafile_context(servers.cafile):
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=parallel) as pool:
+                results = list(
+                    pool.map(
+                        lambda _host: tls_tester.test_https(
+                            "localhost", port=servers.https_port, timeout=5, addresses=addresses
+                        ),
+                        hosts,
+                    )
+                )
+            report.threads_seconds = time.perf_counter() - started
+        report.threads_ok = sum(1 for r in results if r.status == TestStatus.OK)
+
+        engine = AsyncProbeEngine(cafile=servers.cafile, per_host=probes)
+
+        async def _all():
+            return await asyncio.gather(
+                *(engine.probe_https("localhost", port=servers.https_port, timeout=5, addresses=addresses) for _ in hosts)
+            )
+
+        holder: dict = {}
+
+        async def _collect():
+            holder["results"] = await _all()
+
+        started = time.perf_counter()
+        engine.run(_collect())
+        report.async_seconds = time.perf_counter() - started
+        report.async_ok = sum(1 for r in holder["results"] if r.status == TestStatus.OK)
+
+        cancel_at = time.perf_counter() + 0.2
+        cancelling = AsyncProbeEngine(cancelled=lambda: time.perf_counter() >= cancel_at)
+
+        async def _hanging():
+            await asyncio.gather(
+                *(cancelling.probe_https("localhost", port=servers.hang_port, timeout=30, addresses=addresses) for _ in range(50))
+            )
+
+        cancelling.run(_hanging())
+        report.cancel_ms = (time.perf_counter() - cancel_at) * 1000.0
+    return report
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = bench_parser(__doc__)
+    parser.add_argument("--probes", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--parallel", type=int, default=DEFAULT_PARALLEL)
+    args = parser.parse_args(argv)
+
+    report = run_async_probes_bench(probes=args.probes, latency_ms=args.latency_ms, parallel=args.parallel)
+    return print_report(report, as_json=args.json)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
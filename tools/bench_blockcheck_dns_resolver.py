@@ -0,0 +1,161 @@
+"""Бенчмарк DNS-запросов blockcheck и DNS-диагностики (blockcheck.dns_resolver).
+
+Полный набор запросов по умолчанию: DNS integrity (DNS_CHECK_DOMAINS через
+первые два DNS_UDP_SERVERS) плюс DNSChecker (доступность 8 серверов по 3
+тестовым доменам и домены YouTube/Discord через все 8 серверов). Серверы —
+локальные заглушки StubDnsServer (tests/blockcheck_dns_stub.py) с задержкой
+ответа, как у реального RTT.
+
+    reference  по одному блокирующему сокету на запрос, последовательно (как раньше)
+    engine     все запросы разом через DnsResolver.resolve_many
+    cached     повтор того же набора — ответы из TTL-кэша
+
+Запуск (из корня репозитория):
+    PYTHONPATH=src python tools/bench_blockcheck_dns_resolver.py
+    PYTHONPATH=src python tools/bench_blockcheck_dns_resolver.py --latency-ms 80 --json
+    PYTHONPATH=src python tools/bench_blockcheck_dns_resolver.py --live   # настоящие серверы, без reference
+"""
+
+from __future__ import annotations
+
+import secrets
+import socket
+import struct
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+for _path in (PROJECT_ROOT / "src", PROJECT_ROOT / "tests"):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+from bench_common import BenchReport, bench_parser, print_report  # noqa: E402
+from blockcheck.config import DNS_CHECK_DOMAINS, DNS_UDP_SERVERS  # noqa: E402
+from blockcheck.dns_resolver import QTYPE_A, DnsResolver, encode_name, parse_response  # noqa: E402
+from blockcheck_dns_stub import StubDnsServer  # noqa: E402
+
+_CHECKER_SERVERS = (
+    "8.8.8.8", "8.8.4.4", "1.1.1.1", "1.0.0.1",
+    "9.9.9.9", "208.67.222.222", "77.88.8.8", "94.140.14.14",
+)
+_CHECKER_TEST_DOMAINS = ("google.com", "cloudflare.com", "example.com")
+_CHECKER_SERVICE_DOMAINS = (
+    "www.youtube.com", "youtube.com", "googlevideo.com",
+    "discord.com", "discordapp.com", "discord.gg",
+)
+
+
+def default_target_queries() -> list[tuple[str, str]]:
+    """(домен, сервер) — всё, что шлют check_dns_integrity и DNSChecker за один прогон."""
+    queries = [(domain, server) for domain in DNS_CHECK_DOMAINS for server in DNS_UDP_SERVERS[:2]]
+    queries += [(domain, server) for server in _CHECKER_SERVERS for domain in _CHECKER_TEST_DOMAINS]
+    queries += [(domain, server) for domain in _CHECKER_SERVICE_DOMAINS for server in _CHECKER_SERVERS]
+    return queries
+
+
+# ---------------------------------------------------------------------------
+# Прежний способ: блокирующий сокет на каждый запрос
+# ---------------------------------------------------------------------------
+
+def reference_resolve_udp(domain: str, nameserver: tuple[str, int], timeout: float = 5.0) -> list[str]:
+    """Как прежний dns_integrity._resolve_udp (без фолбэка на getaddrinfo)."""
+    query = secrets.token_bytes(2) + b"\x01\x00" + struct.pack(">HHHH", 1, 0, 0, 0)
+    query += encode_name(domain) + struct.pack(">HH", QTYPE_A, 1)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.settimeout(timeout)
+        sock.sendto(query, nameserver)
+        data, _ = sock.recvfrom(1024)
+    finally:
+        sock.close()
+    return list(parse_response(data)[1].addresses)
+
+
+@dataclass
+class DnsResolverBenchReport(BenchReport):
+    queries: int
+    servers: int
+    latency_ms: float
+    live: bool = False
+    reference_seconds: float = 0.0
+    engine_seconds: float = 0.0
+    cached_ms: float = 0.0
+    failed: int = 0
+
+    def format(self) -> str:
+        speedup = self.reference_seconds / self.engine_seconds if self.engine_seconds else 0.0
+        target = "live servers" if self.live else f"stub servers, {self.latency_ms:.0f} ms latency"
+        lines = [f"DNS queries, {self.queries} queries to {self.servers} {target}"]
+        if self.reference_seconds:
+            lines.append(f"  reference (sequential)  {self.reference_seconds:8.3f} s")
+        lines.append(
+            f"  engine (multiplexed)    {self.engine_seconds:8.3f} s"
+            + (f"  (x{speedup:.1f})" if self.reference_seconds else "")
+        )
+        lines.append(f"  cached repeat           {self.cached_ms:8.3f} ms")
+        if self.failed:
+            lines.append(f"  failed queries          {self.failed:8d}")
+        return "\n".join(lines)
+
+
+def _stub_records(queries) -> dict[str, list[tuple[str, str]]]:
+    records: dict[str, list[tuple[str, str]]] = {}
+    for index, domain in enumerate(sorted({domain for domain, _server in queries})):
+        records[domain] = [("A", f"203.0.113.{index + 1}")]
+    return records
+
+
+def run_dns_resolver_bench(*, latency_ms: float = 40.0, live: bool = False) -> DnsResolverBenchReport:
+    queries = default_target_queries()
+    server_names = sorted({server for _domain, server in queries})
+    report = DnsResolverBenchReport(queries=len(queries), servers=len(server_names), latency_ms=latency_ms, live=live)
+
+    stubs: list[StubDnsServer] = []
+    try:
+        if live:
+            addresses = {name: (name, 53) for name in server_names}
+        else:
+            records = _stub_records(queries)
+            stubs = [StubDnsServer(records, latency=latency_ms / 1000.0) for _ in server_names]
+            for stub in stubs:
+                stub.start()
+            addresses = {name: stub.address for name, stub in zip(server_names, stubs)}
+        targets = [(domain, addresses[server]) for domain, server in queries]
+
+        if not live:
+            started = time.perf_counter()
+            for domain, address in targets:
+                reference_resolve_udp(domain, address)
+            report.reference_seconds = time.perf_counter() - started
+
+        resolver = DnsResolver()
+        try:
+            started = time.perf_counter()
+            results = resolver.resolve_many([(domain, address, "A") for domain, address in targets])
+            report.engine_seconds = time.perf_counter() - started
+            report.failed = sum(1 for result in results if isinstance(result, Exception))
+
+            started = time.perf_counter()
+            resolver.resolve_many([(domain, address, "A") for domain, address in targets])
+            report.cached_ms = (time.perf_counter() - started) * 1000.0
+        finally:
+            resolver.close()
+    finally:
+        for stub in stubs:
+            stub.stop()
+    return report
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = bench_parser(__doc__)
+    parser.add_argument("--latency-ms", type=float, default=40.0)
+    parser.add_argument("--live", action="store_true", help="query real public DNS servers")
+    args = parser.parse_args(argv)
+
+    return print_report(run_dns_resolver_bench(latency_ms=args.latency_ms, live=args.live), as_json=args.json)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
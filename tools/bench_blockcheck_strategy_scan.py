@@ -0,0 +1,173 @@
+"""Strategy scan throughput: serial vs pipelined StrategyScanner.
+
+Runs the real scan loop with a fake engine launcher and a fake probe, so it
+works without winws2/WinDivert. Costs are sleeps that stand in for the
+winws2 start, the HTTPS probe, the DNS lookup and the stop + WinDivert
+release; the report is strategies per minute for both modes.
+
+Запуск (из корня репозитория):
+    PYTHONPATH=src python tools/bench_blockcheck_strategy_scan.py --strategies 20
+"""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+PROJECT_SRC = Path(__file__).resolve().parents[1] / "src"
+if str(PROJECT_SRC) not in sys.path:
+    sys.path.insert(0, str(PROJECT_SRC))
+
+from bench_common import BenchReport, bench_parser, print_report  # noqa: E402
+from blockcheck.strategy_scan_engine import StrategyEngineLauncher  # noqa: E402
+from blockcheck.strategy_scanner import StrategyScanner  # noqa: E402
+
+
+@dataclass(frozen=True)
+class StrategyScanBenchConfig:
+    strategies: int = 20
+    startup_wait: float = 0.05
+    launch_cost: float = 0.01
+    probe_cost: float = 0.03
+    resolve_cost: float = 0.03
+    stop_cost: float = 0.02
+    release_pause: float = 0.05
+
+
+@dataclass
+class StrategyScanBenchReport(BenchReport):
+    strategies: int
+    serial_seconds: float
+    pipelined_seconds: float
+
+    @property
+    def serial_per_minute(self) -> float:
+        return self.strategies * 60.0 / self.serial_seconds if self.serial_seconds else 0.0
+
+    @property
+    def pipelined_per_minute(self) -> float:
+        return self.strategies * 60.0 / self.pipelined_seconds if self.pipelined_seconds else 0.0
+
+    def as_dict(self) -> dict:
+        data = super().as_dict()
+        data["serial_per_minute"] = self.serial_per_minute
+        data["pipelined_per_minute"] = self.pipelined_per_minute
+        return data
+
+    def format(self) -> str:
+        return (
+            f"strategy scan ({self.strategies} strategies): "
+            f"serial {self.serial_per_minute:.1f}/min ({self.serial_seconds:.2f}s), "
+            f"pipelined {self.pipelined_per_minute:.1f}/min ({self.pipelined_seconds:.2f}s)"
+        )
+
+
+class _FakeProcess:
+    returncode = None
+    stdout = None
+    stderr = None
+    pid = 0
+
+    def poll(self) -> int | None:
+        return self.returncode
+
+
+class SleepLauncher(StrategyEngineLauncher):
+    """Fake engine: launch/stop cost fixed time, nothing is started."""
+
+    def __init__(self, config: StrategyScanBenchConfig) -> None:
+        self._config = config
+        self.startup_wait = config.startup_wait
+        self.release_pause = config.release_pause
+
+    def launch(self, preset_path: str) -> Any:
+        time.sleep(self._config.launch_cost)
+        return _FakeProcess()
+
+    def stop(self, process: Any) -> None:
+        time.sleep(self._config.stop_cost)
+
+
+class _BenchScanner(StrategyScanner):
+    def __init__(self, config: StrategyScanBenchConfig, work_dir: str, *, pipelined: bool) -> None:
+        self._bench_config = config
+        self._bench_work_dir = work_dir
+        super().__init__(
+            "bench.invalid",
+            mode="full",
+            shutdown_sync=lambda **_kwargs: SimpleNamespace(still_running=False),
+            launcher=SleepLauncher(config),
+            pipelined=pipelined,
+        )
+
+    def _find_work_dir(self) -> str:
+        return self._bench_work_dir
+
+    def _select_strategies(self, mode: str, start_index: int = 0) -> tuple[list[dict], int, int]:
+        count = self._bench_config.strategies
+        strategies = [
+            {"id": f"bench_{i}", "name": f"bench {i}", "args": f"--lua-desync=fake:repeats={i}"}
+            for i in range(count)
+        ]
+        return strategies, 0, count
+
+    def _run_preflight_check(self) -> bool:
+        return True
+
+    def _run_baseline_test(self) -> bool:
+        return False
+
+    def _test_https(self, host: str, timeout: float = 0, af: int = 0) -> tuple[bool, float, str]:
+        # DNS резолвится под движком стратегии в обоих режимах.
+        time.sleep(self._bench_config.resolve_cost)
+        time.sleep(self._bench_config.probe_cost)
+        return False, self._bench_config.probe_cost * 1000.0, "bench"
+
+
+def _run_once(config: StrategyScanBenchConfig, *, pipelined: bool) -> float:
+    with tempfile.TemporaryDirectory(prefix="strategy_scan_bench_") as work_dir:
+        scanner = _BenchScanner(config, work_dir, pipelined=pipelined)
+        started = time.perf_counter()
+        report = scanner._run_scan()
+        elapsed = time.perf_counter() - started
+    if report.total_tested != config.strategies:
+        raise RuntimeError(f"bench scan tested {report.total_tested}/{config.strategies}")
+    return elapsed
+
+
+def run_strategy_scan_bench(config: StrategyScanBenchConfig = StrategyScanBenchConfig()) -> StrategyScanBenchReport:
+    return StrategyScanBenchReport(
+        strategies=config.strategies,
+        serial_seconds=_run_once(config, pipelined=False),
+        pipelined_seconds=_run_once(config, pipelined=True),
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = bench_parser(__doc__)
+    parser.add_argument("--strategies", type=int, default=StrategyScanBenchConfig.strategies)
+    parser.add_argument("--startup-wait", type=float, default=StrategyScanBenchConfig.startup_wait)
+    parser.add_argument("--probe-cost", type=float, default=StrategyScanBenchConfig.probe_cost)
+    parser.add_argument("--resolve-cost", type=float, default=StrategyScanBenchConfig.resolve_cost)
+    parser.add_argument("--stop-cost", type=float, default=StrategyScanBenchConfig.stop_cost)
+    parser.add_argument("--release-pause", type=float, default=StrategyScanBenchConfig.release_pause)
+    args = parser.parse_args(argv)
+
+    config = StrategyScanBenchConfig(
+        strategies=max(1, args.strategies),
+        startup_wait=args.startup_wait,
+        probe_cost=args.probe_cost,
+        resolve_cost=args.resolve_cost,
+        stop_cost=args.stop_cost,
+        release_pause=args.release_pause,
+    )
+    return print_report(run_strategy_scan_bench(config), as_json=args.json)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
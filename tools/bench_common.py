@@ -0,0 +1,34 @@
+"""Общая обвязка бенчмарков tools/bench_*.py (сам по себе не запускается).
+
+BenchReport — примесь для @dataclass-отчётов: as_dict() для --json и
+format() для консоли. bench_parser() и print_report() дают одинаковый CLI:
+описание из первой строки docstring бенчмарка и флаг --json.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from dataclasses import asdict
+
+
+class BenchReport:
+    """Отчёт бенчмарка; наследник — @dataclass с полями замеров."""
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+    def format(self) -> str:
+        raise NotImplementedError
+
+
+def bench_parser(doc: str) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=doc.strip().splitlines()[0])
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    return parser
+
+
+def print_report(report: BenchReport, *, as_json: bool = False, indent: int | None = 2) -> int:
+    """Печатает отчёт; indent=None — JSON в одну строку (несколько прогонов подряд)."""
+    print(json.dumps(report.as_dict(), indent=indent) if as_json else report.format(), flush=True)
+    return 0
@@ -0,0 +1,96 @@
+"""Micro-benchmark: Telegram IP -> DC classification per SOCKS5 CONNECT.
+
+``linear`` is the reference CIDR walk (``ip_to_dc_media`` + ``is_telegram_ip``
+before DcIndex, kept in tests/telegram_proxy_dc_reference.py), ``index`` is the bisect/trie lookup without the LRU and
+``cached`` is the default path with it.
+
+Запуск (из корня репозитория):
+    PYTHONPATH=src python tools/bench_dc_lookup.py
+    PYTHONPATH=src python tools/bench_dc_lookup.py --addresses 200000 --json
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+for _path in (PROJECT_ROOT / "src", PROJECT_ROOT / "tests"):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+from bench_common import BenchReport, bench_parser, print_report  # noqa: E402
+from telegram_proxy.proxy import dc_map  # noqa: E402
+from telegram_proxy_dc_reference import ip_to_dc_linear, is_telegram_ip_linear  # noqa: E402
+
+
+@dataclass
+class DcLookupReport(BenchReport):
+    addresses: int
+    linear_ns: float
+    index_ns: float
+    cached_ns: float
+
+    def format(self) -> str:
+        return (
+            f"dc lookup ({self.addresses} addresses): linear {self.linear_ns:.0f} ns, "
+            f"index {self.index_ns:.0f} ns, cached {self.cached_ns:.0f} ns per call"
+        )
+
+
+def sample_addresses(count: int, *, seed: int = 1) -> list[str]:
+    """Mix of Telegram v4/v6 and foreign addresses, with repeats like real clients."""
+    rng = random.Random(seed)
+    hot = list(dc_map.IP_TO_DC) + [
+        "2001:67c:4e8:f002::a",
+        "2001:b28:f23d:f003::a",
+        "2a0a:f280:203::1",
+    ]
+    result: list[str] = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.6:
+            result.append(rng.choice(hot))
+        elif roll < 0.8:
+            result.append(f"149.154.{rng.randint(160, 175)}.{rng.randint(0, 255)}")
+        else:
+            result.append(f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}")
+    return result
+
+
+def _per_call_ns(fn, addresses: list[str]) -> float:
+    started = time.perf_counter_ns()
+    for ip in addresses:
+        fn(ip)
+    return (time.perf_counter_ns() - started) / max(1, len(addresses))
+
+
+def run_dc_lookup(count: int = 50_000) -> DcLookupReport:
+    addresses = sample_addresses(count)
+    index = dc_map.DcIndex()
+
+    def linear(ip: str):
+        entry = dc_map.IP_TO_DC.get(ip)
+        return (entry or (ip_to_dc_linear(ip), False)), is_telegram_ip_linear(ip)
+
+    return DcLookupReport(
+        addresses=count,
+        linear_ns=_per_call_ns(linear, addresses),
+        index_ns=_per_call_ns(index._lookup, addresses),
+        cached_ns=_per_call_ns(index.lookup, addresses),
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = bench_parser(__doc__)
+    parser.add_argument("--addresses", type=int, default=50_000)
+    args = parser.parse_args(argv)
+
+    return print_report(run_dc_lookup(max(1, args.addresses)), as_json=args.json)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
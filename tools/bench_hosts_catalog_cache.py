@@ -0,0 +1,119 @@
+"""Бенчмарк загрузки split hosts-каталога: полный разбор против hosts.catalog_cache.
+
+Каталог и файлы кэша генерируются во временной папке (dns_sources.json + по файлу на
+сервис, tests/hosts_catalog_fixtures.py), mtime файлов сдвигается в прошлое —
+как у установленного каталога.
+
+    full read      прежний путь: подпись по всем байтам + чтение и разбор всех файлов
+    cold           первая загрузка без файлов кэша (разбор + запись кэша)
+    warm startup   новый процесс, каталог не менялся (собранный каталог из кэша)
+    warm signature проверка watcher'а — только stat файлов
+    one changed    изменён один сервис: перечитан и разобран только он
+
+Запуск (из корня репозитория):
+    PYTHONPATH=src python tools/bench_hosts_catalog_cache.py
+    PYTHONPATH=src python tools/bench_hosts_catalog_cache.py --services 6000 --json
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from unittest import mock
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+for _path in (PROJECT_ROOT / "src", PROJECT_ROOT / "tests"):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+from bench_common import BenchReport, bench_parser, print_report  # noqa: E402
+from hosts import proxy_domains  # noqa: E402
+from hosts import catalog_cache  # noqa: E402
+from hosts.catalog_cache import reset_split_catalog_caches  # noqa: E402
+from hosts_catalog_fixtures import reference_full_load, write_catalog_tree  # noqa: E402
+
+
+@dataclass
+class CatalogCacheBenchReport(BenchReport):
+    services: int
+    files: int
+    catalog_bytes: int
+    full_read_ms: float = 0.0
+    cold_ms: float = 0.0
+    warm_startup_ms: float = 0.0
+    warm_signature_ms: float = 0.0
+    one_changed_ms: float = 0.0
+    identical: bool = False
+
+    def format(self) -> str:
+        return "\n".join(
+            [
+                f"hosts catalog, {self.services} services, {self.files} files, {self.catalog_bytes / 1e6:.1f} MB",
+                f"  {'full read (before)':<18}{self.full_read_ms:9.1f} ms",
+                f"  {'cold':<18}{self.cold_ms:9.1f} ms",
+                f"  {'warm startup':<18}{self.warm_startup_ms:9.1f} ms",
+                f"  {'warm signature':<18}{self.warm_signature_ms:9.1f} ms",
+                f"  {'one changed':<18}{self.one_changed_ms:9.1f} ms",
+                f"  catalog identical to full parse: {self.identical}",
+            ]
+        )
+
+
+def _timed_ms(fn) -> tuple[float, object]:
+    started = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - started) * 1000.0, result
+
+
+def run_catalog_cache_bench(*, services: int = 3000, domains_per_service: int = 6) -> CatalogCacheBenchReport:
+    with tempfile.TemporaryDirectory(prefix="hosts_catalog_bench_") as temp_dir, mock.patch.object(
+        catalog_cache, "default_hosts_catalog_cache_dir", return_value=Path(temp_dir) / "cache"
+    ):
+        catalog = write_catalog_tree(Path(temp_dir) / "json", services=services, domains_per_service=domains_per_service)
+        files = proxy_domains._split_catalog_files(catalog)
+        report = CatalogCacheBenchReport(
+            services=services,
+            files=len(files),
+            catalog_bytes=sum(path.stat().st_size for path in files),
+        )
+
+        report.full_read_ms, expected = _timed_ms(lambda: reference_full_load(catalog))
+
+        reset_split_catalog_caches()
+        report.cold_ms, _loaded = _timed_ms(lambda: proxy_domains._load_split_catalog_with_sig(catalog))
+
+        reset_split_catalog_caches()
+        report.warm_startup_ms, (warm, _sig) = _timed_ms(lambda: proxy_domains._load_split_catalog_with_sig(catalog))
+        report.identical = warm == expected
+
+        report.warm_signature_ms, _sig = _timed_ms(lambda: proxy_domains._get_split_catalog_content_sig(catalog))
+
+        changed = files[len(files) // 2]
+        data = json.loads(changed.read_text(encoding="utf-8"))
+        data["name"] = data["name"] + " (changed)"
+        changed.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        past = time.time_ns() - 60_000_000_000
+        os.utime(changed, ns=(past, past))
+        reset_split_catalog_caches()
+        report.one_changed_ms, _loaded = _timed_ms(lambda: proxy_domains._load_split_catalog_with_sig(catalog))
+        reset_split_catalog_caches()
+    return report
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = bench_parser(__doc__)
+    parser.add_argument("--services", type=int, default=3000)
+    parser.add_argument("--domains-per-service", type=int, default=6)
+    args = parser.parse_args(argv)
+
+    report = run_catalog_cache_bench(services=args.services, domains_per_service=args.domains_per_service)
+    return print_report(report, as_json=args.json)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
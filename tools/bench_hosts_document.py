@@ -0,0 +1,122 @@
+"""Бенчмарк применения блока ZapretGUI к большому hosts (ad-block списки).
+
+hosts генерируется во временной папке: заголовок, секции с комментариями и
+пустыми строками, `0.0.0.0 ad…` строки, среди них несколько ручных записей
+доменов сервисов. Переключаются два набора сервисов (как тумблеры на
+странице hosts), каждый шаг — правка и запись файла.
+
+    before     прежний конвейер (tests/hosts_document_reference.py): splitlines +
+               удаление блока + перебор строк
+    cold       первый HostsDocument: разбор + правка
+    toggle     правка разобранного документа + запись + commit
+    no-op      набор уже применён — правка без записи
+
+Запуск (из корня репозитория):
+    PYTHONPATH=src python tools/bench_hosts_document.py
+    PYTHONPATH=src python tools/bench_hosts_document.py --lines 500000 --json
+"""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+for _path in (PROJECT_ROOT / "src", PROJECT_ROOT / "tests"):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+from bench_common import BenchReport, bench_parser, print_report  # noqa: E402
+from hosts.hosts_document import HostsDocument  # noqa: E402
+from hosts_document_reference import build_hosts_text, reference_apply, service_rows  # noqa: E402
+
+
+
+@dataclass
+class HostsDocumentBenchReport(BenchReport):
+    lines: int
+    rows: int
+    toggles: int
+    hosts_bytes: int = 0
+    before_ms: float = 0.0
+    cold_ms: float = 0.0
+    toggle_ms: float = 0.0
+    noop_ms: float = 0.0
+    identical: bool = False
+
+    def format(self) -> str:
+        return "\n".join(
+            [
+                f"hosts apply, {self.lines} lines ({self.hosts_bytes / 1e6:.1f} MB), {self.rows} rows, {self.toggles} toggles",
+                f"  {'before':<18}{self.before_ms:9.1f} ms",
+                f"  {'cold':<18}{self.cold_ms:9.1f} ms",
+                f"  {'toggle':<18}{self.toggle_ms:9.1f} ms",
+                f"  {'no-op':<18}{self.noop_ms:9.1f} ms",
+                f"  output identical to the old pipeline: {self.identical}",
+            ]
+        )
+
+
+def _write_hosts(path: Path, text: str) -> None:
+    # Как safe_write_hosts_file.
+    path.write_text(text, encoding="utf-8-sig", newline="\n")
+
+
+def run_hosts_document_bench(*, lines: int = 200_000, rows: int = 300, toggles: int = 10) -> HostsDocumentBenchReport:
+    text = build_hosts_text(lines=lines)
+    report = HostsDocumentBenchReport(lines=lines, rows=rows, toggles=toggles, hosts_bytes=len(text.encode("utf-8")))
+    # Наборы пересекаются с ручными строками svcN.example — есть и замены «верхних» записей.
+    row_sets = [service_rows(start=0, count=rows), service_rows(start=rows // 2, count=rows)]
+
+    with tempfile.TemporaryDirectory(prefix="hosts_document_bench_") as temp_dir:
+        path = Path(temp_dir) / "hosts"
+
+        expected: list[str] = []
+        current = text
+        started = time.perf_counter()
+        for step in range(toggles):
+            current = reference_apply(current, row_sets[step % 2])
+            _write_hosts(path, current)
+            expected.append(current)
+        report.before_ms = (time.perf_counter() - started) * 1000.0 / toggles
+
+        started = time.perf_counter()
+        document = HostsDocument(text)
+        plan = document.plan(row_sets[0])
+        report.cold_ms = (time.perf_counter() - started) * 1000.0
+
+        produced: list[str] = []
+        started = time.perf_counter()
+        for step in range(toggles):
+            plan = document.plan(row_sets[step % 2])
+            if plan.changed:
+                _write_hosts(path, plan.text)
+                document.commit(plan)
+            produced.append(document.text)
+        report.toggle_ms = (time.perf_counter() - started) * 1000.0 / toggles
+
+        started = time.perf_counter()
+        for _ in range(toggles):
+            plan = document.plan(row_sets[(toggles - 1) % 2])
+        report.noop_ms = (time.perf_counter() - started) * 1000.0 / toggles
+
+    report.identical = produced == expected
+    return report
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = bench_parser(__doc__)
+    parser.add_argument("--lines", type=int, default=200_000)
+    parser.add_argument("--rows", type=int, default=300)
+    parser.add_argument("--toggles", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    report = run_hosts_document_bench(lines=args.lines, rows=args.rows, toggles=args.toggles)
+    return print_report(report, as_json=args.json)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,101 @@
+"""Бенчмарк нормализации ipset-файлов (lists/core/ip_entries).
+
+Синтетический пользовательский ipset: одиночные IPv4, CIDR (часть с
+ненулевыми битами хоста), немного IPv6, комментарии и повторы. Сравнивает:
+
+    reference  ipaddress на каждую строку + дедупликация по строке (как раньше)
+    fast       iter_ip_entries: IPv4 в целые числа, дедупликация по ключу
+    cached     повторное чтение того же файла через кэш ipsets_manager
+    collapse   разбор + слияние пересекающихся/соседних подсетей
+
+Запуск (из корня репозитория):
+    PYTHONPATH=src python tools/bench_lists_ipset_entries.py
+    PYTHONPATH=src python tools/bench_lists_ipset_entries.py --lines 200000 --json
+"""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+for _path in (PROJECT_ROOT / "src", PROJECT_ROOT / "tests"):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+from bench_common import BenchReport, bench_parser, print_report  # noqa: E402
+from lists.core.ip_entries import iter_ip_entries, normalize_ip_entries  # noqa: E402
+from lists_ipset_reference import reference_effective_entries, synthetic_ipset_lines  # noqa: E402
+
+
+@dataclass
+class IpsetEntriesBenchReport(BenchReport):
+    lines: int
+    entries: int = 0
+    collapsed: int = 0
+    reference_seconds: float = 0.0
+    fast_seconds: float = 0.0
+    cached_ms: float = 0.0
+    collapse_seconds: float = 0.0
+
+    def format(self) -> str:
+        speedup = self.reference_seconds / self.fast_seconds if self.fast_seconds else 0.0
+        return "\n".join(
+            [
+                f"ipset normalize, {self.lines} lines -> {self.entries} entries ({self.collapsed} after collapse)",
+                f"  reference (ipaddress)  {self.reference_seconds:8.3f} s",
+                f"  fast path              {self.fast_seconds:8.3f} s  (x{speedup:.1f})",
+                f"  cached re-read         {self.cached_ms:8.3f} ms",
+                f"  parse + collapse       {self.collapse_seconds:8.3f} s",
+            ]
+        )
+
+
+def run_ipset_entries_bench(lines_count: int = 1_000_000) -> IpsetEntriesBenchReport:
+    from lists import ipsets_manager
+
+    report = IpsetEntriesBenchReport(lines=lines_count)
+    with tempfile.TemporaryDirectory(prefix="ipset_entries_bench_") as temp_dir:
+        path = Path(temp_dir) / "ipset-all.txt"
+        path.write_text("\n".join(synthetic_ipset_lines(lines_count)) + "\n", encoding="utf-8")
+
+        started = time.perf_counter()
+        with open(path, "r", encoding="utf-8") as f:
+            expected = reference_effective_entries(f)
+        report.reference_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        with open(path, "r", encoding="utf-8") as f:
+            entries = list(iter_ip_entries(f))
+        report.fast_seconds = time.perf_counter() - started
+        if entries != expected:
+            raise AssertionError("fast ipset normalizer differs from reference")
+        report.entries = len(entries)
+
+        ipsets_manager._invalidate_base_cache()
+        ipsets_manager._count_effective_entries(str(path))
+        started = time.perf_counter()
+        ipsets_manager._count_effective_entries(str(path))
+        report.cached_ms = (time.perf_counter() - started) * 1000.0
+        ipsets_manager._invalidate_base_cache()
+
+        started = time.perf_counter()
+        with open(path, "r", encoding="utf-8") as f:
+            report.collapsed = len(normalize_ip_entries(f, collapse=True))
+        report.collapse_seconds = time.perf_counter() - started
+    return report
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = bench_parser(__doc__)
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    return print_report(run_ipset_entries_bench(args.lines), as_json=args.json)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,111 @@
+"""Бенчмарк IpsetIndex на встроенной базе ipset-all (+ ipset-ru).
+
+Сравнивает линейный проход `ip in net` по всем подсетям (как раньше в
+OrchestraRunner) с поиском по индексу, а также компиляцию из текста с
+загрузкой из бинарного кэша.
+
+Запуск (из корня репозитория):
+    PYTHONPATH=src python tools/bench_lists_ipset_index.py
+    PYTHONPATH=src python tools/bench_lists_ipset_index.py --lookups 200000 --json
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+for _path in (PROJECT_ROOT / "src", PROJECT_ROOT / "tests"):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+from bench_common import BenchReport, bench_parser, print_report  # noqa: E402
+from lists.ipset_index import IpsetIndex  # noqa: E402
+from lists_ipset_reference import embedded_ipset_sources, owner_linear, parse_networks_linear, sample_addresses  # noqa: E402
+
+
+@dataclass
+class IpsetIndexBenchReport(BenchReport):
+    networks: int
+    lookups: int
+    linear_lookups: int
+    hits: int
+    linear_us_per_lookup: float
+    index_us_per_lookup: float
+    compile_ms: float
+    cache_load_ms: float
+    cache_bytes: int
+
+    @property
+    def speedup(self) -> float:
+        return self.linear_us_per_lookup / self.index_us_per_lookup if self.index_us_per_lookup else 0.0
+
+    def as_dict(self) -> dict:
+        data = super().as_dict()
+        data["speedup"] = self.speedup
+        return data
+
+    def format(self) -> str:
+        return (
+            f"ipset index ({self.networks} networks, {self.lookups} lookups, {self.hits} hits): "
+            f"linear {self.linear_us_per_lookup:.1f} us, index {self.index_us_per_lookup:.2f} us, "
+            f"x{self.speedup:.0f}; compile {self.compile_ms:.0f} ms, "
+            f"cache load {self.cache_load_ms:.1f} ms ({self.cache_bytes // 1024} KiB)"
+        )
+
+
+def run_ipset_index_bench(*, lookups: int = 100_000, linear_lookups: int = 2_000, seed: int = 1) -> IpsetIndexBenchReport:
+    """Линейный проход медленный, поэтому он меряется на первых linear_lookups адресах."""
+    sources = embedded_ipset_sources()
+    networks = parse_networks_linear(sources)
+    addresses = sample_addresses(networks, lookups, seed=seed)
+    linear_lookups = min(linear_lookups, len(addresses))
+
+    started = time.perf_counter()
+    index = IpsetIndex.from_sources(sources)
+    compile_seconds = time.perf_counter() - started
+
+    data = index.to_bytes()
+    started = time.perf_counter()
+    IpsetIndex.from_bytes(data)
+    load_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    expected = [owner_linear(networks, ip) for ip in addresses[:linear_lookups]]
+    linear_seconds = time.perf_counter() - started
+
+    owner = index.owner
+    started = time.perf_counter()
+    results = [owner(ip) for ip in addresses]
+    index_seconds = time.perf_counter() - started
+
+    if results[:linear_lookups] != expected:
+        raise RuntimeError("ipset index disagrees with the linear scan")
+
+    return IpsetIndexBenchReport(
+        networks=len(networks),
+        lookups=len(addresses),
+        linear_lookups=linear_lookups,
+        hits=sum(result is not None for result in results),
+        linear_us_per_lookup=linear_seconds * 1e6 / max(1, linear_lookups),
+        index_us_per_lookup=index_seconds * 1e6 / max(1, len(addresses)),
+        compile_ms=compile_seconds * 1000,
+        cache_load_ms=load_seconds * 1000,
+        cache_bytes=len(data),
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = bench_parser(__doc__)
+    parser.add_argument("--lookups", type=int, default=100_000)
+    parser.add_argument("--linear-lookups", type=int, default=2_000)
+    args = parser.parse_args(argv)
+
+    report = run_ipset_index_bench(lookups=args.lookups, linear_lookups=args.linear_lookups)
+    return print_report(report, as_json=args.json)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
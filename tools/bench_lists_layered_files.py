@@ -0,0 +1,119 @@
+"""Бенчмарк фоновой сверки слоёных списков (rebuild_all_layered_list_files).
+
+Дерево lists/ собирается из встроенных баз (other, ipset-all, ipset-ru) плюс
+синтетические hostlist-ы с user-слоями — примерно как у установленной
+программы. Замеры:
+
+    full     сверка всех списков без манифеста (как до манифеста)
+    noop     повторный запуск — ничего не менялось
+    touched  базы переложены с тем же содержимым (новый mtime)
+    one      изменён один user-слой
+
+Запуск (из корня репозитория):
+    PYTHONPATH=src python tools/bench_lists_layered_files.py
+    PYTHONPATH=src python tools/bench_lists_layered_files.py --hostlists 80 --json
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+PROJECT_SRC = Path(__file__).resolve().parents[1] / "src"
+if str(PROJECT_SRC) not in sys.path:
+    sys.path.insert(0, str(PROJECT_SRC))
+
+from bench_common import BenchReport, bench_parser, print_report  # noqa: E402
+from lists.core import layered_files  # noqa: E402
+from lists.core.embedded_defaults import get_ipset_all_base_text, get_ipset_ru_base_text, get_other_base_text  # noqa: E402
+
+_TLDS = ("com", "net", "org", "ru", "io", "gg")
+
+
+def write_lists_tree(root: Path, *, hostlists: int = 40, hosts_per_list: int = 2000, seed: int = 1) -> int:
+    """Создаёт lists/base + lists/user; возвращает число списков."""
+    rng = random.Random(seed)
+    base_dir = root / "base"
+    user_dir = root / "user"
+    base_dir.mkdir(parents=True, exist_ok=True)
+    user_dir.mkdir(parents=True, exist_ok=True)
+    (base_dir / "other.txt").write_text(get_other_base_text(), encoding="utf-8")
+    (base_dir / "ipset-all.txt").write_text(get_ipset_all_base_text(), encoding="utf-8")
+    (base_dir / "ipset-ru.txt").write_text(get_ipset_ru_base_text(), encoding="utf-8")
+    (user_dir / "other.txt").write_text("example.org\n", encoding="utf-8")
+    for index in range(hostlists):
+        name = f"list-{index:03d}.txt"
+        hosts = (f"h{rng.randrange(10**7)}.site{index}.{rng.choice(_TLDS)}" for _ in range(hosts_per_list))
+        (base_dir / name).write_text("\n".join(hosts) + "\n", encoding="utf-8")
+        if index % 3 == 0:
+            (user_dir / name).write_text(f"user{index}.example.com\n", encoding="utf-8")
+    return hostlists + 3
+
+
+@dataclass
+class LayeredFilesBenchReport(BenchReport):
+    lists: int
+    tree_mb: float = 0.0
+    full_ms: float = 0.0
+    noop_ms: float = 0.0
+    touched_ms: float = 0.0
+    one_changed_ms: float = 0.0
+
+    def format(self) -> str:
+        return "\n".join(
+            [
+                f"layered lists rebuild, {self.lists} lists, {self.tree_mb:.1f} MB of layers",
+                f"  full reconcile (no manifest) {self.full_ms:9.2f} ms",
+                f"  no-op startup                {self.noop_ms:9.2f} ms",
+                f"  bases re-copied, same text   {self.touched_ms:9.2f} ms",
+                f"  one user layer changed       {self.one_changed_ms:9.2f} ms",
+            ]
+        )
+
+
+def _timed_rebuild_ms(root: Path) -> float:
+    started = time.perf_counter()
+    layered_files.rebuild_all_layered_list_files(root)
+    return (time.perf_counter() - started) * 1000.0
+
+
+def run_layered_files_bench(*, hostlists: int = 40, hosts_per_list: int = 2000) -> LayeredFilesBenchReport:
+    with tempfile.TemporaryDirectory(prefix="layered_files_bench_") as temp_dir:
+        root = Path(temp_dir) / "lists"
+        report = LayeredFilesBenchReport(lists=write_lists_tree(root, hostlists=hostlists, hosts_per_list=hosts_per_list))
+        report.tree_mb = sum(path.stat().st_size for path in root.rglob("*.txt")) / (1024 * 1024)
+
+        report.full_ms = _timed_rebuild_ms(root)
+        # Второй полный прогон — итоги уже на месте, как при обычном запуске
+        # до манифеста (write_text_file не перезаписывает совпадающий файл).
+        (root / layered_files.LAYERED_MANIFEST_FILE_NAME).unlink()
+        report.full_ms = _timed_rebuild_ms(root)
+        report.noop_ms = _timed_rebuild_ms(root)
+
+        for path in (root / "base").glob("*.txt"):
+            st = path.stat()
+            os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        report.touched_ms = _timed_rebuild_ms(root)
+
+        (root / "user" / "list-000.txt").write_text("changed.example.com\n", encoding="utf-8")
+        report.one_changed_ms = _timed_rebuild_ms(root)
+    return report
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = bench_parser(__doc__)
+    parser.add_argument("--hostlists", type=int, default=40)
+    parser.add_argument("--hosts-per-list", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    report = run_layered_files_bench(hostlists=args.hostlists, hosts_per_list=args.hosts_per_list)
+    return print_report(report, as_json=args.json)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
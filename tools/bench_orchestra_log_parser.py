@@ -0,0 +1,132 @@
+"""Бенчмарк LogParser.parse_line: разбор с ключевыми словами против
+последовательного прогона всех regex (прежний parse_line из
+tests/orchestra_log_reference.py).
+
+Лог берётся из файла (debug-лог оркестратора) или генерируется
+(tests/orchestra_log_fixtures.py): в основном packet:/IP4:/TCP: шум плюс
+события slm_quality, APPLIED и т.д.
+
+Запуск (из корня репозитория):
+    PYTHONPATH=src python tools/bench_orchestra_log_parser.py --log logs/orchestra_debug.log
+    PYTHONPATH=src python tools/bench_orchestra_log_parser.py --size-mb 300
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+for _path in (PROJECT_ROOT / "src", PROJECT_ROOT / "tests"):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+from bench_common import BenchReport, bench_parser, print_report  # noqa: E402
+from orchestra.log_parser import LogParser  # noqa: E402
+from orchestra_log_fixtures import generate_log_lines  # noqa: E402
+from orchestra_log_reference import BaselineLogParser  # noqa: E402
+
+
+@dataclass
+class LogParserBenchReport(BenchReport):
+    lines: int
+    megabytes: float
+    events: int
+    sequential_seconds: float
+    dispatch_seconds: float
+
+    @property
+    def speedup(self) -> float:
+        return self.sequential_seconds / self.dispatch_seconds if self.dispatch_seconds else 0.0
+
+    def as_dict(self) -> dict:
+        data = super().as_dict()
+        data["speedup"] = self.speedup
+        return data
+
+    def format(self) -> str:
+        lines = max(1, self.lines)
+        return (
+            f"log parser ({self.lines} lines, {self.megabytes:.1f} MB, {self.events} events): "
+            f"sequential {self.sequential_seconds * 1e9 / lines:.0f} ns/line, "
+            f"dispatch {self.dispatch_seconds * 1e9 / lines:.0f} ns/line, x{self.speedup:.1f}"
+        )
+
+
+def _time_parse(parse, lines: Iterable[str]) -> tuple[float, int]:
+    events = 0
+    started = time.perf_counter()
+    for line in lines:
+        if parse(line) is not None:
+            events += 1
+    return time.perf_counter() - started, events
+
+
+def _iter_log_file(path: str) -> Iterator[str]:
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.rstrip()
+            if line:
+                yield line
+
+
+def run_log_parser_bench(
+    *,
+    log_path: str | None = None,
+    lines: int = 200_000,
+    size_mb: float | None = None,
+) -> LogParserBenchReport:
+    """Прогоняет один и тот же лог через оба варианта разбора.
+
+    Файл читается заново на каждый прогон (лог может быть на сотни МБ),
+    синтетический лог держится в памяти.
+    """
+    if log_path:
+        def source() -> Iterator[str]:
+            return _iter_log_file(log_path)
+    else:
+        if size_mb is not None:
+            # ~65 байт на строку в среднем
+            lines = max(1, int(size_mb * 1024 * 1024 / 65))
+        # Генерация дороже разбора, поэтому строки готовятся заранее.
+        generated = list(generate_log_lines(lines))
+
+        def source() -> Iterator[str]:
+            return iter(generated)
+
+    total_lines = 0
+    total_bytes = 0
+    for line in source():
+        total_lines += 1
+        total_bytes += len(line) + 1
+
+    sequential_seconds, sequential_events = _time_parse(BaselineLogParser().parse_line, source())
+    dispatch_seconds, dispatch_events = _time_parse(LogParser().parse_line, source())
+    if sequential_events != dispatch_events:
+        raise RuntimeError(f"event count mismatch: {sequential_events} != {dispatch_events}")
+
+    return LogParserBenchReport(
+        lines=total_lines,
+        megabytes=total_bytes / (1024 * 1024),
+        events=dispatch_events,
+        sequential_seconds=sequential_seconds,
+        dispatch_seconds=dispatch_seconds,
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = bench_parser(__doc__)
+    parser.add_argument("--log", dest="log_path", help="записанный debug-лог winws2")
+    parser.add_argument("--lines", type=int, default=200_000, help="строк синтетического лога")
+    parser.add_argument("--size-mb", type=float, help="размер синтетического лога в МБ")
+    args = parser.parse_args(argv)
+
+    report = run_log_parser_bench(log_path=args.log_path, lines=args.lines, size_mb=args.size_mb)
+    return print_report(report, as_json=args.json)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
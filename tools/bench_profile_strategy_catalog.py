@@ -0,0 +1,131 @@
+"""Бенчмарк загрузки каталогов стратегий.
+
+Каждый замер «запуска» — отдельный процесс, чтобы кэши процесса не мешали:
+
+    parse  пустой tmp: разбор .txt + describe_strategy_visual (как до блоба)
+    blob   второй процесс с тем же tmp: каталоги из <tmp>/strategy_catalogs
+
+Вместо APPLICATION_PATHS.tmp_dir дочерние процессы берут временную папку.
+    call   повторный вызов в уже прогретом процессе (подпись в пределах TTL)
+    resign повторный вызов с принудительным пересчётом подписи дерева
+
+Запуск (из корня репозитория):
+    PYTHONPATH=src python tools/bench_profile_strategy_catalog.py
+    PYTHONPATH=src python tools/bench_profile_strategy_catalog.py --engine winws1 --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+PROJECT_SRC = Path(__file__).resolve().parents[1] / "src"
+if str(PROJECT_SRC) not in sys.path:
+    sys.path.insert(0, str(PROJECT_SRC))
+
+from bench_common import BenchReport, bench_parser, print_report  # noqa: E402
+
+_REPEATS = 200
+
+
+def _run_child(engine: str, tmp_root: str, catalog_name: str) -> dict:
+    started = time.perf_counter()
+    from core.paths import AppPaths
+    from profile import strategy_catalog
+
+    import_seconds = time.perf_counter() - started
+    paths = AppPaths(user_root=PROJECT_SRC, local_root=PROJECT_SRC)
+    cache_dir = Path(tmp_root) / strategy_catalog.STRATEGY_CATALOG_CACHE_DIR_NAME
+    strategy_catalog.strategy_catalog_cache_dir = lambda: cache_dir
+
+    started = time.perf_counter()
+    catalogs = strategy_catalog.load_strategy_catalogs(paths, engine)
+    entries = len(catalogs.get(catalog_name) or {})
+    first_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(_REPEATS):
+        strategy_catalog.load_strategy_catalogs(paths, engine)
+    call_seconds = (time.perf_counter() - started) / _REPEATS
+
+    started = time.perf_counter()
+    for _ in range(_REPEATS):
+        strategy_catalog._SIGNATURE_CACHE.clear()
+        strategy_catalog.load_strategy_catalogs(paths, engine)
+    resign_seconds = (time.perf_counter() - started) / _REPEATS
+
+    return {
+        "import_seconds": import_seconds,
+        "first_seconds": first_seconds,
+        "call_seconds": call_seconds,
+        "resign_seconds": resign_seconds,
+        "entries": entries,
+    }
+
+
+@dataclass
+class StrategyCatalogBenchReport(BenchReport):
+    engine: str
+    catalog_name: str
+    entries: int = 0
+    parse_ms: float = 0.0
+    blob_ms: float = 0.0
+    call_us: float = 0.0
+    resign_us: float = 0.0
+    runs: list[dict] = field(default_factory=list)
+
+    def format(self) -> str:
+        return "\n".join(
+            [
+                f"strategy catalogs {self.engine}, first access '{self.catalog_name}' ({self.entries} entries)",
+                f"  cold start, parse .txt   {self.parse_ms:8.2f} ms",
+                f"  cold start, disk blob    {self.blob_ms:8.2f} ms",
+                f"  warm call (TTL)          {self.call_us:8.1f} us",
+                f"  warm call (re-signature) {self.resign_us:8.1f} us",
+            ]
+        )
+
+
+def run_strategy_catalog_bench(engine: str = "winws2", *, catalog_name: str = "tcp") -> StrategyCatalogBenchReport:
+    report = StrategyCatalogBenchReport(engine=engine, catalog_name=catalog_name)
+    with tempfile.TemporaryDirectory(prefix="strategy_catalog_bench_") as tmp_root:
+        for _mode in ("parse", "blob"):
+            output = subprocess.run(
+                [sys.executable, str(Path(__file__).resolve()), "--child", tmp_root,
+                 "--engine", engine, "--catalog", catalog_name],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            report.runs.append(json.loads(output.strip().splitlines()[-1]))
+    parse_run, blob_run = report.runs
+    report.entries = parse_run["entries"]
+    report.parse_ms = parse_run["first_seconds"] * 1000.0
+    report.blob_ms = blob_run["first_seconds"] * 1000.0
+    report.call_us = blob_run["call_seconds"] * 1_000_000.0
+    report.resign_us = blob_run["resign_seconds"] * 1_000_000.0
+    return report
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = bench_parser(__doc__)
+    parser.add_argument("--engine", default="winws2")
+    parser.add_argument("--catalog", default="tcp")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(_run_child(args.engine, args.child, args.catalog)))
+        return 0
+
+    return print_report(run_strategy_catalog_bench(args.engine, catalog_name=args.catalog), as_json=args.json)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,154 @@
+"""Event-loop lag with proxy logging off, synchronous and queued.
+
+A probe task sleeps ``probe_interval`` and records how late it wakes up,
+while a producer logs ``burst`` lines every ``burst_interval`` seconds —
+roughly what a busy proxy does on connect and route decisions.
+``sync`` is the old path (``RotatingFileHandler.emit`` on the loop),
+``queued`` is ProxyLogger with its writer thread.
+
+Запуск (из корня репозитория):
+    PYTHONPATH=src python tools/bench_proxy_log_lag.py
+    PYTHONPATH=src python tools/bench_proxy_log_lag.py --duration 5 --json
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+PROJECT_SRC = Path(__file__).resolve().parents[1] / "src"
+if str(PROJECT_SRC) not in sys.path:
+    sys.path.insert(0, str(PROJECT_SRC))
+
+from bench_common import BenchReport, bench_parser, print_report  # noqa: E402
+from telegram_proxy.proxy_logger import ProxyLogger  # noqa: E402
+
+
+LOG_LAG_MODES = ("off", "sync", "queued")
+
+
+@dataclass(frozen=True)
+class LogLagConfig:
+    duration: float = 2.0
+    burst: int = 50
+    burst_interval: float = 0.005
+    probe_interval: float = 0.001
+
+
+@dataclass
+class LogLagReport(BenchReport):
+    mode: str
+    lines: int
+    probes: int
+    lag_p50_ms: float
+    lag_p99_ms: float
+    lag_max_ms: float
+
+    def format(self) -> str:
+        return (
+            f"log {self.mode}: {self.lines} lines, loop lag p50 {self.lag_p50_ms:.2f} ms, "
+            f"p99 {self.lag_p99_ms:.2f} ms, max {self.lag_max_ms:.2f} ms"
+        )
+
+
+def _sync_logger(log_dir: str) -> tuple[logging.Logger, RotatingFileHandler]:
+    logger = logging.getLogger(f"tg_proxy_bench_sync.{log_dir}")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    handler = RotatingFileHandler(
+        os.path.join(log_dir, "sync.log"),
+        maxBytes=10 * 1024 * 1024,
+        backupCount=5,
+        encoding="utf-8",
+    )
+    handler.setFormatter(logging.Formatter("%(asctime)s  %(message)s", datefmt="%Y-%m-%d %H:%M:%S"))
+    logger.addHandler(handler)
+    return logger, handler
+
+
+async def _measure(config: LogLagConfig, log_fn) -> tuple[int, list[float]]:
+    lags: list[float] = []
+    lines = 0
+    deadline = time.monotonic() + config.duration
+
+    async def probe() -> None:
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            await asyncio.sleep(config.probe_interval)
+            lags.append(max(0.0, time.perf_counter() - started - config.probe_interval))
+
+    async def produce() -> None:
+        nonlocal lines
+        while time.monotonic() < deadline:
+            if log_fn is not None:
+                for index in range(config.burst):
+                    log_fn(f"[bench-{lines + index}] route=WSS dc=2 media=no result=connected elapsed=0.1s")
+            lines += config.burst
+            await asyncio.sleep(config.burst_interval)
+
+    await asyncio.gather(probe(), produce())
+    return (lines if log_fn is not None else 0), lags
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_log_lag(mode: str, config: LogLagConfig = LogLagConfig()) -> LogLagReport:
+    if mode not in LOG_LAG_MODES:
+        raise ValueError(f"unknown log mode: {mode}")
+    with tempfile.TemporaryDirectory(prefix="tg_proxy_log_lag_") as log_dir:
+        if mode == "sync":
+            logger, handler = _sync_logger(log_dir)
+            try:
+                lines, lags = asyncio.run(_measure(config, logger.info))
+            finally:
+                logger.removeHandler(handler)
+                handler.close()
+        elif mode == "queued":
+            proxy_logger = ProxyLogger(log_dir=log_dir)
+            try:
+                lines, lags = asyncio.run(_measure(config, proxy_logger.log))
+                proxy_logger.flush_pending(timeout=30.0)
+            finally:
+                proxy_logger.shutdown()
+                for handler in list(proxy_logger._logger.handlers):
+                    proxy_logger._logger.removeHandler(handler)
+                    handler.close()
+        else:
+            lines, lags = asyncio.run(_measure(config, None))
+
+    return LogLagReport(
+        mode=mode,
+        lines=lines,
+        probes=len(lags),
+        lag_p50_ms=_percentile(lags, 0.50) * 1000.0,
+        lag_p99_ms=_percentile(lags, 0.99) * 1000.0,
+        lag_max_ms=max(lags, default=0.0) * 1000.0,
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = bench_parser(__doc__)
+    parser.add_argument("--duration", type=float, default=LogLagConfig.duration)
+    parser.add_argument("--burst", type=int, default=LogLagConfig.burst)
+    args = parser.parse_args(argv)
+
+    config = LogLagConfig(duration=args.duration, burst=args.burst)
+    for mode in LOG_LAG_MODES:
+        print_report(run_log_lag(mode, config), as_json=args.json, indent=None)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
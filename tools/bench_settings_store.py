@@ -0,0 +1,132 @@
+"""Бенчмарк settings.store: задержка геттеров и число записей на действие UI.
+
+Документ раздувается пользовательскими профилями (как у активных
+пользователей), чтобы стоимость копирования была заметна.
+
+    getter    get_dpi_autostart() — чтение по пути из снапшота
+    full      read_settings() — изменяемая копия всего документа
+    setter    set_window_opacity() — нормализация + атомарная запись
+    action    5 сеттеров upstream Telegram-прокси: по отдельности и в транзакции
+    slider    60 значений слайдера через update_settings_debounced + flush
+
+Запуск (из корня репозитория):
+    PYTHONPATH=src python tools/bench_settings_store.py
+    PYTHONPATH=src python tools/bench_settings_store.py --profiles 500 --json
+"""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from unittest import mock
+
+PROJECT_SRC = Path(__file__).resolve().parents[1] / "src"
+if str(PROJECT_SRC) not in sys.path:
+    sys.path.insert(0, str(PROJECT_SRC))
+
+from bench_common import BenchReport, bench_parser, print_report  # noqa: E402
+from settings import store  # noqa: E402
+
+_GETTER_REPEATS = 2000
+_SETTER_REPEATS = 100
+_SLIDER_STEPS = 60
+
+
+@dataclass
+class SettingsStoreBenchReport(BenchReport):
+    profiles: int
+    getter_us: float = 0.0
+    full_read_us: float = 0.0
+    setter_ms: float = 0.0
+    action_writes_separate: int = 0
+    action_writes_transaction: int = 0
+    action_ms_separate: float = 0.0
+    action_ms_transaction: float = 0.0
+    slider_writes: int = 0
+
+    def format(self) -> str:
+        return "\n".join(
+            [
+                f"settings.store, {self.profiles} user profiles",
+                f"  getter (path read)         {self.getter_us:8.1f} us",
+                f"  read_settings (full copy)  {self.full_read_us:8.1f} us",
+                f"  setter                     {self.setter_ms:8.2f} ms",
+                f"  5-setter action, separate  {self.action_ms_separate:8.2f} ms  {self.action_writes_separate} writes",
+                f"  5-setter action, batched   {self.action_ms_transaction:8.2f} ms  {self.action_writes_transaction} writes",
+                f"  slider, {_SLIDER_STEPS} values, debounced  {self.slider_writes} writes",
+            ]
+        )
+
+
+def _per_call(fn, repeats: int) -> float:
+    started = time.perf_counter()
+    for index in range(repeats):
+        fn(index)
+    return (time.perf_counter() - started) / repeats
+
+
+def _upstream_action(index: int) -> None:
+    store.set_tg_proxy_upstream_preset_id("")
+    store.set_tg_proxy_upstream_host(f"proxy{index}.example.org")
+    store.set_tg_proxy_upstream_port(1080 + index % 50)
+    store.set_tg_proxy_upstream_user(f"user{index}")
+    store.set_tg_proxy_upstream_pass(f"pass{index}")
+
+
+def _batched_upstream_action(index: int) -> None:
+    with store.settings_transaction():
+        _upstream_action(index)
+
+
+def _count_writes(fn) -> int:
+    with mock.patch.object(store, "atomic_write_text", wraps=store.atomic_write_text) as write:
+        fn()
+    return write.call_count
+
+
+def run_settings_store_bench(profiles: int = 200) -> SettingsStoreBenchReport:
+    report = SettingsStoreBenchReport(profiles=profiles)
+    with tempfile.TemporaryDirectory(prefix="settings_store_bench_") as root:
+        with mock.patch.object(store, "MAIN_DIRECTORY", root):
+            store.reset_settings()
+            store.set_user_profiles_settings(
+                {f"profile_{i}": {"name": f"Profile {i}", "lines": ["--lua-desync=fake:blob=tls"] * 20}
+                 for i in range(profiles)}
+            )
+
+            report.getter_us = _per_call(lambda _i: store.get_dpi_autostart(), _GETTER_REPEATS) * 1_000_000.0
+            report.full_read_us = _per_call(lambda _i: store.read_settings(), _GETTER_REPEATS // 10) * 1_000_000.0
+            report.setter_ms = _per_call(
+                lambda i: store.set_window_opacity(50 + i % 40), _SETTER_REPEATS
+            ) * 1000.0
+
+            report.action_ms_separate = _per_call(_upstream_action, _SETTER_REPEATS // 5) * 1000.0
+            report.action_ms_transaction = _per_call(_batched_upstream_action, _SETTER_REPEATS // 5) * 1000.0
+            report.action_writes_separate = _count_writes(lambda: _upstream_action(10_000))
+            report.action_writes_transaction = _count_writes(lambda: _batched_upstream_action(20_000))
+
+            def _slider() -> None:
+                for step in range(_SLIDER_STEPS):
+                    store.update_settings_debounced(
+                        "window_opacity", lambda value=40 + step: store.set_window_opacity(value), delay=60
+                    )
+                store.flush_debounced_settings()
+
+            report.slider_writes = _count_writes(_slider)
+        store._SETTINGS_CACHE = None
+    return report
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = bench_parser(__doc__)
+    parser.add_argument("--profiles", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    return print_report(run_settings_store_bench(args.profiles), as_json=args.json)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
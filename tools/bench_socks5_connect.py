@@ -0,0 +1,188 @@
+"""Бенчмарк подключений в секунду через TelegramWSProxy._handle_socks5_client.
+
+Имитирует «шторм переподключений» Telegram Desktop: много SOCKS5-клиентов
+сразу присылают CONNECT и 64-байтный obfuscated init, прокси разбирает init,
+при необходимости патчит DC, поднимает WSS к локальному фейковому relay
+(эхо одного кадра) и закрывает релей. Сеть не нужна: RawWebSocket.connect
+подменён фейком, клиенты — in-memory StreamReader.
+
+Отдельно печатается стоимость разбора init: старый путь (dc_from_init +
+patch_init_dc + MsgSplitter, три прохода AES-CTR) против InitPacket.
+
+Запуск (из корня репозитория):
+    PYTHONPATH=src python tools/bench_socks5_connect.py
+    PYTHONPATH=src python tools/bench_socks5_connect.py --connections 2000 --concurrency 64
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import socket
+import struct
+import sys
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+PROJECT_SRC = Path(__file__).resolve().parents[1] / "src"
+if str(PROJECT_SRC) not in sys.path:
+    sys.path.insert(0, str(PROJECT_SRC))
+
+from telegram_proxy.proxy.aes_ctr import AesCtrStream, aes_ctr_keystream  # noqa: E402
+from telegram_proxy.proxy.dc_map import IP_TO_DC  # noqa: E402
+from telegram_proxy.proxy.mtproto import PROTO_TAG_INTERMEDIATE, InitPacket, MsgSplitter  # noqa: E402
+from telegram_proxy.wss_proxy import TelegramWSProxy  # noqa: E402
+
+
+def _client_init(dc_idx: int) -> bytes:
+    init = bytearray(os.urandom(64))
+    keystream = aes_ctr_keystream(bytes(init[8:40]), bytes(init[40:56]), 64)
+    tail = PROTO_TAG_INTERMEDIATE + struct.pack("<h", dc_idx) + b"\x00\x00"
+    init[56:64] = bytes(a ^ b for a, b in zip(tail, keystream[56:64]))
+    return bytes(init)
+
+
+def _legacy_parse(init: bytes, fallback_dc: int) -> None:
+    key = bytes(init[8:40])
+    iv = bytes(init[40:56])
+    keystream = aes_ctr_keystream(key, iv, 64)
+    plain = bytes(a ^ b for a, b in zip(init[56:64], keystream[56:64]))
+    dc_raw = struct.unpack("<h", plain[4:6])[0]
+    if 1 <= abs(dc_raw) <= 1000:
+        return
+    ks = aes_ctr_keystream(key, iv, 64)
+    patched = bytearray(init[:64])
+    new_dc = struct.pack("<h", fallback_dc)
+    patched[60] = ks[60] ^ new_dc[0]
+    patched[61] = ks[61] ^ new_dc[1]
+    splitter = AesCtrStream(key, iv)
+    splitter.update(b"\x00" * 64)
+
+
+def _new_parse(init: bytes, fallback_dc: int) -> None:
+    packet = InitPacket(init)
+    if packet.dc is not None:
+        return
+    packet.patched(fallback_dc)
+    MsgSplitter(packet)
+
+
+class _FakeRelayWebSocket:
+    """Stand-in WSS relay: echoes the first client frame back, then closes."""
+
+    def __init__(self, domain: str):
+        self.domain = domain
+        self._closed = False
+        self._echo: asyncio.Queue = asyncio.Queue()
+
+    async def send(self, data) -> None:
+        self._echo.put_nowait(bytes(data))
+
+    async def send_batch(self, parts) -> None:
+        for part in parts:
+            await self.send(part)
+
+    async def recv(self):
+        if self._closed:
+            return None
+        data = await self._echo.get()
+        self._closed = True
+        return data
+
+    async def close(self) -> None:
+        self._closed = True
+
+
+class _Transport:
+    def get_write_buffer_size(self) -> int:
+        return 0
+
+    def get_extra_info(self, _name, default=None):
+        return default
+
+    def is_closing(self) -> bool:
+        return False
+
+
+class _ClientWriter:
+    def __init__(self) -> None:
+        self.transport = _Transport()
+
+    def get_extra_info(self, name, default=None):
+        if name == "peername":
+            return ("127.0.0.1", 40000)
+        return default
+
+    def write(self, _data) -> None:
+        return None
+
+    async def drain(self) -> None:
+        return None
+
+    def close(self) -> None:
+        return None
+
+    async def wait_closed(self) -> None:
+        return None
+
+
+def _socks5_connect_bytes(host: str, port: int) -> bytes:
+    return b"\x05\x01\x00" + b"\x05\x01\x00\x01" + socket.inet_aton(host) + struct.pack(">H", port)
+
+
+async def _run_connections(total: int, concurrency: int, patched_ratio: float) -> tuple[float, int]:
+    target_host = next(ip for ip, (dc, is_media) in IP_TO_DC.items() if dc == 2 and not is_media)
+    proxy = TelegramWSProxy(pool_size=0)
+    proxy._log = lambda _message: None
+    semaphore = asyncio.Semaphore(concurrency)
+    patched_every = int(1 / patched_ratio) if patched_ratio > 0 else 0
+
+    async def fake_connect(_ip, domain, *_args, **_kwargs):
+        await asyncio.sleep(0)
+        return _FakeRelayWebSocket(domain)
+
+    async def one(index: int) -> None:
+        async with semaphore:
+            reader = asyncio.StreamReader()
+            dc_idx = 2000 if patched_every and index % patched_every == 0 else 2
+            reader.feed_data(_socks5_connect_bytes(target_host, 443))
+            reader.feed_data(_client_init(dc_idx))
+            reader.feed_data(struct.pack("<I", 8) + os.urandom(8))
+            reader.feed_eof()
+            await proxy._handle_socks5_client(reader, _ClientWriter())
+
+    with patch("telegram_proxy.wss_proxy.RawWebSocket.connect", side_effect=fake_connect):
+        started = time.perf_counter()
+        await asyncio.gather(*(one(index) for index in range(total)))
+        elapsed = time.perf_counter() - started
+    return total / elapsed, proxy.stats.wss_connections
+
+
+def _measure_parse(fn, inits: list[bytes]) -> float:
+    started = time.perf_counter()
+    for init in inits:
+        fn(init, 2)
+    return len(inits) / (time.perf_counter() - started)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--patched-ratio", type=float, default=0.5, help="доля init с мусорным DC (путь с патчем)")
+    args = parser.parse_args(argv)
+
+    inits = [_client_init(2000 if index % 2 else 2) for index in range(20000)]
+    legacy = _measure_parse(_legacy_parse, inits)
+    current = _measure_parse(_new_parse, inits)
+    print(f"init parse: legacy {legacy:,.0f}/s, InitPacket {current:,.0f}/s")
+
+    cps, wss = asyncio.run(_run_connections(args.connections, args.concurrency, args.patched_ratio))
+    print(f"_handle_socks5_client: {cps:,.0f} connections/s "
+          f"({args.connections} conns, {wss} via WSS, concurrency {args.concurrency})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
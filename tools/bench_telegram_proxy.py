@@ -0,0 +1,377 @@
+"""Нагрузочный бенчмарк TelegramWSProxy против локальных фейков (Linux, без сети).
+
+Три event loop в трёх потоках: фейки (``network``, tests/telegram_proxy_fakes.py),
+проверяемый прокси и синтетические MTProto-клиенты. CPU прокси — это
+``time.thread_time()`` только его потока, так что работа клиентов и relay не
+попадает в CPU на ГБ. Пиковый RSS — на весь процесс (``ru_maxrss``), вместе
+с фейками.
+
+Запуск (из корня репозитория):
+    PYTHONPATH=src python tools/bench_telegram_proxy.py --mode socks5 --route wss --clients 64
+    PYTHONPATH=src python tools/bench_telegram_proxy.py --mode mtproxy --route tcp --packet-kb 64
+    PYTHONPATH=src python tools/bench_telegram_proxy.py --mode socks5 --route upstream --json
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+for _path in (PROJECT_ROOT / "src", PROJECT_ROOT / "tests"):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+from bench_common import BenchReport, bench_parser, print_report  # noqa: E402
+from telegram_proxy.proxy.aes_ctr import AesCtrStream  # noqa: E402
+from telegram_proxy.proxy.dc_map import TCP_ENDPOINTS  # noqa: E402
+from telegram_proxy.proxy.mtproto import PROTO_TAG_INTERMEDIATE  # noqa: E402
+from telegram_proxy.proxy.mtproxy import generate_secret  # noqa: E402
+from telegram_proxy.proxy.routing import UpstreamProxyConfig  # noqa: E402
+from telegram_proxy.wss_proxy import TelegramWSProxy  # noqa: E402
+from telegram_proxy_fakes import FakeSocks5Upstream, FakeTcpDc, FakeWssRelay, LoopbackRedirect  # noqa: E402
+
+
+MODES = ("socks5", "mtproxy")
+ROUTES = ("wss", "tcp", "upstream")
+
+# DC2 has a stable WSS relay, DC1 has none and always goes over TCP.
+_ROUTE_DC = {"wss": 2, "tcp": 1, "upstream": 2}
+_ZERO_64 = b"\x00" * 64
+
+
+@dataclass(frozen=True)
+class LoadConfig:
+    mode: str = "socks5"
+    route: str = "wss"
+    clients: int = 32
+    packets: int = 64
+    packet_size: int = 16 * 1024
+    download_factor: int = 4
+    pool_size: int = 4
+    warmup: float = 0.5
+    timeout: float = 60.0
+
+
+@dataclass
+class LoadReport(BenchReport):
+    mode: str
+    route: str
+    clients: int
+    completed: int
+    failures: int
+    connect_p50_ms: float
+    connect_p99_ms: float
+    upload_mb_s: float
+    download_mb_s: float
+    wall_seconds: float
+    proxy_cpu_seconds: float
+    cpu_seconds_per_gb: float
+    peak_rss_mb: float
+    relay_handshakes: int
+    pool_hits: int
+    pool_misses: int
+    tls_full_handshakes: int
+    tls_resumed_handshakes: int
+    errors: list[str] = field(default_factory=list)
+
+    def format(self) -> str:
+        return (
+            f"{self.mode}/{self.route}: {self.completed}/{self.clients} clients ok, {self.failures} failed\n"
+            f"  connect p50 {self.connect_p50_ms:.2f} ms, p99 {self.connect_p99_ms:.2f} ms\n"
+            f"  upload {self.upload_mb_s:.1f} MB/s, download {self.download_mb_s:.1f} MB/s "
+            f"({self.wall_seconds:.2f}s)\n"
+            f"  proxy CPU {self.proxy_cpu_seconds:.2f}s, {self.cpu_seconds_per_gb:.2f} CPU-s/GB, "
+            f"peak RSS {self.peak_rss_mb:.1f} MB\n"
+            f"  relay handshakes {self.relay_handshakes} (TLS full {self.tls_full_handshakes}, "
+            f"resumed {self.tls_resumed_handshakes}), pool hits {self.pool_hits}, misses {self.pool_misses}"
+        )
+
+
+class _LoopThread:
+    """Event loop in a daemon thread; coroutines are submitted from outside."""
+
+    def __init__(self, name: str) -> None:
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def call(self, coro, timeout: float | None = None):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    def cpu_time(self) -> float:
+        async def sample() -> float:
+            return time.thread_time()
+
+        return self.call(sample())
+
+    def stop(self) -> None:
+        async def cancel_leftovers() -> None:
+            current = asyncio.current_task()
+            leftovers = [task for task in asyncio.all_tasks() if task is not current]
+            if not leftovers:
+                return
+            # Обработчики клиентов закрываются сами, отменяем только зависшие.
+            _done, pending = await asyncio.wait(leftovers, timeout=2.0)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        try:
+            self.call(cancel_leftovers(), timeout=5)
+        except Exception:
+            pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        if not self._thread.is_alive():
+            self._loop.close()
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def _peak_rss_mb() -> float:
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def build_client_init(mode: str, dc: int, secret_hex: str = "") -> tuple[bytes, AesCtrStream]:
+    """Obfuscated 64-byte init plus the client's outgoing stream cipher."""
+    init = bytearray(os.urandom(64))
+    while init[0] == 0xEF or init[:4] in (b"HEAD", b"POST", b"GET ", b"\xee\xee\xee\xee", b"\x16\x03\x01\x02"):
+        init = bytearray(os.urandom(64))
+    prekey = bytes(init[8:40])
+    iv = bytes(init[40:56])
+    key = hashlib.sha256(prekey + bytes.fromhex(secret_hex)).digest() if mode == "mtproxy" else prekey
+    encryptor = AesCtrStream(key, iv)
+    keystream = encryptor.update(_ZERO_64)
+    tail = PROTO_TAG_INTERMEDIATE + struct.pack("<h", dc) + b"\x00\x00"
+    init[56:64] = bytes(a ^ b for a, b in zip(tail, keystream[56:64]))
+    return bytes(init), encryptor
+
+
+def _socks5_request(host: str, port: int) -> bytes:
+    return b"\x05\x01\x00" + b"\x05\x01\x00\x01" + socket.inet_aton(host) + struct.pack(">H", port)
+
+
+async def _run_client(
+    config: LoadConfig,
+    proxy_port: int,
+    secret_hex: str,
+    start: asyncio.Event,
+) -> tuple[float, int, int]:
+    dc = _ROUTE_DC[config.route]
+    await start.wait()
+    started = time.perf_counter()
+    reader, writer = await asyncio.open_connection("127.0.0.1", proxy_port)
+    try:
+        if config.mode == "socks5":
+            host, port = TCP_ENDPOINTS[dc]
+            writer.write(_socks5_request(host, port))
+            await reader.readexactly(2)
+            reply = await reader.readexactly(10)
+            if reply[1] != 0x00:
+                raise ConnectionError(f"SOCKS5 reply {reply[1]:#x}")
+
+        init, encryptor = build_client_init(config.mode, dc, secret_hex)
+        body = os.urandom(config.packet_size)
+        packet = struct.pack("<I", len(body)) + body
+        expected = len(packet) * config.packets * config.download_factor
+
+        writer.write(init + encryptor.update(packet))
+        await writer.drain()
+        received = len(await reader.read(65536))
+        if not received:
+            raise ConnectionError("proxy closed before first echo")
+        latency = time.perf_counter() - started
+
+        async def upload() -> None:
+            for _ in range(config.packets - 1):
+                writer.write(encryptor.update(packet))
+                await writer.drain()
+
+        uploader = asyncio.create_task(upload())
+        while received < expected:
+            chunk = await reader.read(256 * 1024)
+            if not chunk:
+                raise ConnectionError(f"short download: {received}/{expected}")
+            received += len(chunk)
+        await uploader
+        return latency, len(packet) * config.packets, received
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+
+
+async def _drive_clients(config: LoadConfig, proxy_port: int, secret_hex: str):
+    start = asyncio.Event()
+    tasks = [
+        asyncio.create_task(_run_client(config, proxy_port, secret_hex, start))
+        for _ in range(config.clients)
+    ]
+    began = time.perf_counter()
+    start.set()
+    _done, pending = await asyncio.wait(tasks, timeout=config.timeout)
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+    wall = time.perf_counter() - began
+    return [task.result() if not task.cancelled() and task.exception() is None else task for task in tasks], wall
+
+
+async def _wait_idle(proxy: TelegramWSProxy, timeout: float = 5.0) -> None:
+    # stop() отменяет обработчики — ждём, пока они закроют сокеты сами.
+    deadline = time.monotonic() + timeout
+    while proxy.stats.active_connections > 0 and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+
+
+def run_load(config: LoadConfig) -> LoadReport:
+    """Start the fakes and the proxy, run ``config.clients`` clients, collect the report."""
+    if config.mode not in MODES:
+        raise ValueError(f"unknown mode: {config.mode}")
+    if config.route not in ROUTES:
+        raise ValueError(f"unknown route: {config.route}")
+
+    network = _LoopThread("bench-network")
+    proxy_loop = _LoopThread("bench-proxy")
+    relay = FakeWssRelay(download_factor=config.download_factor)
+    dc = FakeTcpDc(download_factor=config.download_factor)
+    upstream = FakeSocks5Upstream()
+    proxy: TelegramWSProxy | None = None
+    try:
+        tls_port = network.call(relay.start())
+        tcp_port = network.call(dc.start())
+        socks_port = network.call(upstream.start())
+        secret_hex = generate_secret() if config.mode == "mtproxy" else ""
+        upstream_config = None
+        if config.route == "upstream":
+            upstream_config = UpstreamProxyConfig(enabled=True, host="127.0.0.1", port=socks_port, mode="always")
+
+        with LoopbackRedirect(tls_port=tls_port, tcp_port=tcp_port):
+            proxy = TelegramWSProxy(
+                port=0,
+                mode=config.mode,
+                on_log=lambda _message: None,
+                upstream_config=upstream_config,
+                mtproxy_secret=secret_hex,
+                pool_size=config.pool_size,
+            )
+            proxy_loop.call(proxy.start())
+            proxy_port = int(proxy._servers[0].sockets[0].getsockname()[1])
+            # Пул WSS прогревается в фоне — даём ему заполниться, как у живого клиента.
+            time.sleep(max(0.0, config.warmup))
+            cpu_before = proxy_loop.cpu_time()
+            results, wall = asyncio.run(_drive_clients(config, proxy_port, secret_hex))
+            proxy_cpu = proxy_loop.cpu_time() - cpu_before
+            stats = proxy.stats
+            proxy_loop.call(_wait_idle(proxy), timeout=10)
+            proxy_loop.call(proxy.stop(), timeout=10)
+    finally:
+        proxy_loop.stop()
+        for server in (relay, dc, upstream):
+            try:
+                network.call(server.stop(), timeout=5)
+            except Exception:
+                pass
+        network.stop()
+
+    latencies: list[float] = []
+    uploaded = downloaded = 0
+    errors: list[str] = []
+    for result in results:
+        if isinstance(result, tuple):
+            latency, sent, received = result
+            latencies.append(latency)
+            uploaded += sent
+            downloaded += received
+        elif result.cancelled():
+            errors.append("timeout")
+        else:
+            exc = result.exception()
+            errors.append(f"{type(exc).__name__}: {exc}")
+
+    moved_gb = (uploaded + downloaded) / 1e9
+    return LoadReport(
+        mode=config.mode,
+        route=config.route,
+        clients=config.clients,
+        completed=len(latencies),
+        failures=len(errors),
+        connect_p50_ms=_percentile(latencies, 0.50) * 1000,
+        connect_p99_ms=_percentile(latencies, 0.99) * 1000,
+        upload_mb_s=uploaded / wall / 1e6 if wall else 0.0,
+        download_mb_s=downloaded / wall / 1e6 if wall else 0.0,
+        wall_seconds=wall,
+        proxy_cpu_seconds=proxy_cpu,
+        cpu_seconds_per_gb=proxy_cpu / moved_gb if moved_gb else 0.0,
+        peak_rss_mb=_peak_rss_mb(),
+        relay_handshakes=relay.connections,
+        pool_hits=int(stats.pool_hits),
+        pool_misses=int(stats.pool_misses),
+        tls_full_handshakes=int(stats.tls_full_handshakes),
+        tls_resumed_handshakes=int(stats.tls_resumed_handshakes),
+        errors=sorted(set(errors))[:10],
+    )
+
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = bench_parser(__doc__)
+    parser.add_argument("--mode", choices=MODES, action="append", help="proxy mode (repeatable, default: both)")
+    parser.add_argument("--route", choices=ROUTES, action="append", help="route (repeatable, default: wss)")
+    parser.add_argument("--clients", type=int, default=32, help="concurrent clients (default: 32)")
+    parser.add_argument("--packets", type=int, default=64, help="MTProto packets per client (default: 64)")
+    parser.add_argument("--packet-kb", type=int, default=16, help="packet payload in KB (default: 16)")
+    parser.add_argument("--download-factor", type=int, default=4, help="relay echoes each packet N times")
+    parser.add_argument("--pool-size", type=int, default=4, help="proxy WSS pool size (default: 4)")
+    parser.add_argument("--warmup", type=float, default=0.5, help="seconds to let the WSS pool fill")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-run timeout in seconds")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for mode in args.mode or list(MODES):
+        for route in args.route or ["wss"]:
+            report = run_load(
+                LoadConfig(
+                    mode=mode,
+                    route=route,
+                    clients=max(1, args.clients),
+                    packets=max(1, args.packets),
+                    packet_size=max(1, args.packet_kb) * 1024,
+                    download_factor=max(1, args.download_factor),
+                    pool_size=args.pool_size,
+                    warmup=args.warmup,
+                    timeout=args.timeout,
+                )
+            )
+            failed = failed or report.failures > 0
+            # --json: по объекту JSON в строке на каждый прогон.
+            print_report(report, as_json=args.json, indent=None)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
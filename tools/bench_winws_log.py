@@ -0,0 +1,157 @@
+"""Бенчмарк разбора debug-лога winws2: полный парсер, пул процессов и индекс.
+
+Каждый режим запускается в отдельном процессе, чтобы пиковый RSS одного
+не смешивался с другим:
+
+    full     parse_winws_log_file (все PacketRecord в памяти)
+    parallel parse_winws_log_file_parallel (--workers процессов)
+    indexed  index_winws_log_file, первый проход
+    reopen   index_winws_log_file по готовому индексу на диске
+
+Запуск (из корня репозитория):
+    PYTHONPATH=src python tools/bench_winws_log.py --size-mb 2048
+    PYTHONPATH=src python tools/bench_winws_log.py --log logs/orchestra_20260101_000000.log --json
+
+Синтетический лог пишет write_synthetic_log из tests/winws_log_fixtures.py.
+
+peak RSS у parallel — только родительского процесса (слияние результатов),
+у воркеров пиковая память порядка одного диапазона.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+for _path in (PROJECT_ROOT / "src", PROJECT_ROOT / "tests"):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+from bench_common import BenchReport, bench_parser, print_report  # noqa: E402
+from winws_log_fixtures import write_synthetic_log  # noqa: E402
+
+_MODES = ("full", "parallel", "indexed", "reopen")
+
+
+def _peak_rss_mb() -> float:
+    try:
+        import resource
+    except ImportError:
+        import psutil
+
+        info = psutil.Process().memory_info()
+        return float(getattr(info, "peak_wset", info.rss)) / (1024.0 * 1024.0)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def _run_child(mode: str, log_path: str, cache_dir: str, workers: int) -> dict:
+    from winws_log_analyzer.log_index import index_winws_log_file
+    from winws_log_analyzer.parallel import parse_winws_log_file_parallel
+    from winws_log_analyzer.parser import parse_winws_log_file
+
+    started = time.perf_counter()
+    if mode == "full":
+        result = parse_winws_log_file(log_path)
+    elif mode == "parallel":
+        result = parse_winws_log_file_parallel(log_path, workers=workers)
+    else:
+        result = index_winws_log_file(log_path, cache_dir=cache_dir, workers=workers)
+    seconds = time.perf_counter() - started
+
+    # Открыть самое «тяжёлое» соединение — как клик в таблице.
+    open_seconds = 0.0
+    if result.connections:
+        busiest = max(result.connections, key=lambda conn: conn.packets_total)
+        started = time.perf_counter()
+        if result.packet_index is not None:
+            result.packet_index.packets(busiest, limit=5_000)
+        open_seconds = time.perf_counter() - started
+    return {
+        "mode": mode,
+        "workers": 1 if mode == "full" else workers,
+        "seconds": seconds,
+        "open_connection_seconds": open_seconds,
+        "peak_rss_mb": _peak_rss_mb(),
+        "packets": result.packets_total,
+        "connections": len(result.connections),
+    }
+
+
+@dataclass
+class WinwsLogBenchReport(BenchReport):
+    megabytes: float
+    runs: list[dict] = field(default_factory=list)
+
+    def format(self) -> str:
+        lines = [f"winws2 log {self.megabytes:.0f} MB"]
+        for run in self.runs:
+            lines.append(
+                f"  {run['mode']:<8} x{run['workers']:<2} {run['seconds']:8.2f} s  peak RSS {run['peak_rss_mb']:8.0f} MB  "
+                f"{run['packets']} packets / {run['connections']} connections  "
+                f"open busiest {run['open_connection_seconds'] * 1000:.0f} ms"
+            )
+        return "\n".join(lines)
+
+
+def run_winws_log_bench(
+    log_path: str,
+    *,
+    modes: tuple[str, ...] = _MODES,
+    workers: int | None = None,
+) -> WinwsLogBenchReport:
+    from winws_log_analyzer.parallel import default_parse_workers
+
+    workers = default_parse_workers() if workers is None else workers
+    report = WinwsLogBenchReport(megabytes=os.path.getsize(log_path) / (1024 * 1024))
+    with tempfile.TemporaryDirectory(prefix="winws_log_index_") as cache_dir:
+        for mode in modes:
+            # reopen без готового индекса ничем не отличается от indexed.
+            if mode == "reopen" and "indexed" not in modes:
+                continue
+            command = [sys.executable, str(Path(__file__).resolve()), "--child", mode, "--log", log_path]
+            command += ["--cache-dir", cache_dir, "--workers", str(workers)]
+            output = subprocess.run(
+                command,
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            report.runs.append(json.loads(output.strip().splitlines()[-1]))
+    return report
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = bench_parser(__doc__)
+    parser.add_argument("--log", dest="log_path", help="готовый debug-лог winws2")
+    parser.add_argument("--size-mb", type=float, default=2048.0, help="размер синтетического лога")
+    parser.add_argument("--modes", default=",".join(_MODES))
+    parser.add_argument("--workers", type=int, help="процессов для parallel/indexed (по умолчанию — по ядрам)")
+    parser.add_argument("--child", choices=_MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--cache-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(_run_child(args.child, args.log_path, args.cache_dir, args.workers or 1)))
+        return 0
+
+    modes = tuple(mode for mode in args.modes.split(",") if mode in _MODES)
+    if args.log_path:
+        report = run_winws_log_bench(args.log_path, modes=modes, workers=args.workers)
+    else:
+        with tempfile.TemporaryDirectory(prefix="winws_log_bench_") as folder:
+            log_path = os.path.join(folder, "synthetic_debug.log")
+            write_synthetic_log(log_path, size_mb=args.size_mb)
+            report = run_winws_log_bench(log_path, modes=modes, workers=args.workers)
+    return print_report(report, as_json=args.json)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,117 @@
+"""Бенчмарк фильтра таблицы соединений: задержка на нажатие клавиши.
+
+Запрос «набирается» посимвольно; на каждом шаге сравниваются линейный
+filter_connections и ConnectionFilterIndex (с инкрементальным сужением).
+
+Соединения — synthetic_connections из tests/winws_log_fixtures.py.
+
+Запуск (из корня репозитория):
+    PYTHONPATH=src python tools/bench_winws_log_filter.py
+    PYTHONPATH=src python tools/bench_winws_log_filter.py --sizes 10000,100000 --json
+"""
+
+from __future__ import annotations
+
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+for _path in (PROJECT_ROOT / "src", PROJECT_ROOT / "tests"):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+from bench_common import BenchReport, bench_parser, print_report  # noqa: E402
+from winws_log_analyzer.filters import ConnectionFilterIndex, filter_connections  # noqa: E402
+from winws_log_fixtures import synthetic_connections  # noqa: E402
+
+_DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+_QUERIES = ("googlevideo", "85.172.", "discord.gg")
+
+def _keystrokes(query: str) -> list[str]:
+    return [query[:length] for length in range(1, len(query) + 1)]
+
+
+@dataclass
+class FilterBenchRow:
+    connections: int
+    build_seconds: float
+    linear_ms_mean: float
+    linear_ms_max: float
+    indexed_ms_mean: float
+    indexed_ms_max: float
+
+
+@dataclass
+class FilterBenchReport(BenchReport):
+    queries: tuple[str, ...]
+    rows: list[FilterBenchRow] = field(default_factory=list)
+
+    def format(self) -> str:
+        lines = [f"per-keystroke filter latency, queries: {', '.join(self.queries)}"]
+        for row in self.rows:
+            lines.append(
+                f"  {row.connections:>9} conns  build {row.build_seconds:6.2f} s  "
+                f"linear {row.linear_ms_mean:8.2f} ms (max {row.linear_ms_max:8.2f})  "
+                f"indexed {row.indexed_ms_mean:7.2f} ms (max {row.indexed_ms_max:7.2f})"
+            )
+        return "\n".join(lines)
+
+
+def _time_ms(fn) -> tuple[float, list]:
+    started = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - started) * 1000.0, result
+
+
+def run_filter_bench(
+    sizes: tuple[int, ...] = _DEFAULT_SIZES,
+    *,
+    queries: tuple[str, ...] = _QUERIES,
+) -> FilterBenchReport:
+    report = FilterBenchReport(queries=tuple(queries))
+    for size in sizes:
+        connections = synthetic_connections(size)
+        started = time.perf_counter()
+        index = ConnectionFilterIndex(connections)
+        build_seconds = time.perf_counter() - started
+
+        linear_times: list[float] = []
+        indexed_times: list[float] = []
+        for query in queries:
+            for text in _keystrokes(query):
+                for only_affected in (False, True):
+                    linear_ms, expected = _time_ms(
+                        lambda: filter_connections(connections, text=text, only_affected=only_affected)
+                    )
+                    indexed_ms, actual = _time_ms(lambda: index.filter(text=text, only_affected=only_affected))
+                    if actual != expected:
+                        raise AssertionError(f"index mismatch for {text!r} at {size} connections")
+                    linear_times.append(linear_ms)
+                    indexed_times.append(indexed_ms)
+        report.rows.append(
+            FilterBenchRow(
+                connections=size,
+                build_seconds=build_seconds,
+                linear_ms_mean=statistics.fmean(linear_times),
+                linear_ms_max=max(linear_times),
+                indexed_ms_mean=statistics.fmean(indexed_times),
+                indexed_ms_max=max(indexed_times),
+            )
+        )
+    return report
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = bench_parser(__doc__)
+    parser.add_argument("--sizes", default=",".join(str(size) for size in _DEFAULT_SIZES))
+    args = parser.parse_args(argv)
+
+    sizes = tuple(int(size) for size in args.sizes.split(",") if size.strip())
+    return print_report(run_filter_bench(sizes), as_json=args.json)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
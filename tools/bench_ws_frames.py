@@ -0,0 +1,128 @@
+"""Микро-бенчмарк кодека WebSocket-кадров Telegram Proxy.
+
+Сравнивает МБ/с старого пути (``_build_frame`` со склейкой заголовка и
+payload + ``_xor_mask`` через две конвертации в big-int) с новым кодеком
+telegram_proxy.proxy.ws_codec: кадр собирается в один ``bytearray``, маска
+накладывается на месте (``bytes.translate`` по четырём полосам), плюс разбор
+нескольких кадров из одного чтения против ``readexactly`` по кадру.
+
+Запуск (из корня репозитория):
+    PYTHONPATH=src python tools/bench_ws_frames.py
+    PYTHONPATH=src python tools/bench_ws_frames.py --size 16384 --seconds 2
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import struct
+import sys
+import time
+from pathlib import Path
+
+PROJECT_SRC = Path(__file__).resolve().parents[1] / "src"
+if str(PROJECT_SRC) not in sys.path:
+    sys.path.insert(0, str(PROJECT_SRC))
+
+from telegram_proxy.proxy.ws_codec import WsFrameParser, encode_frame  # noqa: E402
+
+
+def _legacy_xor_mask(data: bytes, mask: bytes) -> bytes:
+    if not data:
+        return data
+    n = len(data)
+    mask_rep = (mask * (n // 4 + 1))[:n]
+    return (int.from_bytes(data, "big") ^ int.from_bytes(mask_rep, "big")).to_bytes(n, "big")
+
+
+def _legacy_build_frame(opcode: int, data: bytes, mask: bool = False) -> bytes:
+    header = bytearray()
+    header.append(0x80 | opcode)
+    length = len(data)
+    mask_bit = 0x80 if mask else 0x00
+    if length < 126:
+        header.append(mask_bit | length)
+    elif length < 65536:
+        header.append(mask_bit | 126)
+        header.extend(struct.pack(">H", length))
+    else:
+        header.append(mask_bit | 127)
+        header.extend(struct.pack(">Q", length))
+    if mask:
+        mask_key = os.urandom(4)
+        header.extend(mask_key)
+        return bytes(header) + _legacy_xor_mask(data, mask_key)
+    return bytes(header) + data
+
+
+async def _legacy_read_frame(reader: asyncio.StreamReader) -> tuple[int, bytes]:
+    hdr = await reader.readexactly(2)
+    opcode = hdr[0] & 0x0F
+    length = hdr[1] & 0x7F
+    if length == 126:
+        length = struct.unpack(">H", await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack(">Q", await reader.readexactly(8))[0]
+    return opcode, await reader.readexactly(length)
+
+
+def _measure(fn, payload_bytes: int, seconds: float) -> float:
+    rounds = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        fn()
+        rounds += 1
+    elapsed = time.perf_counter() - started
+    return payload_bytes * rounds / elapsed / (1024 * 1024)
+
+
+def _bench_encode(size: int, seconds: float) -> tuple[float, float]:
+    payload = os.urandom(size)
+    legacy = _measure(lambda: _legacy_build_frame(0x2, payload, mask=True), size, seconds)
+    codec = _measure(lambda: encode_frame(0x2, payload, mask=True), size, seconds)
+    return legacy, codec
+
+
+def _bench_decode(size: int, frames: int, seconds: float) -> tuple[float, float]:
+    stream = b"".join(_legacy_build_frame(0x2, os.urandom(size)) for _ in range(frames))
+    chunk = 256 * 1024
+
+    async def legacy_round() -> None:
+        reader = asyncio.StreamReader()
+        reader.feed_data(stream)
+        for _ in range(frames):
+            await _legacy_read_frame(reader)
+
+    def codec_round() -> None:
+        parser = WsFrameParser()
+        for offset in range(0, len(stream), chunk):
+            parser.feed(stream[offset:offset + chunk])
+
+    loop = asyncio.new_event_loop()
+    try:
+        legacy = _measure(lambda: loop.run_until_complete(legacy_round()), size * frames, seconds)
+    finally:
+        loop.close()
+    codec = _measure(codec_round, size * frames, seconds)
+    return legacy, codec
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, action="append", help="размер payload в байтах (можно несколько раз)")
+    parser.add_argument("--seconds", type=float, default=1.0, help="длительность одного замера")
+    args = parser.parse_args(argv)
+    sizes = args.size or [512, 16 * 1024, 128 * 1024]
+
+    print(f"{'payload':>10}  {'encode old':>11}  {'encode new':>11}  {'decode old':>11}  {'decode new':>11}  (MB/s)")
+    for size in sizes:
+        enc_old, enc_new = _bench_encode(size, args.seconds)
+        frames = max(1, (1024 * 1024) // max(1, size))
+        dec_old, dec_new = _bench_decode(size, frames, args.seconds)
+        print(f"{size:>10}  {enc_old:>11.1f}  {enc_new:>11.1f}  {dec_old:>11.1f}  {dec_new:>11.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())